@@ -0,0 +1,875 @@
+# -*- coding: utf-8 -*-
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+
+def get_rss_mb() -> float:
+    try:
+        with open('/proc/self/status', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return 0.0
+
+
+def print_table(headers: list, rows: list) -> None:
+    widths = [max(len(str(x)) for x in col) for col in zip(headers, *rows)]
+    print(' | '.join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print('-+-'.join('-' * w for w in widths))
+    for row in rows:
+        print(' | '.join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+# --------------------------- monitoring engine ---------------------------
+
+async def simulated_probe(latency: float) -> dict:
+    await asyncio.sleep(latency)
+    return {"anchor_name": "bench", "is_live": False}
+
+
+def run_engine_case(mode: str, rooms: int, seconds: float, interval: float, latency: float) -> dict:
+    probes = 0
+    probes_lock = threading.Lock()
+    stop = threading.Event()
+    started = time.perf_counter()
+
+    if mode == 'threads':
+        # The legacy model: one OS thread per room and a fresh event loop per probe
+        def room_thread():
+            nonlocal probes
+            while not stop.is_set():
+                asyncio.run(simulated_probe(latency))
+                with probes_lock:
+                    probes += 1
+                stop.wait(interval)
+
+        threads = []
+        try:
+            for _ in range(rooms):
+                t = threading.Thread(target=room_thread, daemon=True)
+                t.start()
+                threads.append(t)
+        except RuntimeError as e:
+            return {"mode": mode, "rooms": rooms, "error": f"started {len(threads)} threads: {e}"}
+    else:
+        from src.engine import MonitorEngine
+
+        engine = MonitorEngine()
+
+        async def room_task():
+            nonlocal probes
+            while not stop.is_set():
+                await simulated_probe(latency)
+                probes += 1
+                await asyncio.sleep(interval)
+
+        for i in range(rooms):
+            engine.add_room(f'room-{i}', room_task())
+
+    time.sleep(seconds)
+    result = {
+        "mode": mode,
+        "rooms": rooms,
+        "threads": threading.active_count(),
+        "rss_mb": round(get_rss_mb(), 1),
+        "probes_per_sec": round(probes / (time.perf_counter() - started), 1),
+    }
+    stop.set()
+    return result
+
+
+def bench_engine(args) -> None:
+    if args.mode:
+        result = run_engine_case(args.mode, args.rooms, args.seconds, args.interval, args.latency)
+        print(json.dumps(result))
+        return
+
+    rows = []
+    for rooms in args.room_counts:
+        for mode in ('threads', 'engine'):
+            cmd = [sys.executable, os.path.abspath(__file__), 'engine', '--mode', mode, '--rooms', str(rooms),
+                   '--seconds', str(args.seconds), '--interval', str(args.interval), '--latency', str(args.latency)]
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            lines = [i for i in proc.stdout.splitlines() if i.startswith('{')]
+            if not lines:
+                rows.append([mode, rooms, '-', '-', '-', (proc.stderr.strip().splitlines() or ['failed'])[-1]])
+                continue
+            r = json.loads(lines[-1])
+            rows.append([mode, rooms, r.get('threads', '-'), r.get('rss_mb', '-'), r.get('probes_per_sec', '-'),
+                         r.get('error', '')])
+    print_table(['mode', 'rooms', 'threads', 'rss_mb', 'probes/s', 'note'], rows)
+
+
+# --------------------------- adaptive polling ---------------------------
+
+def synthesize_history(days: int = 30, seed: int = 7) -> dict:
+    import random
+    rnd = random.Random(seed)
+    end = time.time()
+    start = end - days * 86400
+    rooms = {}
+    for i in range(40):
+        sessions = []
+        if i < 20:
+            # Daily streamers going live around the same time of day
+            hour = rnd.randint(0, 23) * 3600
+            for d in range(days):
+                s = start + d * 86400 + hour + rnd.randint(-600, 600)
+                sessions.append([s, s + rnd.randint(2, 4) * 3600])
+        elif i < 30:
+            hour = rnd.randint(0, 23) * 3600
+            for d in range(0, days, 7):
+                s = start + d * 86400 + hour + rnd.randint(-900, 900)
+                sessions.append([s, s + 3 * 3600])
+        elif i < 35:
+            s = start + rnd.randint(0, 3) * 86400
+            sessions.append([s, s + 2 * 3600])
+        rooms[f'room-{i}'] = {"first_seen": start, "live": False, "sessions": sessions}
+    return rooms
+
+
+def bench_adaptive(args) -> None:
+    from src.adaptive_poll import compare_with_fixed
+
+    history_file = args.history or 'config/live_history.json'
+    if os.path.exists(history_file):
+        with open(history_file, encoding='utf-8') as f:
+            rooms = json.load(f)
+        print(f"Using recorded history: {history_file} ({len(rooms)} rooms)")
+    else:
+        rooms = synthesize_history()
+        print(f"No history at {history_file}, using {len(rooms)} synthesized rooms")
+
+    end = time.time()
+    totals = {"fixed": 0, "adaptive": 0, "fixed_lat": [], "adaptive_lat": [], "fixed_miss": 0, "adaptive_miss": 0}
+    for entry in rooms.values():
+        sessions = [[s, e] for s, e in entry.get('sessions', [])]
+        result = compare_with_fixed(sessions, entry.get('first_seen', end - 86400), end, args.fixed_interval,
+                                    floor=args.floor, ceiling=args.ceiling)
+        for kind in ('fixed', 'adaptive'):
+            totals[kind] += result[kind]['probes']
+            totals[f'{kind}_miss'] += result[kind]['missed']
+            if result[kind]['detected']:
+                totals[f'{kind}_lat'].append(result[kind]['mean_latency'])
+
+    def mean(values):
+        return round(sum(values) / len(values), 1) if values else 0.0
+
+    rows = [
+        ['fixed', totals['fixed'], mean(totals['fixed_lat']), totals['fixed_miss']],
+        ['adaptive', totals['adaptive'], mean(totals['adaptive_lat']), totals['adaptive_miss']],
+    ]
+    print_table(['policy', 'probes', 'mean detect latency (s)', 'missed sessions'], rows)
+    if totals['fixed']:
+        print(f"Request savings vs fixed {args.fixed_interval}s interval: "
+              f"{(1 - totals['adaptive'] / totals['fixed']) * 100:.1f}%")
+
+
+# --------------------------- batched probing ---------------------------
+
+def bench_batch(args) -> None:
+    import random
+    from src.batch_probe import BatchProber
+
+    # Time is scaled down: a polling cycle of --interval seconds with +-5% jitter per room, the
+    # same shape as the main loop's delay_default +- 5s with the default 1s window and 30s max age
+    interval = args.interval
+    prober = BatchProber(window=interval / 120, max_age=interval / 4)
+    requests = {"count": 0}
+
+    async def fake_batch(room_ids, proxy_addr=None, cookies=None):
+        requests['count'] += 1
+        await asyncio.sleep(args.latency)
+        return {room_id: {"anchor_name": room_id, "live_status": False, "title": ""} for room_id in room_ids}
+
+    prober.register('B站直播', fake_batch, batch_size=args.batch_size)
+    probes = {"count": 0}
+
+    async def room(room_id):
+        while True:
+            await prober.probe('B站直播', room_id)
+            probes['count'] += 1
+            await asyncio.sleep(interval + random.uniform(-interval / 24, interval / 24))
+
+    async def run():
+        tasks = [asyncio.create_task(room(str(i))) for i in range(args.rooms)]
+        await asyncio.sleep(args.seconds)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+    cycles = probes['count'] / args.rooms
+    rows = [
+        ['single', probes['count'], round(probes['count'] / cycles, 1)],
+        ['batched', requests['count'], round(requests['count'] / cycles, 1)],
+    ]
+    print(f"{args.rooms} rooms, {cycles:.1f} polling cycles")
+    print_table(['mode', 'requests', 'requests/cycle'], rows)
+    print(f"Cache hits: {prober.hits}, fallbacks: {prober.fallbacks}")
+
+
+# --------------------------- poll scheduler ---------------------------
+
+def run_scheduler_case(mode: str, rooms: int, seconds: float, interval: float) -> dict:
+    import random
+    from src.scheduler import PollScheduler
+
+    scheduler = PollScheduler()
+    stats = {"timers": 0, "probes": 0}
+
+    async def room(key):
+        while True:
+            stats['probes'] += 1
+            if mode == 'sleep-loop':
+                # The legacy countdown: one wakeup per room per second
+                x = int(interval + random.randint(-5, 5))
+                while x > 0:
+                    x -= 1
+                    stats['timers'] += 1
+                    await asyncio.sleep(1)
+            elif mode == 'sleep':
+                stats['timers'] += 1
+                await asyncio.sleep(interval + random.randint(-5, 5))
+            else:
+                await scheduler.wait(key, interval + scheduler.jitter(key, 5))
+
+    async def run():
+        tasks = [asyncio.create_task(room(f'room-{i}')) for i in range(rooms)]
+        cpu = time.process_time()
+        await asyncio.sleep(seconds)
+        cpu = time.process_time() - cpu
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return cpu
+
+    cpu = asyncio.run(run())
+    timers = scheduler.wakeups if mode == 'scheduler' else stats['timers']
+    return {"mode": mode, "rooms": rooms, "cpu_s": round(cpu, 2), "wakeups_per_sec": round(timers / seconds, 1),
+            "probes": stats['probes']}
+
+
+def bench_scheduler(args) -> None:
+    rows = []
+    for rooms in args.room_counts:
+        for mode in ('sleep-loop', 'sleep', 'scheduler'):
+            r = run_scheduler_case(mode, rooms, args.seconds, args.interval)
+            rows.append([r['mode'], r['rooms'], r['cpu_s'], r['wakeups_per_sec'], r['probes']])
+    print_table(['mode', 'rooms', 'cpu (s)', 'timer wakeups/s', 'probes'], rows)
+
+
+# --------------------------- connection pool ---------------------------
+
+def start_https_server(workdir: str, body: bytes = b'{"data": {"live_status": 0}}',
+                       content_type: str = 'application/json', bandwidth_kb: float = 0) -> tuple:
+    import http.server
+    import ssl
+
+    cert, key = os.path.join(workdir, 'cert.pem'), os.path.join(workdir, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj',
+                    '/CN=localhost', '-keyout', key, '-out', cert], check=True, capture_output=True)
+    connections = {"count": 0}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            connections['count'] += 1
+            super().setup()
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if not bandwidth_kb:
+                self.wfile.write(body)
+                return
+            for i in range(0, len(body), 16384):
+                self.wfile.write(body[i:i + 16384])
+                time.sleep(16 / bandwidth_kb)
+
+        def log_message(self, *args):
+            pass
+
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    # Clients that stop reading mid-body are expected
+    server.handle_error = lambda request, client_address: None
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, connections
+
+
+def run_pool_case(mode: str, url: str, requests: int, concurrency: int) -> float:
+    import httpx
+    from src.http_clients.pool import ClientPool
+
+    pool = ClientPool()
+
+    async def fetch():
+        if mode == 'per-request':
+            # What every spider function used to do
+            client = httpx.AsyncClient(verify=False, http2=True, timeout=20, trust_env=False)
+        else:
+            client = httpx.AsyncClient(transport=pool.transport(None, True, False), timeout=20)
+        async with client:
+            response = await client.get(url)
+            response.raise_for_status()
+
+    async def worker(count):
+        for _ in range(count):
+            await fetch()
+
+    async def run():
+        start = time.perf_counter()
+        per_worker = requests // concurrency
+        await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    return asyncio.run(run())
+
+
+def bench_pool(args) -> None:
+    import tempfile
+
+    os.environ['no_proxy'] = '127.0.0.1'
+    with tempfile.TemporaryDirectory() as workdir:
+        server, connections = start_https_server(workdir)
+        url = f'https://127.0.0.1:{server.server_address[1]}/room'
+        requests = args.rooms - args.rooms % args.concurrency
+        rows = []
+        for mode in ('per-request', 'pooled'):
+            connections['count'] = 0
+            cpu = time.process_time()
+            elapsed = run_pool_case(mode, url, requests, args.concurrency)
+            cpu = time.process_time() - cpu
+            rows.append([mode, requests, round(elapsed, 2), round(requests / elapsed, 1),
+                         round(elapsed / requests * 1000 * args.concurrency, 2), round(cpu, 2),
+                         connections['count']])
+        server.shutdown()
+    print(f"{requests} GET requests against a local HTTPS server, {args.concurrency} concurrent")
+    print_table(['mode', 'requests', 'time (s)', 'req/s', 'latency (ms)', 'cpu (s)', 'TLS handshakes'],
+                rows)
+
+
+# --------------------------- streaming extraction ---------------------------
+
+def synthesize_kuaishou_page(size_kb: int) -> bytes:
+    # The shape of a Kuaishou live page: the state script near the top, then hundreds of KB of markup
+    state = json.dumps({"liveroom": {"playList": [{"liveStream": {"id": "x", "playUrls": {}}, "author": {
+        "name": "bench"}, "gameInfo": {}}]}}, separators=(',', ':'))
+    head = f'<html><head><title>bench</title></head><body><script>window.__INITIAL_STATE__={state};' \
+           '(function(){var s;(s=document.currentScript).parentNode.removeChild(s);}());</script>'
+    filler = '<div class="feed-item"><a href="/u/3x00000000">' + 'x' * 200 + '</a></div>\n'
+    return (head + filler * (size_kb * 1024 // len(filler)) + '</body></html>').encode()
+
+
+def bench_extract(args) -> None:
+    import re
+    import tempfile
+    import tracemalloc
+    from src.http_clients import async_http
+
+    pattern = '<script>window.__INITIAL_STATE__=(.*?);\\(function\\(\\)\\{var s;'
+    os.environ['no_proxy'] = '127.0.0.1'
+    with tempfile.TemporaryDirectory() as workdir:
+        server, _ = start_https_server(workdir, synthesize_kuaishou_page(args.page_kb), 'text/html; charset=utf-8',
+                                       args.bandwidth)
+        url = f'https://127.0.0.1:{server.server_address[1]}/u/3x00000000'
+        rows = []
+        for mode in ('full', 'streaming'):
+            async def fetch():
+                if mode == 'full':
+                    return await async_http.async_req(url)
+                return await async_http.async_req_until(url, until=[pattern])
+
+            async def run():
+                downloaded = async_http.stream_stats['bytes']
+                await fetch()
+                tracemalloc.start()
+                start = time.perf_counter()
+                for _ in range(args.rooms):
+                    html_str = await fetch()
+                    assert json.loads(re.search(pattern, html_str).group(1))
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                return elapsed, peak, async_http.stream_stats['bytes'] - downloaded
+
+            elapsed, peak, downloaded = asyncio.run(run())
+            if mode == 'full':
+                downloaded = len(synthesize_kuaishou_page(args.page_kb)) * (args.rooms + 1)
+            rows.append([mode, args.rooms, round(elapsed / args.rooms * 1000, 2),
+                         round(downloaded / (args.rooms + 1) / 1024, 1), round(peak / 1024, 1)])
+        server.shutdown()
+    print(f"Kuaishou-style page of {args.page_kb} KB served over local HTTPS at {args.bandwidth:g} KB/s")
+    print_table(['mode', 'probes', 'ms/probe', 'KB read/probe', 'peak memory (KB)'], rows)
+
+
+# --------------------------- recorded fixtures ---------------------------
+
+def bench_record(args) -> None:
+    import importlib
+    from src.http_clients.replay import http_fixtures
+    from src.metrics import current_platform
+
+    if not args.call or not args.url:
+        sys.exit('record needs --call (e.g. spider.get_kuaishou_stream_data) and --url')
+    module, name = args.call.rsplit('.', 1)
+    func = getattr(importlib.import_module(f'src.{module}'), name)
+    platform = args.platform or args.url.split('/')[2]
+    http_fixtures.configure('record', args.fixtures)
+
+    async def run():
+        token = current_platform.set(platform)
+        try:
+            return await func(url=args.url)
+        finally:
+            current_platform.reset(token)
+
+    result = json.loads(json.dumps(asyncio.run(run()), ensure_ascii=False, default=str))
+    http_fixtures.record_case(platform, args.call, {"url": args.url}, result)
+    http_fixtures.save()
+    print(f"Recorded {args.call}({args.url}) for {platform} into {http_fixtures.directory}")
+
+
+def bench_replay(args) -> None:
+    import importlib
+    from src.http_clients.replay import http_fixtures
+    from src.metrics import current_platform
+
+    http_fixtures.configure('replay', args.fixtures)
+    cases = http_fixtures.cases()
+    if not cases:
+        sys.exit(f"No recorded cases in {http_fixtures.directory}, create some with: benchmark.py record")
+
+    async def run_case(func, platform, kwargs):
+        token = current_platform.set(platform)
+        try:
+            return await func(**kwargs)
+        finally:
+            current_platform.reset(token)
+
+    rows = []
+    for platform, case in cases:
+        module, name = case['call'].rsplit('.', 1)
+        func = getattr(importlib.import_module(f'src.{module}'), name)
+        results = []
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            http_fixtures.reset_cursors()
+            results.append(asyncio.run(run_case(func, platform, case['kwargs'])))
+        elapsed = time.perf_counter() - start
+        same = all(json.loads(json.dumps(r, ensure_ascii=False, default=str)) == case['result'] for r in results)
+        rows.append([platform, case['call'], case['kwargs'].get('url', ''), round(elapsed / args.repeat * 1000, 2),
+                     'match' if same else 'DIFFERS'])
+    print_table(['platform', 'call', 'url', 'ms/call', 'result'], rows)
+    if http_fixtures.misses:
+        print(f"{http_fixtures.misses} requests had no recorded response")
+
+
+# --------------------------- page parsing ---------------------------
+
+def synthesize_state(size_kb: int) -> dict:
+    # Stands in for the bulk of a platform's state blob: feeds, gift lists and recommendations
+    item = {"id": "3x00000000", "name": "bench 直播间", "cover": "https://example.com/cover.jpg", "count": 12345,
+            "tags": ["a", "b"], "live": True, "score": 0.5}
+    return {"items": [dict(item, index=i) for i in range(max(size_kb * 1024 // 170, 1))]}
+
+
+def synthesize_pages(size_kb: int) -> dict:
+    # One page per platform in the shape its scraper expects: a state script, then as much markup again
+    state = synthesize_state(size_kb // 2)
+    compact = json.dumps(state, ensure_ascii=False, separators=(',', ':'))
+    markup = ('<div class="feed-item"><a href="/u/3x00000000">' + 'x' * 200 + '</a></div>\n') * (
+            size_kb * 512 // 250)
+    room = {"id": "1", "status": 2, "owner": {"nickname": "bench", "avatar_thumb": {}}, "feed": state,
+            "has_commerce_goods": False}
+    douyin_state = json.dumps({"state": {"roomStore": {"roomInfo": {"room": room}}, "linkmicStore": {}}},
+                              separators=(',', ':')).replace('"', '\\"')
+    kuaishou_state = json.dumps({"liveroom": {"playList": [{"liveStream": {"id": "x", "playUrls": state},
+                                                            "gameInfo": {}}]}}, separators=(',', ':'))
+    return {
+        'douyin': f'<html><body>{markup}<script>self.__pace_f.push([1,"{douyin_state}]\\n"])</script></body></html>',
+        'tiktok': f'<html><head><script id="SIGI_STATE" type="application/json">{compact}</script></head>'
+                  f'<body>{markup}</body></html>',
+        'kuaishou': f'<html><body><script>window.__INITIAL_STATE__={kuaishou_state};(function(){{var s;'
+                    f'(s=document.currentScript).parentNode.removeChild(s);}}());</script>{markup}</body></html>',
+        'huya': f'<html><body>{markup}<script>var hyPlayerConfig = {{stream: {{"data":{compact},'
+                f'"iWebDefaultBitRate":0}}}};</script></body></html>',
+        'youtube': f'<html><body><script>var ytcfg = {{"INNERTUBE_API_KEY":"AIzaBench"}};</script><script>'
+                   f'var ytInitialPlayerResponse = {compact};var meta = document.createElement("meta");</script>'
+                   f'{markup}</body></html>',
+        'zhihu': f'<html><body>{markup}<script id="js-initialData" type="text/json">{compact}</script></body></html>',
+    }
+
+
+def parse_cases() -> dict:
+    import re
+    from src import extractors, fast_json
+
+    # Each platform's page parsing as spider.py did it with inline patterns, and as it does now
+    def douyin_before(html_str):
+        json_str = re.search(r'(\{\\"state\\":.*?)]\\n"]\)', html_str).group(1)
+        cleaned_string = json_str.replace('\\', '').replace(r'u0026', r'&')
+        room_store = re.search('"roomStore":(.*?),"linkmicStore"', cleaned_string, re.DOTALL).group(1)
+        re.search('"nickname":"(.*?)","avatar_thumb', room_store, re.DOTALL).group(1)
+        return json.loads(room_store.split(',"has_commerce_goods"')[0] + '}}}')
+
+    def douyin_after(html_str):
+        json_str = extractors.douyin.state.search(html_str).group(1)
+        cleaned_string = json_str.replace('\\', '').replace(r'u0026', r'&')
+        room_store = extractors.douyin.room_store.search(cleaned_string).group(1)
+        extractors.douyin.nickname.search(room_store).group(1)
+        return fast_json.loads(room_store.split(',"has_commerce_goods"')[0] + '}}}')
+
+    def kuaishou_before(html_str):
+        json_str = re.search('<script>window.__INITIAL_STATE__=(.*?);\\(function\\(\\)\\{var s;', html_str).group(1)
+        return json.loads(re.findall('(\\{"liveStream".*?),"gameInfo', json_str)[0] + "}")
+
+    def kuaishou_after(html_str):
+        json_str = extractors.kuaishou.state.search(html_str).group(1)
+        return fast_json.loads(extractors.kuaishou.live_stream.findall(json_str)[0] + "}")
+
+    def youtube_before(html_str):
+        re.search(r'"INNERTUBE_API_KEY":"([^"]+)"', html_str).group(1)
+        return json.loads(re.search(r'var ytInitialPlayerResponse = (.*?);var meta = document\.createElement',
+                                    html_str).group(1))
+
+    def youtube_after(html_str):
+        extractors.youtube.api_key.search(html_str).group(1)
+        return fast_json.loads(extractors.youtube.player_response.search(html_str).group(1))
+
+    return {
+        'douyin': ('douyin.com', douyin_before, douyin_after),
+        'tiktok': ('tiktok.com',
+                   lambda html_str: json.loads(re.compile(
+                       '<script id="SIGI_STATE" type="application/json">(.*?)</script>', re.DOTALL).findall(
+                       html_str)[0]),
+                   lambda html_str: fast_json.loads(extractors.tiktok.state.findall(html_str)[0])),
+        'kuaishou': ('kuaishou.com', kuaishou_before, kuaishou_after),
+        'huya': ('huya.com',
+                 lambda html_str: json.loads(re.findall('stream: (\\{"data".*?),"iWebDefaultBitRate"', html_str)[0]
+                                             + '}'),
+                 lambda html_str: fast_json.loads(extractors.huya.stream.findall(html_str)[0] + '}')),
+        'youtube': ('youtube.com', youtube_before, youtube_after),
+        'zhihu': ('zhihu.com',
+                  lambda html_str: json.loads(re.findall(
+                      '<script id="js-initialData" type="text/json">(.*?)</script>', html_str)[0]),
+                  lambda html_str: fast_json.loads(extractors.zhihu.initial_data.findall(html_str)[0])),
+    }
+
+
+def recorded_pages(directory: str, cases: dict) -> dict:
+    import urllib.parse
+    from src.http_clients.replay import FixtureStore, entry_body
+
+    store = FixtureStore(None, directory)
+    store.load()
+    pages = {}
+    for entries in store.index.values():
+        for entry in entries:
+            host = urllib.parse.urlsplit(entry['url']).hostname or ''
+            for platform, (domain, before, _) in cases.items():
+                if not host.endswith(domain):
+                    continue
+                html_str = entry_body(entry).decode('utf-8', errors='replace')
+                try:
+                    before(html_str)
+                except Exception:
+                    continue
+                pages.setdefault(platform, []).append(html_str)
+    return pages
+
+
+def bench_parse(args) -> None:
+    from src import fast_json
+
+    cases = parse_cases()
+    pages = recorded_pages(args.fixtures or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures'),
+                           cases)
+    source = 'recorded fixture pages'
+    if not pages:
+        source = f'synthesized {args.page_kb} KB pages (record some with: benchmark.py record)'
+        pages = {platform: [page] for platform, page in synthesize_pages(args.page_kb).items()}
+    rows = []
+    for platform, html_list in pages.items():
+        _, before, after = cases[platform]
+        timings = []
+        for parse in (before, after):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for html_str in html_list:
+                    parse(html_str)
+            timings.append((time.perf_counter() - start) / (args.repeat * len(html_list)) * 1000)
+        same = all(before(html_str) == after(html_str) for html_str in html_list)
+        rows.append([platform, len(html_list), round(sum(map(len, html_list)) / len(html_list) / 1024, 1),
+                     round(timings[0], 3), round(timings[1], 3), f"{timings[0] / timings[1]:.1f}x",
+                     'match' if same else 'DIFFERS'])
+    print(f"Parsing {source}, JSON backend: {fast_json.backend()}")
+    print_table(['platform', 'pages', 'KB/page', 'inline re + json (ms)', 'extractors + fast_json (ms)', 'speedup',
+                 'result'], rows)
+
+
+def sign_cases(script_dir) -> dict:
+    crypto_js = f'{script_dir}/crypto-js.min.js'
+    return {
+        'x-bogus.js': ('sign', ('device_platform=webapp&aid=6383&room_id=7380000000000000000',
+                                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/121.0.0.0')),
+        'taobao-sign.js': ('sign', ('5655b7041ca049730330701082886efd&1719411639403&12574478&{"liveId":"1"}',)),
+        'liveme.js': ('sign', ('1234567890', crypto_js)),
+        'haixiu.js': ('sign', ({"accessToken": "token", "tku": "3000006", "c": "10138100100000", "_st1": 1}, crypto_js)),
+    }
+
+
+def bench_sign(args) -> None:
+    from src import JS_SCRIPT_PATH
+    from src.node_pool import NodePool
+
+    try:
+        import execjs
+    except ImportError:
+        execjs = None
+    pool = NodePool(size=1)
+    start = time.perf_counter()
+    pool.call('taobao-sign.js', 'sign', 'warm up')
+    print(f"Worker start: {(time.perf_counter() - start) * 1000:.0f}ms")
+    rows = []
+    for script, (fn, call_args) in sign_cases(JS_SCRIPT_PATH).items():
+        before = None
+        if execjs is not None:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                with open(f'{JS_SCRIPT_PATH}/{script}', encoding='utf-8') as f:
+                    execjs.compile(f.read()).call(fn, *call_args)
+            before = (time.perf_counter() - start) / args.repeat * 1000
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            pool.call(script, fn, *call_args)
+        after = (time.perf_counter() - start) / args.repeat * 1000
+        rows.append([script, round(before, 2) if before else '-', round(after, 2),
+                     f"{before / after:.1f}x" if before else '-'])
+    pool.close()
+    print_table(['script', 'execjs.compile per call (ms)', 'worker pool (ms)', 'speedup'], rows)
+
+
+def bench_absign(args) -> None:
+    import random
+    from src import ab_sign
+
+    user_agent = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/116.0.0.0 Safari/537.36')
+    rng = random.Random(7)
+    queries = [f"aid=6383&app_name=douyin_web&live_id=1&device_platform=web&web_rid={rng.randrange(10 ** 11)}"
+               f"&room_id_str={rng.randrange(10 ** 18)}&enter_source=&is_need_double_stream=false"
+               for _ in range(args.repeat * 10)]
+    start_time = int(time.time() * 1000)
+    pure = ab_sign.ABogusSigner(sm3=ab_sign.sm3_digest)
+    cases = [
+        ('reference', lambda: [ab_sign.ab_sign_reference(q, user_agent, start_time) for q in queries]),
+        ('signer, pure Python SM3', lambda: [pure.sign(q, user_agent, start_time) for q in queries]),
+        (f"signer, {'OpenSSL' if ab_sign.sm3_hash is not ab_sign.sm3_digest else 'pure Python'} SM3",
+         lambda: [ab_sign.signer.sign(q, user_agent, start_time) for q in queries]),
+        ('sign_many', lambda: ab_sign.signer.sign_many(queries, user_agent, start_time)),
+    ]
+    reference = baseline = None
+    rows = []
+    for name, run in cases:
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+        if reference is None:
+            reference, baseline = result, elapsed
+        rows.append([name, len(queries), round(len(queries) / elapsed), f"{baseline / elapsed:.1f}x",
+                     'match' if result == reference else 'DIFFERS'])
+    print_table(['implementation', 'signatures', 'per second', 'speedup', 'output'], rows)
+
+
+def synthesize_media_playlist(segments: int, first_sequence: int, byte_ranges: bool = False) -> str:
+    # A live sliding window: fMP4 init section, a discontinuity halfway and program date times
+    lines = ['#EXTM3U', '#EXT-X-VERSION:7', '#EXT-X-TARGETDURATION:2', f'#EXT-X-MEDIA-SEQUENCE:{first_sequence}',
+             '#EXT-X-MAP:URI="init.mp4"']
+    for sequence in range(first_sequence, first_sequence + segments):
+        if sequence == first_sequence + segments // 2:
+            lines.append('#EXT-X-DISCONTINUITY')
+        lines.append(f'#EXT-X-PROGRAM-DATE-TIME:2025-01-01T00:{sequence // 60 % 60:02d}:{sequence % 60:02d}.000Z')
+        lines.append('#EXTINF:2.000,')
+        if byte_ranges:
+            lines.append(f'#EXT-X-BYTERANGE:1000@{sequence * 1000}')
+            lines.append('stream.m4s')
+        else:
+            lines.append(f'seg-{sequence}.m4s?token=abcdef')
+    return '\n'.join(lines) + '\n'
+
+
+def legacy_new_segments(content: str, base_url: str, last_seq: int) -> list:
+    # The regex + look-ahead parsing NativeHLSDownloader ran on every poll before src/m3u8.py
+    import re
+    from urllib.parse import urljoin
+
+    seq_match = re.search(r'#EXT-X-MEDIA-SEQUENCE:(\d+)', content)
+    current_seq = int(seq_match.group(1)) if seq_match else 0
+    re.search(r'#EXT-X-MAP:URI="(.*?)"', content)
+    re.search(r'#EXT-X-TARGETDURATION:(\d+)', content)
+    lines = content.splitlines()
+    segments = []
+    for i, line in enumerate(lines):
+        if line.startswith('#EXTINF:'):
+            byte_range = None
+            j = i + 1
+            while j < len(lines):
+                next_line = lines[j].strip()
+                if not next_line:
+                    j += 1
+                    continue
+                if next_line.startswith('#'):
+                    if next_line.startswith('#EXT-X-BYTERANGE:'):
+                        byte_range = next_line.split(':')[1]
+                    if next_line.startswith('#EXTINF:'):
+                        break
+                    j += 1
+                    continue
+                segments.append((next_line, byte_range))
+                break
+    new = []
+    for sequence, (uri, _) in enumerate(segments, current_seq):
+        if sequence > last_seq:
+            new.append((urljoin(base_url, uri), sequence))
+    return new
+
+
+def synthesize_master_playlist(variants: int) -> str:
+    lines = ['#EXTM3U', '#EXT-X-INDEPENDENT-SEGMENTS']
+    for i in range(variants):
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={(i * 7919) % 10000 * 1000 + i},RESOLUTION=1280x720,'
+                     f'CODECS="avc1.64001f,mp4a.40.2",FRAME-RATE=30.000')
+        lines.append(f'https://cdn.example.com/live/room/{i}/chunklist.m3u8?token=abcdef')
+    return '\n'.join(lines) + '\n'
+
+
+def legacy_play_url_list(resp: str) -> list:
+    # spider.get_play_url_list before src/m3u8.py
+    import re
+
+    play_url_list = [i.strip() for i in resp.split('\n') if i.startswith('https://')]
+    bandwidth_list = re.compile(r'BANDWIDTH=(\d+)').findall(resp)
+    url_to_bandwidth = {url: int(bandwidth) for bandwidth, url in zip(bandwidth_list, play_url_list)}
+    return sorted(play_url_list, key=lambda url: url_to_bandwidth[url], reverse=True)
+
+
+def time_cases(label, cases: list, repeat: int) -> list:
+    reference = baseline = None
+    rows = []
+    for name, run in cases:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = run()
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        if reference is None:
+            reference, baseline = result, elapsed
+        rows.append([label, name, round(elapsed, 3), f"{baseline / elapsed:.1f}x",
+                     'match' if result == reference else 'DIFFERS'])
+    return rows
+
+
+def bench_m3u8(args) -> None:
+    from src import m3u8
+
+    base_url = 'https://cdn.example.com/live/room/index.m3u8'
+    polls, first_polls = [], []
+    for window in (6, 100, 1000, 10000):
+        # Each poll the window has slid by two segments, so only the last two are new
+        first_sequence = 100000
+        content = synthesize_media_playlist(window, first_sequence)
+        last_seq = first_sequence + window - 3
+        polls += time_cases(window, [
+            ('regex + look-ahead', lambda: legacy_new_segments(content, base_url, last_seq)),
+            ('m3u8.parse, after_sequence', lambda: [(i.uri, i.sequence) for i in
+                                                 m3u8.parse(content, base_url, after_sequence=last_seq).segments]),
+        ], args.repeat)
+        # The downloader's first poll, when every segment in the window is new
+        first_polls += time_cases(window, [
+            ('regex + look-ahead', lambda: legacy_new_segments(content, base_url, -1)),
+            ('m3u8.parse', lambda: [(i.uri, i.sequence) for i in m3u8.parse(content, base_url).segments]),
+        ], args.repeat)
+    print(f"Polling a sliding-window media playlist ({args.repeat} polls per case)")
+    print_table(['segments', 'parser', 'ms/poll', 'speedup', 'new segments'], polls)
+    print("First poll, every segment new (Segment objects with all their tags are built)")
+    print_table(['segments', 'parser', 'ms/poll', 'speedup', 'new segments'], first_polls)
+
+    masters = []
+    for count in (4, 50):
+        content = synthesize_master_playlist(count)
+        masters += time_cases(count, [
+            ('split + zipped BANDWIDTH', lambda: legacy_play_url_list(content)),
+            ('m3u8.parse_variants', lambda: [i.uri for i in m3u8.parse_variants(content, base_url)]),
+            ('m3u8.parse', lambda: [i.uri for i in m3u8.parse(content, base_url).variants_by_bandwidth()]),
+        ], args.repeat * 10)
+    print("Variant list of a master playlist (spider call sites)")
+    print_table(['variants', 'parser', 'ms/call', 'speedup', 'urls'], masters)
+
+    playlist = m3u8.parse(synthesize_media_playlist(1000, 0, byte_ranges=True), base_url)
+    ranges_ok = all(seg.byte_range == (1000, seg.sequence * 1000) for seg in playlist.segments)
+    print(f"Byte ranges: {len(playlist.segments)} segments, offsets {'match' if ranges_ok else 'DIFFER'}")
+
+
+BENCHMARKS = {
+    "engine": bench_engine,
+    "adaptive": bench_adaptive,
+    "batch": bench_batch,
+    "scheduler": bench_scheduler,
+    "pool": bench_pool,
+    "extract": bench_extract,
+    "record": bench_record,
+    "replay": bench_replay,
+    "parse": bench_parse,
+    "sign": bench_sign,
+    "absign": bench_absign,
+    "m3u8": bench_m3u8,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='DouyinLiveRecorder benchmarks')
+    parser.add_argument('name', choices=list(BENCHMARKS))
+    parser.add_argument('--mode', choices=['threads', 'engine'])
+    parser.add_argument('--rooms', type=int, default=100)
+    parser.add_argument('--room-counts', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--history', help='live history file for the adaptive benchmark')
+    parser.add_argument('--fixed-interval', type=int, default=120)
+    parser.add_argument('--floor', type=int, default=30)
+    parser.add_argument('--ceiling', type=int, default=3600)
+    parser.add_argument('--batch-size', type=int, default=30)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--page-kb', type=int, default=500)
+    parser.add_argument('--bandwidth', type=float, default=4096, help='KB/s served by the extract benchmark')
+    parser.add_argument('--call', help='function to record, relative to src, e.g. spider.get_kuaishou_stream_data')
+    parser.add_argument('--url', help='live room url to record')
+    parser.add_argument('--platform', help='fixture file the recording goes into, defaults to the host')
+    parser.add_argument('--fixtures', help='fixture directory, defaults to fixtures/')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    BENCHMARKS[args.name](args)
+
+
+if __name__ == "__main__":
+    main()
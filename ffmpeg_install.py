@@ -13,8 +13,7 @@ import sys
 import platform
 import zipfile
 from pathlib import Path
-import requests
-from tqdm import tqdm
+from src.capabilities import capability_cache
 from src.logger import logger
 
 current_platform = platform.system()
@@ -35,6 +34,7 @@ def unzip_file(zip_path: str | Path, extract_to: str | Path, delete: bool = True
 
 
 def get_lanzou_download_link(url: str, password: str | None = None) -> str | None:
+    import requests
     try:
         headers = {
             'accept-language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
@@ -61,6 +61,8 @@ def get_lanzou_download_link(url: str, password: str | None = None) -> str | Non
 
 
 def install_ffmpeg_windows():
+    import requests
+    from tqdm import tqdm
     try:
         logger.warning("ffmpeg is not installed.")
         logger.debug("Installing the latest version of ffmpeg for Windows...")
@@ -200,16 +202,9 @@ def ensure_ffmpeg_installed(func):
 
 
 def check_ffmpeg_installed() -> bool:
+    # `ffmpeg -version` is only run again when the binary on PATH changes
     try:
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True)
-        version = result.stdout.strip()
-        if result.returncode == 0 and version:
-            return True
-    except FileNotFoundError:
-        pass
-    except OSError as e:
-        print(f"OSError occurred: {e}. ffmpeg may not be installed correctly or is not available in the system PATH.")
-        print("Please delete the ffmpeg and try to download and install again.")
+        return capability_cache.tool('ffmpeg', ['-version']) is not None
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
     return False
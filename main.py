@@ -17,18 +17,35 @@ import signal
 import threading
 import time
 import datetime
+import json
 import re
 import shutil
-import random
 import uuid
 from pathlib import Path
 import urllib.request
 from urllib.error import URLError, HTTPError
 from typing import Any
 import configparser
+# Imported first so the startup report also covers the imports below
+from src.startup import startup_timer
 import httpx
-from src import spider, stream
-from src.proxy import ProxyDetector
+from src.capabilities import capability_cache
+from src.platforms import platform_registry, load
+from src.proxy import ProxyDetector, ProxyPool, proxy_pool
+from src.engine import MonitorEngine
+from src.adaptive_poll import LiveHistory, AdaptivePoller
+from src.rate_limit import RateLimiter, parse_rules, classify_error
+from src.breaker import BreakerRegistry, endpoint_breakers
+from src.batch_probe import BatchProber
+from src.shard import ShardCoordinator, ShardWorker, SHARD_GLOBAL_PROXY_ENV
+from src.scheduler import PollScheduler, StopSignals
+from src.stream_cache import StreamCache
+from src.http_clients.dns_cache import dns_cache
+from src.metrics import metrics
+from src.sessions import session_store
+from src.single_flight import flight_key
+from src.canonical import canonical_cache
+from src.persist import persister
 from src.utils import logger
 from src import utils
 from msg_push import (
@@ -46,11 +63,7 @@ platforms = ("\n国内站点：抖音|快手|虎牙|斗鱼|YY|B站|小红书|big
 
 recording = set()
 error_count = 0
-pre_max_request = 10
 max_request_lock = threading.Lock()
-error_window = []
-error_window_size = 10
-error_threshold = 5
 monitoring = 0
 running_list = []
 url_tuples_list = []
@@ -66,11 +79,34 @@ start_display_time = datetime.datetime.now()
 global_proxy = False
 weverse_cookie = ''
 weverse_refresh_token = ''
+WEVERSE_SESSION_TTL = 30 * 86400
 recording_time_list = {}
+recording_urls = set()
+engine = MonitorEngine()
+poll_scheduler = PollScheduler()
+stop_signals = StopSignals()
+signalled_comments = set()
+shard_worker = ShardWorker.from_env(
+    on_message=lambda message: message['type'] == 'sessions' and session_store.adopt(message['sessions']))
+shard_coordinator = None
+rate_limiter = RateLimiter()
+batch_prober = BatchProber()
+platform_breakers = BreakerRegistry()
+stream_cache = StreamCache()
 script_path = os.path.split(os.path.realpath(sys.argv[0]))[0]
 config_file = f'{script_path}/config/config.ini'
 url_config_file = f'{script_path}/config/URL_config.ini'
 backup_dir = f'{script_path}/backup_config'
+live_history = LiveHistory(f'{script_path}/config/live_history.json')
+adaptive_poller = AdaptivePoller(live_history)
+if shard_worker:
+    # Only the coordinator writes the JSON stores, a worker forwards what it learns to it
+    persister.read_only = True
+    live_history.on_change = lambda room, is_live, now: shard_worker.send(
+        'live_history', room=room, is_live=is_live, now=now)
+    canonical_cache.on_change = lambda kind, key, value: shard_worker.send(
+        'canonical', kind=kind, key=key, value=value)
+    session_store.on_change = lambda item: shard_worker.send('sessions', sessions=[item])
 text_encoding = 'utf-8-sig'
 rstr = r"[\/\\\:\*\？?\"\<\>\|&#.。,， ~！· ]"
 default_path = f'{script_path}/downloads'
@@ -87,17 +123,31 @@ def signal_handler(_signal, _frame):
     if not exit_recording:
         print("\n[!] 接收到退出信号，正在关停所有录制任务，请稍候...")
         exit_recording = True
+        signal_stop()
     else:
         print("\n[!] 再次接收到信号，强制退出...")
         os._exit(0)
 
 
+def dump_metrics() -> None:
+    suffix = f"-shard{shard_worker.shard}" if shard_worker else ""
+    dump_path = f"{script_path}/logs/metrics{suffix}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    os.makedirs(os.path.dirname(dump_path), exist_ok=True)
+    with open(dump_path, 'w', encoding='utf-8') as f:
+        json.dump({"started": metrics.started, "dumped": time.time(), "series": metrics.snapshot()}, f,
+                  ensure_ascii=False, indent=2)
+    logger.info(f"请求统计已写入 {dump_path}\n{metrics.format_table()}")
+
+
 signal.signal(signal.SIGTERM, signal_handler)
 signal.signal(signal.SIGINT, signal_handler)
+if hasattr(signal, 'SIGUSR1'):
+    # Dumped from a thread since the signal may arrive while this thread holds the metrics lock
+    signal.signal(signal.SIGUSR1, lambda _signal, _frame: threading.Thread(target=dump_metrics).start())
 
 
 def display_info() -> None:
-    global start_display_time
+    global start_display_time, error_count
     time.sleep(5)
     while not exit_recording:
         try:
@@ -111,8 +161,13 @@ def display_info() -> None:
                 os.system(clear_command)
             if exit_recording:
                 break
-            print(f"\r共监测{monitoring}个直播中", end=" | ")
-            print(f"同一时间访问网络的线程数: {max_request}", end=" | ")
+            recording_info = {i: recording_time_list[i] for i in recording if i in recording_time_list}
+            shard_status = shard_coordinator.shard_status() if shard_coordinator else {}
+            total_monitoring = monitoring
+            for status in shard_status.values():
+                total_monitoring += status['monitoring']
+                recording_info |= {name: (rt, qa) for name, rt, qa in status['recording']}
+            print(f"\r共监测{total_monitoring}个直播中", end=" | ")
             print(f"是否开启代理录制: {'是' if use_proxy else '否'}", end=" | ")
             if split_video_by_time:
                 print(f"录制分段开启: {split_time}秒", end=" | ")
@@ -122,23 +177,55 @@ def display_info() -> None:
                 print("是否生成时间文件: 是", end=" | ")
             print(f"录制视频质量为: {video_record_quality}", end=" | ")
             print(f"录制视频格式为: {video_save_type}", end=" | ")
-            print(f"目前瞬时错误数为: {error_count}", end=" | ")
+            with max_request_lock:
+                recent_errors, error_count = error_count, 0
+            print(f"目前瞬时错误数为: {recent_errors}", end=" | ")
             now = time.strftime("%H:%M:%S", time.localtime())
             print(f"当前时间: {now}")
-
-            if len(recording) == 0:
+            limiter_stats = rate_limiter.stats()
+            if limiter_stats:
+                print("平台限流: " + " | ".join(
+                    f"{i['key']} 并发{i['in_flight']}/{i['concurrency']} 排队{i['queued']} "
+                    f"平均等待{i['avg_wait']:.2f}s p95等待{i['p95_wait']:.2f}s"
+                    + (f" 错误{sum(i['errors'].values())}" if i['errors'] else "") for i in limiter_stats))
+            batch_stats = batch_prober.stats()
+            if batch_stats['requests']:
+                print(f"批量探测: 请求{batch_stats['requests']}次 覆盖{batch_stats['rooms']}个直播间 "
+                      f"缓存命中{batch_stats['hits']}次 回退单独探测{batch_stats['fallbacks']}次")
+            if len(proxy_pool) > 1:
+                print("代理池: " + " | ".join(
+                    f"{i['address']} 成功率{i['success']:.0%} 延迟{i['latency']:.1f}s"
+                    + (f" 隔离中{i['quarantined']:.0f}秒" if i['quarantined'] else "")
+                    + (f" 平台{','.join(i['platforms'])}" if i['platforms'] else "") for i in proxy_pool.stats()))
+            dns_stats = dns_cache.stats()
+            if dns_stats['hits'] or dns_stats['misses']:
+                print(f"DNS缓存: {dns_stats['entries']}个域名 命中{dns_stats['hits']}次 未命中{dns_stats['misses']}次 "
+                      f"后台刷新{dns_stats['refreshes']}次 解析失败{dns_stats['failures']}次"
+                      + (f" 使用过期结果{dns_stats['stale']}次" if dns_stats['stale'] else ""))
+            breaker_stats = platform_breakers.stats() + endpoint_breakers.stats()
+            if breaker_stats:
+                state_names = {"open": "熔断", "half_open": "半开探测"}
+                print("熔断状态: " + " | ".join(
+                    f"{i['key']} {state_names[i['state']]} 最近错误{i['last_error']}"
+                    + (f" {i['retry_after']:.0f}秒后探测" if i['state'] == 'open' else "")
+                    + (f" 等待中{i['blocked']}个直播间" if i['blocked'] else "") for i in breaker_stats))
+            if shard_status:
+                print("多进程分片: " + " | ".join(
+                    f"{shard}号(pid {i['pid']}) 分配{i['rooms']} 监测{i['monitoring']} 录制{len(i['recording'])} "
+                    f"错误{i['errors']}" + ("" if i['connected'] else " 已断开,等待重启")
+                    + (f" 重启{i['restarts']}次" if i['restarts'] else "") for shard, i in shard_status.items()))
+
+            if len(recording_info) == 0:
                 time.sleep(5)
-                if monitoring == 0:
+                if total_monitoring == 0:
                     print("\r没有正在监测和录制的直播")
                 else:
                     print(f"\r没有正在录制的直播 循环监测间隔时间：{delay_default}秒")
             else:
                 now_time = datetime.datetime.now()
                 print("x" * 60)
-                no_repeat_recording = list(set(recording))
-                print(f"正在录制{len(no_repeat_recording)}个直播: ")
-                for recording_live in no_repeat_recording:
-                    rt, qa = recording_time_list[recording_live]
+                print(f"正在录制{len(recording_info)}个直播: ")
+                for recording_live, (rt, qa) in recording_info.items():
                     have_record_time = now_time - rt
                     print(f"{recording_live}[{qa}] 正在录制中 {str(have_record_time).split('.')[0]}")
 
@@ -310,35 +397,6 @@ def generate_subtitles(record_name: str, ass_filename: str, sub_format: str = 's
         re_datatime = today.strftime('%Y-%m-%d %H:%M:%S')
 
 
-def adjust_max_request() -> None:
-    global max_request, error_count, pre_max_request, error_window
-    preset = max_request
-
-    while not exit_recording:
-        time.sleep(5)
-        with max_request_lock:
-            if error_window:
-                error_rate = sum(error_window) / len(error_window)
-            else:
-                error_rate = 0
-
-            if error_rate > error_threshold:
-                max_request = max(1, max_request - 1)
-            elif error_rate < error_threshold / 2 and max_request < preset:
-                max_request += 1
-            else:
-                pass
-
-            if pre_max_request != max_request:
-                pre_max_request = max_request
-                print(f"\r同一时间访问网络的线程数动态改为 {max_request}")
-
-        error_window.append(error_count)
-        if len(error_window) > error_window_size:
-            error_window.pop(0)
-        error_count = 0
-
-
 def push_message(record_name: str, live_url: str, content: str) -> None:
     msg_title = push_message_title.strip() or "直播间状态更新通知"
     push_functions = {
@@ -368,6 +426,33 @@ def push_message(record_name: str, live_url: str, content: str) -> None:
                 color_obj.print_colored(f"直播消息推送到{platform}失败: {e}", color_obj.RED)
 
 
+def send_push(record_name: str, live_url: str, content: str) -> None:
+    if shard_worker:
+        shard_worker.send('push', record_name=record_name, live_url=live_url, content=content)
+    else:
+        threading.Thread(target=push_message, args=(record_name, live_url, content), daemon=True).start()
+
+
+def handle_shard_message(_shard: int, message: dict) -> None:
+    if message['type'] == 'push':
+        send_push(message['record_name'], message['live_url'], message['content'])
+    elif message['type'] == 'url_config':
+        need_update_line_list.extend(message['update_lines'])
+        for url in message['not_record']:
+            if url not in not_record_list:
+                not_record_list.append(url)
+    elif message['type'] == 'live_history':
+        live_history.update(message['room'], message['is_live'], message['now'])
+    elif message['type'] == 'canonical':
+        if message['value'] is None:
+            canonical_cache.invalidate(message['kind'], message['key'])
+        else:
+            canonical_cache.put(message['kind'], message['key'], message['value'])
+    elif message['type'] == 'sessions':
+        if session_store.adopt(message['sessions']):
+            shard_coordinator.broadcast('sessions', sessions=message['sessions'])
+
+
 def run_script(command: str) -> None:
     try:
         process = subprocess.Popen(
@@ -397,6 +482,15 @@ def clear_record_info(record_name: str, record_url: str) -> None:
         color_obj.print_colored(f"[{record_name}]已经从录制列表中移除\n", color_obj.YELLOW)
 
 
+def signal_stop(record_url: str | None = None) -> None:
+    if record_url:
+        poll_scheduler.wake(record_url)
+        stop_signals.signal(record_url)
+    else:
+        poll_scheduler.wake_all()
+        stop_signals.signal_all()
+
+
 def direct_download_stream(source_url: str, save_path: str, record_name: str, live_url: str, platform: str) -> bool:
     try:
         with open(save_path, 'wb') as f:
@@ -435,6 +529,8 @@ def direct_download_stream(source_url: str, save_path: str, record_name: str, li
 def check_subprocess(record_name: str, record_url: str, ffmpeg_command: list, save_type: str,
                      script_command: str | None = None) -> bool:
     save_file_path = ffmpeg_command[-1]
+    start_time = time.time()
+    media_errors = []
     process = subprocess.Popen(
         ffmpeg_command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, startupinfo=get_startup_info(os_type)
     )
@@ -448,6 +544,8 @@ def check_subprocess(record_name: str, record_url: str, ffmpeg_command: list, sa
                 decoded_line = line.decode('utf-8', errors='ignore').strip()
                 if decoded_line and not exit_recording:
                     print(f"[{record_name}] {decoded_line}")
+                    if re.search(r'\b(403|404)\b.*(Forbidden|Not Found)|Server returned 40[34]', decoded_line):
+                        media_errors.append(decoded_line)
             except Exception:
                 pass
 
@@ -464,26 +562,37 @@ def check_subprocess(record_name: str, record_url: str, ffmpeg_command: list, sa
         create_var[subs_thread_name].daemon = True
         create_var[subs_thread_name].start()
 
-    while process.poll() is None:
-        if record_url in url_comments or exit_recording:
-            color_obj.print_colored(f"[{record_name}]录制时已被注释,本条线程将会退出", color_obj.YELLOW)
-            clear_record_info(record_name, record_url)
-            # process.terminate()
-            if os.name == 'nt':
-                if process.stdin:
-                    process.stdin.write(b'q')
-                    process.stdin.close()
-            else:
-                process.send_signal(signal.SIGINT)
-            process.wait()
-            log_thread.join(timeout=2)
-            return True
-        time.sleep(1)
+    stop_event = stop_signals.register(record_url)
+    threading.Thread(target=lambda: (process.wait(), stop_event.set()), daemon=True).start()
+    try:
+        while process.poll() is None:
+            if record_url in url_comments or exit_recording:
+                color_obj.print_colored(f"[{record_name}]录制时已被注释,本条线程将会退出", color_obj.YELLOW)
+                clear_record_info(record_name, record_url)
+                # process.terminate()
+                if os.name == 'nt':
+                    if process.stdin:
+                        process.stdin.write(b'q')
+                        process.stdin.close()
+                else:
+                    process.send_signal(signal.SIGINT)
+                process.wait()
+                log_thread.join(timeout=2)
+                return True
+            stop_event.wait()
+            stop_event.clear()
+    finally:
+        stop_signals.unregister(record_url, stop_event)
 
     return_code = process.returncode
     stop_time = time.strftime('%Y-%m-%d %H:%M:%S')
     process.wait()
     log_thread.join(timeout=2)
+    if return_code != 0 and not media_errors:
+        stream_cache.request_reconnect(record_url, time.time() - start_time)
+    else:
+        # The media server rejected the URL or the stream ended, the next probe must resolve it again
+        stream_cache.invalidate(record_url)
     if return_code == 0:
         if converts_to_mp4 and save_type == 'TS':
             if split_video_by_time:
@@ -531,17 +640,29 @@ def check_native_download(record_name: str, record_url: str, m3u8_url: str, save
     print(f"\r{record_name} Native Downloader Started: {save_file_path}")
 
     downloader = NativeHLSDownloader(m3u8_url, save_file_path, headers)
-    download_thread = threading.Thread(target=downloader.start)
+    stop_event = stop_signals.register(record_url)
+
+    def run_download():
+        try:
+            downloader.start()
+        finally:
+            stop_event.set()
+
+    download_thread = threading.Thread(target=run_download)
     download_thread.start()
 
-    while download_thread.is_alive():
-        if record_url in url_comments or exit_recording:
-            color_obj.print_colored(f"[{record_name}]录制时已被注释,本条线程将会退出", color_obj.YELLOW)
-            clear_record_info(record_name, record_url)
-            downloader.stop()
-            download_thread.join()
-            return True
-        time.sleep(1)
+    try:
+        while download_thread.is_alive():
+            if record_url in url_comments or exit_recording:
+                color_obj.print_colored(f"[{record_name}]录制时已被注释,本条线程将会退出", color_obj.YELLOW)
+                clear_record_info(record_name, record_url)
+                downloader.stop()
+                download_thread.join()
+                return True
+            stop_event.wait()
+            stop_event.clear()
+    finally:
+        stop_signals.unregister(record_url, stop_event)
 
     if downloader.failed:
         color_obj.print_colored(f"\n{record_name} Native download failed, switching to ffmpeg...\n", color_obj.YELLOW)
@@ -575,25 +696,13 @@ def get_quality_code(qn):
 
 
 def get_record_headers(platform, live_url):
-    live_domain = '/'.join(live_url.split('/')[0:3])
-    record_headers = {
-        'PandaTV': 'origin:https://www.pandalive.co.kr',
-        'WinkTV': 'origin:https://www.winktv.co.kr',
-        'PopkonTV': 'origin:https://www.popkontv.com',
-        'FlexTV': 'origin:https://www.flextv.co.kr',
-        '千度热播': 'referer:https://qiandurebo.com',
-        '17Live': 'referer:https://17.live/en/live/6302408',
-        '浪Live': 'referer:https://www.lang.live',
-        'shopee': f'origin:{live_domain}',
-        'Blued直播': 'referer:https://app.blued.cn',
-        'Weverse': 'origin:https://weverse.io',
-        'B站直播': 'referer:https://live.bilibili.com/'
-    }
-    return record_headers.get(platform)
+    platform_info = platform_registry.get(platform)
+    return platform_info.headers_for(live_url) if platform_info else None
 
 
 def is_flv_preferred_platform(link):
-    return any(i in link for i in ["douyin", "tiktok", "douyu"])
+    platform_info = platform_registry.for_url(link)
+    return platform_info is not None and platform_info.flv_preferred
 
 
 def select_source_url(link, stream_info):
@@ -607,537 +716,871 @@ def select_source_url(link, stream_info):
     return stream_info.get('record_url')
 
 
-def start_record(url_data: tuple, count_variable: int = -1) -> None:
-    global error_count, weverse_cookie, weverse_refresh_token
+async def probe_bilibili_rooms(room_ids: list, proxy_addr: str | None = None, cookies: str | None = None) -> dict:
+    async with rate_limiter.limit('B站直播', 'api.live.bilibili.com'):
+        return await load('spider.get_bilibili_rooms_info')(room_ids, proxy_addr=proxy_addr, cookies=cookies)
+
+
+async def probe_twitch_rooms(logins: list, proxy_addr: str | None = None, cookies: str | None = None) -> dict:
+    async with rate_limiter.limit('TwitchTV', 'gql.twitch.tv'):
+        return await load('spider.get_twitchtv_rooms_info')(logins, proxy_addr=proxy_addr, cookies=cookies)
+
+
+batch_prober.register('B站直播', probe_bilibili_rooms, batch_size=30)
+batch_prober.register('TwitchTV', probe_twitch_rooms, batch_size=35)
+
+# Platforms registered as custom in src/platforms.py, for fetches that log in, batch or write back to the config
+platform_handlers = {}
+
+
+def platform_handler(platform: str):
+    def decorator(func):
+        platform_handlers[platform] = func
+        return func
+    return decorator
+
+
+@platform_handler('抖音直播')
+async def fetch_douyin(record_url: str, record_host: str, record_quality: str, proxy_address: str | None):
+    from src import spider, stream
+    platform = '抖音直播'
+    async with rate_limiter.limit(platform, record_host):
+        if 'v.douyin.com' not in record_url and '/user/' not in record_url:
+            json_data = await spider.get_douyin_web_stream_data(
+                url=record_url,
+                proxy_addr=proxy_address,
+                cookies=platform_cookies.get(platform))
+        else:
+            json_data = await spider.get_douyin_app_stream_data(
+                url=record_url,
+                proxy_addr=proxy_address,
+                cookies=platform_cookies.get(platform))
+        return await stream.get_douyin_stream_url(json_data, record_quality, proxy_address)
+
+
+@platform_handler('虎牙直播')
+async def fetch_huya(record_url: str, record_host: str, record_quality: str, proxy_address: str | None):
+    from src import spider, stream
+    platform = '虎牙直播'
+    async with rate_limiter.limit(platform, record_host):
+        if record_quality not in ['OD', 'BD', 'UHD']:
+            json_data = await spider.get_huya_stream_data(
+                url=record_url,
+                proxy_addr=proxy_address,
+                cookies=platform_cookies.get(platform))
+            return await stream.get_huya_stream_url(json_data, record_quality)
+        return await spider.get_huya_app_stream_url(
+            url=record_url,
+            proxy_addr=proxy_address,
+            cookies=platform_cookies.get(platform)
+        )
+
+
+@platform_handler('B站直播')
+async def fetch_bilibili(record_url: str, record_host: str, record_quality: str, proxy_address: str | None):
+    from src import spider, stream
+    platform = 'B站直播'
+    bili_cookie = platform_cookies.get(platform)
+    json_data = None
+    if batch_probe:
+        room_id = record_url.split('?')[0].rsplit('/', maxsplit=1)[1]
+        json_data = await batch_prober.probe(platform, room_id, proxy_addr=proxy_address, cookies=bili_cookie)
+    async with rate_limiter.limit(platform, record_host):
+        # As for Twitch, a batch result only settles offline rooms; a live one is confirmed by the room's
+        # own probe before recording starts, as the batch answer may be up to its ttl old
+        if json_data and not json_data['live_status']:
+            json_data = {**json_data, "room_url": record_url}
+        else:
+            json_data = await spider.get_bilibili_room_info(
+                url=record_url, proxy_addr=proxy_address, cookies=bili_cookie)
+        return await stream.get_bilibili_stream_url(
+            json_data, video_quality=record_quality, cookies=bili_cookie, proxy_addr=proxy_address)
+
+
+@platform_handler('SOOP')
+async def fetch_sooplive(record_url: str, record_host: str, record_quality: str, proxy_address: str | None):
+    from src import spider, stream
+    platform = 'SOOP'
+    async with rate_limiter.limit(platform, record_host):
+        json_data = await spider.get_sooplive_stream_data(
+            url=record_url, proxy_addr=proxy_address,
+            cookies=session_store.credential(platform, sooplive_username, platform_cookies.get(platform)),
+            username=sooplive_username,
+            password=sooplive_password
+        )
+        if json_data and json_data.get('new_cookies'):
+            session_store.put(platform, sooplive_username, json_data['new_cookies'])
+        return await stream.get_stream_url(json_data, record_quality, spec=True)
+
+
+def weverse_tokens() -> tuple[str, str, str]:
+    # The configured pair is only the starting point: refreshed pairs are kept in the session store,
+    # which shards share, under an account derived from the configured refresh token
+    account = flight_key('Weverse', weverse_refresh_token, 'session')[1] if weverse_refresh_token else ''
+    session = session_store.get('Weverse', account) if account else None
+    if session:
+        return account, session.credential, session.extra.get('refresh_token', '')
+    return account, weverse_cookie, weverse_refresh_token
+
+
+@platform_handler('Weverse')
+async def fetch_weverse(record_url: str, record_host: str, record_quality: str, proxy_address: str | None):
+    from src import spider, stream
+    account, access_token, refresh_token = weverse_tokens()
+    async with rate_limiter.limit('Weverse', record_host):
+        json_data = await spider.get_weverse_stream_data(
+            url=record_url,
+            proxy_addr=proxy_address,
+            cookies=access_token,
+            refresh_token=refresh_token
+        )
+        if json_data and json_data.get('new_tokens') and account:
+            # Shards pick the new pair up through the session store; an expired access token is renewed
+            # by the probe itself, so the pair is kept as long as its refresh token
+            session_store.put('Weverse', account, json_data['new_tokens']['access'],
+                              expires_at=time.time() + WEVERSE_SESSION_TTL,
+                              refresh_token=json_data['new_tokens']['refresh'])
+
+        return await stream.get_weverse_stream_url(json_data)
+
+
+@platform_handler('FlexTV')
+async def fetch_flextv(record_url: str, record_host: str, record_quality: str, proxy_address: str | None):
+    from src import spider, stream
+    platform = 'FlexTV'
+    async with rate_limiter.limit(platform, record_host):
+        json_data = await spider.get_flextv_stream_data(
+            url=record_url,
+            proxy_addr=proxy_address,
+            cookies=session_store.credential(platform, flextv_username, platform_cookies.get(platform)),
+            username=flextv_username,
+            password=flextv_password
+        )
+        if json_data and json_data.get('new_cookies'):
+            session_store.put(platform, flextv_username, json_data['new_cookies'])
+        if 'play_url_list' in json_data:
+            return await stream.get_stream_url(json_data, record_quality, spec=True)
+        return json_data
+
+
+@platform_handler('PopkonTV')
+async def fetch_popkontv(record_url: str, record_host: str, record_quality: str, proxy_address: str | None):
+    from src import spider
+    platform = 'PopkonTV'
+    async with rate_limiter.limit(platform, record_host):
+        port_info = await spider.get_popkontv_stream_url(
+            url=record_url,
+            proxy_addr=proxy_address,
+            access_token=session_store.credential(platform, popkontv_username, popkontv_access_token),
+            username=popkontv_username,
+            password=popkontv_password,
+            partner_code=popkontv_partner_code
+        )
+        if port_info and port_info.get('new_token'):
+            session_store.put(platform, popkontv_username, port_info['new_token'].removeprefix('Bearer '))
+        return port_info
+
+
+@platform_handler('TwitCasting')
+async def fetch_twitcasting(record_url: str, record_host: str, record_quality: str, proxy_address: str | None):
+    from src import spider, stream
+    platform = 'TwitCasting'
+    async with rate_limiter.limit(platform, record_host):
+        json_data = await spider.get_twitcasting_stream_url(
+            url=record_url,
+            proxy_addr=proxy_address,
+            cookies=session_store.credential(platform, twitcasting_username, platform_cookies.get(platform)),
+            account_type=twitcasting_account_type,
+            username=twitcasting_username,
+            password=twitcasting_password
+        )
+        port_info = await stream.get_stream_url(json_data, record_quality, spec=False)
+
+        if port_info and port_info.get('new_cookies'):
+            session_store.put(platform, twitcasting_username, port_info['new_cookies'])
+        return port_info
+
+
+# Logins used by the session store to renew a stored session before it expires
+async def login_sooplive(proxy_address: str | None) -> str | None:
+    from src import spider
+    return await spider.login_sooplive(sooplive_username, sooplive_password, proxy_addr=proxy_address)
+
+
+async def login_flextv(proxy_address: str | None) -> str | None:
+    from src import spider
+    return await spider.login_flextv(flextv_username, flextv_password, proxy_addr=proxy_address)
+
+
+async def login_popkontv(proxy_address: str | None) -> str | None:
+    from src import spider
+    access_token, _partner_code = await spider.login_popkontv(
+        popkontv_username, popkontv_password, proxy_addr=proxy_address, code=popkontv_partner_code)
+    return access_token
+
+
+async def login_twitcasting(proxy_address: str | None) -> str | None:
+    from src import spider
+    return await spider.login_twitcasting(
+        twitcasting_account_type, twitcasting_username, twitcasting_password, proxy_addr=proxy_address)
+
+
+session_store.register('SOOP', lambda: sooplive_username, login_sooplive)
+session_store.register('FlexTV', lambda: flextv_username, login_flextv)
+session_store.register('PopkonTV', lambda: popkontv_username, login_popkontv)
+session_store.register('TwitCasting', lambda: twitcasting_username, login_twitcasting)
+
+
+def url_proxy(url: str) -> str | None:
+    proxy_platform = proxy_platform_for(url)
+    return proxy_pool.choose(proxy_platform) if proxy_platform else None
+
+
+def session_proxy(platform: str) -> str | None:
+    platform_info = platform_registry.get(platform)
+    host = platform_info.hosts[0] if platform_info else ''
+    return url_proxy(f'https://{host}/')
+
+
+@platform_handler('TwitchTV')
+async def fetch_twitch(record_url: str, record_host: str, record_quality: str, proxy_address: str | None):
+    from src import spider, stream
+    platform = 'TwitchTV'
+    twitch_cookie = platform_cookies.get(platform)
+    json_data = None
+    if batch_probe:
+        login = record_url.split('?')[0].rsplit('/', maxsplit=1)[-1]
+        json_data = await batch_prober.probe(platform, login, proxy_addr=proxy_address, cookies=twitch_cookie)
+    async with rate_limiter.limit(platform, record_host):
+        if not json_data or json_data['is_live']:
+            json_data = await spider.get_twitchtv_stream_data(
+                url=record_url,
+                proxy_addr=proxy_address,
+                cookies=twitch_cookie
+            )
+        return await stream.get_stream_url(json_data, record_quality, spec=True)
+
+
+async def fetch_port_info(record_url: str, record_quality: str, proxy_address: str | None) -> tuple:
+    new_record_url = ''
+    record_host = record_url.split('/')[2] if '://' in record_url else ''
+    platform_info = platform_registry.for_url(record_url)
+
+    if platform_info is None:
+        if record_url.find(".m3u8") > -1 or record_url.find(".flv") > -1:
+            platform = '自定义录制直播'
+            port_info = {
+                "anchor_name": platform + '_' + str(uuid.uuid4())[:8],
+                "is_live": True,
+                "record_url": record_url,
+            }
+            if '.flv' in record_url:
+                port_info['flv_url'] = record_url
+            else:
+                port_info['m3u8_url'] = record_url
+            return platform, port_info, new_record_url
+
+        platform = '未知平台'
+        logger.error(f'{record_url} {platform}直播地址')
+        return platform, None, new_record_url
+
+    platform = platform_info.name
+    if platform_info.proxy_required and not (global_proxy or proxy_address):
+        logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问{platform}平台")
+        return platform, [], new_record_url
+
+    if platform_info.custom:
+        port_info = await platform_handlers[platform](record_url, record_host, record_quality, proxy_address)
+    else:
+        async with rate_limiter.limit(platform, record_host):
+            port_info = await platform_info.fetch(
+                record_url, record_quality, proxy_address, platform_cookies.get(platform, ''))
+
+    if platform_info.pin_uid and port_info.get('uid'):
+        new_record_url = record_url.split('?')[0] + '?' + str(port_info['uid'])
+    return platform, port_info, new_record_url
+
+
+def record_live_stream(record_url: str, real_url: str, platform: str, port_info: dict, anchor_name: str,
+                       record_name: str, show_anchor_name: str, record_quality_zh: str,
+                       proxy_address: str | None) -> tuple[bool, bool]:
+    global error_count
+    record_finished = False
+    full_path = f'{default_path}/{platform}'
+    now = datetime.datetime.today().strftime("%Y-%m-%d_%H-%M-%S")
+    live_title = port_info.get('title')
+    title_in_name = ''
+    if live_title:
+        live_title = clean_name(live_title)
+        title_in_name = live_title + '_' if filename_by_title else ''
+
+    try:
+        if len(video_save_path) > 0:
+            if not video_save_path.endswith(('/', '\\')):
+                full_path = f'{video_save_path}/{platform}'
+            else:
+                full_path = f'{video_save_path}{platform}'
+
+        full_path = full_path.replace("\\", '/')
+        if folder_by_author:
+            full_path = f'{full_path}/{anchor_name}'
+        if folder_by_time:
+            full_path = f'{full_path}/{now[:10]}'
+        if folder_by_title and port_info.get('title'):
+            if folder_by_time:
+                full_path = f'{full_path}/{live_title}_{anchor_name}'
+            else:
+                full_path = f'{full_path}/{now[:10]}_{live_title}'
+        if not os.path.exists(full_path):
+            os.makedirs(full_path)
+    except Exception as e:
+        logger.error(f"错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
+
+    platform_info = platform_registry.get(platform)
+    if platform != '自定义录制直播':
+        if enable_https_recording and real_url.startswith("http://"):
+            real_url = real_url.replace("http://", "https://")
+
+        if platform_info and platform_info.http_only:
+            real_url = real_url.replace("https://", "http://")
+
+    user_agent = ("Mozilla/5.0 (Linux; Android 11; SAMSUNG SM-G973U) AppleWebKit/537.36 ("
+                  "KHTML, like Gecko) SamsungBrowser/14.2 Chrome/87.0.4280.141 Mobile "
+                  "Safari/537.36")
+    if platform_info and platform_info.record_user_agent:
+        user_agent = platform_info.record_user_agent
+
+    rw_timeout = "15000000"
+    analyzeduration = "20000000"
+    probesize = "10000000"
+    bufsize = "8000k"
+    max_muxing_queue_size = "1024"
+    if platform_info and platform_info.overseas:
+        rw_timeout = "50000000"
+        analyzeduration = "40000000"
+        probesize = "20000000"
+        bufsize = "15000k"
+        max_muxing_queue_size = "2048"
+
+    ffmpeg_command = [
+        'ffmpeg', "-y",
+        "-v", "verbose",
+        "-rw_timeout", rw_timeout,
+        "-loglevel", "error",
+        "-hide_banner",
+        "-user_agent", user_agent,
+        "-protocol_whitelist", "rtmp,crypto,file,http,https,tcp,tls,udp,rtp,httpproxy",
+        "-thread_queue_size", "1024",
+        "-analyzeduration", analyzeduration,
+        "-probesize", probesize,
+        "-fflags", "+discardcorrupt+genpts+igndts",
+        "-i", real_url,
+        "-bufsize", bufsize,
+        "-sn", "-dn",
+        "-reconnect_delay_max", "60",
+        "-reconnect_streamed", "1",
+        "-reconnect_at_eof", "1",
+        "-max_muxing_queue_size", max_muxing_queue_size,
+        "-correct_ts_overflow", "1",
+        "-avoid_negative_ts", "1"
+    ]
+
+    headers = get_record_headers(platform, record_url)
+    if platform == 'Weverse':
+        weverse_access = weverse_tokens()[1]
+        if headers:
+            headers += f"\r\nCookie: {weverse_access}"
+        else:
+            headers = f"Cookie: {weverse_access}"
+
+    if headers:
+        ffmpeg_command.insert(11, "-headers")
+        ffmpeg_command.insert(12, headers)
+
+    if proxy_address:
+        ffmpeg_command.insert(1, "-http_proxy")
+        ffmpeg_command.insert(2, proxy_address)
+
+    recording.add(record_name)
+    start_record_time = datetime.datetime.now()
+    recording_time_list[record_name] = [start_record_time, record_quality_zh]
+    rec_info = f"\r{show_anchor_name} 准备开始录制视频: {full_path}"
+    if show_url:
+        re_plat = ('WinkTV', 'PandaTV', 'ShowRoom', 'CHZZK', 'Youtube')
+        if platform in re_plat:
+            logger.info(
+                f"{platform} | {anchor_name} | 直播源地址: {port_info.get('m3u8_url')}")
+        else:
+            logger.info(
+                f"{platform} | {anchor_name} | 直播源地址: {real_url}")
+
+    only_flv_record = False
+    if platform_info and platform_info.flv_only:
+        logger.debug(f"提示: {platform} 将强制使用FLV格式录制")
+        only_flv_record = True
+
+    only_audio_record = bool(platform_info and platform_info.audio_only)
+
+    record_save_type = video_save_type
+    if platform_info and platform_info.save_type:
+        record_save_type = platform_info.save_type
+
+    if is_flv_preferred_platform(record_url) and port_info.get('flv_url'):
+        codec = utils.get_query_params(port_info['flv_url'], "codec")
+        if codec and codec[0] == 'h265':
+            logger.warning("FLV is not supported for h265 codec, use TS format instead")
+            record_save_type = "TS"
+
+    if only_audio_record or any(i in record_save_type for i in ['MP3', 'M4A']):
+        try:
+            now = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
+            extension = "mp3" if "m4a" not in record_save_type.lower() else "m4a"
+            name_format = "_%03d" if split_video_by_time else ""
+            save_file_path = (f"{full_path}/{anchor_name}_{title_in_name}{now}"
+                              f"{name_format}.{extension}")
+
+            if split_video_by_time:
+                print(f'\r{show_anchor_name} 准备开始录制音频: {save_file_path}')
+
+                if "MP3" in record_save_type:
+                    command = [
+                        "-map", "0:a",
+                        "-c:a", "libmp3lame",
+                        "-ab", "320k",
+                        "-f", "segment",
+                        "-segment_time", split_time,
+                        "-reset_timestamps", "1",
+                        save_file_path,
+                    ]
+                else:
+                    command = [
+                        "-map", "0:a",
+                        "-c:a", "aac",
+                        "-bsf:a", "aac_adtstoasc",
+                        "-ab", "320k",
+                        "-f", "segment",
+                        "-segment_time", split_time,
+                        "-segment_format", 'mpegts',
+                        "-reset_timestamps", "1",
+                        save_file_path,
+                    ]
+
+            else:
+                if "MP3" in record_save_type:
+                    command = [
+                        "-map", "0:a",
+                        "-c:a", "libmp3lame",
+                        "-ab", "320k",
+                        save_file_path,
+                    ]
+
+                else:
+                    command = [
+                        "-map", "0:a",
+                        "-c:a", "aac",
+                        "-bsf:a", "aac_adtstoasc",
+                        "-ab", "320k",
+                        "-movflags", "+faststart",
+                        save_file_path,
+                    ]
+
+            ffmpeg_command.extend(command)
+            comment_end = check_subprocess(
+                record_name,
+                record_url,
+                ffmpeg_command,
+                record_save_type,
+                custom_script
+            )
+            if comment_end:
+                return True, record_finished
+
+        except subprocess.CalledProcessError as e:
+            logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
+            with max_request_lock:
+                error_count += 1
+
+    if only_flv_record:
+        logger.info(f"Use Direct Downloader to Download FLV Stream: {record_url}")
+        filename = anchor_name + f'_{title_in_name}' + now + '.flv'
+        save_file_path = f'{full_path}/{filename}'
+        print(f'{rec_info}/{filename}')
+
+        subs_file_path = save_file_path.rsplit('.', maxsplit=1)[0]
+        subs_thread_name = f'subs_{Path(subs_file_path).name}'
+        if create_time_file:
+            create_var[subs_thread_name] = threading.Thread(
+                target=generate_subtitles, args=(record_name, subs_file_path)
+            )
+            create_var[subs_thread_name].daemon = True
+            create_var[subs_thread_name].start()
+
+        try:
+            flv_url = port_info.get('flv_url')
+            if flv_url:
+                recording.add(record_name)
+                start_record_time = datetime.datetime.now()
+                recording_time_list[record_name] = [start_record_time, record_quality_zh]
+
+                download_success = direct_download_stream(
+                    flv_url, save_file_path, record_name, record_url, platform
+                )
+
+                if download_success:
+                    record_finished = True
+                    print(
+                        f"\n{show_anchor_name} {time.strftime('%Y-%m-%d %H:%M:%S')} 直播录制完成\n")
+
+                recording.discard(record_name)
+            else:
+                logger.debug("未找到FLV直播流，跳过录制")
+        except Exception as e:
+            clear_record_info(record_name, record_url)
+            color_obj.print_colored(
+                f"\n{anchor_name} {time.strftime('%Y-%m-%d %H:%M:%S')} 直播录制出错,请检查网络\n",
+                color_obj.RED)
+            logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
+            with max_request_lock:
+                error_count += 1
+
+    elif record_save_type == "FLV":
+        filename = anchor_name + f'_{title_in_name}' + now + ".flv"
+        print(f'{rec_info}/{filename}')
+        save_file_path = full_path + '/' + filename
+
+        try:
+            if split_video_by_time:
+                now = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
+                save_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.flv"
+                command = [
+                    "-map", "0",
+                    "-c:v", "copy",
+                    "-c:a", "copy",
+                    "-bsf:a", "aac_adtstoasc",
+                    "-f", "segment",
+                    "-segment_time", split_time,
+                    "-segment_format", "flv",
+                    "-reset_timestamps", "1",
+                    save_file_path
+                ]
+
+            else:
+                command = [
+                    "-map", "0",
+                    "-c:v", "copy",
+                    "-c:a", "copy",
+                    "-bsf:a", "aac_adtstoasc",
+                    "-f", "flv",
+                    "{path}".format(path=save_file_path),
+                ]
+            ffmpeg_command.extend(command)
+
+            comment_end = check_subprocess(
+                record_name,
+                record_url,
+                ffmpeg_command,
+                record_save_type,
+                custom_script
+            )
+            if comment_end:
+                return True, record_finished
+
+        except subprocess.CalledProcessError as e:
+            logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
+            with max_request_lock:
+                error_count += 1
+
+        try:
+            if converts_to_mp4:
+                seg_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.mp4"
+                if split_video_by_time:
+                    segment_video(
+                        save_file_path, seg_file_path,
+                        segment_format='mp4', segment_time=split_time,
+                        is_original_delete=delete_origin_file
+                    )
+                else:
+                    threading.Thread(
+                        target=converts_mp4,
+                        args=(save_file_path, delete_origin_file)
+                    ).start()
+
+            else:
+                seg_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.flv"
+                if split_video_by_time:
+                    segment_video(
+                        save_file_path, seg_file_path,
+                        segment_format='flv', segment_time=split_time,
+                        is_original_delete=delete_origin_file
+                    )
+        except Exception as e:
+            logger.error(f"转码失败: {e} ")
+
+    elif record_save_type == "MKV":
+        filename = anchor_name + f'_{title_in_name}' + now + ".mkv"
+        print(f'{rec_info}/{filename}')
+        save_file_path = full_path + '/' + filename
+
+        try:
+            if split_video_by_time:
+                now = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
+                save_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.mkv"
+                command = [
+                    "-flags", "global_header",
+                    "-c:v", "copy",
+                    "-c:a", "aac",
+                    "-map", "0",
+                    "-f", "segment",
+                    "-segment_time", split_time,
+                    "-segment_format", "matroska",
+                    "-reset_timestamps", "1",
+                    save_file_path,
+                ]
+
+            else:
+                command = [
+                    "-flags", "global_header",
+                    "-map", "0",
+                    "-c:v", "copy",
+                    "-c:a", "copy",
+                    "-f", "matroska",
+                    "{path}".format(path=save_file_path),
+                ]
+            ffmpeg_command.extend(command)
+
+            comment_end = check_subprocess(
+                record_name,
+                record_url,
+                ffmpeg_command,
+                record_save_type,
+                custom_script
+            )
+            if comment_end:
+                return True, record_finished
+
+        except subprocess.CalledProcessError as e:
+            logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
+            with max_request_lock:
+                error_count += 1
+
+    elif record_save_type == "MP4":
+        filename = anchor_name + f'_{title_in_name}' + now + ".mp4"
+        print(f'{rec_info}/{filename}')
+        save_file_path = full_path + '/' + filename
+
+        try:
+            if split_video_by_time:
+                now = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
+                save_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.mp4"
+                command = [
+                    "-c:v", "copy",
+                    "-c:a", "aac",
+                    "-map", "0",
+                    "-f", "segment",
+                    "-segment_time", split_time,
+                    "-segment_format", "mp4",
+                    "-reset_timestamps", "1",
+                    "-movflags", "+frag_keyframe+empty_moov",
+                    save_file_path,
+                ]
+
+            else:
+                command = [
+                    "-map", "0",
+                    "-c:v", "copy",
+                    "-c:a", "copy",
+                    "-f", "mp4",
+                    save_file_path,
+                ]
+
+            ffmpeg_command.extend(command)
+            comment_end = check_subprocess(
+                record_name,
+                record_url,
+                ffmpeg_command,
+                record_save_type,
+                custom_script
+            )
+            if comment_end:
+                return True, record_finished
+
+        except subprocess.CalledProcessError as e:
+            logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
+            with max_request_lock:
+                error_count += 1
+
+    else:
+        if split_video_by_time:
+            now = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
+            filename = anchor_name + f'_{title_in_name}' + now + ".ts"
+            print(f'{rec_info}/{filename}')
+
+            try:
+                native_success = False
+                if platform == 'CHZZK':
+                    save_file_path_native = f"{full_path}/{anchor_name}_{title_in_name}{now}.ts"
+                    m3u8_url = port_info.get("m3u8_url")
+
+                    native_success = check_native_download(
+                        record_name, record_url, m3u8_url, save_file_path_native, headers
+                    )
+                    if native_success:
+                        if converts_to_mp4:
+                             threading.Thread(
+                                target=converts_mp4,
+                                args=(save_file_path_native, delete_origin_file)
+                            ).start()
+                        return True, record_finished
+                    else:
+                        raise Exception("Native download failed")
+
+                save_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.ts"
+                command = [
+                    "-c:v", "copy",
+                    "-c:a", "copy",
+                    "-map", "0",
+                    "-bsf:v", "h264_mp4toannexb",
+                    "-f", "segment",
+                    "-segment_time", split_time,
+                    "-segment_format", 'mpegts',
+                    "-reset_timestamps", "1",
+                    save_file_path,
+                ]
+
+                ffmpeg_command.extend(command)
+                comment_end = check_subprocess(
+                    record_name,
+                    record_url,
+                    ffmpeg_command,
+                    record_save_type,
+                    custom_script
+                )
+                if comment_end:
+                    if converts_to_mp4:
+                        file_paths = utils.get_file_paths(os.path.dirname(save_file_path))
+                        prefix = os.path.basename(save_file_path).rsplit('_', maxsplit=1)[0]
+                        for path in file_paths:
+                            if prefix in path:
+                                try:
+                                    threading.Thread(
+                                        target=converts_mp4,
+                                        args=(path, delete_origin_file)
+                                    ).start()
+                                except subprocess.CalledProcessError as e:
+                                    logger.error(f"转码失败: {e} ")
+                    return True, record_finished
+
+            except subprocess.CalledProcessError as e:
+                logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
+                with max_request_lock:
+                    error_count += 1
+
+        else:
+            filename = anchor_name + f'_{title_in_name}' + now + ".ts"
+            print(f'{rec_info}/{filename}')
+            save_file_path = full_path + '/' + filename
+
+            try:
+                command = [
+                    "-c:v", "copy",
+                    "-c:a", "copy",
+                    "-map", "0",
+                    "-f", "mpegts",
+                    save_file_path,
+                ]
+
+                ffmpeg_command.extend(command)
+                comment_end = check_subprocess(
+                    record_name,
+                    record_url,
+                    ffmpeg_command,
+                    record_save_type,
+                    custom_script
+                )
+                if comment_end:
+                    threading.Thread(
+                        target=converts_mp4, args=(save_file_path, delete_origin_file)
+                    ).start()
+                    return True, record_finished
+
+            except subprocess.CalledProcessError as e:
+                logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
+                with max_request_lock:
+                    error_count += 1
+
+    return False, record_finished
+
+
+def record_probe_result(platform: str, error: BaseException | str | None = None) -> None:
+    if not platform:
+        return
+    breaker = platform_breakers.get(platform)
+    if error is None:
+        for url in breaker.record_success():
+            poll_scheduler.wake(url)
+    else:
+        breaker.record_failure(error if isinstance(error, str) else classify_error(error)[0])
+
+
+def proxy_platform_for(record_url: str) -> str | None:
+    if proxy_addr:
+        for platform in enable_proxy_platform_list or []:
+            if platform and platform.strip() in record_url:
+                return platform.strip()
+    for pt in extra_enable_proxy_platform_list or []:
+        if pt and pt.strip() in record_url:
+            return pt.strip()
+    return None
+
+
+async def start_record(url_data: tuple, count_variable: int = -1) -> None:
+    global error_count
+    room_platform = ''
 
     while not exit_recording:
         try:
             record_finished = False
             run_once = False
             start_pushed = False
-            new_record_url = ''
             count_time = time.time()
-            retry = 0
             record_quality_zh, record_url, anchor_name = url_data
             record_quality = get_quality_code(record_quality_zh)
-            proxy_address = proxy_addr
-            platform = '未知平台'
-            live_domain = '/'.join(record_url.split('/')[0:3])
-
-            if proxy_addr:
-                proxy_address = None
-                for platform in enable_proxy_platform_list:
-                    if platform and platform.strip() in record_url:
-                        proxy_address = proxy_addr
-                        break
-
-            if not proxy_address:
-                if extra_enable_proxy_platform_list:
-                    for pt in extra_enable_proxy_platform_list:
-                        if pt and pt.strip() in record_url:
-                            proxy_address = proxy_addr_bak or None
+            proxy_platform = proxy_platform_for(record_url)
 
             # print(f'\r代理地址:{proxy_address}')
             # print(f'\r全局代理:{global_proxy}')
             while not exit_recording:
+                # Checked before every probe, not only after a successful one, so a room that was commented out
+                # or moved to another shard stops here even while its probes keep failing
+                if record_url in url_comments:
+                    print(f"[{anchor_name or record_url}]已被注释,本条线程将会退出")
+                    clear_record_info(anchor_name or record_url, record_url)
+                    return
                 try:
-                    port_info = []
-                    if record_url.find("douyin.com/") > -1:
-                        platform = '抖音直播'
-                        with semaphore:
-                            if 'v.douyin.com' not in record_url and '/user/' not in record_url:
-                                json_data = asyncio.run(spider.get_douyin_web_stream_data(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=dy_cookie))
-                            else:
-                                json_data = asyncio.run(spider.get_douyin_app_stream_data(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=dy_cookie))
-                            port_info = asyncio.run(
-                                stream.get_douyin_stream_url(json_data, record_quality, proxy_address))
-
-                    elif record_url.find("https://www.tiktok.com/") > -1:
-                        platform = 'TikTok直播'
-                        with semaphore:
-                            if global_proxy or proxy_address:
-                                json_data = asyncio.run(spider.get_tiktok_stream_data(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=tiktok_cookie))
-                                port_info = asyncio.run(
-                                    stream.get_tiktok_stream_url(json_data, record_quality, proxy_address))
-                            else:
-                                logger.error(f"[{record_url}] 错误信息: 网络异常，请检查网络是否能正常访问TikTok平台")
-
-                    elif record_url.find("https://live.kuaishou.com/") > -1:
-                        platform = '快手直播'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_kuaishou_stream_data(
-                                url=record_url,
-                                proxy_addr=proxy_address,
-                                cookies=ks_cookie))
-                            port_info = asyncio.run(stream.get_kuaishou_stream_url(json_data, record_quality))
-
-                    elif record_url.find("https://www.huya.com/") > -1:
-                        platform = '虎牙直播'
-                        with semaphore:
-                            if record_quality not in ['OD', 'BD', 'UHD']:
-                                json_data = asyncio.run(spider.get_huya_stream_data(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=hy_cookie))
-                                port_info = asyncio.run(stream.get_huya_stream_url(json_data, record_quality))
-                            else:
-                                port_info = asyncio.run(spider.get_huya_app_stream_url(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=hy_cookie
-                                ))
-
-                    elif record_url.find("https://www.douyu.com/") > -1:
-                        platform = '斗鱼直播'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_douyu_info_data(
-                                url=record_url, proxy_addr=proxy_address, cookies=douyu_cookie))
-                            port_info = asyncio.run(stream.get_douyu_stream_url(
-                                json_data, video_quality=record_quality, cookies=douyu_cookie, proxy_addr=proxy_address
-                            ))
-
-                    elif record_url.find("https://www.yy.com/") > -1:
-                        platform = 'YY直播'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_yy_stream_data(
-                                url=record_url, proxy_addr=proxy_address, cookies=yy_cookie))
-                            port_info = asyncio.run(stream.get_yy_stream_url(json_data))
-
-                    elif record_url.find("https://live.bilibili.com/") > -1:
-                        platform = 'B站直播'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_bilibili_room_info(
-                                url=record_url, proxy_addr=proxy_address, cookies=bili_cookie))
-                            port_info = asyncio.run(stream.get_bilibili_stream_url(
-                                json_data, video_quality=record_quality, cookies=bili_cookie, proxy_addr=proxy_address))
-
-                    elif record_url.find("http://xhslink.com/") > -1 or \
-                            record_url.find("https://www.xiaohongshu.com/") > -1:
-                        platform = '小红书直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_xhs_stream_url(
-                                record_url, proxy_addr=proxy_address, cookies=xhs_cookie))
-                            retry += 1
-
-                    elif record_url.find("www.bigo.tv/") > -1 or record_url.find("slink.bigovideo.tv/") > -1:
-                        platform = 'Bigo直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_bigo_stream_url(
-                                record_url, proxy_addr=proxy_address, cookies=bigo_cookie))
-
-                    elif record_url.find("https://app.blued.cn/") > -1:
-                        platform = 'Blued直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_blued_stream_url(
-                                record_url, proxy_addr=proxy_address, cookies=blued_cookie))
-
-                    elif record_url.find("sooplive.co.kr/") > -1 or record_url.find("sooplive.com/") > -1:
-                        platform = 'SOOP'
-                        with semaphore:
-                            if global_proxy or proxy_address:
-                                json_data = asyncio.run(spider.get_sooplive_stream_data(
-                                    url=record_url, proxy_addr=proxy_address,
-                                    cookies=sooplive_cookie,
-                                    username=sooplive_username,
-                                    password=sooplive_password
-                                ))
-                                if json_data and json_data.get('new_cookies'):
-                                    utils.update_config(
-                                        config_file, 'Cookie', 'sooplive_cookie', json_data['new_cookies']
-                                    )
-                                port_info = asyncio.run(stream.get_stream_url(json_data, record_quality, spec=True))
-                            else:
-                                logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问SOOP平台")
-
-                    elif record_url.find("weverse.io/") > -1:
-                        platform = 'Weverse'
-                        with semaphore:
-                            if global_proxy or proxy_address:
-                                json_data = asyncio.run(spider.get_weverse_stream_data(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=weverse_cookie,
-                                    refresh_token=weverse_refresh_token
-                                ))
-                                if json_data and json_data.get('new_tokens'):
-                                    new_access = json_data['new_tokens']['access']
-                                    new_refresh = json_data['new_tokens']['refresh']
-                                    utils.update_config(config_file, 'Cookie', 'weverse_cookie', new_access)
-                                    utils.update_config(config_file, 'Cookie', 'weverse_refresh_token', new_refresh)
-                                    weverse_cookie = new_access
-                                    weverse_refresh_token = new_refresh
-
-                                port_info = asyncio.run(stream.get_weverse_stream_url(json_data))
-                            else:
-                                logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问Weverse平台")
-
-                    elif record_url.find("cc.163.com/") > -1:
-                        platform = '网易CC直播'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_netease_stream_data(
-                                url=record_url, cookies=netease_cookie))
-                            port_info = asyncio.run(stream.get_netease_stream_url(json_data, record_quality))
-
-                    elif record_url.find("qiandurebo.com/") > -1:
-                        platform = '千度热播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_qiandurebo_stream_data(
-                                url=record_url, proxy_addr=proxy_address, cookies=qiandurebo_cookie))
-
-                    elif record_url.find("www.pandalive.co.kr/") > -1:
-                        platform = 'PandaTV'
-                        with semaphore:
-                            if global_proxy or proxy_address:
-                                json_data = asyncio.run(spider.get_pandatv_stream_data(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=pandatv_cookie
-                                ))
-                                port_info = asyncio.run(stream.get_stream_url(json_data, record_quality, spec=True))
-                            else:
-                                logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问PandaTV直播平台")
-
-                    elif record_url.find("fm.missevan.com/") > -1:
-                        platform = '猫耳FM直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_maoerfm_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=maoerfm_cookie))
-
-                    elif record_url.find("www.winktv.co.kr/") > -1:
-                        platform = 'WinkTV'
-                        with semaphore:
-                            if global_proxy or proxy_address:
-                                json_data = asyncio.run(spider.get_winktv_stream_data(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=winktv_cookie))
-                                port_info = asyncio.run(stream.get_stream_url(json_data, record_quality, spec=True))
-                            else:
-                                logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问WinkTV直播平台")
-
-                    elif record_url.find("www.flextv.co.kr/") > -1 or record_url.find("www.ttinglive.com/") > -1:
-                        platform = 'FlexTV'
-                        with semaphore:
-                            if global_proxy or proxy_address:
-                                json_data = asyncio.run(spider.get_flextv_stream_data(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=flextv_cookie,
-                                    username=flextv_username,
-                                    password=flextv_password
-                                ))
-                                if json_data and json_data.get('new_cookies'):
-                                    utils.update_config(
-                                        config_file, 'Cookie', 'flextv_cookie', json_data['new_cookies']
-                                    )
-                                if 'play_url_list' in json_data:
-                                    port_info = asyncio.run(stream.get_stream_url(json_data, record_quality, spec=True))
-                                else:
-                                    port_info = json_data
-                            else:
-                                logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问FlexTV直播平台")
-
-                    elif record_url.find("look.163.com/") > -1:
-                        platform = 'Look直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_looklive_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=look_cookie
-                            ))
-
-                    elif record_url.find("www.popkontv.com/") > -1:
-                        platform = 'PopkonTV'
-                        with semaphore:
-                            if global_proxy or proxy_address:
-                                port_info = asyncio.run(spider.get_popkontv_stream_url(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    access_token=popkontv_access_token,
-                                    username=popkontv_username,
-                                    password=popkontv_password,
-                                    partner_code=popkontv_partner_code
-                                ))
-                                if port_info and port_info.get('new_token'):
-                                    utils.update_config(
-                                        file_path=config_file, section='Authorization', key='popkontv_token',
-                                        new_value=port_info['new_token']
-                                    )
-
-                            else:
-                                logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问PopkonTV直播平台")
-
-                    elif record_url.find("twitcasting.tv/") > -1:
-                        platform = 'TwitCasting'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_twitcasting_stream_url(
-                                url=record_url,
-                                proxy_addr=proxy_address,
-                                cookies=twitcasting_cookie,
-                                account_type=twitcasting_account_type,
-                                username=twitcasting_username,
-                                password=twitcasting_password
-                            ))
-                            port_info = asyncio.run(stream.get_stream_url(json_data, record_quality, spec=False))
-
-                            if port_info and port_info.get('new_cookies'):
-                                utils.update_config(
-                                    file_path=config_file, section='Cookie', key='twitcasting_cookie',
-                                    new_value=port_info['new_cookies']
-                                )
-
-                    elif record_url.find("live.baidu.com/") > -1:
-                        platform = '百度直播'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_baidu_stream_data(
-                                url=record_url,
-                                proxy_addr=proxy_address,
-                                cookies=baidu_cookie))
-                            port_info = asyncio.run(stream.get_stream_url(json_data, record_quality))
-
-                    elif record_url.find("weibo.com/") > -1:
-                        platform = '微博直播'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_weibo_stream_data(
-                                url=record_url, proxy_addr=proxy_address, cookies=weibo_cookie))
-                            port_info = asyncio.run(stream.get_stream_url(
-                                json_data, record_quality, hls_extra_key='m3u8_url'))
-
-                    elif record_url.find("kugou.com/") > -1:
-                        platform = '酷狗直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_kugou_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=kugou_cookie))
-
-                    elif record_url.find("www.twitch.tv/") > -1:
-                        platform = 'TwitchTV'
-                        with semaphore:
-                            if global_proxy or proxy_address:
-                                json_data = asyncio.run(spider.get_twitchtv_stream_data(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=twitch_cookie
-                                ))
-                                port_info = asyncio.run(stream.get_stream_url(json_data, record_quality, spec=True))
-                            else:
-                                logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问TwitchTV直播平台")
-
-                    elif record_url.find("www.liveme.com/") > -1:
-                        if global_proxy or proxy_address:
-                            platform = 'LiveMe'
-                            with semaphore:
-                                port_info = asyncio.run(spider.get_liveme_stream_url(
-                                    url=record_url, proxy_addr=proxy_address, cookies=liveme_cookie))
-                        else:
-                            logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问LiveMe直播平台")
-
-                    elif record_url.find("www.huajiao.com/") > -1:
-                        platform = '花椒直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_huajiao_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=huajiao_cookie))
-
-                    elif record_url.find("7u66.com/") > -1:
-                        platform = '流星直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_liuxing_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=liuxing_cookie))
-
-                    elif record_url.find("showroom-live.com/") > -1:
-                        platform = 'ShowRoom'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_showroom_stream_data(
-                                url=record_url, proxy_addr=proxy_address, cookies=showroom_cookie))
-                            port_info = asyncio.run(stream.get_stream_url(json_data, record_quality, spec=True))
-
-                    elif record_url.find("live.acfun.cn/") > -1 or record_url.find("m.acfun.cn/") > -1:
-                        platform = 'Acfun'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_acfun_stream_data(
-                                url=record_url, proxy_addr=proxy_address, cookies=acfun_cookie))
-                            port_info = asyncio.run(stream.get_stream_url(
-                                json_data, record_quality, url_type='flv', flv_extra_key='url'))
-
-                    elif record_url.find("live.tlclw.com/") > -1:
-                        platform = '畅聊直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_changliao_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=changliao_cookie))
-
-                    elif record_url.find("ybw1666.com/") > -1:
-                        platform = '音播直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_yinbo_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=yinbo_cookie))
-
-                    elif record_url.find("www.inke.cn/") > -1:
-                        platform = '映客直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_yingke_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=yingke_cookie))
-
-                    elif record_url.find("www.zhihu.com/") > -1:
-                        platform = '知乎直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_zhihu_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=zhihu_cookie))
-
-                    elif record_url.find("chzzk.naver.com/") > -1:
-                        platform = 'CHZZK'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_chzzk_stream_data(
-                                url=record_url, proxy_addr=proxy_address, cookies=chzzk_cookie))
-                            port_info = asyncio.run(stream.get_stream_url(json_data, record_quality, spec=True))
-
-                    elif record_url.find("www.haixiutv.com/") > -1:
-                        platform = '嗨秀直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_haixiu_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=haixiu_cookie))
-
-                    elif record_url.find("vvxqiu.com/") > -1:
-                        platform = 'VV星球'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_vvxqiu_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=vvxqiu_cookie))
-
-                    elif record_url.find("17.live/") > -1:
-                        platform = '17Live'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_17live_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=yiqilive_cookie))
-
-                    elif record_url.find("www.lang.live/") > -1:
-                        platform = '浪Live'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_langlive_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=langlive_cookie))
-
-                    elif record_url.find("m.pp.weimipopo.com/") > -1:
-                        platform = '漂漂直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_pplive_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=pplive_cookie))
-
-                    elif record_url.find(".6.cn/") > -1:
-                        platform = '六间房直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_6room_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=six_room_cookie))
-
-                    elif record_url.find("lehaitv.com/") > -1:
-                        platform = '乐嗨直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_haixiu_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=lehaitv_cookie))
-
-                    elif record_url.find("h.catshow168.com/") > -1:
-                        platform = '花猫直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_pplive_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=huamao_cookie))
-
-                    elif record_url.find("live.shopee") > -1 or record_url.find("shp.ee/") > -1:
-                        platform = 'shopee'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_shopee_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=shopee_cookie))
-                            if port_info.get('uid'):
-                                new_record_url = record_url.split('?')[0] + '?' + str(port_info['uid'])
-
-                    elif record_url.find("www.youtube.com/") > -1 or record_url.find("youtu.be/") > -1:
-                        platform = 'Youtube'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_youtube_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=youtube_cookie))
-                            port_info = asyncio.run(stream.get_stream_url(json_data, record_quality, spec=True))
-
-                    elif record_url.find("tb.cn") > -1:
-                        platform = '淘宝直播'
-                        with semaphore:
-                            json_data = asyncio.run(spider.get_taobao_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=taobao_cookie))
-                            port_info = asyncio.run(stream.get_stream_url(
-                                json_data, record_quality,
-                                url_type='all', hls_extra_key='hlsUrl', flv_extra_key='flvUrl'
-                            ))
-
-                    elif record_url.find("3.cn") > -1 or record_url.find("m.jd.com") > -1:
-                        platform = '京东直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_jd_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=jd_cookie))
-
-                    elif record_url.find("faceit.com/") > -1:
-                        platform = 'faceit'
-                        with semaphore:
-                            if global_proxy or proxy_address:
-                                with semaphore:
-                                    json_data = asyncio.run(spider.get_faceit_stream_data(
-                                        url=record_url, proxy_addr=proxy_address, cookies=faceit_cookie))
-                                    port_info = asyncio.run(stream.get_stream_url(json_data, record_quality, spec=True))
-                            else:
-                                logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问faceit直播平台")
-
-                    elif record_url.find("www.miguvideo.com") > -1 or record_url.find("m.miguvideo.com") > -1:
-                        platform = '咪咕直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_migu_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=migu_cookie))
-
-                    elif record_url.find("show.lailianjie.com") > -1:
-                        platform = '连接直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_lianjie_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=lianjie_cookie))
-
-                    elif record_url.find("www.imkktv.com") > -1:
-                        platform = '来秀直播'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_laixiu_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=laixiu_cookie))
-
-                    elif record_url.find("www.picarto.tv") > -1:
-                        platform = 'Picarto'
-                        with semaphore:
-                            port_info = asyncio.run(spider.get_picarto_stream_url(
-                                url=record_url, proxy_addr=proxy_address, cookies=picarto_cookie))
-
-                    elif record_url.find("instagram.com/") > -1:
-                        platform = 'Instagram'
-                        with semaphore:
-                            if global_proxy or proxy_address:
-                                json_data = asyncio.run(spider.get_instagram_stream_data(
-                                    url=record_url,
-                                    proxy_addr=proxy_address,
-                                    cookies=instagram_cookie
-                                ))
-                                port_info = asyncio.run(stream.get_instagram_stream_url(json_data))
-                            else:
-                                logger.error(f"[{record_url}] 错误信息: 网络异常，请检查本网络是否能正常访问Instagram平台")
-
-                    elif record_url.find(".m3u8") > -1 or record_url.find(".flv") > -1:
-                        platform = '自定义录制直播'
-                        port_info = {
-                            "anchor_name": platform + '_' + str(uuid.uuid4())[:8],
-                            "is_live": True,
-                            "record_url": record_url,
-                        }
-                        if '.flv' in record_url:
-                            port_info['flv_url'] = record_url
-                        else:
-                            port_info['m3u8_url'] = record_url
-
+                    # Chosen again every round so a failed proxy is replaced by a healthy one
+                    proxy_address = proxy_pool.choose(proxy_platform) if proxy_platform else None
+                    cached = stream_cache.take_reconnect(record_url, record_quality)
+                    if cached:
+                        platform, port_info, new_record_url = cached
+                        print(f"\r{record_url} 录制中断, 使用缓存的直播流地址重连")
                     else:
-                        logger.error(f'{record_url} {platform}直播地址')
-                        return
+                        breaker = platform_breakers.get(room_platform) if room_platform else None
+                        if breaker and not breaker.allow(record_url):
+                            retry_after = max(breaker.retry_after(), 5) + abs(poll_scheduler.jitter(record_url, 5))
+                            print(f"\r{record_url} [{room_platform}]平台熔断中, {retry_after:.0f}秒后重试")
+                            await poll_scheduler.wait(record_url, retry_after)
+                            continue
+
+                        if startup_timer.finish('首次探测'):
+                            logger.info(startup_timer.format())
+                        platform, port_info, new_record_url = await fetch_port_info(
+                            record_url, record_quality, proxy_address)
+                        if port_info is None:
+                            return
+                        room_platform = platform
+                        if port_info.get('is_live'):
+                            stream_cache.put(record_url, record_quality, port_info,
+                                             (platform, port_info, new_record_url))
 
                     if anchor_name:
                         if '主播:' in anchor_name:
@@ -1151,10 +1594,12 @@ def start_record(url_data: tuple, count_variable: int = -1) -> None:
 
                     if not port_info.get("anchor_name", ''):
                         print(f'序号{count_variable} 网址内容获取失败,进行重试中...获取失败的地址是:{url_data}')
+                        record_probe_result(platform, 'empty')
                         with max_request_lock:
                             error_count += 1
-                            error_window.append(1)
                     else:
+                        if not cached:
+                            record_probe_result(platform)
                         anchor_name = clean_name(anchor_name)
                         show_anchor_name = anchor_name
                         if platform:
@@ -1175,6 +1620,7 @@ def start_record(url_data: tuple, count_variable: int = -1) -> None:
                                 need_update_line_list.append(f'{record_url}|{record_url},主播: {anchor_name.strip()}')
                             run_once = True
 
+                        live_history.update(record_url, bool(port_info['is_live']))
                         push_at = datetime.datetime.today().strftime('%Y-%m-%d %H:%M:%S')
                         if port_info['is_live'] is False:
                             if not exit_recording:
@@ -1188,11 +1634,7 @@ def start_record(url_data: tuple, count_variable: int = -1) -> None:
 
                                     push_content = (push_content.replace('[直播间名称]', record_name).
                                                     replace('[时间]', push_at))
-                                    threading.Thread(
-                                        target=push_message,
-                                        args=(record_name, record_url, push_content.replace(r'\n', '\n')),
-                                        daemon=True
-                                    ).start()
+                                    send_push(record_name, record_url, push_content.replace(r'\n', '\n'))
                                 start_pushed = False
 
                         else:
@@ -1207,550 +1649,43 @@ def start_record(url_data: tuple, count_variable: int = -1) -> None:
 
                                     push_content = (push_content.replace('[直播间名称]', record_name).
                                                     replace('[时间]', push_at))
-                                    threading.Thread(
-                                        target=push_message,
-                                        args=(record_name, record_url, push_content.replace(r'\n', '\n')),
-                                        daemon=True
-                                    ).start()
+                                    send_push(record_name, record_url, push_content.replace(r'\n', '\n'))
                                 start_pushed = True
 
                             if disable_record:
-                                time.sleep(push_check_seconds)
+                                await poll_scheduler.wait(record_url, push_check_seconds)
                                 continue
 
                             real_url = select_source_url(record_url, port_info)
-                            full_path = f'{default_path}/{platform}'
                             if real_url:
-                                now = datetime.datetime.today().strftime("%Y-%m-%d_%H-%M-%S")
-                                live_title = port_info.get('title')
-                                title_in_name = ''
-                                if live_title:
-                                    live_title = clean_name(live_title)
-                                    title_in_name = live_title + '_' if filename_by_title else ''
-
+                                recording_urls.add(record_url)
                                 try:
-                                    if len(video_save_path) > 0:
-                                        if not video_save_path.endswith(('/', '\\')):
-                                            full_path = f'{video_save_path}/{platform}'
-                                        else:
-                                            full_path = f'{video_save_path}{platform}'
-
-                                    full_path = full_path.replace("\\", '/')
-                                    if folder_by_author:
-                                        full_path = f'{full_path}/{anchor_name}'
-                                    if folder_by_time:
-                                        full_path = f'{full_path}/{now[:10]}'
-                                    if folder_by_title and port_info.get('title'):
-                                        if folder_by_time:
-                                            full_path = f'{full_path}/{live_title}_{anchor_name}'
-                                        else:
-                                            full_path = f'{full_path}/{now[:10]}_{live_title}'
-                                    if not os.path.exists(full_path):
-                                        os.makedirs(full_path)
-                                except Exception as e:
-                                    logger.error(f"错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
-
-                                if platform != '自定义录制直播':
-                                    if enable_https_recording and real_url.startswith("http://"):
-                                        real_url = real_url.replace("http://", "https://")
-
-                                    http_record_list = ['shopee', "migu"]
-                                    if platform in http_record_list:
-                                        real_url = real_url.replace("https://", "http://")
-
-                                user_agent = ("Mozilla/5.0 (Linux; Android 11; SAMSUNG SM-G973U) AppleWebKit/537.36 ("
-                                              "KHTML, like Gecko) SamsungBrowser/14.2 Chrome/87.0.4280.141 Mobile "
-                                              "Safari/537.36")
-                                if platform == 'B站直播':
-                                    user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:127.0) Gecko/20100101 Firefox/127.0"
-
-                                rw_timeout = "15000000"
-                                analyzeduration = "20000000"
-                                probesize = "10000000"
-                                bufsize = "8000k"
-                                max_muxing_queue_size = "1024"
-                                for pt_host in overseas_platform_host:
-                                    if pt_host in record_url:
-                                        rw_timeout = "50000000"
-                                        analyzeduration = "40000000"
-                                        probesize = "20000000"
-                                        bufsize = "15000k"
-                                        max_muxing_queue_size = "2048"
-                                        break
-
-                                ffmpeg_command = [
-                                    'ffmpeg', "-y",
-                                    "-v", "verbose",
-                                    "-rw_timeout", rw_timeout,
-                                    "-loglevel", "error",
-                                    "-hide_banner",
-                                    "-user_agent", user_agent,
-                                    "-protocol_whitelist", "rtmp,crypto,file,http,https,tcp,tls,udp,rtp,httpproxy",
-                                    "-thread_queue_size", "1024",
-                                    "-analyzeduration", analyzeduration,
-                                    "-probesize", probesize,
-                                    "-fflags", "+discardcorrupt+genpts+igndts",
-                                    "-i", real_url,
-                                    "-bufsize", bufsize,
-                                    "-sn", "-dn",
-                                    "-reconnect_delay_max", "60",
-                                    "-reconnect_streamed", "1",
-                                    "-reconnect_at_eof", "1",
-                                    "-max_muxing_queue_size", max_muxing_queue_size,
-                                    "-correct_ts_overflow", "1",
-                                    "-avoid_negative_ts", "1"
-                                ]
-
-                                headers = get_record_headers(platform, record_url)
-                                if platform == 'Weverse':
-                                    if headers:
-                                        headers += f"\r\nCookie: {weverse_cookie}"
-                                    else:
-                                        headers = f"Cookie: {weverse_cookie}"
-
-                                if headers:
-                                    ffmpeg_command.insert(11, "-headers")
-                                    ffmpeg_command.insert(12, headers)
-
-                                if proxy_address:
-                                    ffmpeg_command.insert(1, "-http_proxy")
-                                    ffmpeg_command.insert(2, proxy_address)
-
-                                recording.add(record_name)
-                                start_record_time = datetime.datetime.now()
-                                recording_time_list[record_name] = [start_record_time, record_quality_zh]
-                                rec_info = f"\r{show_anchor_name} 准备开始录制视频: {full_path}"
-                                if show_url:
-                                    re_plat = ('WinkTV', 'PandaTV', 'ShowRoom', 'CHZZK', 'Youtube')
-                                    if platform in re_plat:
-                                        logger.info(
-                                            f"{platform} | {anchor_name} | 直播源地址: {port_info.get('m3u8_url')}")
-                                    else:
-                                        logger.info(
-                                            f"{platform} | {anchor_name} | 直播源地址: {real_url}")
-
-                                only_flv_record = False
-                                only_flv_platform_list = ['shopee', '花椒直播']
-                                if platform in only_flv_platform_list:
-                                    logger.debug(f"提示: {platform} 将强制使用FLV格式录制")
-                                    only_flv_record = True
-
-                                only_audio_record = False
-                                only_audio_platform_list = ['猫耳FM直播', 'Look直播']
-                                if platform in only_audio_platform_list:
-                                    only_audio_record = True
-
-                                record_save_type = video_save_type
-                                if platform in ['Youtube', 'CHZZK']:
-                                    record_save_type = "TS"
-
-                                if is_flv_preferred_platform(record_url) and port_info.get('flv_url'):
-                                    codec = utils.get_query_params(port_info['flv_url'], "codec")
-                                    if codec and codec[0] == 'h265':
-                                        logger.warning("FLV is not supported for h265 codec, use TS format instead")
-                                        record_save_type = "TS"
-
-                                if only_audio_record or any(i in record_save_type for i in ['MP3', 'M4A']):
-                                    try:
-                                        now = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
-                                        extension = "mp3" if "m4a" not in record_save_type.lower() else "m4a"
-                                        name_format = "_%03d" if split_video_by_time else ""
-                                        save_file_path = (f"{full_path}/{anchor_name}_{title_in_name}{now}"
-                                                          f"{name_format}.{extension}")
-
-                                        if split_video_by_time:
-                                            print(f'\r{show_anchor_name} 准备开始录制音频: {save_file_path}')
-
-                                            if "MP3" in record_save_type:
-                                                command = [
-                                                    "-map", "0:a",
-                                                    "-c:a", "libmp3lame",
-                                                    "-ab", "320k",
-                                                    "-f", "segment",
-                                                    "-segment_time", split_time,
-                                                    "-reset_timestamps", "1",
-                                                    save_file_path,
-                                                ]
-                                            else:
-                                                command = [
-                                                    "-map", "0:a",
-                                                    "-c:a", "aac",
-                                                    "-bsf:a", "aac_adtstoasc",
-                                                    "-ab", "320k",
-                                                    "-f", "segment",
-                                                    "-segment_time", split_time,
-                                                    "-segment_format", 'mpegts',
-                                                    "-reset_timestamps", "1",
-                                                    save_file_path,
-                                                ]
-
-                                        else:
-                                            if "MP3" in record_save_type:
-                                                command = [
-                                                    "-map", "0:a",
-                                                    "-c:a", "libmp3lame",
-                                                    "-ab", "320k",
-                                                    save_file_path,
-                                                ]
-
-                                            else:
-                                                command = [
-                                                    "-map", "0:a",
-                                                    "-c:a", "aac",
-                                                    "-bsf:a", "aac_adtstoasc",
-                                                    "-ab", "320k",
-                                                    "-movflags", "+faststart",
-                                                    save_file_path,
-                                                ]
-
-                                        ffmpeg_command.extend(command)
-                                        comment_end = check_subprocess(
-                                            record_name,
-                                            record_url,
-                                            ffmpeg_command,
-                                            record_save_type,
-                                            custom_script
-                                        )
-                                        if comment_end:
-                                            return
-
-                                    except subprocess.CalledProcessError as e:
-                                        logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
-                                        with max_request_lock:
-                                            error_count += 1
-                                            error_window.append(1)
-
-                                if only_flv_record:
-                                    logger.info(f"Use Direct Downloader to Download FLV Stream: {record_url}")
-                                    filename = anchor_name + f'_{title_in_name}' + now + '.flv'
-                                    save_file_path = f'{full_path}/{filename}'
-                                    print(f'{rec_info}/{filename}')
-
-                                    subs_file_path = save_file_path.rsplit('.', maxsplit=1)[0]
-                                    subs_thread_name = f'subs_{Path(subs_file_path).name}'
-                                    if create_time_file:
-                                        create_var[subs_thread_name] = threading.Thread(
-                                            target=generate_subtitles, args=(record_name, subs_file_path)
-                                        )
-                                        create_var[subs_thread_name].daemon = True
-                                        create_var[subs_thread_name].start()
-
-                                    try:
-                                        flv_url = port_info.get('flv_url')
-                                        if flv_url:
-                                            recording.add(record_name)
-                                            start_record_time = datetime.datetime.now()
-                                            recording_time_list[record_name] = [start_record_time, record_quality_zh]
-
-                                            download_success = direct_download_stream(
-                                                flv_url, save_file_path, record_name, record_url, platform
-                                            )
-
-                                            if download_success:
-                                                record_finished = True
-                                                print(
-                                                    f"\n{show_anchor_name} {time.strftime('%Y-%m-%d %H:%M:%S')} 直播录制完成\n")
-
-                                            recording.discard(record_name)
-                                        else:
-                                            logger.debug("未找到FLV直播流，跳过录制")
-                                    except Exception as e:
-                                        clear_record_info(record_name, record_url)
-                                        color_obj.print_colored(
-                                            f"\n{anchor_name} {time.strftime('%Y-%m-%d %H:%M:%S')} 直播录制出错,请检查网络\n",
-                                            color_obj.RED)
-                                        logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
-                                        with max_request_lock:
-                                            error_count += 1
-                                            error_window.append(1)
-
-                                elif record_save_type == "FLV":
-                                    filename = anchor_name + f'_{title_in_name}' + now + ".flv"
-                                    print(f'{rec_info}/{filename}')
-                                    save_file_path = full_path + '/' + filename
-
-                                    try:
-                                        if split_video_by_time:
-                                            now = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
-                                            save_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.flv"
-                                            command = [
-                                                "-map", "0",
-                                                "-c:v", "copy",
-                                                "-c:a", "copy",
-                                                "-bsf:a", "aac_adtstoasc",
-                                                "-f", "segment",
-                                                "-segment_time", split_time,
-                                                "-segment_format", "flv",
-                                                "-reset_timestamps", "1",
-                                                save_file_path
-                                            ]
-
-                                        else:
-                                            command = [
-                                                "-map", "0",
-                                                "-c:v", "copy",
-                                                "-c:a", "copy",
-                                                "-bsf:a", "aac_adtstoasc",
-                                                "-f", "flv",
-                                                "{path}".format(path=save_file_path),
-                                            ]
-                                        ffmpeg_command.extend(command)
-
-                                        comment_end = check_subprocess(
-                                            record_name,
-                                            record_url,
-                                            ffmpeg_command,
-                                            record_save_type,
-                                            custom_script
-                                        )
-                                        if comment_end:
-                                            return
-
-                                    except subprocess.CalledProcessError as e:
-                                        logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
-                                        with max_request_lock:
-                                            error_count += 1
-                                            error_window.append(1)
-
-                                    try:
-                                        if converts_to_mp4:
-                                            seg_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.mp4"
-                                            if split_video_by_time:
-                                                segment_video(
-                                                    save_file_path, seg_file_path,
-                                                    segment_format='mp4', segment_time=split_time,
-                                                    is_original_delete=delete_origin_file
-                                                )
-                                            else:
-                                                threading.Thread(
-                                                    target=converts_mp4,
-                                                    args=(save_file_path, delete_origin_file)
-                                                ).start()
-
-                                        else:
-                                            seg_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.flv"
-                                            if split_video_by_time:
-                                                segment_video(
-                                                    save_file_path, seg_file_path,
-                                                    segment_format='flv', segment_time=split_time,
-                                                    is_original_delete=delete_origin_file
-                                                )
-                                    except Exception as e:
-                                        logger.error(f"转码失败: {e} ")
-
-                                elif record_save_type == "MKV":
-                                    filename = anchor_name + f'_{title_in_name}' + now + ".mkv"
-                                    print(f'{rec_info}/{filename}')
-                                    save_file_path = full_path + '/' + filename
-
-                                    try:
-                                        if split_video_by_time:
-                                            now = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
-                                            save_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.mkv"
-                                            command = [
-                                                "-flags", "global_header",
-                                                "-c:v", "copy",
-                                                "-c:a", "aac",
-                                                "-map", "0",
-                                                "-f", "segment",
-                                                "-segment_time", split_time,
-                                                "-segment_format", "matroska",
-                                                "-reset_timestamps", "1",
-                                                save_file_path,
-                                            ]
-
-                                        else:
-                                            command = [
-                                                "-flags", "global_header",
-                                                "-map", "0",
-                                                "-c:v", "copy",
-                                                "-c:a", "copy",
-                                                "-f", "matroska",
-                                                "{path}".format(path=save_file_path),
-                                            ]
-                                        ffmpeg_command.extend(command)
-
-                                        comment_end = check_subprocess(
-                                            record_name,
-                                            record_url,
-                                            ffmpeg_command,
-                                            record_save_type,
-                                            custom_script
-                                        )
-                                        if comment_end:
-                                            return
-
-                                    except subprocess.CalledProcessError as e:
-                                        logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
-                                        with max_request_lock:
-                                            error_count += 1
-                                            error_window.append(1)
-
-                                elif record_save_type == "MP4":
-                                    filename = anchor_name + f'_{title_in_name}' + now + ".mp4"
-                                    print(f'{rec_info}/{filename}')
-                                    save_file_path = full_path + '/' + filename
-
-                                    try:
-                                        if split_video_by_time:
-                                            now = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
-                                            save_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.mp4"
-                                            command = [
-                                                "-c:v", "copy",
-                                                "-c:a", "aac",
-                                                "-map", "0",
-                                                "-f", "segment",
-                                                "-segment_time", split_time,
-                                                "-segment_format", "mp4",
-                                                "-reset_timestamps", "1",
-                                                "-movflags", "+frag_keyframe+empty_moov",
-                                                save_file_path,
-                                            ]
-
-                                        else:
-                                            command = [
-                                                "-map", "0",
-                                                "-c:v", "copy",
-                                                "-c:a", "copy",
-                                                "-f", "mp4",
-                                                save_file_path,
-                                            ]
-
-                                        ffmpeg_command.extend(command)
-                                        comment_end = check_subprocess(
-                                            record_name,
-                                            record_url,
-                                            ffmpeg_command,
-                                            record_save_type,
-                                            custom_script
-                                        )
-                                        if comment_end:
-                                            return
-
-                                    except subprocess.CalledProcessError as e:
-                                        logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
-                                        with max_request_lock:
-                                            error_count += 1
-                                            error_window.append(1)
-
-                                else:
-                                    if split_video_by_time:
-                                        now = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime())
-                                        filename = anchor_name + f'_{title_in_name}' + now + ".ts"
-                                        print(f'{rec_info}/{filename}')
-
-                                        try:
-                                            native_success = False
-                                            if platform == 'CHZZK':
-                                                save_file_path_native = f"{full_path}/{anchor_name}_{title_in_name}{now}.ts"
-                                                m3u8_url = port_info.get("m3u8_url")
-
-                                                native_success = check_native_download(
-                                                    record_name, record_url, m3u8_url, save_file_path_native, headers
-                                                )
-                                                if native_success:
-                                                    if converts_to_mp4:
-                                                         threading.Thread(
-                                                            target=converts_mp4,
-                                                            args=(save_file_path_native, delete_origin_file)
-                                                        ).start()
-                                                    return
-                                                else:
-                                                    raise Exception("Native download failed")
-
-                                            save_file_path = f"{full_path}/{anchor_name}_{title_in_name}{now}_%03d.ts"
-                                            command = [
-                                                "-c:v", "copy",
-                                                "-c:a", "copy",
-                                                "-map", "0",
-                                                "-bsf:v", "h264_mp4toannexb",
-                                                "-f", "segment",
-                                                "-segment_time", split_time,
-                                                "-segment_format", 'mpegts',
-                                                "-reset_timestamps", "1",
-                                                save_file_path,
-                                            ]
-
-                                            ffmpeg_command.extend(command)
-                                            comment_end = check_subprocess(
-                                                record_name,
-                                                record_url,
-                                                ffmpeg_command,
-                                                record_save_type,
-                                                custom_script
-                                            )
-                                            if comment_end:
-                                                if converts_to_mp4:
-                                                    file_paths = utils.get_file_paths(os.path.dirname(save_file_path))
-                                                    prefix = os.path.basename(save_file_path).rsplit('_', maxsplit=1)[0]
-                                                    for path in file_paths:
-                                                        if prefix in path:
-                                                            try:
-                                                                threading.Thread(
-                                                                    target=converts_mp4,
-                                                                    args=(path, delete_origin_file)
-                                                                ).start()
-                                                            except subprocess.CalledProcessError as e:
-                                                                logger.error(f"转码失败: {e} ")
-                                                return
-
-                                        except subprocess.CalledProcessError as e:
-                                            logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
-                                            with max_request_lock:
-                                                error_count += 1
-                                                error_window.append(1)
-
-                                    else:
-                                        filename = anchor_name + f'_{title_in_name}' + now + ".ts"
-                                        print(f'{rec_info}/{filename}')
-                                        save_file_path = full_path + '/' + filename
-
-                                        try:
-                                            command = [
-                                                "-c:v", "copy",
-                                                "-c:a", "copy",
-                                                "-map", "0",
-                                                "-f", "mpegts",
-                                                save_file_path,
-                                            ]
-
-                                            ffmpeg_command.extend(command)
-                                            comment_end = check_subprocess(
-                                                record_name,
-                                                record_url,
-                                                ffmpeg_command,
-                                                record_save_type,
-                                                custom_script
-                                            )
-                                            if comment_end:
-                                                threading.Thread(
-                                                    target=converts_mp4, args=(save_file_path, delete_origin_file)
-                                                ).start()
-                                                return
-
-                                        except subprocess.CalledProcessError as e:
-                                            logger.error(f"[{record_name}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
-                                            with max_request_lock:
-                                                error_count += 1
-                                                error_window.append(1)
-
+                                    comment_end, record_finished = await engine.run_worker(
+                                        record_name, record_live_stream, record_url, real_url, platform, port_info,
+                                        anchor_name, record_name, show_anchor_name, record_quality_zh, proxy_address
+                                    )
+                                finally:
+                                    recording_urls.discard(record_url)
+                                if comment_end:
+                                    return
                                 count_time = time.time()
+                                if stream_cache.wants_reconnect(record_url):
+                                    continue
 
                 except Exception as e:
                     logger.error(f"[{record_url}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
+                    record_probe_result(room_platform, e)
                     with max_request_lock:
                         error_count += 1
-                        error_window.append(1)
 
-                num = random.randint(-5, 5) + delay_default
+                if adaptive_polling:
+                    num = round(poll_scheduler.jitter(record_url, 5)) + adaptive_poller.next_interval(record_url)
+                else:
+                    num = round(poll_scheduler.jitter(record_url, 5)) + delay_default
                 if num < 0:
                     num = 0
                 x = num
 
-                if error_count > 20:
-                    x = x + 60
-                    color_obj.print_colored("\r瞬时错误太多,延迟加60秒", color_obj.YELLOW)
-
                 # 这里是.如果录制结束后,循环时间会暂时变成30s后检测一遍. 这样一定程度上防止主播卡顿造成少录
                 # 当30秒过后检测一遍后. 会回归正常设置的循环秒数
                 if record_finished:
@@ -1763,19 +1698,19 @@ def start_record(url_data: tuple, count_variable: int = -1) -> None:
                     x = num
 
                 # 这里是正常循环
-                while x:
-                    x = x - 1
-                    if loop_time:
-                        print(f'\r{anchor_name}循环等待{x}秒 ', end="")
-                    time.sleep(1)
                 if loop_time:
+                    while x:
+                        x = x - 1
+                        print(f'\r{anchor_name}循环等待{x}秒 ', end="")
+                        await asyncio.sleep(1)
                     print('\r检测直播间中...', end="")
+                else:
+                    await poll_scheduler.wait(record_url, x)
         except Exception as e:
             logger.error(f"[{record_url}] 错误信息: {e} 发生错误的行数: {e.__traceback__.tb_lineno}")
             with max_request_lock:
                 error_count += 1
-                error_window.append(1)
-            time.sleep(2)
+            await asyncio.sleep(2)
 
 
 def backup_file(file_path: str, backup_dir_path: str, limit_counts: int = 6) -> None:
@@ -1824,25 +1759,52 @@ def backup_file_start() -> None:
 
 
 def check_ffmpeg_existence() -> bool:
-    try:
-        result = subprocess.run(['ffmpeg', '-version'], check=True, capture_output=True, text=True)
-        if result.returncode == 0:
-            lines = result.stdout.splitlines()
-            version_line = lines[0]
-            built_line = lines[1]
-            print(version_line)
-            print(built_line)
-    except subprocess.CalledProcessError as e:
-        logger.error(e)
-    except FileNotFoundError:
-        pass
-    finally:
-        if check_ffmpeg():
+    probes = capability_cache.probes
+    version_lines = capability_cache.tool('ffmpeg', ['-version'])
+    if version_lines:
+        for line in version_lines:
+            print(line)
+    if check_ffmpeg():
+        # The pause only gives a freshly probed ffmpeg time to settle, a cached result needs none
+        if capability_cache.probes != probes:
             time.sleep(1)
-            return True
+        return True
     return False
 
 
+def check_global_proxy(show: bool = True) -> bool:
+    try:
+        if show:
+            print('系统代理检测中，请耐心等待...')
+        urllib.request.urlopen("https://www.google.com/", timeout=15)
+        capability_cache.remember('global_proxy', True)
+        if show:
+            print('\r全局/规则网络代理已开启√')
+            pd = ProxyDetector()
+            if pd.is_proxy_enabled():
+                proxy_info = pd.get_proxy_info()
+                print("System Proxy: http://{}:{}".format(proxy_info.ip, proxy_info.port))
+        return True
+    except HTTPError as err:
+        print(f"HTTP error occurred: {err.code} - {err.reason}")
+    except URLError:
+        capability_cache.remember('global_proxy', False)
+        if show:
+            color_obj.print_colored(
+                "INFO：未检测到全局/规则网络代理，请检查代理配置（若无需录制海外直播请忽略此条提示）", color_obj.YELLOW)
+    except Exception as err:
+        print("An unexpected error occurred:", err)
+    return False
+
+
+def refresh_global_proxy() -> None:
+    global global_proxy
+    detected = check_global_proxy(show=False)
+    if detected != global_proxy:
+        global_proxy = detected
+        logger.info(f"全局/规则网络代理检测完成: {'已开启' if detected else '未开启'}")
+
+
 # --------------------------初始化程序-------------------------------------
 print("-----------------------------------------------------")
 print("|                DouyinLiveRecorder                 |")
@@ -1852,13 +1814,16 @@ print(f"版本号: {version}")
 print("GitHub: https://github.com/ihmily/DouyinLiveRecorder")
 print(f'支持平台: {platforms}')
 print('.....................................................')
+startup_timer.mark('导入模块')
 if not check_ffmpeg_existence():
     logger.error("缺少ffmpeg无法进行录制，程序退出")
     sys.exit(1)
 os.makedirs(os.path.dirname(config_file), exist_ok=True)
-t3 = threading.Thread(target=backup_file_start, args=(), daemon=False)
-t3.start()
-utils.remove_duplicate_lines(url_config_file)
+if not shard_worker:
+    t3 = threading.Thread(target=backup_file_start, args=(), daemon=False)
+    t3.start()
+    utils.remove_duplicate_lines(url_config_file)
+startup_timer.mark('检查ffmpeg')
 
 
 def read_config_value(config_parser: configparser.RawConfigParser, section: str, option: str, default_value: Any) \
@@ -1879,6 +1844,8 @@ def read_config_value(config_parser: configparser.RawConfigParser, section: str,
                 config_parser.add_section('账号密码')
             return config_parser.get(section, option)
         except (configparser.NoSectionError, configparser.NoOptionError):
+            if shard_worker:
+                return default_value
             config_parser.set(section, option, str(default_value))
             with open(config_file, 'w', encoding=text_encoding) as f:
                 config_parser.write(f)
@@ -1894,25 +1861,18 @@ if language and 'en' not in language.lower():
 
     builtins.print = translated_print
 
-try:
-    if skip_proxy_check:
-        global_proxy = True
-    else:
-        print('系统代理检测中，请耐心等待...')
-        response_g = urllib.request.urlopen("https://www.google.com/", timeout=15)
-        global_proxy = True
-        print('\r全局/规则网络代理已开启√')
-        pd = ProxyDetector()
-        if pd.is_proxy_enabled():
-            proxy_info = pd.get_proxy_info()
-            print("System Proxy: http://{}:{}".format(proxy_info.ip, proxy_info.port))
-except HTTPError as err:
-    print(f"HTTP error occurred: {err.code} - {err.reason}")
-except URLError:
-    color_obj.print_colored("INFO：未检测到全局/规则网络代理，请检查代理配置（若无需录制海外直播请忽略此条提示）",
-                            color_obj.YELLOW)
-except Exception as err:
-    print("An unexpected error occurred:", err)
+fast_start = options.get(read_config_value(config, '录制设置', '快速启动(是/否)', "否"), False)
+if shard_worker:
+    global_proxy = shard_worker.global_proxy
+elif skip_proxy_check:
+    global_proxy = True
+elif fast_start:
+    # Start with the last known result and let the real check finish in the background
+    global_proxy = capability_cache.recall('global_proxy', 86400, False)
+    threading.Thread(target=refresh_global_proxy, daemon=True).start()
+else:
+    global_proxy = check_global_proxy()
+startup_timer.mark('代理检测')
 
 while not exit_recording:
 
@@ -1926,7 +1886,7 @@ while not exit_recording:
             with open(url_config_file, 'r', encoding=text_encoding) as file:
                 ini_URL_content = file.read().strip()
 
-        if not ini_URL_content.strip():
+        if not ini_URL_content.strip() and not shard_worker:
             input_url = input('请输入要录制的主播直播间网址（尽量使用PC网页端的直播间地址）:\n')
             with open(url_config_file, 'w', encoding=text_encoding) as file:
                 file.write(input_url)
@@ -1944,10 +1904,31 @@ while not exit_recording:
     use_proxy = options.get(read_config_value(config, '录制设置', '是否使用代理ip(是/否)', "是"), False)
     proxy_addr_bak = read_config_value(config, '录制设置', '代理地址', "")
     proxy_addr = None if not use_proxy else proxy_addr_bak
+    proxy_pool.configure(ProxyPool.parse(proxy_addr_bak))
     max_request = int(read_config_value(config, '录制设置', '同一时间访问网络的线程数', 3))
-    semaphore = threading.Semaphore(max_request)
+    rate_limit_rules = read_config_value(
+        config, '录制设置', '平台限流规则(平台或域名:并发数:每秒请求数,逗号分隔)', "")
+    adaptive_concurrency = options.get(read_config_value(config, '录制设置', '是否启用动态并发调节(是/否)', "是"), True)
+    adaptive_latency_target = float(read_config_value(config, '录制设置', '动态并发延迟阈值(秒)', 8))
+    rate_limiter.configure(max_request, parse_rules(rate_limit_rules), adaptive=adaptive_concurrency,
+                           latency_target=adaptive_latency_target)
     delay_default = int(read_config_value(config, '录制设置', '循环时间(秒)', 120))
     local_delay_default = int(read_config_value(config, '录制设置', '排队读取网址时间(秒)', 0))
+    adaptive_polling = options.get(read_config_value(config, '录制设置', '是否启用智能轮询(是/否)', "否"), False)
+    adaptive_poll_floor = int(read_config_value(config, '录制设置', '智能轮询最小间隔(秒)', 30))
+    adaptive_poll_ceiling = int(read_config_value(config, '录制设置', '智能轮询最大间隔(秒)', 3600))
+    adaptive_poller.configure(delay_default, adaptive_poll_floor, adaptive_poll_ceiling)
+    batch_probe = options.get(read_config_value(config, '录制设置', '是否启用批量探测(是/否)', "是"), True)
+    batch_probe_window = float(read_config_value(config, '录制设置', '批量探测合并窗口(秒)', 1))
+    batch_probe_max_age = float(read_config_value(config, '录制设置', '批量探测结果有效期(秒)', 30))
+    batch_prober.configure(batch_probe_window, batch_probe_max_age)
+    breaker_threshold = int(read_config_value(config, '录制设置', '熔断连续失败次数(0为不启用)', 5))
+    breaker_reset_timeout = float(read_config_value(config, '录制设置', '熔断恢复等待(秒)', 60))
+    platform_breakers.configure(breaker_threshold, breaker_reset_timeout)
+    stream_cache.configure(float(read_config_value(config, '录制设置', '直播流缓存有效期(秒,0为不启用)', 60)))
+    dns_cache.configure(float(read_config_value(config, '录制设置', 'DNS缓存有效期(秒,0为不启用)', 300)))
+    engine.lag_monitor.threshold = float(read_config_value(config, '录制设置', '事件循环阻塞告警阈值(秒,0为不启用)', 0.5))
+    endpoint_breakers.configure(breaker_threshold, breaker_reset_timeout)
     loop_time = options.get(read_config_value(config, '录制设置', '是否显示循环秒数', "否"), False)
     show_url = options.get(read_config_value(config, '录制设置', '是否显示直播源地址', "否"), False)
     split_video_by_time = options.get(read_config_value(config, '录制设置', '分段录制是否开启', "否"), False)
@@ -2007,57 +1988,8 @@ while not exit_recording:
     twitcasting_username = read_config_value(config, '账号密码', 'twitcasting账号', '')
     twitcasting_password = read_config_value(config, '账号密码', 'twitcasting密码', '')
     popkontv_access_token = read_config_value(config, 'Authorization', 'popkontv_token', '')
-    dy_cookie = read_config_value(config, 'Cookie', '抖音cookie', '')
-    ks_cookie = read_config_value(config, 'Cookie', '快手cookie', '')
-    tiktok_cookie = read_config_value(config, 'Cookie', 'tiktok_cookie', '')
-    hy_cookie = read_config_value(config, 'Cookie', '虎牙cookie', '')
-    douyu_cookie = read_config_value(config, 'Cookie', '斗鱼cookie', '')
-    yy_cookie = read_config_value(config, 'Cookie', 'yy_cookie', '')
-    bili_cookie = read_config_value(config, 'Cookie', 'B站cookie', '')
-    xhs_cookie = read_config_value(config, 'Cookie', '小红书cookie', '')
-    bigo_cookie = read_config_value(config, 'Cookie', 'bigo_cookie', '')
-    blued_cookie = read_config_value(config, 'Cookie', 'blued_cookie', '')
-    sooplive_cookie = read_config_value(config, 'Cookie', 'sooplive_cookie', '')
-    netease_cookie = read_config_value(config, 'Cookie', 'netease_cookie', '')
-    qiandurebo_cookie = read_config_value(config, 'Cookie', '千度热播_cookie', '')
-    pandatv_cookie = read_config_value(config, 'Cookie', 'pandatv_cookie', '')
-    maoerfm_cookie = read_config_value(config, 'Cookie', '猫耳fm_cookie', '')
-    winktv_cookie = read_config_value(config, 'Cookie', 'winktv_cookie', '')
-    flextv_cookie = read_config_value(config, 'Cookie', 'flextv_cookie', '')
-    look_cookie = read_config_value(config, 'Cookie', 'look_cookie', '')
-    twitcasting_cookie = read_config_value(config, 'Cookie', 'twitcasting_cookie', '')
-    baidu_cookie = read_config_value(config, 'Cookie', 'baidu_cookie', '')
-    weibo_cookie = read_config_value(config, 'Cookie', 'weibo_cookie', '')
-    kugou_cookie = read_config_value(config, 'Cookie', 'kugou_cookie', '')
-    twitch_cookie = read_config_value(config, 'Cookie', 'twitch_cookie', '')
-    liveme_cookie = read_config_value(config, 'Cookie', 'liveme_cookie', '')
-    huajiao_cookie = read_config_value(config, 'Cookie', 'huajiao_cookie', '')
-    liuxing_cookie = read_config_value(config, 'Cookie', 'liuxing_cookie', '')
-    showroom_cookie = read_config_value(config, 'Cookie', 'showroom_cookie', '')
-    acfun_cookie = read_config_value(config, 'Cookie', 'acfun_cookie', '')
-    changliao_cookie = read_config_value(config, 'Cookie', 'changliao_cookie', '')
-    yinbo_cookie = read_config_value(config, 'Cookie', 'yinbo_cookie', '')
-    yingke_cookie = read_config_value(config, 'Cookie', 'yingke_cookie', '')
-    zhihu_cookie = read_config_value(config, 'Cookie', 'zhihu_cookie', '')
-    chzzk_cookie = read_config_value(config, 'Cookie', 'chzzk_cookie', '')
-    haixiu_cookie = read_config_value(config, 'Cookie', 'haixiu_cookie', '')
-    vvxqiu_cookie = read_config_value(config, 'Cookie', 'vvxqiu_cookie', '')
-    yiqilive_cookie = read_config_value(config, 'Cookie', '17live_cookie', '')
-    langlive_cookie = read_config_value(config, 'Cookie', 'langlive_cookie', '')
-    pplive_cookie = read_config_value(config, 'Cookie', 'pplive_cookie', '')
-    six_room_cookie = read_config_value(config, 'Cookie', '6room_cookie', '')
-    lehaitv_cookie = read_config_value(config, 'Cookie', 'lehaitv_cookie', '')
-    huamao_cookie = read_config_value(config, 'Cookie', 'huamao_cookie', '')
-    shopee_cookie = read_config_value(config, 'Cookie', 'shopee_cookie', '')
-    youtube_cookie = read_config_value(config, 'Cookie', 'youtube_cookie', '')
-    taobao_cookie = read_config_value(config, 'Cookie', 'taobao_cookie', '')
-    jd_cookie = read_config_value(config, 'Cookie', 'jd_cookie', '')
-    faceit_cookie = read_config_value(config, 'Cookie', 'faceit_cookie', '')
-    migu_cookie = read_config_value(config, 'Cookie', 'migu_cookie', '')
-    lianjie_cookie = read_config_value(config, 'Cookie', 'lianjie_cookie', '')
-    laixiu_cookie = read_config_value(config, 'Cookie', 'laixiu_cookie', '')
-    picarto_cookie = read_config_value(config, 'Cookie', 'picarto_cookie', '')
-    instagram_cookie = read_config_value(config, 'Cookie', 'instagram_cookie', '')
+    platform_cookies = {platform.name: read_config_value(config, 'Cookie', platform.cookie_key, '')
+                        for platform in platform_registry if platform.cookie_key}
     weverse_cookie = read_config_value(config, 'Cookie', 'weverse_cookie', '')
     weverse_refresh_token = read_config_value(config, 'Cookie', 'weverse_refresh_token', '')
 
@@ -2068,13 +2000,24 @@ while not exit_recording:
         video_save_type = "TS"
 
     check_path = video_save_path or default_path
-    if utils.check_disk_capacity(check_path, show=first_run) < disk_space_limit:
+    if not shard_worker and utils.check_disk_capacity(check_path, show=first_run) < disk_space_limit:
         exit_recording = True
-        if not recording:
+        signal_stop()
+        if not recording and not shard_coordinator:
             logger.warning(f"Disk space remaining is below {disk_space_limit} GB. "
                            f"Exiting program due to the disk space limit being reached.")
             sys.exit(-1)
 
+    shard_count = int(read_config_value(config, '录制设置', '多进程分片数(0为不启用)', 0))
+    if shard_count > 1 and not shard_worker and not shard_coordinator and not exit_recording:
+        shard_coordinator = ShardCoordinator(
+            shard_count, f'{script_path}/logs', on_message=handle_shard_message,
+            env={SHARD_GLOBAL_PROXY_ENV: '1' if global_proxy else '0'},
+            on_connect=lambda shard: shard_coordinator.send(shard, 'sessions', sessions=session_store.snapshot()))
+        session_store.on_change = lambda item: shard_coordinator.broadcast('sessions', sessions=[item])
+        shard_coordinator.start()
+        print(f"已启用多进程分片录制, 共{shard_count}个录制进程, 日志位于 logs/shard-*.log")
+
 
     def contains_url(string: str) -> bool:
         pattern = r"(https?://)?(www\.)?[a-zA-Z0-9-]+(\.[a-zA-Z0-9-]+)+(:\d+)?(/.*)?"
@@ -2082,190 +2025,106 @@ while not exit_recording:
 
 
     try:
-        url_comments, line_list, url_line_list = [[] for _ in range(3)]
-        with (open(url_config_file, "r", encoding=text_encoding, errors='ignore') as file):
-            for origin_line in file:
-                if origin_line in line_list:
-                    delete_line(url_config_file, origin_line)
-                line_list.append(origin_line)
-                line = origin_line.strip()
-                if len(line) < 18:
-                    continue
+        if shard_worker:
+            url_comments = shard_worker.excluded_rooms(running_list, recording_urls)
+            url_tuples_list = list(shard_worker.rooms)
+        else:
+            url_comments, line_list, url_line_list = [[] for _ in range(3)]
+            with (open(url_config_file, "r", encoding=text_encoding, errors='ignore') as file):
+                for origin_line in file:
+                    if origin_line in line_list:
+                        delete_line(url_config_file, origin_line)
+                    line_list.append(origin_line)
+                    line = origin_line.strip()
+                    if len(line) < 18:
+                        continue
 
-                line_spilt = line.split('主播: ')
-                if len(line_spilt) > 2:
-                    line = update_file(url_config_file, line, f'{line_spilt[0]}主播: {line_spilt[-1]}')
+                    line_spilt = line.split('主播: ')
+                    if len(line_spilt) > 2:
+                        line = update_file(url_config_file, line, f'{line_spilt[0]}主播: {line_spilt[-1]}')
 
-                is_comment_line = line.startswith("#")
-                if is_comment_line:
-                    line = line.lstrip('#')
+                    is_comment_line = line.startswith("#")
+                    if is_comment_line:
+                        line = line.lstrip('#')
 
-                if re.search('[,，]', line):
-                    split_line = re.split('[,，]', line)
-                else:
-                    split_line = [line, '']
-
-                if len(split_line) == 1:
-                    url = split_line[0]
-                    quality, name = [video_record_quality, '']
-                elif len(split_line) == 2:
-                    if contains_url(split_line[0]):
-                        quality = video_record_quality
-                        url, name = split_line
+                    if re.search('[,，]', line):
+                        split_line = re.split('[,，]', line)
                     else:
-                        quality, url = split_line
-                        name = ''
-                else:
-                    quality, url, name = split_line
-
-                if quality not in ("原画", "蓝光", "超清", "高清", "标清", "流畅"):
-                    quality = '原画'
+                        split_line = [line, '']
+
+                    if len(split_line) == 1:
+                        url = split_line[0]
+                        quality, name = [video_record_quality, '']
+                    elif len(split_line) == 2:
+                        if contains_url(split_line[0]):
+                            quality = video_record_quality
+                            url, name = split_line
+                        else:
+                            quality, url = split_line
+                            name = ''
+                    else:
+                        quality, url, name = split_line
 
-                if url not in url_line_list:
-                    url_line_list.append(url)
-                else:
-                    delete_line(url_config_file, origin_line)
-
-                url = 'https://' + url if '://' not in url else url
-                url_host = url.split('/')[2]
-
-                platform_host = [
-                    'live.douyin.com',
-                    'v.douyin.com',
-                    'www.douyin.com',
-                    'live.kuaishou.com',
-                    'www.huya.com',
-                    'www.douyu.com',
-                    'www.yy.com',
-                    'live.bilibili.com',
-                    'www.redelight.cn',
-                    'www.xiaohongshu.com',
-                    'xhslink.com',
-                    'www.bigo.tv',
-                    'slink.bigovideo.tv',
-                    'app.blued.cn',
-                    'cc.163.com',
-                    'qiandurebo.com',
-                    'fm.missevan.com',
-                    'look.163.com',
-                    'twitcasting.tv',
-                    'live.baidu.com',
-                    'weibo.com',
-                    'fanxing.kugou.com',
-                    'fanxing2.kugou.com',
-                    'mfanxing.kugou.com',
-                    'www.huajiao.com',
-                    'www.7u66.com',
-                    'wap.7u66.com',
-                    'live.acfun.cn',
-                    'm.acfun.cn',
-                    'live.tlclw.com',
-                    'wap.tlclw.com',
-                    'live.ybw1666.com',
-                    'wap.ybw1666.com',
-                    'www.inke.cn',
-                    'www.zhihu.com',
-                    'www.haixiutv.com',
-                    "h5webcdnp.vvxqiu.com",
-                    "17.live",
-                    'www.lang.live',
-                    "m.pp.weimipopo.com",
-                    "v.6.cn",
-                    "m.6.cn",
-                    'www.lehaitv.com',
-                    'h.catshow168.com',
-                    'e.tb.cn',
-                    'huodong.m.taobao.com',
-                    '3.cn',
-                    'eco.m.jd.com',
-                    'www.miguvideo.com',
-                    'm.miguvideo.com',
-                    'show.lailianjie.com',
-                    'www.imkktv.com',
-                    'www.picarto.tv'
-                ]
-                overseas_platform_host = [
-                    'www.instagram.com',
-                    'www.tiktok.com',
-                    'play.sooplive.co.kr',
-                    'm.sooplive.co.kr',
-                    'www.sooplive.com',
-                    'm.sooplive.com',
-                    'www.pandalive.co.kr',
-                    'www.winktv.co.kr',
-                    'www.flextv.co.kr',
-                    'www.ttinglive.com',
-                    'www.popkontv.com',
-                    'www.twitch.tv',
-                    'www.liveme.com',
-                    'www.showroom-live.com',
-                    'chzzk.naver.com',
-                    'm.chzzk.naver.com',
-                    'live.shopee.',
-                    '.shp.ee',
-                    'www.youtube.com',
-                    'youtu.be',
-                    'www.faceit.com',
-                    'weverse.io',
-                    'www.weverse.io'
-                ]
+                    if quality not in ("原画", "蓝光", "超清", "高清", "标清", "流畅"):
+                        quality = '原画'
 
-                platform_host.extend(overseas_platform_host)
-                clean_url_host_list = (
-                    "live.douyin.com",
-                    "live.bilibili.com",
-                    "www.huajiao.com",
-                    "www.zhihu.com",
-                    "www.huya.com",
-                    "chzzk.naver.com",
-                    "www.liveme.com",
-                    "www.haixiutv.com",
-                    "v.6.cn",
-                    "m.6.cn",
-                    'www.lehaitv.com',
-                    'weverse.io',
-                    'www.weverse.io'
-                )
+                    if url not in url_line_list:
+                        url_line_list.append(url)
+                    else:
+                        delete_line(url_config_file, origin_line)
 
-                if 'live.shopee.' in url_host or '.shp.ee' in url_host:
-                    url_host = 'live.shopee.' if 'live.shopee.' in url_host else '.shp.ee'
+                    url = 'https://' + url if '://' not in url else url
+                    url_host = url.split('/')[2]
 
-                if url_host in platform_host or any(ext in url for ext in (".flv", ".m3u8")):
-                    if url_host in clean_url_host_list:
-                        url = update_file(url_config_file, old_str=url, new_str=url.split('?')[0])
+                    platform_info = platform_registry.for_host(url_host)
+                    if platform_info or any(ext in url for ext in (".flv", ".m3u8")):
+                        if platform_info and url_host in platform_info.clean_hosts:
+                            url = update_file(url_config_file, old_str=url, new_str=url.split('?')[0])
 
-                    if 'xiaohongshu' in url:
-                        host_id = re.search('&host_id=(.*?)(?=&|$)', url)
-                        if host_id:
-                            new_url = url.split('?')[0] + f'?host_id={host_id.group(1)}'
-                            url = update_file(url_config_file, old_str=url, new_str=new_url)
+                        if 'xiaohongshu' in url:
+                            host_id = re.search('&host_id=(.*?)(?=&|$)', url)
+                            if host_id:
+                                new_url = url.split('?')[0] + f'?host_id={host_id.group(1)}'
+                                url = update_file(url_config_file, old_str=url, new_str=new_url)
 
-                    url_comments = [i for i in url_comments if url not in i]
-                    if is_comment_line:
-                        url_comments.append(url)
+                        url_comments = [i for i in url_comments if url not in i]
+                        if is_comment_line:
+                            url_comments.append(url)
+                        else:
+                            new_line = (quality, url, name)
+                            url_tuples_list.append(new_line)
                     else:
-                        new_line = (quality, url, name)
-                        url_tuples_list.append(new_line)
-                else:
-                    if not origin_line.startswith('#'):
-                        color_obj.print_colored(f"\r{origin_line.strip()} 本行包含未知链接.此条跳过", color_obj.YELLOW)
-                        update_file(url_config_file, old_str=origin_line, new_str=origin_line, start_str='#')
-
-        while len(need_update_line_list):
-            a = need_update_line_list.pop()
-            replace_words = a.split('|')
-            if replace_words[0] != replace_words[1]:
-                if replace_words[1].startswith("#"):
-                    start_with = '#'
-                    new_word = replace_words[1][1:]
-                else:
-                    start_with = None
-                    new_word = replace_words[1]
-                update_file(url_config_file, old_str=replace_words[0], new_str=new_word, start_str=start_with)
+                        if not origin_line.startswith('#'):
+                            color_obj.print_colored(f"\r{origin_line.strip()} 本行包含未知链接.此条跳过", color_obj.YELLOW)
+                            update_file(url_config_file, old_str=origin_line, new_str=origin_line, start_str='#')
+
+            while len(need_update_line_list):
+                a = need_update_line_list.pop()
+                replace_words = a.split('|')
+                if replace_words[0] != replace_words[1]:
+                    if replace_words[1].startswith("#"):
+                        start_with = '#'
+                        new_word = replace_words[1][1:]
+                    else:
+                        start_with = None
+                        new_word = replace_words[1]
+                    update_file(url_config_file, old_str=replace_words[0], new_str=new_word, start_str=start_with)
+
+        for url in set(url_comments) - signalled_comments:
+            if url in running_list:
+                signal_stop(url)
+        signalled_comments = set(url_comments)
 
         text_no_repeat_url = list(set(url_tuples_list))
 
-        if len(text_no_repeat_url) > 0:
+        if shard_coordinator:
+            shard_coordinator.assign([i for i in text_no_repeat_url if i[1] not in not_record_list], url_comments)
+        elif len(text_no_repeat_url) > 0:
+            new_urls = [i[1] for i in text_no_repeat_url if i[1] not in running_list and i[1] not in not_record_list]
+            if new_urls:
+                from src import spider
+                engine.submit(spider.prefetch_canonical_urls(new_urls, url_proxy))
+
             for url_tuple in text_no_repeat_url:
                 monitoring = len(running_list)
 
@@ -2275,31 +2134,53 @@ while not exit_recording:
                 if url_tuple[1] not in running_list:
                     print(f"\r{'新增' if not first_start else '传入'}地址: {url_tuple[1]}")
                     monitoring += 1
-                    args = [url_tuple, monitoring]
-                    create_var[f'thread_{monitoring}'] = threading.Thread(target=start_record, args=args)
-                    create_var[f'thread_{monitoring}'].daemon = False
-                    create_var[f'thread_{monitoring}'].start()
+                    engine.add_room(url_tuple[1], start_record(url_tuple, monitoring))
                     running_list.append(url_tuple[1])
                     time.sleep(local_delay_default)
         url_tuples_list = []
         first_start = False
 
+        if shard_worker:
+            if need_update_line_list or not_record_list:
+                shard_worker.send('url_config', update_lines=need_update_line_list[:], not_record=not_record_list[:])
+                need_update_line_list.clear()
+            with max_request_lock:
+                recent_errors, error_count = error_count, 0
+            shard_worker.send(
+                'status', monitoring=len(running_list), errors=recent_errors, recording_urls=sorted(recording_urls),
+                recording=[(i, *recording_time_list[i]) for i in list(recording) if i in recording_time_list])
+            if shard_worker.stopped.is_set():
+                exit_recording = True
+                signal_stop()
+
     except Exception as err:
         logger.error(f"错误信息: {err} 发生错误的行数: {err.__traceback__.tb_lineno}")
 
     if first_run:
-        t = threading.Thread(target=display_info, args=(), daemon=False)
-        t.start()
-        t2 = threading.Thread(target=adjust_max_request, args=(), daemon=False)
-        t2.start()
+        if not shard_worker:
+            t = threading.Thread(target=display_info, args=(), daemon=False)
+            t.start()
+        engine.start()
+        engine.submit(proxy_pool.run_checks())
+        if not shard_worker:
+            # Sessions renewed in the coordinator are sent on to the workers
+            engine.submit(session_store.run_refresher(session_proxy))
+        engine.submit(persister.run())
         first_run = False
 
     time.sleep(3)
 
 if exit_recording:
+    engine.stop()
+    persister.flush_all()
+    if shard_coordinator:
+        shard_coordinator.stop()
     try:
-        while recording:
-            print(f"\r正在等待 {len(recording)} 个录制任务结束: {list(recording)}  ", end="")
+        while recording or (shard_coordinator and shard_coordinator.alive_workers()):
+            if shard_coordinator:
+                print(f"\r正在等待 {len(shard_coordinator.alive_workers())} 个录制进程结束  ", end="")
+            else:
+                print(f"\r正在等待 {len(recording)} 个录制任务结束: {list(recording)}  ", end="")
             time.sleep(1)
     except KeyboardInterrupt:
         pass
@@ -1,6 +1,7 @@
 import os
 import sys
 from pathlib import Path
+from .startup import startup_timer
 from .initializer import check_node
 
 current_file_path = Path(__file__).resolve()
@@ -12,3 +13,4 @@ node_execute_dir = Path(execute_dir) / 'node'
 current_env_path = os.environ.get('PATH')
 os.environ['PATH'] = str(node_execute_dir) + os.pathsep + current_env_path
 check_node()
+startup_timer.mark('检查node')
@@ -1,5 +1,9 @@
 # -*- encoding: utf-8 -*-
+import base64
+import functools
+import hashlib
 import math
+import struct
 import time
 
 
@@ -291,12 +295,13 @@ def generate_random_str() -> str:
 
 
 def generate_rc4_bb_str(url_search_params: str, user_agent: str, window_env_str: str,
-                        suffix: str = "cus", arguments: list[int] | None = None) -> str:
+                        suffix: str = "cus", arguments: list[int] | None = None, start_time: int | None = None) -> str:
     if arguments is None:
         arguments = [0, 1, 14]
 
     sm3 = SM3()
-    start_time = int(time.time() * 1000)
+    if start_time is None:
+        start_time = int(time.time() * 1000)
 
     # 三次加密处理
     # 1: url_search_params两次sm3之的结果
@@ -441,14 +446,195 @@ def generate_rc4_bb_str(url_search_params: str, user_agent: str, window_env_str:
     )
 
 
-def ab_sign(url_search_params: str, user_agent: str) -> str:
-    window_env_str = "1920|1080|1920|1040|0|30|0|0|1872|92|1920|1040|1857|92|1|24|Win32"
+WINDOW_ENV_STR = "1920|1080|1920|1040|0|30|0|0|1872|92|1920|1040|1857|92|1|24|Win32"
+
+
+def ab_sign_reference(url_search_params: str, user_agent: str, start_time: int | None = None) -> str:
+    # 逐步计算的原始实现, 用于校验 ABogusSigner 的输出
+    window_env_str = WINDOW_ENV_STR
 
     # 1. 生成随机字符串前缀
     # 2. 生成RC4加密的主体部分
     # 3. 对结果进行最终加密并添加等号后缀
     return result_encrypt(
         generate_random_str() +
-        generate_rc4_bb_str(url_search_params, user_agent, window_env_str),
+        generate_rc4_bb_str(url_search_params, user_agent, window_env_str, start_time=start_time),
         "s4"
     ) + "="
+
+
+# SM3 over bytes: message words unpacked with struct and the 64 rotated round constants precomputed
+SM3_IV = (1937774191, 1226093241, 388252375, 3666478592, 2842636476, 372324522, 3817729613, 2969243214)
+SM3_T = tuple(left_rotate(get_t_j(j), j) for j in range(64))
+SM3_WORDS = struct.Struct('>16I')
+SM3_DIGEST = struct.Struct('>8I')
+
+
+def _sm3_compress(reg: list[int], block: bytes) -> None:
+    w = list(SM3_WORDS.unpack(block))
+    for j in range(16, 68):
+        a = w[j - 16] ^ w[j - 9] ^ (((w[j - 3] << 15) | (w[j - 3] >> 17)) & 0xFFFFFFFF)
+        a ^= (((a << 15) | (a >> 17)) ^ ((a << 23) | (a >> 9))) & 0xFFFFFFFF
+        x = w[j - 13]
+        w.append(a ^ (((x << 7) | (x >> 25)) & 0xFFFFFFFF) ^ w[j - 6])
+    a, b, c, d, e, f, g, h = reg
+    for j in range(64):
+        a12 = ((a << 12) | (a >> 20)) & 0xFFFFFFFF
+        ss1 = (a12 + e + SM3_T[j]) & 0xFFFFFFFF
+        ss1 = ((ss1 << 7) | (ss1 >> 25)) & 0xFFFFFFFF
+        if j < 16:
+            ff = a ^ b ^ c
+            gg = e ^ f ^ g
+        else:
+            ff = (a & b) | (a & c) | (b & c)
+            gg = (e & f) | (~e & g)
+        tt1 = (ff + d + (ss1 ^ a12) + (w[j] ^ w[j + 4])) & 0xFFFFFFFF
+        tt2 = (gg + h + ss1 + w[j]) & 0xFFFFFFFF
+        d = c
+        c = ((b << 9) | (b >> 23)) & 0xFFFFFFFF
+        b = a
+        a = tt1
+        h = g
+        g = ((f << 19) | (f >> 13)) & 0xFFFFFFFF
+        f = e
+        e = (tt2 ^ ((tt2 << 9) | (tt2 >> 23)) ^ ((tt2 << 17) | (tt2 >> 15))) & 0xFFFFFFFF
+    for i, value in enumerate((a, b, c, d, e, f, g, h)):
+        reg[i] ^= value
+
+
+def sm3_digest(data: bytes) -> bytes:
+    reg = list(SM3_IV)
+    padding = b'\x80' + b'\x00' * ((55 - len(data)) % 64) + struct.pack('>Q', len(data) * 8)
+    message = data + padding
+    for offset in range(0, len(message), 64):
+        _sm3_compress(reg, message[offset:offset + 64])
+    return SM3_DIGEST.pack(*reg)
+
+
+# OpenSSL builds that ship SM3 hash in C; the pure Python version is the fallback
+if 'sm3' in hashlib.algorithms_available:
+    def sm3_hash(data: bytes) -> bytes:
+        return hashlib.new('sm3', data).digest()
+else:
+    sm3_hash = sm3_digest
+
+
+def rc4_keystream(key: bytes, length: int) -> bytes:
+    s = list(range(256))
+    j = 0
+    for i in range(256):
+        j = (j + s[i] + key[i % len(key)]) % 256
+        s[i], s[j] = s[j], s[i]
+    i = j = 0
+    stream = bytearray(length)
+    for n in range(length):
+        i = (i + 1) % 256
+        j = (j + s[i]) % 256
+        s[i], s[j] = s[j], s[i]
+        stream[n] = s[(s[i] + s[j]) % 256]
+    return bytes(stream)
+
+
+BASE64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+S4_TABLE = bytes.maketrans(BASE64_ALPHABET, b"Dkdpgh2ZmsQB80/MfvV36XI1R45-WUAlEixNLwoqYTOPuzKFjJnry79HbGcaStCe")
+
+
+def encode_bytes(data: bytes, table: bytes = S4_TABLE) -> str:
+    # result_encrypt for byte strings: the same 6-bit grouping as base64, so it runs as
+    # b64encode plus a translation into the custom alphabet
+    total_chars = math.ceil(len(data) / 3 * 4)
+    padded = data + b'\x00' * (-len(data) % 3)
+    return base64.b64encode(padded).translate(table)[:total_chars].decode()
+
+
+@functools.lru_cache(maxsize=64)
+def ua_component(user_agent: str) -> tuple[int, int]:
+    # 对ua处理之后的结果, 同一UA只计算一次
+    ua = sm3_hash(result_encrypt(rc4_encrypt(user_agent, chr(0) + chr(1) + chr(14)), "s3").encode('utf-8'))
+    return ua[23], ua[24]
+
+
+def _split_to_bytes(num: int) -> list[int]:
+    return [(num >> 24) & 255, (num >> 16) & 255, (num >> 8) & 255, num & 255]
+
+
+# a_bogus signer with everything that does not depend on the query string or the clock worked out
+# once: the suffix hash, the UA hash (per UA), the fixed config bytes, the RC4 keystream of the
+# final layer and the random prefix. A signature is then one double SM3 of the query plus a few
+# XORs. Output is identical to ab_sign_reference for the same start time.
+class ABogusSigner:
+    def __init__(self, window_env_str: str = WINDOW_ENV_STR, suffix: str = "cus",
+                 arguments: tuple[int, int, int] = (0, 1, 14), page_id: int = 110624, aid: int = 6383,
+                 sm3=None):
+        self.sm3 = sm3 or sm3_hash
+        self.suffix = suffix.encode('utf-8')
+        cus = self.sm3(self.sm3(self.suffix))
+        self.cus = (cus[21], cus[22])
+        self.prefix = generate_random_str().encode('latin-1')
+        window_env = [ord(char) for char in window_env_str]
+        arg0 = _split_to_bytes(arguments[0])
+        arg1 = _split_to_bytes(arguments[1])
+        arg2 = _split_to_bytes(arguments[2])
+        page = _split_to_bytes(page_id)
+        aid_bytes = [aid & 255, (aid >> 8) & 255, (aid >> 16) & 255, (aid >> 24) & 255]
+        env_length = [len(window_env) & 255, (len(window_env) >> 8) & 255]
+        arg1_high, arg1_low = int(arguments[1] / 256) & 255, (arguments[1] % 256) & 255
+        # b[18], b[26]-b[37], b[52]-b[60], b[65], b[66], b[70], b[71]
+        self.fixed = dict(b18=44, arg0=arg0, arg1=(arg1_high, arg1_low, arg1[0], arg1[1]), arg2=arg2,
+                          page=page, aid=aid_bytes, env_length=env_length)
+        self.fixed_checksum = 44 ^ arg1_high ^ arg1_low ^ arg1[0] ^ arg1[1] ^ arg2[1] ^ arg2[2] ^ arg2[3] ^ \
+            aid_bytes[0] ^ aid_bytes[1] ^ aid_bytes[2] ^ aid_bytes[3] ^ env_length[0] ^ env_length[1] ^ 3
+        for value in arg0 + page:
+            self.fixed_checksum ^= value
+        self.window_env = bytes(window_env)
+        self.keystream = rc4_keystream(b'y', 44 + len(window_env) + 1)
+        self.keystream_int = int.from_bytes(self.keystream, 'big')
+
+    def _body(self, params_hash: bytes, ua: tuple[int, int], start_time: int) -> bytes:
+        end_time = start_time + 100
+        start = _split_to_bytes(start_time)
+        end = _split_to_bytes(end_time)
+        start_high = [(start_time >> 32) & 255, (start_time >> 40) & 255]
+        end_high = [(end_time >> 32) & 255, (end_time >> 40) & 255]
+        fixed = self.fixed
+        arg0, arg1, arg2, page, aid = fixed['arg0'], fixed['arg1'], fixed['arg2'], fixed['page'], fixed['aid']
+        p38, p39 = params_hash[21], params_hash[22]
+        cus40, cus41 = self.cus
+        checksum = self.fixed_checksum ^ p38 ^ p39 ^ cus40 ^ cus41 ^ ua[0] ^ ua[1]
+        for value in start + end + start_high + end_high:
+            checksum ^= value
+        bb = bytes([
+            44, start[0], page[0], arg0[0], arg1[0], arg2[0], aid[1], p38, cus40, page[1], ua[0], start[1],
+            arg0[1], page[2], page[3], arg1[1], arg2[1], aid[0], p39, cus41, ua[1], start[2], arg0[2], arg1[2],
+            aid[3], arg2[2], start[3], arg0[3], arg1[3], arg2[3], end[0], end[1], aid[2], end[2], end[3], 3,
+            end_high[0], end_high[1], start_high[0], start_high[1], *fixed['env_length'], 0, 0
+        ]) + self.window_env + bytes([checksum & 255])
+        encrypted = (int.from_bytes(bb, 'big') ^ self.keystream_int).to_bytes(len(bb), 'big')
+        return self.prefix + encrypted
+
+    def sign(self, url_search_params: str, user_agent: str, start_time: int | None = None) -> str:
+        if start_time is None:
+            start_time = int(time.time() * 1000)
+        params_hash = self.sm3(self.sm3(url_search_params.encode('utf-8') + self.suffix))
+        return encode_bytes(self._body(params_hash, ua_component(user_agent), start_time)) + "="
+
+    def sign_many(self, url_search_params_list: list[str], user_agent: str,
+                  start_time: int | None = None) -> list[str]:
+        # All signatures share one timestamp and one UA lookup
+        if start_time is None:
+            start_time = int(time.time() * 1000)
+        ua = ua_component(user_agent)
+        sm3 = self.sm3
+        return [encode_bytes(self._body(sm3(sm3(i.encode('utf-8') + self.suffix)), ua, start_time)) + "="
+                for i in url_search_params_list]
+
+
+signer = ABogusSigner()
+
+
+def ab_sign(url_search_params: str, user_agent: str) -> str:
+    return signer.sign(url_search_params, user_agent)
+
+
+def ab_sign_many(url_search_params_list: list[str], user_agent: str) -> list[str]:
+    return signer.sign_many(url_search_params_list, user_agent)
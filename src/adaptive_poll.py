@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import datetime
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+from .logger import logger
+from .persist import persister, write_text
+
+DAY = 86400
+MAX_SESSIONS = 60
+HISTORY_DAYS = 30
+BACKOFF_PERIOD = 6 * 3600
+
+
+def time_of_day(ts: float) -> int:
+    dt = datetime.datetime.fromtimestamp(ts)
+    return dt.hour * 3600 + dt.minute * 60 + dt.second
+
+
+class LiveHistory:
+    def __init__(self, file_path: str | Path | None = None):
+        self.file_path = Path(file_path) if file_path else None
+        self.lock = threading.Lock()
+        self.rooms: dict[str, dict] = {}
+        self.on_change: Callable[[str, bool, float], None] | None = None
+        self.load()
+        if self.file_path:
+            persister.register(str(self.file_path), self.save)
+
+    def load(self) -> None:
+        if not self.file_path or not self.file_path.exists():
+            return
+        try:
+            with open(self.file_path, encoding='utf-8') as f:
+                self.rooms = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load live history {self.file_path}: {e}")
+            self.rooms = {}
+
+    def save(self) -> None:
+        if not self.file_path:
+            return
+        try:
+            with self.lock:
+                data = json.dumps(self.rooms, ensure_ascii=False)
+            write_text(str(self.file_path), data)
+        except OSError as e:
+            logger.warning(f"Failed to save live history {self.file_path}: {e}")
+
+    def get(self, room: str) -> dict | None:
+        return self.rooms.get(room)
+
+    def update(self, room: str, is_live: bool, now: float | None = None) -> bool:
+        now = now or time.time()
+        with self.lock:
+            entry = self.rooms.get(room)
+            if entry is None:
+                entry = self.rooms[room] = {"first_seen": now, "live": False, "sessions": []}
+                changed = True
+            else:
+                changed = False
+
+            if is_live and not entry['live']:
+                entry['sessions'].append([now, None])
+                del entry['sessions'][:-MAX_SESSIONS]
+                changed = True
+            elif not is_live and entry['live']:
+                if entry['sessions'] and entry['sessions'][-1][1] is None:
+                    entry['sessions'][-1][1] = now
+                changed = True
+            entry['live'] = is_live
+
+        if changed and self.file_path:
+            # Written by the persister a few seconds later, off the event loop
+            persister.mark_dirty(str(self.file_path))
+        if changed and self.on_change:
+            self.on_change(room, is_live, now)
+        return changed
+
+
+class AdaptivePoller:
+    def __init__(self, history: LiveHistory, base: int = 120, floor: int = 30, ceiling: int = 3600,
+                 window: int = 1800):
+        self.history = history
+        self.base = base
+        self.floor = floor
+        self.ceiling = ceiling
+        self.window = window
+
+    def configure(self, base: int, floor: int, ceiling: int) -> None:
+        self.base = base
+        self.floor = max(1, min(floor, base))
+        self.ceiling = max(ceiling, base)
+
+    def seconds_until_window(self, starts: list, now: float) -> int:
+        now_tod = time_of_day(now)
+        until = DAY
+        for start in starts:
+            offset = (now_tod - time_of_day(start) + DAY // 2) % DAY - DAY // 2
+            if abs(offset) <= self.window:
+                return 0
+            until = min(until, (-offset - self.window) % DAY)
+        return until
+
+    def next_interval(self, room: str, now: float | None = None) -> int:
+        now = now or time.time()
+        entry = self.history.get(room)
+        floor = int(entry.get('floor', self.floor)) if entry else self.floor
+        ceiling = int(entry.get('ceiling', self.ceiling)) if entry else self.ceiling
+        if not entry or entry['live']:
+            return max(floor, min(self.base, ceiling))
+
+        sessions = entry['sessions']
+        if sessions:
+            last_live = sessions[-1][1] or sessions[-1][0]
+        else:
+            last_live = entry['first_seen']
+
+        # Double the interval for every BACKOFF_PERIOD the room has stayed offline
+        dormant_periods = int(max(0.0, now - last_live) // BACKOFF_PERIOD)
+        interval = self.base * 2 ** min(dormant_periods, 16)
+
+        starts = [s[0] for s in sessions if now - s[0] <= HISTORY_DAYS * DAY]
+        if starts:
+            until = self.seconds_until_window(starts, now)
+            interval = floor if until == 0 else min(interval, until)
+        return int(max(floor, min(interval, ceiling)))
+
+
+def simulate_polling(sessions: list, start: float, end: float, next_interval) -> dict:
+    sessions = sorted(sessions, key=lambda x: x[0])
+    probes = detected = missed = 0
+    latencies = []
+    index = 0
+    t = start
+    while t < end:
+        while index < len(sessions) and (sessions[index][1] or end) <= t:
+            if sessions[index][0] >= start:
+                missed += 1
+            index += 1
+        probes += 1
+        if index < len(sessions) and sessions[index][0] <= t:
+            live_start, live_end = sessions[index]
+            if live_start >= start:
+                detected += 1
+                latencies.append(t - live_start)
+            next_interval(t, True)
+            # No probes are made while the stream is being recorded
+            t = live_end or end
+            index += 1
+            continue
+        t += max(1, next_interval(t, False))
+    return {
+        "probes": probes,
+        "detected": detected,
+        "missed": missed,
+        "mean_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+    }
+
+
+def compare_with_fixed(sessions: list, start: float, end: float, fixed_interval: int,
+                       floor: int = 30, ceiling: int = 3600) -> dict:
+    fixed = simulate_polling(sessions, start, end, lambda t, live: fixed_interval)
+
+    history = LiveHistory()
+    poller = AdaptivePoller(history, base=fixed_interval)
+    poller.configure(fixed_interval, floor, ceiling)
+    room = 'simulated'
+    history.update(room, False, start)
+
+    def adaptive_interval(t, live):
+        history.update(room, live, t)
+        return poller.next_interval(room, t)
+
+    adaptive = simulate_polling(sessions, start, end, adaptive_interval)
+    saved = 1 - adaptive['probes'] / fixed['probes'] if fixed['probes'] else 0.0
+    return {"fixed": fixed, "adaptive": adaptive, "saved": saved}
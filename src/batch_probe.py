@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+from .logger import logger
+
+BatchFetch = Callable[..., Awaitable[dict]]
+
+
+class _Group:
+    def __init__(self, platform: str, kwargs: dict):
+        self.platform = platform
+        self.kwargs = kwargs
+        self.pending: dict[str, list[asyncio.Future]] = {}
+        self.results: dict[str, tuple[float, dict]] = {}
+        self.known: dict[str, tuple[float, float]] = {}
+        self.task: asyncio.Task | None = None
+
+
+# Rooms of a batch-capable platform that come due within the same window share one request.
+# Each room's probe period is learned from its previous calls, so a batch also prefetches the
+# rooms expected to come due before its results go stale and a whole polling cycle is served
+# from a few requests. Anything the batch could not answer is returned as None and the caller
+# falls back to its single-room probe.
+class BatchProber:
+    def __init__(self, window: float = 1.0, max_age: float = 30.0, known_ttl: float = 600.0):
+        self.window = window
+        self.max_age = max_age
+        self.known_ttl = known_ttl
+        self.handlers: dict[str, tuple[BatchFetch, int]] = {}
+        self.groups: dict[tuple, _Group] = {}
+        self.requests = 0
+        self.rooms = 0
+        self.hits = 0
+        self.fallbacks = 0
+
+    def configure(self, window: float, max_age: float) -> None:
+        self.window = max(0.0, window)
+        self.max_age = max(0.0, max_age)
+
+    def register(self, platform: str, fetch: BatchFetch, batch_size: int = 30) -> None:
+        self.handlers[platform] = (fetch, max(1, batch_size))
+
+    def supports(self, platform: str) -> bool:
+        return platform in self.handlers
+
+    async def probe(self, platform: str, item: str, **kwargs) -> dict | None:
+        if platform not in self.handlers or not item:
+            return None
+        key = (platform, tuple(sorted(kwargs.items())))
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = _Group(platform, kwargs)
+
+        now = time.monotonic()
+        last_seen, period = group.known.get(item, (0.0, 0.0))
+        if last_seen and now - last_seen > self.window:
+            period = now - last_seen
+        group.known[item] = (now, period)
+        cached = group.results.get(item)
+        if cached and now - cached[0] <= self.max_age:
+            self.hits += 1
+            return cached[1]
+
+        future = asyncio.get_running_loop().create_future()
+        group.pending.setdefault(item, []).append(future)
+        if group.task is None:
+            group.task = asyncio.create_task(self._flush(group))
+        result = await future
+        if result is None:
+            self.fallbacks += 1
+        return result
+
+    async def _flush(self, group: _Group) -> None:
+        try:
+            await asyncio.sleep(self.window)
+        except asyncio.CancelledError:
+            for futures in group.pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_result(None)
+            raise
+        finally:
+            pending, group.pending = group.pending, {}
+            group.task = None
+
+        now = time.monotonic()
+        items = list(pending)
+        for item, (last_seen, period) in list(group.known.items()):
+            if now - last_seen > max(self.known_ttl, period * 2):
+                group.known.pop(item)
+                group.results.pop(item, None)
+                continue
+            if item in pending or not period:
+                continue
+            due = last_seen + period
+            cached = group.results.get(item)
+            if now - self.window <= due <= now + self.max_age and (not cached or cached[0] < due - self.max_age):
+                items.append(item)
+
+        fetch, batch_size = self.handlers[group.platform]
+        chunks = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        await asyncio.gather(*(self._fetch_chunk(group, fetch, chunk, pending) for chunk in chunks))
+
+    async def _fetch_chunk(self, group: _Group, fetch: BatchFetch, chunk: list, pending: dict) -> None:
+        self.requests += 1
+        self.rooms += len(chunk)
+        try:
+            results = await fetch(chunk, **group.kwargs) or {}
+        except Exception as e:
+            logger.debug(f"Batch probe for {group.platform} failed ({len(chunk)} rooms): {type(e).__name__}: {e}")
+            results = {}
+
+        now = time.monotonic()
+        for item in chunk:
+            result = results.get(item)
+            if result is not None:
+                group.results[item] = (now, result)
+            else:
+                group.results.pop(item, None)
+            for future in pending.get(item, []):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "rooms": self.rooms,
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+        }
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from .logger import logger
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+ENDPOINT_FAILURES = ('timeout', 'risk_control', 'server_error', 'network')
+
+
+# Opens after `threshold` consecutive failures and rejects callers until `reset_timeout` has
+# passed. Then a single canary is let through: success closes the breaker and releases every
+# caller it blocked, failure opens it again with twice the timeout. A canary that ends in neither
+# (an error that says nothing about the endpoint, or cancellation) hands the slot to the next caller.
+class CircuitBreaker:
+    def __init__(self, key: str, threshold: int = 5, reset_timeout: float = 60.0, max_timeout: float = 900.0,
+                 canary_timeout: float = 120.0):
+        self.key = key
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.canary_timeout = canary_timeout
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.timeout = reset_timeout
+        self.opened_at = 0.0
+        self.canary_at = 0.0
+        self.last_error: str | None = None
+        self.blocked: set[str] = set()
+
+    def allow(self, caller: str | None = None) -> bool:
+        with self.lock:
+            if self.threshold <= 0 or self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.timeout:
+                self.state = HALF_OPEN
+                self.canary_at = now
+                logger.debug(f"Circuit breaker [{self.key}] half-open, letting {caller or 'one request'} through")
+                return True
+            if self.state == HALF_OPEN and now - self.canary_at >= self.canary_timeout:
+                # The previous canary never reported back
+                self.canary_at = now
+                return True
+            if caller:
+                self.blocked.add(caller)
+            return False
+
+    def record_success(self) -> set[str]:
+        with self.lock:
+            self.failures = 0
+            if self.state == CLOSED:
+                return set()
+            logger.debug(f"Circuit breaker [{self.key}] closed, resuming {len(self.blocked)} blocked callers")
+            self.state = CLOSED
+            self.timeout = self.reset_timeout
+            released, self.blocked = self.blocked, set()
+            return released
+
+    def record_failure(self, error_type: str | None = None) -> None:
+        with self.lock:
+            self.failures += 1
+            self.last_error = error_type or 'error'
+            if self.threshold <= 0:
+                return
+            if self.state == HALF_OPEN:
+                self.timeout = min(self.timeout * 2, self.max_timeout)
+                self._open(f"canary failed ({self.last_error})")
+            elif self.state == CLOSED and self.failures >= self.threshold:
+                self._open(f"{self.failures} consecutive failures, last {self.last_error}")
+
+    def release(self) -> None:
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.canary_at = 0.0
+
+    def _open(self, reason: str) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        logger.warning(f"Circuit breaker [{self.key}] opened for {self.timeout:.0f}s: {reason}")
+
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.timeout - time.monotonic())
+
+    def stats(self) -> dict:
+        return {
+            "key": self.key,
+            "state": self.state,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "retry_after": self.retry_after(),
+            "blocked": len(self.blocked),
+        }
+
+
+class BreakerRegistry:
+    def __init__(self, threshold: int = 5, reset_timeout: float = 60.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    def configure(self, threshold: int, reset_timeout: float) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        with self.lock:
+            for breaker in self.breakers.values():
+                breaker.threshold = threshold
+                breaker.reset_timeout = reset_timeout
+
+    def get(self, key: str) -> CircuitBreaker:
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            with self.lock:
+                breaker = self.breakers.setdefault(
+                    key, CircuitBreaker(key, threshold=self.threshold, reset_timeout=self.reset_timeout))
+        return breaker
+
+    def stats(self) -> list[dict]:
+        return [breaker.stats() for breaker in list(self.breakers.values()) if breaker.state != CLOSED]
+
+
+# Keyed by host and consulted by the HTTP layer for every request
+endpoint_breakers = BreakerRegistry()
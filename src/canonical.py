@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Iterable
+from .logger import logger
+from .persist import persister, write_json
+from .single_flight import single_flight
+
+CANONICAL_FILE = os.path.join(os.path.split(os.path.realpath(sys.argv[0]))[0], 'config', 'canonical_cache.json')
+CANONICAL_VERSION = 1
+# Mappings are re-resolved as soon as using one fails, this only bounds how long an unused one is kept
+MAX_AGE = 30 * 86400
+PREFETCH_CONCURRENCY = 8
+
+Resolver = Callable[[], Awaitable[dict]]
+
+
+@dataclass
+class Canonical:
+    value: dict
+    resolved_at: float
+
+
+# Maps room URLs that need extra requests before the live status can be asked for (share links,
+# redirects, name -> id lookups) to the ids those requests return, kept in
+# config/canonical_cache.json so they are resolved once instead of on every poll. An entry is
+# trusted until a probe that used it fails, then it is resolved again and the probe retried once.
+# Concurrent resolutions of one URL share a single request.
+class CanonicalCache:
+    def __init__(self, path: str = CANONICAL_FILE, max_age: float = MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries: dict[tuple[str, str], Canonical] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.on_change: Callable[[str, str, dict | None], None] | None = None
+        self.load()
+        persister.register(self.path, self._save)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != CANONICAL_VERSION:
+            return
+        with self.lock:
+            for item in data.get('entries', []):
+                try:
+                    self.entries[(item['kind'], item['key'])] = Canonical(item['value'], item['resolved_at'])
+                except (KeyError, TypeError):
+                    continue
+
+    def _save(self) -> None:
+        with self.lock:
+            entries = [{"kind": kind, "key": key, **asdict(entry)} for (kind, key), entry in self.entries.items()]
+        try:
+            write_json(self.path, {"version": CANONICAL_VERSION, "entries": entries}, indent=1)
+        except OSError as e:
+            logger.error(f"链接解析缓存保存失败: {e}")
+
+    def get(self, kind: str, key: str, max_age: float | None = None) -> dict | None:
+        with self.lock:
+            entry = self.entries.get((kind, key))
+        if entry and time.time() - entry.resolved_at < (max_age or self.max_age):
+            return entry.value
+        return None
+
+    def put(self, kind: str, key: str, value: dict) -> None:
+        with self.lock:
+            entry = self.entries.get((kind, key))
+            if entry and entry.value == value:
+                entry.resolved_at = time.time()
+            else:
+                self.entries[(kind, key)] = Canonical(value, time.time())
+        persister.mark_dirty(self.path)
+        if self.on_change:
+            self.on_change(kind, key, value)
+
+    def invalidate(self, kind: str, key: str) -> None:
+        with self.lock:
+            removed = self.entries.pop((kind, key), None)
+        if removed:
+            persister.mark_dirty(self.path)
+            if self.on_change:
+                self.on_change(kind, key, None)
+
+    async def resolve(self, kind: str, key: str, resolver: Resolver, refresh: bool = False,
+                      max_age: float | None = None) -> dict:
+        if not refresh:
+            value = self.get(kind, key, max_age)
+            if value is not None:
+                self.hits += 1
+                return value
+        self.misses += 1
+
+        async def do_resolve():
+            value = await resolver()
+            self.put(kind, key, value)
+            return value
+
+        return await single_flight.do((kind, key, 'canonical'), do_resolve)
+
+    async def use(self, kind: str, key: str, resolver: Resolver, consume: Callable[[dict], Awaitable[Any]]) -> Any:
+        cached = self.get(kind, key) is not None
+        value = await self.resolve(kind, key, resolver)
+        if not cached:
+            return await consume(value)
+        try:
+            return await consume(value)
+        except Exception as e:
+            # The id may have moved; only retry when resolving again actually gives a different one
+            self.revalidations += 1
+            fresh = await self.resolve(kind, key, resolver, refresh=True)
+            if fresh == value:
+                raise
+            logger.info(f"{key} 解析结果已变化, 使用新结果重试: {e}")
+            return await consume(fresh)
+
+    async def prefetch(self, kind_of: Callable[[str], str | None], resolver_for: Callable[[str], Resolver],
+                       urls: Iterable[str], concurrency: int = PREFETCH_CONCURRENCY) -> int:
+        # Resolves the not yet known URLs of a freshly loaded list concurrently, returns how many succeeded
+        pending = [(kind, url) for url in urls if (kind := kind_of(url)) and self.get(kind, url) is None]
+        if not pending:
+            return 0
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(kind: str, url: str) -> bool:
+            async with semaphore:
+                try:
+                    await self.resolve(kind, url, resolver_for(url))
+                    return True
+                except Exception as e:
+                    logger.debug(f"{url} 链接预解析失败: {e}")
+                    return False
+
+        results = await asyncio.gather(*(one(kind, url) for kind, url in pending))
+        return sum(results)
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries = len(self.entries)
+        return {"entries": entries, "hits": self.hits, "misses": self.misses, "revalidations": self.revalidations}
+
+
+canonical_cache = CanonicalCache()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from .persist import persister, write_json
+
+CACHE_FILE = os.path.join(os.path.split(os.path.realpath(sys.argv[0]))[0], 'config', 'capability_cache.json')
+CACHE_VERSION = 1
+
+
+# Results of environment probes kept across restarts. A tool check (`node -v`, `ffmpeg -version`)
+# is reused for as long as the binary found on PATH keeps its path, size and mtime, so upgrading or
+# replacing it triggers a fresh check. Other results, like whether a global proxy was detected,
+# are stored with a timestamp and recalled as a first guess while the real check runs.
+class CapabilityCache:
+    def __init__(self, path: str = CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: dict | None = None
+        self.hits = 0
+        self.probes = 0
+
+    def _load(self) -> dict:
+        if self.entries is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self.entries = data.get('entries', {}) if data.get('version') == CACHE_VERSION else {}
+            except (OSError, ValueError):
+                self.entries = {}
+        return self.entries
+
+    def _save(self) -> None:
+        # Shard workers only read the results the coordinator probed before starting them
+        if persister.read_only:
+            return
+        try:
+            write_json(self.path, {"version": CACHE_VERSION, "entries": self.entries}, indent=1)
+        except OSError:
+            pass
+
+    def tool(self, name: str, args: list[str], timeout: float = 30) -> list[str] | None:
+        # The first lines of the tool's output, or None when it is missing or fails
+        binary = shutil.which(name)
+        if binary is None:
+            return None
+        try:
+            stat = os.stat(binary)
+        except OSError:
+            return None
+        fingerprint = [os.path.realpath(binary), stat.st_size, stat.st_mtime_ns]
+        key = f"tool:{name}"
+        with self.lock:
+            entry = self._load().get(key)
+            if entry and entry['fingerprint'] == fingerprint:
+                self.hits += 1
+                return entry['output']
+        self.probes += 1
+        try:
+            result = subprocess.run([binary, *args], capture_output=True, text=True, timeout=timeout)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        output = result.stdout.strip().splitlines()[:2]
+        if result.returncode != 0 or not output:
+            return None
+        with self.lock:
+            self._load()[key] = {"fingerprint": fingerprint, "output": output, "checked_at": time.time()}
+            self._save()
+        return output
+
+    def remember(self, key: str, value) -> None:
+        with self.lock:
+            self._load()[key] = {"value": value, "checked_at": time.time()}
+            self._save()
+
+    def recall(self, key: str, max_age: float, default=None):
+        with self.lock:
+            entry = self._load().get(key)
+        if entry and 'value' in entry and time.time() - entry['checked_at'] < max_age:
+            return entry['value']
+        return default
+
+
+capability_cache = CapabilityCache()
@@ -2,10 +2,9 @@
 import os
 import time
 import requests
-import re
-from urllib.parse import urljoin
 import threading
 import queue
+from . import m3u8
 
 class NativeHLSDownloader:
     def __init__(self, m3u8_url: str, output_path: str, headers: dict = None):
@@ -43,26 +42,12 @@ class NativeHLSDownloader:
         try:
             resp = self.session.get(self.m3u8_url, timeout=15)
             if resp.status_code == 200:
-                content = resp.text
-                if '#EXT-X-STREAM-INF' in content:
+                variants = m3u8.parse_variants(resp.text, self.m3u8_url)
+                if variants:
                     print("Master Playlist detected, selecting best variant...")
-                    lines = content.splitlines()
-                    variants = []
-                    for i, line in enumerate(lines):
-                        if line.startswith('#EXT-X-STREAM-INF:'):
-                            bw_match = re.search(r'BANDWIDTH=(\d+)', line)
-                            bandwidth = int(bw_match.group(1)) if bw_match else 0
-                            
-                            url_line = lines[i+1] if i+1 < len(lines) else None
-                            if url_line and not url_line.startswith('#'):
-                                full_url = urljoin(self.m3u8_url, url_line.strip())
-                                variants.append({'bandwidth': bandwidth, 'url': full_url})
-                    
-                    if variants:
-                        variants.sort(key=lambda x: x['bandwidth'], reverse=True)
-                        best_variant = variants[0]
-                        print(f"Selected variant with bandwidth {best_variant['bandwidth']}")
-                        self.m3u8_url = best_variant['url']
+                    best_variant = variants[0]
+                    print(f"Selected variant with bandwidth {best_variant.bandwidth}")
+                    self.m3u8_url = best_variant.uri
         except Exception as e:
             print(f"Error checking playlist type: {e}")
 
@@ -95,83 +80,36 @@ class NativeHLSDownloader:
                     continue
                 
                 self.error_count = 0 # Reset on success
-                content = resp.text
-                
-                # Check for end of stream
-                if '#EXT-X-ENDLIST' in content:
-                    print("Stream ended (EXT-X-ENDLIST).")
-                    self.stop_flag = True
-                    break
 
-                # Parse Header Info
-                seq_match = re.search(r'#EXT-X-MEDIA-SEQUENCE:(\d+)', content)
-                current_seq = int(seq_match.group(1)) if seq_match else 0
+                # Only segments after last_seq are built, older ones are just counted
+                playlist = m3u8.parse(resp.text, self.m3u8_url, after_sequence=self.last_seq)
+                target_duration = playlist.target_duration or 5.0
 
-                # Check for Initialization Segment (fMP4)
-                map_match = re.search(r'#EXT-X-MAP:URI="(.*?)"', content)
-                if map_match:
-                    init_uri = map_match.group(1)
-                    full_init_url = urljoin(self.m3u8_url, init_uri)
-                    
-                    if full_init_url != self.last_init_url:
-                        print(f"Queueing Initialization Segment: {full_init_url}")
+                for seg in playlist.segments:
+                    # Initialization Segment (fMP4), queued again whenever EXT-X-MAP changes
+                    if seg.init and seg.init.uri != self.last_init_url:
+                        print(f"Queueing Initialization Segment: {seg.init.uri}")
                         self.segment_queue.put({
                             'type': 'init',
-                            'url': full_init_url
-                        })
-                        self.last_init_url = full_init_url
-                
-                target_duration_match = re.search(r'#EXT-X-TARGETDURATION:(\d+)', content)
-                target_duration = float(target_duration_match.group(1)) if target_duration_match else 5.0
-                
-                # Parse Segments
-                lines = content.splitlines()
-                segments = []
-                for i, line in enumerate(lines):
-                    if line.startswith('#EXTINF:'):
-                        byte_range = None
-                        # Look ahead for URL and other tags
-                        j = i + 1
-                        while j < len(lines):
-                            next_line = lines[j].strip()
-                            if not next_line: # Skip empty lines
-                                j += 1
-                                continue
-                            if next_line.startswith('#'):
-                                if next_line.startswith('#EXT-X-BYTERANGE:'):
-                                    byte_range = next_line.split(':')[1]
-                                # If we hit another EXTINF before finding a URL, stop
-                                if next_line.startswith('#EXTINF:'):
-                                    break
-                                j += 1
-                                continue
-                            
-                            # Found URL
-                            segments.append({'url': next_line, 'range': byte_range})
-                            break
-                
-                # Logic to find NEW segments
-                local_seq = current_seq
-                new_segments_found = False
-                
-                for seg in segments:
-                    if local_seq > self.last_seq:
-                        # We found a new segment
-                        full_url = urljoin(self.m3u8_url, seg['url'].strip())
-                        
-                        # Add to Queue
-                        self.segment_queue.put({
-                            'type': 'segment',
-                            'url': full_url,
-                            'range': seg['range'],
-                            'seq': local_seq
+                            'url': seg.init.uri,
+                            'range': seg.init.byte_range
                         })
-                        
-                        self.last_seq = local_seq
-                        new_segments_found = True
-                    
-                    local_seq += 1
-                
+                        self.last_init_url = seg.init.uri
+
+                    self.segment_queue.put({
+                        'type': 'segment',
+                        'url': seg.uri,
+                        'range': seg.byte_range,
+                        'seq': seg.sequence
+                    })
+                    self.last_seq = seg.sequence
+
+                # Check for end of stream, after queueing the segments the final playlist still had
+                if playlist.endlist:
+                    print("Stream ended (EXT-X-ENDLIST).")
+                    self.stop_flag = True
+                    break
+
                 # Polling Sleep Logic
                 # Since we decoupled downloading, we can poll aggressively.
                 # Target Duration / 2 is good, but for low latency, we might want to ensure we don't drift.
@@ -209,7 +147,7 @@ class NativeHLSDownloader:
                         continue
                     
                     if item['type'] == 'init':
-                        self.download_data(item['url'], f)
+                        self.download_data(item['url'], f, item['range'])
                     elif item['type'] == 'segment':
                         success = self.download_data(item['url'], f, item['range'])
                         if not success:
@@ -225,16 +163,9 @@ class NativeHLSDownloader:
     def download_data(self, url, file_handle, byte_range=None):
         headers = {}
         if byte_range:
-            try:
-                if '@' in byte_range:
-                    length, offset = byte_range.split('@')
-                    start = int(offset)
-                    end = start + int(length) - 1
-                    headers['Range'] = f'bytes={start}-{end}'
-                else:
-                     pass
-            except Exception as e:
-                print(f"Error parsing Byte Range {byte_range}: {e}")
+            # (length, offset) as resolved by the playlist parser
+            length, start = byte_range
+            headers['Range'] = f'bytes={start}-{start + length - 1}'
 
         for _ in range(3): # Retry 3 times
             if self.stop_flag and self.segment_queue.empty(): # Only stop if queue is empty? No, hard stop.
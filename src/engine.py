@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Coroutine
+from .logger import logger
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Watches one event loop for callbacks that run too long (a threshold of 0 turns the warnings off). A timer on the loop notes when it last
+# got to run; a watchdog thread that sees it overdue by more than `threshold` grabs the loop
+# thread's stack at that moment, so the warning logged once the loop is back names the code that
+# was blocking it rather than whatever happened to run next.
+class LoopLagMonitor:
+    def __init__(self, threshold: float = 0.5, interval: float = 0.1):
+        self.threshold = threshold
+        self.interval = interval
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.thread_id: int | None = None
+        self.expected = 0.0
+        self.culprit: str | None = None
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._watchdog: threading.Thread | None = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self.loop is not None:
+            return
+        self.loop = loop
+        self.thread_id = threading.get_ident()
+        self.expected = time.perf_counter() + self.interval
+        loop.call_later(self.interval, self._beat)
+        self._watchdog = threading.Thread(target=self._watch, name='loop-lag-watchdog', daemon=True)
+        self._watchdog.start()
+
+    def _beat(self) -> None:
+        now = time.perf_counter()
+        lag = now - self.expected
+        self.expected = now + self.interval
+        if 0 < self.threshold < lag:
+            self.stalls += 1
+            self.max_lag = max(self.max_lag, lag)
+            logger.warning(f"事件循环阻塞 {lag:.2f}s: {self.culprit or '未知位置'}")
+        self.culprit = None
+        self.loop.call_later(self.interval, self._beat)
+
+    def _watch(self) -> None:
+        while self.loop is not None and not self.loop.is_closed():
+            time.sleep(self.interval)
+            if self.culprit is None and 0 < self.threshold < time.perf_counter() - self.expected:
+                frame = sys._current_frames().get(self.thread_id)
+                self.culprit = self.describe(frame) if frame is not None else None
+
+    @staticmethod
+    def describe(frame) -> str:
+        stack = [i for i in traceback.extract_stack(frame)
+                 if i.filename.startswith(PROJECT_DIR) and not i.filename.endswith('engine.py')]
+        if not stack:
+            stack = traceback.extract_stack(frame)[-1:]
+        return ' <- '.join(f"{os.path.basename(i.filename)}:{i.lineno} {i.name}" for i in reversed(stack[-3:]))
+
+    def stats(self) -> dict:
+        return {"stalls": self.stalls, "max_lag": self.max_lag}
+
+
+
+# All room monitors run as tasks on one long-lived event loop; blocking recording work is
+# handed to supervised worker threads so probing never waits on ffmpeg.
+class MonitorEngine:
+    def __init__(self, name: str = 'monitor-engine'):
+        self.name = name
+        self.loop = asyncio.new_event_loop()
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.workers: dict[str, threading.Thread] = {}
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self.lag_monitor = LoopLagMonitor()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.lag_monitor.attach(self.loop)
+        self.loop.call_soon(self._ready.set)
+        self.loop.run_forever()
+
+    def add_room(self, key: str, coro: Coroutine) -> None:
+        if not self._thread:
+            self.start()
+        self.loop.call_soon_threadsafe(self._spawn, key, coro)
+
+    def _spawn(self, key: str, coro: Coroutine) -> None:
+        task = self.loop.create_task(coro, name=key)
+        self.tasks[key] = task
+        task.add_done_callback(lambda t: self._on_task_done(key, t))
+
+    def _on_task_done(self, key: str, task: asyncio.Task) -> None:
+        if self.tasks.get(key) is task:
+            self.tasks.pop(key, None)
+        if not task.cancelled() and task.exception():
+            exc = task.exception()
+            logger.error(f"Room task {key} exited with error: {type(exc).__name__}: {exc}")
+
+    def submit(self, coro: Coroutine) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def run_worker(self, name: str, func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def set_result(value):
+            if not future.done():
+                future.set_result(value)
+
+        def set_exception(exc):
+            if not future.done():
+                future.set_exception(exc)
+
+        def target():
+            try:
+                result = func(*args)
+            except Exception as e:
+                loop.call_soon_threadsafe(set_exception, e)
+            else:
+                loop.call_soon_threadsafe(set_result, result)
+            finally:
+                if self.workers.get(name) is thread:
+                    self.workers.pop(name, None)
+
+        # Recording workers are not daemons so that a shutdown waits for ffmpeg to finalize files
+        thread = threading.Thread(target=target, name=f'worker-{name}', daemon=False)
+        self.workers[name] = thread
+        thread.start()
+        return await future
+
+    @property
+    def room_count(self) -> int:
+        return len(self.tasks)
+
+    @property
+    def worker_count(self) -> int:
+        return len(self.workers)
+
+    def stop(self) -> None:
+        def cancel_all():
+            for task in list(self.tasks.values()):
+                task.cancel()
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(cancel_all)
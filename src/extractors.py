@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+import re
+from types import SimpleNamespace
+
+
+class Match:
+    __slots__ = ('string', 'begin', 'end', 'capture_begin', 'capture_end')
+
+    def __init__(self, string: str, begin: int, end: int, capture_begin: int, capture_end: int):
+        self.string = string
+        self.begin = begin
+        self.end = end
+        self.capture_begin = capture_begin
+        self.capture_end = capture_end
+
+    def group(self, index: int = 0) -> str:
+        if index == 0:
+            return self.string[self.begin:self.end]
+        if index == 1:
+            return self.string[self.capture_begin:self.capture_end]
+        raise IndexError("no such group")
+
+    def groups(self) -> tuple[str]:
+        return self.group(1),
+
+    def span(self) -> tuple[int, int]:
+        return self.begin, self.end
+
+    def __getitem__(self, index: int) -> str:
+        return self.group(index)
+
+
+# The `start(.*?)end` extraction that most page scrapers need, done with str.find instead of the
+# regex engine, which on large pages is several times faster. `lead` and `tail` are matched like
+# start and end but kept in the captured text, e.g. `(\{"data".*?),"iWebDefaultBitRate"` is
+# Between('', ',"iWebDefaultBitRate"', lead='{"data"'). Without `dotall` the captured text may not
+# span a newline, like `.` in a regex. Results match re.search/re.findall on the same pattern.
+class Between:
+    def __init__(self, start: str, end: str, lead: str = '', tail: str = '', dotall: bool = False):
+        if not (start or lead) or not (end or tail):
+            raise ValueError("Between needs a start and an end delimiter")
+        self.start = start
+        self.lead = lead
+        self.needle = start + lead
+        self.closing = tail + end
+        self.tail = tail
+        self.dotall = dotall
+        self.pattern = f"{re.escape(start)}({re.escape(lead)}.*?{re.escape(tail)}){re.escape(end)}"
+
+    def _scan(self, string: str, pos: int = 0) -> Match | None:
+        while True:
+            begin = string.find(self.needle, pos)
+            if begin < 0:
+                return None
+            inner = begin + len(self.needle)
+            close = string.find(self.closing, inner)
+            if close < 0:
+                return None
+            if not self.dotall:
+                newline = string.find('\n', inner, close)
+                if newline >= 0:
+                    # No match can start before this newline, as none of them could close before it
+                    pos = newline + 1 if '\n' not in self.needle else begin + 1
+                    continue
+            return Match(string, begin, close + len(self.closing), begin + len(self.start), close + len(self.tail))
+
+    def search(self, string: str) -> Match | None:
+        return self._scan(string)
+
+    def findall(self, string: str) -> list[str]:
+        results = []
+        pos = 0
+        while (match := self._scan(string, pos)) is not None:
+            results.append(match.group(1))
+            pos = match.end if match.end > match.begin else match.end + 1
+        return results
+
+    def __repr__(self) -> str:
+        return f"Between({self.pattern!r}{', dotall' if self.dotall else ''})"
+
+
+# Longest regex match a StreamMatcher still sees when it ends in a newly received piece; a longer one
+# is only found by the caller's own search over the whole text
+REGEX_OVERLAP = 4096
+
+
+# Tells whether a pattern matches a text that arrives piece by piece, e.g. a streamed page, without
+# searching it again from the start on every piece. `needs` is the earliest offset the next call
+# has to be given text from: where a Between match could still begin, or where its closing
+# delimiter is still being looked for.
+class StreamMatcher:
+    def __init__(self, pattern: Between | re.Pattern):
+        self.pattern = pattern
+        self.pos = 0
+        self.close_from = -1
+
+    @property
+    def needs(self) -> int:
+        pattern = self.pattern
+        if self.close_from < 0 or (isinstance(pattern, Between) and not pattern.dotall and '\n' in pattern.needle):
+            return self.pos
+        return self.close_from
+
+    def feed(self, text: str, base: int = 0) -> bool:
+        # `text` is everything received from offset `base` on, base <= needs
+        pattern = self.pattern
+        end = base + len(text)
+        if not isinstance(pattern, Between):
+            if pattern.search(text, self.pos - base):
+                return True
+            self.pos = max(self.pos, end - REGEX_OVERLAP)
+            return False
+
+        while True:
+            if self.close_from < 0:
+                begin = text.find(pattern.needle, self.pos - base)
+                if begin < 0:
+                    self.pos = max(self.pos, end - len(pattern.needle) + 1)
+                    return False
+                self.pos = base + begin
+                self.close_from = self.pos + len(pattern.needle)
+            close = text.find(pattern.closing, self.close_from - base)
+            if not pattern.dotall:
+                newline = text.find('\n', self.close_from - base, close if close >= 0 else len(text))
+                if newline >= 0:
+                    # Same rule as Between._scan: no match can start before this newline
+                    self.pos = base + newline + 1 if '\n' not in pattern.needle else self.pos + 1
+                    self.close_from = -1
+                    continue
+            if close >= 0:
+                return True
+            self.close_from = max(self.close_from, end - len(pattern.closing) + 1)
+            return False
+
+
+def regex(pattern: str, flags: int = 0) -> re.Pattern:
+    # For patterns that need more than fixed delimiters, compiled once at import
+    return re.compile(pattern, flags)
+
+
+EXTRACTORS: dict[str, dict[str, Between | re.Pattern]] = {}
+
+
+def register(platform: str, **extractors: Between | re.Pattern) -> SimpleNamespace:
+    EXTRACTORS[platform] = extractors
+    return SimpleNamespace(**extractors)
+
+
+def extractor(platform: str, name: str) -> Between | re.Pattern:
+    return EXTRACTORS[platform][name]
+
+
+douyin = register(
+    'douyin',
+    state=Between('', ']\\n"])', lead='{\\"state\\":'),
+    common=Between('', ']\\n"])</script><div hidden', lead='{\\"common\\":'),
+    room_store=Between('"roomStore":', ',"linkmicStore"', dotall=True),
+    nickname=Between('"nickname":"', '","avatar_thumb', dotall=True),
+    streams=Between('"', '"])</script><script nonce=', lead='{\\"common\\":'),
+    origin=Between('"origin":{"main":', ',"dash"', dotall=True),
+)
+
+tiktok = register(
+    'tiktok',
+    state=Between('<script id="SIGI_STATE" type="application/json">', '</script>', dotall=True),
+)
+
+kuaishou = register(
+    'kuaishou',
+    state=Between('<script>window.__INITIAL_STATE__=', ';(function(){var s;'),
+    live_stream=Between('', ',"gameInfo', lead='{"liveStream"'),
+)
+
+huya = register(
+    'huya',
+    stream=Between('stream: ', ',"iWebDefaultBitRate"', lead='{"data"'),
+    profile_room=Between('ProfileRoom":', ',"sPrivateHost'),
+)
+
+douyu = register(
+    'douyu',
+    page_context=Between('<script id="vike_pageContext" type="application/json">', '</script>'),
+)
+
+yy = register(
+    'yy',
+    nick=regex('nick: "(.*?)",\n\\s+logo'),
+    sid=regex('sid : "(.*?)",\n\\s+ssid', re.DOTALL),
+)
+
+xhs = register(
+    'xhs',
+    state=Between('<script>window.__INITIAL_STATE__=', '</script>'),
+    title=Between('<title>@', ' 的个人主页</title>'),
+)
+
+bigo = register(
+    'bigo',
+    web_url=Between('<meta data-n-head="ssr" data-hid="al:web:url" property="al:web:url" content="', '">'),
+    title=Between('<title>欢迎来到', '的直播间</title>', dotall=True),
+    og_title=Between('<meta data-n-head="ssr" data-hid="og:title" property="og:title" content="', ' - BIGO LIVE">',
+                     dotall=True),
+)
+
+blued = register(
+    'blued',
+    state=Between('decodeURIComponent("', '")),window.Promise', dotall=True),
+)
+
+netease = register(
+    'netease',
+    next_data=regex('<script id="__NEXT_DATA__" .* crossorigin="anonymous">(.*?)</script></body>', re.DOTALL),
+)
+
+qiandurebo = register(
+    'qiandurebo',
+    user=regex('var user = (.*?)\r\n\\s+user\\.play_url', re.DOTALL),
+    nickname=Between('"zb_nickname": "', '",\r\n'),
+    play_url=Between('"play_url": "', '",\r\n'),
+)
+
+flextv = register(
+    'flextv',
+    next_data=regex('<script id="__NEXT_DATA__" type=".*">(.*?)</script>'),
+    twitter_title=Between('<meta name="twitter:title" content="', '의'),
+)
+
+popkontv = register(
+    'popkontv',
+    mc_name=regex(r'"mcNickName":"([^"]+)"'),
+    next_data=Between('<script id="__NEXT_DATA__" type="application/json">', '</script>'),
+)
+
+twitcasting = register(
+    'twitcasting',
+    session_id=Between('<input type="hidden" name="cs_session_id" value="', '">'),
+    anchor=regex("<title>(.*?) \\(@(.*?)\\)  的直播 - Twit"),
+    title=regex('<meta name="twitter:title" content="(.*?)">\n\\s+<meta'),
+    status=regex('data-is-onlive="(.*?)"\n\\s+data-view-mode'),
+    movie_id=Between('data-movie-id="', '" data-audience-id'),
+)
+
+liveme = register(
+    'liveme',
+    og_url=Between('<meta property="og:url" content="', '">'),
+)
+
+huajiao = register(
+    'huajiao',
+    feed=Between('var feed = ', ';', tail='}'),
+    user_title=regex('<title>(.*?)的主页.*</title>'),
+)
+
+showroom = register(
+    'showroom',
+    room_id=Between('href="/room/profile?room_id=', '"'),
+)
+
+changliao = register(
+    'changliao',
+    config=Between('var config = ', 'config.webskins', dotall=True),
+)
+
+yinbo = register(
+    'yinbo',
+    config=Between('var config = ', 'config.webskins', dotall=True),
+)
+
+zhihu = register(
+    'zhihu',
+    initial_data=Between('<script id="js-initialData" type="text/json">', '</script>'),
+)
+
+sixroom = register(
+    '6room',
+    room_id=regex('rid: \'(.*?)\',\n\\s+roomid'),
+)
+
+youtube = register(
+    'youtube',
+    api_key=regex(r'"INNERTUBE_API_KEY":"([^"]+)"'),
+    video_id=regex(r'"videoId":"([^"]+)"'),
+    player_response=Between('var ytInitialPlayerResponse = ', ';var meta = document.createElement'),
+    player_response_short=Between('var ytInitialPlayerResponse = ', ';var'),
+)
+
+taobao = register(
+    'taobao',
+    redirect=Between("var url = '", "';"),
+)
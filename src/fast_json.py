@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSONDecodeError = json.JSONDecodeError
+
+
+# Drop-in for json.loads that decodes with orjson when it is installed. orjson is stricter than the
+# standard library (no NaN/Infinity, integers limited to 64 bits, no lone surrogates), so anything
+# it rejects is decoded again by json.loads and callers keep getting the same results and errors.
+def loads(data: str | bytes | bytearray, **kwargs):
+    if orjson is None or kwargs:
+        return json.loads(data, **kwargs)
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
+
+
+def backend() -> str:
+    return 'orjson' if orjson is not None else 'json'
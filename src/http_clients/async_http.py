@@ -1,10 +1,26 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import bisect
+import re
+import time
+import urllib.parse
 import httpx
 from typing import Dict, Any
 from .. import utils
+from ..breaker import endpoint_breakers, ENDPOINT_FAILURES
+from ..extractors import Between, StreamMatcher
+from ..metrics import metrics, endpoint_name, current_platform
+from ..proxy import proxy_pool
+from ..rate_limit import classify_error, report_request
+from .pool import client_pool
 
 OptionalStr = str | None
 OptionalDict = Dict[str, Any] | None
+OptionalPatterns = list[str | re.Pattern | Between] | None
+
+stream_stats = {"requests": 0, "aborted": 0, "bytes": 0}
+# Raised before a request leaves the machine, so it is safe to resend through another proxy
+CONNECT_ERRORS = (httpx.ProxyError, httpx.ConnectError, httpx.ConnectTimeout)
 
 
 async def async_req(
@@ -24,14 +40,21 @@ async def async_req(
 ) -> OptionalDict | OptionalStr | tuple:
     if headers is None:
         headers = {}
+    breaker = endpoint_breakers.get(urllib.parse.urlsplit(url).hostname or '')
+    if not breaker.allow():
+        return f"Circuit breaker open for {breaker.key}, retry in {breaker.retry_after():.0f}s"
+    endpoint = endpoint_name(url, 'POST' if data or json_data else 'GET')
+    start = time.monotonic()
+    async def send(proxy: OptionalStr) -> httpx.Response:
+        async with httpx.AsyncClient(transport=client_pool.transport(proxy, http2, verify), timeout=timeout) as client:
+            if data or json_data:
+                return await client.post(url, data=data, json=json_data, headers=headers)
+            return await client.get(url, headers=headers, follow_redirects=True)
+
     try:
         proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        if data or json_data:
-            async with httpx.AsyncClient(proxy=proxy_addr, timeout=timeout, verify=verify, http2=http2) as client:
-                response = await client.post(url, data=data, json=json_data, headers=headers)
-        else:
-            async with httpx.AsyncClient(proxy=proxy_addr, timeout=timeout, verify=verify, http2=http2) as client:
-                response = await client.get(url, headers=headers, follow_redirects=True)
+        response, proxy_addr = await send_with_failover(send, proxy_addr)
+        record_outcome(breaker, start, endpoint, status=response.status_code, response=response, proxy=proxy_addr)
 
         if redirect_url:
             return str(response.url)
@@ -40,20 +63,125 @@ async def async_req(
             return (response.text, cookies_dict) if include_cookies else cookies_dict
         else:
             resp_str = response.text
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
     except Exception as e:
+        record_outcome(breaker, start, endpoint, error=e, proxy=proxy_addr)
         resp_str = str(e)
 
     return resp_str
 
 
+def record_outcome(breaker, start: float, endpoint: str, status: int | None = None, error: Exception | None = None,
+                   response: httpx.Response | None = None, proxy: OptionalStr = None) -> None:
+    latency = time.monotonic() - start
+    report_request(latency, error=error, status=status)
+    error_type, _ = classify_error(error, status)
+    if error_type in ENDPOINT_FAILURES:
+        breaker.record_failure(error_type)
+    elif error is None:
+        breaker.record_success()
+    else:
+        breaker.release()
+    metrics.record(endpoint, latency, status=status, error=error_type if error else None,
+                   bytes_in=response.num_bytes_downloaded if response else 0,
+                   bytes_out=len(response.request.content) if response else 0, proxy=bool(proxy))
+    if proxy and not isinstance(error, CONNECT_ERRORS):
+        proxy_pool.report(proxy, error_type if error else None, latency, platform=current_platform.get())
+
+
+async def send_with_failover(send, proxy_addr: OptionalStr) -> tuple:
+    try:
+        return await send(proxy_addr), proxy_addr
+    except CONNECT_ERRORS as e:
+        if proxy_addr not in proxy_pool:
+            raise
+        proxy_pool.report(proxy_addr, classify_error(e)[0], platform=current_platform.get())
+        alternative = proxy_pool.alternative(proxy_addr)
+        if not alternative:
+            raise
+    try:
+        return await send(alternative), alternative
+    except CONNECT_ERRORS as e:
+        proxy_pool.report(alternative, classify_error(e)[0], platform=current_platform.get())
+        raise
+
+
+async def async_req_until(
+        url: str,
+        until: OptionalPatterns = None,
+        proxy_addr: OptionalStr = None,
+        headers: OptionalDict = None,
+        timeout: int = 20,
+        verify: bool = False,
+        http2: bool = True,
+        chunk_size: int = 32768,
+        max_chars: int = 8 * 1024 * 1024
+) -> str:
+    # Streams a page and stops reading as soon as every pattern in `until` matches the text received
+    # so far. The caller runs its own regexes over the returned prefix, which is the whole page when
+    # a pattern never matches, so parsing behaves as if the full body had been downloaded.
+    if headers is None:
+        headers = {}
+    matchers = [StreamMatcher(re.compile(p) if isinstance(p, str) else p) for p in until or []]
+    breaker = endpoint_breakers.get(urllib.parse.urlsplit(url).hostname or '')
+    if not breaker.allow():
+        return f"Circuit breaker open for {breaker.key}, retry in {breaker.retry_after():.0f}s"
+    endpoint = endpoint_name(url)
+    start = time.monotonic()
+    async def send(proxy: OptionalStr) -> httpx.Response:
+        client = httpx.AsyncClient(transport=client_pool.transport(proxy, http2, verify), timeout=timeout)
+        return await client.send(client.build_request('GET', url, headers=headers), stream=True,
+                                 follow_redirects=True)
+
+    try:
+        proxy_addr = utils.handle_proxy_addr(proxy_addr)
+        response, proxy_addr = await send_with_failover(send, proxy_addr)
+        try:
+            # Each pattern is only shown the chunks from where it still needs text, not the whole page
+            chunks = []
+            offsets = []
+            received = 0
+            async for chunk in response.aiter_text(chunk_size):
+                chunks.append(chunk)
+                offsets.append(received)
+                received += len(chunk)
+                if matchers:
+                    first = bisect.bisect_right(offsets, min(m.needs for m in matchers)) - 1
+                    tail = ''.join(chunks[first:])
+                    matchers = [m for m in matchers if not m.feed(tail, offsets[first])]
+                if not matchers or received >= max_chars:
+                    break
+            text = ''.join(chunks)
+            stream_stats['requests'] += 1
+            stream_stats['bytes'] += response.num_bytes_downloaded
+            if not response.is_stream_consumed:
+                stream_stats['aborted'] += 1
+        finally:
+            await response.aclose()
+        record_outcome(breaker, start, endpoint, status=response.status_code, response=response, proxy=proxy_addr)
+        return text
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        record_outcome(breaker, start, endpoint, error=e, proxy=proxy_addr)
+        return str(e)
+
+
 async def get_response_status(url: str, proxy_addr: OptionalStr = None, headers: OptionalDict = None,
                               timeout: int = 10, abroad: bool = False, verify: bool = False, http2=False) -> bool:
-
+    start = time.monotonic()
     try:
         proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        async with httpx.AsyncClient(proxy=proxy_addr, timeout=timeout, verify=verify) as client:
+        async with httpx.AsyncClient(transport=client_pool.transport(proxy_addr, False, verify), timeout=timeout) as client:
             response = await client.head(url, headers=headers, follow_redirects=True)
+            metrics.record(endpoint_name(url, 'HEAD'), time.monotonic() - start, status=response.status_code,
+                           bytes_in=response.num_bytes_downloaded, proxy=bool(proxy_addr))
             return response.status_code == 200
     except Exception as e:
+        metrics.record(endpoint_name(url, 'HEAD'), time.monotonic() - start, error=classify_error(e)[0],
+                       proxy=bool(proxy_addr))
         print(e)
     return False
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import ipaddress
+import os
+import socket
+import threading
+import time
+import typing
+import httpcore
+from ..logger import logger
+
+try:
+    import dns.asyncresolver
+    import dns.exception
+    import dns.resolver
+except ImportError:
+    dns = None
+
+RESOLVER_ERRORS = (OSError, asyncio.TimeoutError) + ((dns.exception.DNSException,) if dns else ())
+if os.name == 'nt':
+    HOSTS_FILE = os.path.join(os.environ.get('SystemRoot', r'C:\Windows'), 'System32', 'drivers', 'etc', 'hosts')
+else:
+    HOSTS_FILE = '/etc/hosts'
+
+
+class DNSEntry:
+    def __init__(self, addresses: list[str], ttl: float):
+        self.addresses = addresses
+        self.resolved_at = time.monotonic()
+        self.expires = self.resolved_at + ttl
+        self.ttl = ttl
+        self.hits = 0
+
+
+# Process-wide cache of resolved hosts for the shared HTTP layer. Answers are kept for their TTL
+# (taken from dnspython when it is installed, `default_ttl` otherwise), hosts that are still being
+# used are re-resolved in the background shortly before they expire, and when the resolver fails
+# the last known answer is served for up to `stale_ttl` instead of failing the request.
+class DNSCache:
+    def __init__(self, default_ttl: float = 300.0, min_ttl: float = 30.0, max_ttl: float = 3600.0,
+                 stale_ttl: float = 3600.0, refresh_ahead: float = 0.2, timeout: float = 5.0):
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.entries: dict[str, DNSEntry] = {}
+        self.inflight: dict[tuple[str, int], asyncio.Future] = {}
+        self.refreshing: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    def configure(self, default_ttl: float) -> None:
+        self.default_ttl = default_ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.default_ttl > 0
+
+    async def resolve(self, host: str) -> list[str]:
+        if is_ip_address(host) or not self.enabled:
+            return [host]
+        now = time.monotonic()
+        entry = self.entries.get(host)
+        if entry and entry.expires > now:
+            self.hits += 1
+            entry.hits += 1
+            if entry.hits > 1 and entry.expires - now < entry.ttl * self.refresh_ahead:
+                self._refresh_in_background(host)
+            return entry.addresses
+        self.misses += 1
+        return await self._lookup(host)
+
+    async def _lookup(self, host: str) -> list[str]:
+        # Concurrent misses for one host on one loop share a single query
+        loop = asyncio.get_running_loop()
+        key = (host, id(loop))
+        future = self.inflight.get(key)
+        if future is not None and not future.done():
+            return await asyncio.shield(future)
+        future = self.inflight[key] = loop.create_future()
+        try:
+            addresses = await self._query(host)
+            future.set_result(addresses)
+            return addresses
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            if self.inflight.get(key) is future:
+                del self.inflight[key]
+
+    async def _query(self, host: str) -> list[str]:
+        try:
+            addresses, ttl = await asyncio.wait_for(query_resolver(host), self.timeout)
+        except RESOLVER_ERRORS as e:
+            self.failures += 1
+            entry = self.entries.get(host)
+            if entry and time.monotonic() - entry.expires < self.stale_ttl:
+                self.stale += 1
+                logger.debug(f"DNS lookup for {host} failed ({e!r}), using the answer from "
+                             f"{time.monotonic() - entry.resolved_at:.0f}s ago")
+                return entry.addresses
+            raise
+        ttl = min(max(ttl or self.default_ttl, self.min_ttl), self.max_ttl)
+        with self.lock:
+            self.entries[host] = DNSEntry(addresses, ttl)
+        return addresses
+
+    def _refresh_in_background(self, host: str) -> None:
+        with self.lock:
+            if host in self.refreshing:
+                return
+            self.refreshing.add(host)
+        self.refreshes += 1
+
+        async def refresh():
+            try:
+                await self._query(host)
+            except Exception as e:
+                logger.debug(f"Background DNS refresh for {host} failed: {e!r}")
+            finally:
+                self.refreshing.discard(host)
+
+        asyncio.get_running_loop().create_task(refresh())
+
+    def invalidate(self, host: str) -> None:
+        with self.lock:
+            self.entries.pop(host, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+def is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+
+# Names listed in the hosts file, which dnspython does not read. Re-read whenever the file changes.
+class HostsFile:
+    def __init__(self, path: str = HOSTS_FILE):
+        self.path = path
+        self.mtime = None
+        self.names: set[str] = set()
+
+    def __contains__(self, host: str) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self.mtime:
+            self.mtime = mtime
+            self.names = set()
+            try:
+                with open(self.path, encoding='utf-8', errors='ignore') as f:
+                    for line in f:
+                        self.names.update(i.lower().rstrip('.') for i in line.split('#', 1)[0].split()[1:])
+            except OSError:
+                pass
+        return host.lower().rstrip('.') in self.names
+
+
+hosts_file = HostsFile()
+
+
+async def query_resolver(host: str) -> tuple[list[str], float | None]:
+    # dnspython gives TTLs but only asks DNS servers, so names from the hosts file, and any name it
+    # finds no address for (search domains, mDNS, ...), go to the system resolver
+    if dns is not None and host not in hosts_file:
+        try:
+            return await query_dnspython(host)
+        except (OSError, dns.exception.DNSException) as e:
+            logger.debug(f"dnspython lookup for {host} failed ({e!r}), trying the system resolver")
+    return await query_system(host)
+
+
+async def query_dnspython(host: str) -> tuple[list[str], float]:
+    addresses, ttls = [], []
+    for rdtype in ('A', 'AAAA'):
+        try:
+            answer = await dns.asyncresolver.resolve(host, rdtype)
+        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+            continue
+        addresses += [item.to_text() for item in answer]
+        ttls.append(answer.rrset.ttl)
+    if addresses:
+        return addresses, min(ttls)
+    raise OSError(f"No address found for {host}")
+
+
+async def query_system(host: str) -> tuple[list[str], None]:
+    # The system resolver does not report TTLs
+    infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    if not addresses:
+        raise OSError(f"No address found for {host}")
+    return addresses, None
+
+
+# Resolves hostnames through the cache before connecting, trying each address in turn. TLS still
+# uses the original hostname for SNI and certificate checks since httpcore passes it separately.
+class CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self, cache: DNSCache, backend: httpcore.AsyncNetworkBackend | None = None):
+        self.cache = cache
+        self.backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host: str, port: int, timeout: float | None = None, local_address: str | None = None,
+                          socket_options: typing.Iterable | None = None) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await self.cache.resolve(host)
+        except RESOLVER_ERRORS as e:
+            raise httpcore.ConnectError(f"DNS lookup for {host} failed: {e!r}") from e
+        error = None
+        for address in addresses:
+            try:
+                return await self.backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        if len(addresses) > 1 or addresses[0] != host:
+            # Every cached address refused, the host may have moved
+            self.cache.invalidate(host)
+        raise error
+
+    async def connect_unix_socket(self, path: str, timeout: float | None = None,
+                                  socket_options: typing.Iterable | None = None) -> httpcore.AsyncNetworkStream:
+        return await self.backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+dns_cache = DNSCache()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+import time
+import urllib.request
+import weakref
+import httpcore
+import httpx
+from .dns_cache import dns_cache, CachingNetworkBackend
+from .replay import http_fixtures
+
+ENV_PROXY_TTL = 60.0
+
+
+# Connection pools shared by every request. Callers still open a short-lived AsyncClient per
+# request (so cookies never leak between requests), but its transport routes into a pool kept per
+# (host, proxy, http2, verify, event loop), so keep-alive connections and TLS sessions are reused.
+# Each host gets its own pool, which makes `per_host` a bound on connections to that host, and
+# pools that sat idle for `idle_timeout` are closed.
+class ClientPool:
+    def __init__(self, per_host: int = 10, keepalive_expiry: float = 30.0, idle_timeout: float = 300.0):
+        self.limits = httpx.Limits(max_connections=per_host, max_keepalive_connections=per_host,
+                                   keepalive_expiry=keepalive_expiry)
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.pools: dict[tuple, tuple[BackendTransport, weakref.ref, list]] = {}
+        self.env_proxies: dict[str, str] = {}
+        self.env_checked = 0.0
+        self.last_evict = 0.0
+        self.created = 0
+        self.evicted = 0
+        self.requests = 0
+        self.network_backend = CachingNetworkBackend(dns_cache)
+
+    def transport(self, proxy: str | None = None, http2: bool = True, verify: bool = True) -> 'PooledTransport':
+        return PooledTransport(self, proxy, http2, verify)
+
+    def env_proxy(self, url: httpx.URL) -> str | None:
+        # A client given a transport ignores the proxy environment variables, so honour them here
+        now = time.monotonic()
+        if now - self.env_checked > ENV_PROXY_TTL:
+            self.env_proxies = urllib.request.getproxies()
+            self.env_checked = now
+        if not self.env_proxies or urllib.request.proxy_bypass(url.host):
+            return None
+        return self.env_proxies.get(url.scheme) or self.env_proxies.get('all')
+
+    def get(self, url: httpx.URL, proxy: str | None, http2: bool, verify: bool) -> 'BackendTransport':
+        if proxy is None:
+            proxy = self.env_proxy(url)
+        loop = asyncio.get_running_loop()
+        key = (url.scheme, url.host, url.port, proxy, http2, verify, id(loop))
+        now = time.monotonic()
+        with self.lock:
+            self.requests += 1
+            entry = self.pools.get(key)
+            if entry is None or entry[1]() is not loop:
+                backend = self.network_backend if dns_cache.enabled else None
+                transport = BackendTransport(proxy=proxy, http2=http2, verify=verify, limits=self.limits,
+                                             network_backend=backend)
+                entry = self.pools[key] = (transport, weakref.ref(loop), [now])
+                self.created += 1
+            entry[2][0] = now
+        if now - self.last_evict > min(self.idle_timeout, 60.0):
+            self.evict_idle(now)
+        return entry[0]
+
+    def evict_idle(self, now: float | None = None) -> int:
+        now = now or time.monotonic()
+        self.last_evict = now
+        loop = asyncio.get_running_loop()
+        closing = []
+        with self.lock:
+            for key, (transport, loop_ref, last_used) in list(self.pools.items()):
+                owner = loop_ref()
+                if owner is None or owner.is_closed():
+                    # The loop that owned these connections is gone, they cannot be closed from here
+                    del self.pools[key]
+                elif owner is loop and now - last_used[0] > self.idle_timeout:
+                    del self.pools[key]
+                    closing.append(transport)
+            self.evicted += len(closing)
+        for transport in closing:
+            loop.create_task(transport.aclose())
+        return len(closing)
+
+    def stats(self) -> dict:
+        with self.lock:
+            connections = sum(len(transport.connection_pool.connections) for transport, _, _ in self.pools.values())
+            return {
+                "pools": len(self.pools),
+                "connections": connections,
+                "created": self.created,
+                "evicted": self.evicted,
+                "requests": self.requests,
+            }
+
+
+# httpx.AsyncHTTPTransport with the httpcore pool built here, so the network backend (the DNS cache)
+# can be passed to it; httpx itself has no option for one.
+class BackendTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, proxy: str | None, http2: bool, verify: bool, limits: httpx.Limits,
+                 network_backend: httpcore.AsyncNetworkBackend | None = None):
+        ssl_context = httpx.create_ssl_context(verify=verify)
+        options = dict(ssl_context=ssl_context, max_connections=limits.max_connections,
+                       max_keepalive_connections=limits.max_keepalive_connections,
+                       keepalive_expiry=limits.keepalive_expiry, http2=http2, network_backend=network_backend)
+        if proxy is None:
+            pool = httpcore.AsyncConnectionPool(**options)
+        else:
+            proxy = httpx.Proxy(proxy)
+            proxy_url = httpcore.URL(scheme=proxy.url.raw_scheme, host=proxy.url.raw_host, port=proxy.url.port,
+                                     target=proxy.url.raw_path)
+            if proxy.url.scheme in ('http', 'https'):
+                pool = httpcore.AsyncHTTPProxy(proxy_url=proxy_url, proxy_auth=proxy.raw_auth,
+                                               proxy_headers=proxy.headers.raw, proxy_ssl_context=proxy.ssl_context,
+                                               **options)
+            elif proxy.url.scheme in ('socks5', 'socks5h'):
+                pool = httpcore.AsyncSOCKSProxy(proxy_url=proxy_url, proxy_auth=proxy.raw_auth, **options)
+            else:
+                raise ValueError(f"Unsupported proxy scheme: {proxy.url.scheme}")
+        self.connection_pool = self._pool = pool
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    def __init__(self, pool: ClientPool, proxy: str | None, http2: bool, verify: bool):
+        self.pool = pool
+        self.proxy = proxy
+        self.http2 = http2
+        self.verify = verify
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if http_fixtures.mode:
+            return await http_fixtures.handle(request, self.send)
+        return await self.send(request)
+
+    async def send(self, request: httpx.Request) -> httpx.Response:
+        transport = self.pool.get(request.url, self.proxy, self.http2, self.verify)
+        return await transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        # Closing the per-request client must leave the shared connections open
+        pass
+
+
+client_pool = ClientPool()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import atexit
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+import httpx
+from ..logger import logger
+from ..metrics import current_platform
+
+FIXTURE_VERSION = 1
+MODE_ENV = 'DLR_HTTP_MODE'
+FIXTURES_ENV = 'DLR_HTTP_FIXTURES'
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                    'fixtures')
+# Signatures, timestamps and nonces change on every call, so they are left out when matching
+VOLATILE_PARAMS = {'a_bogus', 'x-bogus', 'mstoken', '_signature', 'signature', 'sign', 'ts', 't', '_', 'timestamp',
+                   'time', 'callback', 'nonce', 'rnd', 'random', 'w_rid', 'wts', 'verifyfp'}
+# The body is stored decoded, so the headers describing its transfer no longer apply
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+def request_key(method: str, url: str, body: bytes | None = None) -> str:
+    parsed = urllib.parse.urlsplit(str(url))
+    query = sorted((k, v) for k, v in urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+                   if k.lower() not in VOLATILE_PARAMS)
+    key = f"{method.upper()} {parsed.scheme}://{parsed.netloc}{parsed.path}?{urllib.parse.urlencode(query)}"
+    return f"{key} {hashlib.sha1(body).hexdigest()[:12]}" if body else key
+
+
+def fixture_name(platform: str) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', platform) + '.json'
+
+
+# Request/response pairs captured per platform into versioned JSON files. In record mode every
+# response that passes through the shared HTTP layer is saved; in replay mode requests are
+# answered from those files and never reach the network. Requests are matched on method, URL
+# without volatile parameters and body, and repeated requests are answered in recorded order.
+class FixtureStore:
+    def __init__(self, mode: str | None = None, directory: str = DEFAULT_FIXTURES_DIR):
+        self.lock = threading.Lock()
+        self.mode = None
+        self.directory = directory
+        self.files: dict[str, dict] = {}
+        self.index: dict[str, list[dict]] = {}
+        self.cursors: dict[str, int] = {}
+        self.dirty: set[str] = set()
+        self.last_save = time.monotonic()
+        self.misses = 0
+        self.configure(mode, directory)
+        atexit.register(self.save)
+
+    @classmethod
+    def from_env(cls) -> 'FixtureStore':
+        return cls(os.environ.get(MODE_ENV) or None, os.environ.get(FIXTURES_ENV) or DEFAULT_FIXTURES_DIR)
+
+    def configure(self, mode: str | None, directory: str | None = None) -> None:
+        if mode not in (None, 'record', 'replay'):
+            raise ValueError(f"{MODE_ENV} must be record or replay, got {mode}")
+        with self.lock:
+            self.mode = mode
+            self.directory = directory or self.directory
+            self.files.clear()
+            self.index.clear()
+            self.cursors.clear()
+            self.dirty.clear()
+        if mode:
+            self.load()
+            logger.info(f"HTTP {mode} mode, fixtures in {self.directory}")
+
+    def load(self) -> None:
+        if not os.path.isdir(self.directory):
+            return
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != FIXTURE_VERSION:
+                logger.warning(f"Skipping fixture {name}: version {data.get('version')}, expected {FIXTURE_VERSION}")
+                continue
+            with self.lock:
+                self.files[name] = data
+                for entry in data['entries']:
+                    self.index.setdefault(entry['key'], []).append(entry)
+
+    def _file(self, platform: str) -> dict:
+        name = fixture_name(platform)
+        data = self.files.get(name)
+        if data is None:
+            data = self.files[name] = {"version": FIXTURE_VERSION, "platform": platform, "entries": [], "cases": []}
+        self.dirty.add(name)
+        data['recorded_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        return data
+
+    def record(self, method: str, url: str, request_body: bytes | None, status: int, headers: list, body: bytes,
+               final_url: str | None = None, platform: str | None = None) -> None:
+        entry = {
+            "key": request_key(method, url, request_body),
+            "method": method.upper(),
+            "url": str(url),
+            "status": status,
+            "headers": [[k, v] for k, v in headers if k.lower() not in DROPPED_HEADERS],
+        }
+        try:
+            entry['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body'] = base64.b64encode(body).decode()
+            entry['body_encoding'] = 'base64'
+        if final_url and final_url != str(url):
+            entry['final_url'] = final_url
+        platform = platform or current_platform.get() or urllib.parse.urlsplit(str(url)).hostname or 'unknown'
+        with self.lock:
+            self._file(platform)['entries'].append(entry)
+            self.index.setdefault(entry['key'], []).append(entry)
+        if time.monotonic() - self.last_save > 10:
+            self.save()
+
+    def record_case(self, platform: str, call: str, kwargs: dict, result) -> None:
+        with self.lock:
+            self._file(platform)['cases'].append({"call": call, "kwargs": kwargs, "result": result})
+
+    def lookup(self, method: str, url: str, request_body: bytes | None = None) -> dict | None:
+        with self.lock:
+            key = request_key(method, url, request_body)
+            entries = self.index.get(key)
+            if entries is None and request_body:
+                # Bodies often carry timestamps of their own
+                key = request_key(method, url)
+                entries = [entry for k, v in self.index.items() if k.rsplit(' ', 1)[0] == key for entry in v]
+            if not entries:
+                self.misses += 1
+                return None
+            cursor = self.cursors.get(key, 0)
+            self.cursors[key] = cursor + 1
+            return entries[cursor % len(entries)]
+
+    def cases(self) -> list[tuple[str, dict]]:
+        return [(data.get('platform', name), case) for name, data in self.files.items() for case in data['cases']]
+
+    def reset_cursors(self) -> None:
+        with self.lock:
+            self.cursors.clear()
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            for name in self.dirty:
+                with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as f:
+                    json.dump(self.files[name], f, ensure_ascii=False, indent=1)
+            self.dirty.clear()
+            self.last_save = time.monotonic()
+
+    async def handle(self, request: httpx.Request, send) -> httpx.Response:
+        if self.mode == 'replay':
+            entry = self.lookup(request.method, str(request.url), request.content)
+            if entry is None:
+                raise httpx.ConnectError(f"No recorded response for {request.method} {request.url}", request=request)
+            return httpx.Response(entry['status'], headers=entry['headers'], content=entry_body(entry),
+                                  request=request)
+        response = await send(request)
+        body = await response.aread()
+        await response.aclose()
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in DROPPED_HEADERS]
+        self.record(request.method, str(request.url), request.content, response.status_code, headers, body)
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request,
+                              extensions=response.extensions)
+
+
+def entry_body(entry: dict) -> bytes:
+    if entry.get('body_encoding') == 'base64':
+        return base64.b64decode(entry['body'])
+    return entry['body'].encode('utf-8')
+
+
+http_fixtures = FixtureStore.from_env()
@@ -5,7 +5,11 @@ import urllib.error
 import requests
 import ssl
 import json
+import time
 import urllib.request
+from ..metrics import metrics, endpoint_name
+from ..rate_limit import classify_error
+from .replay import http_fixtures, entry_body
 
 no_proxy_handler = urllib.request.ProxyHandler({})
 opener = urllib.request.build_opener(no_proxy_handler)
@@ -30,6 +34,18 @@ def sync_req(
 ) -> str:
     if headers is None:
         headers = {}
+    method = 'POST' if data or json_data else 'GET'
+    endpoint = endpoint_name(url, method)
+    payload = json.dumps(json_data).encode() if json_data else data if isinstance(data, bytes) else \
+        urllib.parse.urlencode(data).encode() if data else None
+    if http_fixtures.mode == 'replay':
+        entry = http_fixtures.lookup(method, url, payload)
+        if entry is None:
+            return f"No recorded response for {method} {url}"
+        return entry.get('final_url', url) if redirect_url else entry_body(entry).decode('utf-8')
+    start = time.monotonic()
+    status = None
+    received = 0
     try:
         if proxy_addr:
             proxies = {
@@ -42,7 +58,10 @@ def sync_req(
                 )
             else:
                 response = requests.get(url, headers=headers, proxies=proxies, timeout=timeout)
+            status, received = response.status_code, len(response.content)
             if redirect_url:
+                metrics.record(endpoint, time.monotonic() - start, status=status, proxy=True)
+                record_fixture(method, url, payload, status, '', response.url)
                 return response.url
             resp_str = response.text
         else:
@@ -58,19 +77,24 @@ def sync_req(
                     response = urllib.request.urlopen(req, timeout=timeout)
                 else:
                     response = opener.open(req, timeout=timeout)
+                status = response.status
                 if redirect_url:
+                    metrics.record(endpoint, time.monotonic() - start, status=status)
+                    record_fixture(method, url, payload, status, '', response.url)
                     return response.url
                 content_encoding = response.info().get('Content-Encoding')
                 try:
+                    body = response.read()
+                    received = len(body)
                     if content_encoding == 'gzip':
-                        with gzip.open(response, 'rt', encoding=content_conding) as gzipped:
-                            resp_str = gzipped.read()
+                        resp_str = gzip.decompress(body).decode(content_conding)
                     else:
-                        resp_str = response.read().decode(content_conding)
+                        resp_str = body.decode(content_conding)
                 finally:
                     response.close()
 
             except urllib.error.HTTPError as e:
+                status = e.code
                 if e.code == 400:
                     resp_str = e.read().decode(content_conding)
                 else:
@@ -83,6 +107,16 @@ def sync_req(
                 raise
 
     except Exception as e:
-        resp_str = str(e)
+        metrics.record(endpoint, time.monotonic() - start, status=status, error=classify_error(e)[0],
+                       bytes_in=received, proxy=bool(proxy_addr))
+        return str(e)
 
+    metrics.record(endpoint, time.monotonic() - start, status=status, bytes_in=received, proxy=bool(proxy_addr))
+    record_fixture(method, url, payload, status, resp_str)
     return resp_str
+
+
+def record_fixture(method: str, url: str, payload: bytes | None, status: int | None, text: str,
+                   final_url: str | None = None) -> None:
+    if http_fixtures.mode == 'record':
+        http_fixtures.record(method, url, payload, status or 200, [], text.encode('utf-8'), final_url=final_url)
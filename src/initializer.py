@@ -12,10 +12,8 @@ import sys
 import platform
 import zipfile
 from pathlib import Path
-import requests
 import re
-import distro
-from tqdm import tqdm
+from .capabilities import capability_cache
 from .logger import logger
 
 current_platform = platform.system()
@@ -35,6 +33,9 @@ def unzip_file(zip_path: str | Path, extract_to: str | Path, delete: bool = True
 
 
 def install_nodejs_windows():
+    # The installers' dependencies are only imported when something has to be installed
+    import requests
+    from tqdm import tqdm
     try:
         logger.warning("Node.js is not installed.")
         logger.debug("Installing the stable version of Node.js for Windows...")
@@ -152,6 +153,7 @@ def install_nodejs_mac():
 
 
 def get_package_manager():
+    import distro
     dist_id = distro.id()
     if dist_id in ["centos", "fedora", "rhel", "amzn", "oracle", "scientific", "opencloudos", "alinux"]:
         return "RHS"
@@ -205,14 +207,7 @@ def ensure_nodejs_installed(func):
 
 
 def check_nodejs_installed() -> bool:
-    try:
-        result = subprocess.run(['node', '-v'], capture_output=True)
-        version = result.stdout.strip()
-        if result.returncode == 0 and version:
-            return True
-    except FileNotFoundError:
-        pass
-    return False
+    return capability_cache.tool('node', ['-v']) is not None
 
 
 def check_node() -> bool:
@@ -0,0 +1,94 @@
+// Long-lived worker for src/node_pool.py. Every script in the parent directory is compiled once at
+// start, each in its own function scope like execjs does, and calls are answered over stdin/stdout.
+// A frame is a 4-byte big-endian length followed by that many bytes of UTF-8 JSON:
+//   request  {"id": 1, "script": "x-bogus.js", "fn": "sign", "args": [...]}
+//   response {"id": 1, "ok": true, "result": ...} or {"id": 1, "ok": false, "error": "..."}
+// stdout carries only frames, so the scripts' console output goes to stderr.
+
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const scriptDir = process.argv[2] || path.join(__dirname, '..');
+const stderrConsole = new console.Console(process.stderr, process.stderr);
+const IDENTIFIER = /^[A-Za-z_$][\w$]*$/;
+const scripts = {};
+
+function load(name) {
+    const filename = path.join(scriptDir, name);
+    const source = fs.readFileSync(filename, 'utf8');
+    const wrapper = '(function (exports, require, module, __filename, __dirname, console) {' + source +
+        '\n;return function (name) { return eval(name); };\n})';
+    const module = {exports: {}, filename: filename};
+    const lookup = vm.runInThisContext(wrapper, {filename: filename})(
+        module.exports, require, module, filename, scriptDir, stderrConsole);
+    return {lookup: lookup, module: module};
+}
+
+for (const name of fs.readdirSync(scriptDir)) {
+    if (!name.endsWith('.js')) {
+        continue;
+    }
+    try {
+        scripts[name] = load(name);
+    } catch (err) {
+        scripts[name] = {error: String(err && err.stack || err)};
+    }
+}
+
+function resolve(script, fn) {
+    const entry = scripts[script];
+    if (!entry) {
+        throw new Error('Unknown script: ' + script);
+    }
+    if (entry.error) {
+        throw new Error('Failed to load ' + script + ': ' + entry.error);
+    }
+    if (!IDENTIFIER.test(fn)) {
+        throw new Error('Invalid function name: ' + fn);
+    }
+    const exported = entry.module.exports && entry.module.exports[fn];
+    const target = typeof exported === 'function' ? exported : entry.lookup(fn);
+    if (typeof target !== 'function') {
+        throw new Error(script + ' has no function ' + fn);
+    }
+    return target;
+}
+
+function send(message) {
+    const payload = Buffer.from(JSON.stringify(message), 'utf8');
+    const header = Buffer.alloc(4);
+    header.writeUInt32BE(payload.length, 0);
+    process.stdout.write(Buffer.concat([header, payload]));
+}
+
+async function handle(request) {
+    try {
+        const result = await resolve(request.script, request.fn)(...(request.args || []));
+        send({id: request.id, ok: true, result: result === undefined ? null : result});
+    } catch (err) {
+        send({id: request.id, ok: false, error: String(err && err.stack || err)});
+    }
+}
+
+let buffer = Buffer.alloc(0);
+process.stdin.on('data', chunk => {
+    buffer = Buffer.concat([buffer, chunk]);
+    while (buffer.length >= 4) {
+        const length = buffer.readUInt32BE(0);
+        if (buffer.length < 4 + length) {
+            break;
+        }
+        const payload = buffer.subarray(4, 4 + length).toString('utf8');
+        buffer = buffer.subarray(4 + length);
+        let request;
+        try {
+            request = JSON.parse(payload);
+        } catch (err) {
+            stderrConsole.error('Malformed frame: ' + err);
+            continue;
+        }
+        handle(request);
+    }
+});
+process.stdin.on('end', () => process.exit(0));
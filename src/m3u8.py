@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+import re
+from dataclasses import dataclass, field
+from typing import Callable
+from urllib.parse import urljoin, urlsplit
+
+ATTRIBUTE = re.compile(r'([A-Z0-9-]+)=(?:"([^"]*)"|([^,]*))')
+BANDWIDTH = re.compile(r'(?<![A-Z-])BANDWIDTH=(\d+)')
+
+
+def parse_attributes(value: str) -> dict[str, str]:
+    return {k: quoted or plain for k, quoted, plain in ATTRIBUTE.findall(value)}
+
+
+def parse_bandwidth(value: str) -> int:
+    match = BANDWIDTH.search(value)
+    return int(match.group(1)) if match else 0
+
+
+def parse_byte_range(value: str, next_offset: int = 0) -> tuple[int, int]:
+    # `<length>[@<offset>]`, a missing offset continues where the previous range of the same file ended
+    length, _, offset = value.partition('@')
+    return int(length), int(offset) if offset else next_offset
+
+
+def uri_resolver(base_url: str) -> Callable[[str], str]:
+    # urljoin is most of the cost of a long playlist, so the usual relative forms are joined by hand
+    if not base_url:
+        return lambda uri: uri
+    split = urlsplit(base_url)
+    origin = f'{split.scheme}://{split.netloc}'
+    directory = origin + split.path.rsplit('/', 1)[0] + '/'
+
+    def resolve(uri: str) -> str:
+        first = uri[:1]
+        if first == 'h' and uri.startswith(('http://', 'https://')):
+            return uri
+        if ':' not in uri and '/.' not in uri and first not in '.?#':
+            if first != '/':
+                return directory + uri
+            if uri[1:2] != '/':
+                return origin + uri
+        return urljoin(base_url, uri)
+
+    return resolve
+
+
+@dataclass(slots=True)
+class InitSection:
+    uri: str
+    byte_range: tuple[int, int] | None = None
+
+
+@dataclass(slots=True)
+class Part:
+    uri: str
+    duration: float
+    independent: bool = False
+    byte_range: tuple[int, int] | None = None
+    gap: bool = False
+
+
+@dataclass(slots=True)
+class Segment:
+    uri: str
+    duration: float
+    sequence: int
+    title: str = ''
+    byte_range: tuple[int, int] | None = None
+    discontinuity: bool = False
+    discontinuity_sequence: int = 0
+    init: InitSection | None = None
+    key: dict | None = None
+    program_date_time: str | None = None
+    gap: bool = False
+    parts: list[Part] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Variant:
+    uri: str
+    bandwidth: int
+    # The raw EXT-X-STREAM-INF attribute list, most callers only need uri and bandwidth
+    attribute_list: str = ''
+
+    @property
+    def attributes(self) -> dict[str, str]:
+        return parse_attributes(self.attribute_list)
+
+
+@dataclass(slots=True)
+class Playlist:
+    is_master: bool = False
+    version: int = 1
+    target_duration: float = 0.0
+    media_sequence: int = 0
+    discontinuity_sequence: int = 0
+    playlist_type: str | None = None
+    endlist: bool = False
+    segment_count: int = 0
+    variants: list[Variant] = field(default_factory=list)
+    media: list[dict] = field(default_factory=list)
+    segments: list[Segment] = field(default_factory=list)
+    # LL-HLS: parts published after the last full segment, and the server's blocking-reload hints
+    parts: list[Part] = field(default_factory=list)
+    part_target: float | None = None
+    server_control: dict = field(default_factory=dict)
+    preload_hints: list[dict] = field(default_factory=list)
+    rendition_reports: list[dict] = field(default_factory=list)
+
+    @property
+    def last_sequence(self) -> int:
+        return self.media_sequence + self.segment_count - 1
+
+    def variants_by_bandwidth(self) -> list[Variant]:
+        return sorted(self.variants, key=lambda i: i.bandwidth, reverse=True)
+
+
+# Parses a playlist one line at a time, dispatching on the tag name. The state a segment inherits
+# from the lines before it (sequence, byte range offsets, discontinuities, EXT-X-MAP, EXT-X-KEY)
+# lives on the parser, so text can be fed in pieces and a run of segments can be skipped. Segments
+# numbered at or below `after_sequence` are counted but not built.
+class Parser:
+    def __init__(self, base_url: str = '', after_sequence: int = -1):
+        self.playlist = Playlist()
+        self.resolve = uri_resolver(base_url)
+        self.after_sequence = after_sequence
+        self.sequence = None
+        self.discontinuity_sequence = 0
+        self.next_offsets: dict[str, int] = {}
+        self.init = None
+        self.key = None
+        self.stream_inf = None
+        self.reset_segment()
+
+    def reset_segment(self) -> None:
+        self.duration = None
+        self.title = ''
+        self.byte_range = None
+        self.discontinuity = False
+        self.gap = False
+        self.program_date_time = None
+        self.parts: list[Part] = []
+
+    def next_sequence(self) -> int:
+        if self.sequence is None:
+            self.sequence = self.playlist.media_sequence
+        return self.sequence
+
+    def skip(self, text: str, count: int) -> None:
+        # `text` holds exactly `count` whole segments, none of which is wanted: only what the
+        # segments after them inherit is read from it
+        if '#EXT-X-BYTERANGE' in text or 'BYTERANGE=' in text:
+            # Offsets without `@` continue from the previous range, so these have to be walked
+            self.feed(text.splitlines())
+            return
+        self.discontinuity_sequence += text.count('#EXT-X-DISCONTINUITY') - text.count('#EXT-X-DISCONTINUITY-')
+        for tag in ('#EXT-X-MAP:', '#EXT-X-KEY:'):
+            start = text.rfind(tag)
+            if start != -1:
+                end = text.find('\n', start)
+                self.feed(((text[start:end] if end != -1 else text[start:]).rstrip(),))
+        self.sequence = self.next_sequence() + count
+        self.playlist.segment_count += count
+        self.reset_segment()
+
+    def feed(self, lines) -> None:
+        # The state is kept in locals while looping and stored back at the end, attribute access
+        # per line would cost more than the parsing itself
+        playlist = self.playlist
+        resolve = self.resolve
+        after_sequence = self.after_sequence
+        next_offsets = self.next_offsets
+        segments = playlist.segments
+        sequence, discontinuity_sequence = self.sequence, self.discontinuity_sequence
+        init, key, stream_inf = self.init, self.key, self.stream_inf
+        duration, title, byte_range = self.duration, self.title, self.byte_range
+        discontinuity, gap, program_date_time, parts = self.discontinuity, self.gap, self.program_date_time, self.parts
+        counted = 0
+
+        for line in lines:
+            if not line:
+                continue
+            if line[0] != '#':
+                uri = line.strip()
+                if not uri:
+                    continue
+                if stream_inf is not None:
+                    playlist.variants.append(Variant(resolve(uri), parse_bandwidth(stream_inf), stream_inf))
+                    stream_inf = None
+                    continue
+                if duration is None:
+                    continue
+                if sequence is None:
+                    sequence = playlist.media_sequence
+                if byte_range is not None:
+                    byte_range = parse_byte_range(byte_range, next_offsets.get(uri, 0))
+                    next_offsets[uri] = byte_range[0] + byte_range[1]
+                if sequence > after_sequence:
+                    segments.append(Segment(
+                        resolve(uri), float(duration or 0), sequence, title, byte_range, discontinuity,
+                        discontinuity_sequence, init, key, program_date_time, gap, parts))
+                counted += 1
+                sequence += 1
+                duration = byte_range = program_date_time = None
+                title = ''
+                discontinuity = gap = False
+                parts = []
+                continue
+
+            tag, _, value = line.partition(':')
+            if tag == '#EXTINF':
+                duration, _, title = value.partition(',')
+            elif tag == '#EXT-X-PROGRAM-DATE-TIME':
+                program_date_time = value.strip()
+            elif tag == '#EXT-X-BYTERANGE':
+                byte_range = value.strip()
+            elif tag == '#EXT-X-PART':
+                attributes = parse_attributes(value)
+                part_uri = attributes.get('URI', '')
+                part_range = attributes.get('BYTERANGE')
+                if part_range is not None:
+                    part_range = parse_byte_range(part_range, next_offsets.get(part_uri, 0))
+                    next_offsets[part_uri] = part_range[0] + part_range[1]
+                parts.append(Part(resolve(part_uri), float(attributes.get('DURATION') or 0),
+                                  attributes.get('INDEPENDENT') == 'YES', part_range, attributes.get('GAP') == 'YES'))
+            elif tag == '#EXT-X-DISCONTINUITY':
+                discontinuity = True
+                discontinuity_sequence += 1
+            elif tag == '#EXT-X-GAP':
+                gap = True
+            elif tag == '#EXT-X-MAP':
+                attributes = parse_attributes(value)
+                map_range = attributes.get('BYTERANGE')
+                init = InitSection(resolve(attributes.get('URI', '')), parse_byte_range(map_range) if map_range else None)
+            elif tag == '#EXT-X-KEY':
+                attributes = parse_attributes(value)
+                key = None if attributes.get('METHOD') == 'NONE' else attributes
+            elif tag == '#EXT-X-STREAM-INF':
+                playlist.is_master = True
+                stream_inf = value.rstrip()
+            elif tag == '#EXT-X-MEDIA':
+                playlist.is_master = True
+                attributes = parse_attributes(value)
+                if 'URI' in attributes:
+                    attributes['URI'] = resolve(attributes['URI'])
+                playlist.media.append(attributes)
+            elif tag == '#EXT-X-I-FRAME-STREAM-INF':
+                playlist.is_master = True
+            elif tag == '#EXT-X-MEDIA-SEQUENCE':
+                playlist.media_sequence = int(value)
+            elif tag == '#EXT-X-DISCONTINUITY-SEQUENCE':
+                playlist.discontinuity_sequence = discontinuity_sequence = int(value)
+            elif tag == '#EXT-X-TARGETDURATION':
+                playlist.target_duration = float(value)
+            elif tag == '#EXT-X-SKIP':
+                # Delta update: the first SKIPPED-SEGMENTS segments were left out of this response
+                skipped = int(parse_attributes(value).get('SKIPPED-SEGMENTS') or 0)
+                sequence = (playlist.media_sequence if sequence is None else sequence) + skipped
+                playlist.segment_count += skipped
+            elif tag == '#EXT-X-ENDLIST':
+                playlist.endlist = True
+            elif tag == '#EXT-X-PLAYLIST-TYPE':
+                playlist.playlist_type = value.strip()
+            elif tag == '#EXT-X-VERSION':
+                playlist.version = int(value)
+            elif tag == '#EXT-X-PART-INF':
+                part_target = parse_attributes(value).get('PART-TARGET')
+                playlist.part_target = float(part_target) if part_target else None
+            elif tag == '#EXT-X-SERVER-CONTROL':
+                playlist.server_control = parse_attributes(value)
+            elif tag == '#EXT-X-PRELOAD-HINT':
+                playlist.preload_hints.append(parse_attributes(value))
+            elif tag == '#EXT-X-RENDITION-REPORT':
+                playlist.rendition_reports.append(parse_attributes(value))
+
+        playlist.segment_count += counted
+        self.sequence, self.discontinuity_sequence = sequence, discontinuity_sequence
+        self.init, self.key, self.stream_inf = init, key, stream_inf
+        self.duration, self.title, self.byte_range = duration, title, byte_range
+        self.discontinuity, self.gap, self.program_date_time, self.parts = discontinuity, gap, program_date_time, parts
+
+    def finish(self) -> Playlist:
+        self.playlist.parts = self.parts
+        return self.playlist
+
+
+def parse_variants(text: str, base_url: str = '') -> list[Variant]:
+    # For callers that only want the renditions of a master playlist, highest bandwidth first; a
+    # media playlist costs one str.find
+    first = text.find('#EXT-X-STREAM-INF:')
+    if first == -1:
+        return []
+    parser = Parser(base_url)
+    parser.feed(text[first:].splitlines())
+    return parser.finish().variants_by_bandwidth()
+
+
+def segment_end(text: str, start: int) -> int:
+    # End of the URI line of the segment whose #EXTINF is at `start`, -1 if it has none
+    end = text.find('\n', start)
+    while end != -1:
+        start = end + 1
+        end = text.find('\n', start)
+        line = text[start:end if end != -1 else len(text)].strip()
+        if line and line[0] != '#':
+            return len(text) if end == -1 else end + 1
+    return -1
+
+
+def parse(text: str, base_url: str = '', after_sequence: int = -1) -> Playlist:
+    parser = Parser(base_url, after_sequence)
+    first = text.find('#EXTINF')
+    if after_sequence < 0 or first == -1:
+        parser.feed(text.splitlines())
+        return parser.finish()
+
+    # A poller that passes the last sequence it has seen pays for the new end of a sliding-window
+    # playlist: the #EXTINF of the old segments are located with str.find and skipped as one block
+    parser.feed(text[:first].splitlines())
+    count = after_sequence - parser.next_sequence() + 1
+    cut = first
+    if count > 0:
+        # Found from the end, since only the few newest segments follow the ones being skipped
+        total = text.count('#EXTINF', first)
+        skipped = min(count, total)
+        start = len(text)
+        for _ in range(total - skipped + 1):
+            start = text.rfind('#EXTINF', first, start)
+        end = segment_end(text, start)
+        cut = len(text) if end == -1 else end
+        parser.skip(text[first:cut], skipped)
+    parser.feed(text[cut:].splitlines())
+    return parser.finish()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import bisect
+import contextvars
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from contextlib import contextmanager
+
+# Set by the rate limiter around a platform's fetch so the HTTP layer can tag its requests
+current_platform: contextvars.ContextVar[str | None] = contextvars.ContextVar('current_platform', default=None)
+
+# 1ms to ~150s in steps of 20%, so a quantile read from the buckets is off by at most that much
+BUCKET_BOUNDS = [0.001 * 1.2 ** i for i in range(66)]
+ID_SEGMENT = re.compile(r'\d{3,}|[0-9a-fA-F]{16,}|[\w-]{24,}')
+
+
+def endpoint_name(url: str, method: str = 'GET') -> str:
+    # Room ids, user ids and tokens in the path are folded so each API is a single endpoint
+    parsed = urllib.parse.urlsplit(url)
+    segments = ['*' if ID_SEGMENT.search(i) else i for i in parsed.path.split('/')[1:5] if i]
+    return f"{method} {parsed.hostname or ''}/{'/'.join(segments)}"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(BUCKET_BOUNDS[i], self.max) if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+
+class Series:
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+# In-memory request telemetry keyed by (platform, endpoint, via proxy). Recording is a bucket
+# lookup and a few counter updates under one lock; reading happens only when a dump is asked for.
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series: dict[tuple[str, str, bool], Series] = {}
+        self.started = time.time()
+
+    def record(self, endpoint: str, latency: float, status: int | None = None, error: str | None = None,
+               bytes_in: int = 0, bytes_out: int = 0, proxy: bool = False, platform: str | None = None) -> None:
+        key = (platform or current_platform.get() or '-', endpoint, proxy)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = Series()
+            series.latency.record(latency)
+            if status is not None:
+                series.statuses[status] += 1
+            if error:
+                series.errors[error] += 1
+            series.bytes_in += bytes_in
+            series.bytes_out += bytes_out
+
+    @contextmanager
+    def measure(self, endpoint: str):
+        # For work that is not a request but adds to a probe's latency, such as signing
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(endpoint, time.perf_counter() - start, error=error)
+
+    def snapshot(self) -> list[dict]:
+        with self.lock:
+            items = list(self.series.items())
+        rows = []
+        for (platform, endpoint, proxy), series in sorted(items, key=lambda i: -i[1].latency.total):
+            latency = series.latency
+            rows.append({
+                "platform": platform,
+                "endpoint": endpoint,
+                "proxy": proxy,
+                "count": latency.count,
+                "mean": latency.total / latency.count if latency.count else 0.0,
+                "p50": latency.quantile(0.5),
+                "p95": latency.quantile(0.95),
+                "p99": latency.quantile(0.99),
+                "max": latency.max,
+                "statuses": dict(series.statuses),
+                "errors": dict(series.errors),
+                "bytes_in": series.bytes_in,
+                "bytes_out": series.bytes_out,
+            })
+        return rows
+
+    def format_table(self) -> str:
+        headers = ['platform', 'endpoint', 'proxy', 'count', 'p50', 'p95', 'p99', 'max', 'statuses', 'errors',
+                   'KB in', 'KB out']
+        rows = [[i['platform'], i['endpoint'], 'yes' if i['proxy'] else 'no', i['count'],
+                 *(f"{i[k] * 1000:.0f}ms" for k in ('p50', 'p95', 'p99', 'max')),
+                 ' '.join(f"{k}:{v}" for k, v in sorted(i['statuses'].items())) or '-',
+                 ' '.join(f"{k}:{v}" for k, v in sorted(i['errors'].items())) or '-',
+                 f"{i['bytes_in'] / 1024:.1f}", f"{i['bytes_out'] / 1024:.1f}"] for i in self.snapshot()]
+        widths = [max(len(str(x)) for x in col) for col in zip(headers, *rows)]
+        lines = [' | '.join(str(h).ljust(w) for h, w in zip(headers, widths)),
+                 '-+-'.join('-' * w for w in widths)]
+        lines += [' | '.join(str(c).ljust(w) for c, w in zip(row, widths)) for row in rows]
+        return '\n'.join(lines)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.series.clear()
+            self.started = time.time()
+
+
+metrics = Metrics()
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import atexit
+import itertools
+import json
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from .logger import logger
+from .metrics import metrics
+
+SCRIPT_DIR = Path(__file__).resolve().parent / 'javascript'
+WORKER_SCRIPT = SCRIPT_DIR / 'worker' / 'node-worker.js'
+FRAME_HEADER = struct.Struct('>I')
+
+
+class JSError(Exception):
+    pass
+
+
+# One long-lived `node` process running node-worker.js, which compiles every script in
+# src/javascript once. Requests and responses are length-prefixed JSON frames matched by id, so
+# several calls can be in flight at once; a reader thread resolves them as answers arrive.
+class NodeWorker:
+    def __init__(self, node: str, script_dir: Path = SCRIPT_DIR):
+        self.process = subprocess.Popen(
+            [node, str(WORKER_SCRIPT), str(script_dir)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        self.pending: dict[int, Future] = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.closed = False
+        self.reader = threading.Thread(target=self._read, name='node-worker-reader', daemon=True)
+        self.reader.start()
+
+    def alive(self) -> bool:
+        return not self.closed and self.process.poll() is None
+
+    def submit(self, script: str, fn: str, args: tuple) -> Future:
+        future = Future()
+        call_id = next(self.ids)
+        frame = json.dumps({"id": call_id, "script": script, "fn": fn, "args": args},
+                           ensure_ascii=False).encode('utf-8')
+        with self.lock:
+            if not self.alive():
+                raise JSError("Node worker is not running")
+            self.pending[call_id] = future
+            try:
+                self.process.stdin.write(FRAME_HEADER.pack(len(frame)) + frame)
+                self.process.stdin.flush()
+            except OSError as e:
+                self.pending.pop(call_id, None)
+                raise JSError(f"Node worker pipe closed: {e}") from e
+        return future
+
+    def _read_exactly(self, size: int) -> bytes | None:
+        data = b''
+        while len(data) < size:
+            chunk = self.process.stdout.read(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _read(self) -> None:
+        while True:
+            header = self._read_exactly(FRAME_HEADER.size)
+            if header is None:
+                break
+            payload = self._read_exactly(FRAME_HEADER.unpack(header)[0])
+            if payload is None:
+                break
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                continue
+            with self.lock:
+                future = self.pending.pop(message.get('id'), None)
+            if future is None or future.done():
+                continue
+            if message.get('ok'):
+                future.set_result(message.get('result'))
+            else:
+                future.set_exception(JSError(message.get('error') or 'Unknown JS error'))
+        self.closed = True
+        with self.lock:
+            pending = list(self.pending.values())
+            self.pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(JSError("Node worker exited"))
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self.process.kill()
+        except OSError:
+            pass
+
+
+# A small pool of NodeWorker processes, started on first use. Each call goes to the worker with
+# the fewest calls in flight; a worker that crashed is replaced on the next call, and one that
+# misses a timeout is killed, since it may be stuck in a loop and would block everything queued
+# behind it. Call latency goes to the metrics table as `sign <script>`.
+class NodePool:
+    def __init__(self, size: int = 2, timeout: float = 10, script_dir: Path = SCRIPT_DIR):
+        self.size = size
+        self.timeout = timeout
+        self.script_dir = script_dir
+        self.workers: list[NodeWorker] = []
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.started = 0
+
+    def _worker(self) -> NodeWorker:
+        with self.lock:
+            for worker in self.workers[:]:
+                if not worker.alive():
+                    worker.close()
+                    self.workers.remove(worker)
+                    self.restarts += 1
+            idle = [i for i in self.workers if not i.pending]
+            if idle:
+                return idle[0]
+            if len(self.workers) < self.size:
+                node = shutil.which('node')
+                if node is None:
+                    raise JSError('Failed to execute JS code. Please check if the Node.js environment')
+                try:
+                    worker = NodeWorker(node, self.script_dir)
+                except OSError as e:
+                    raise JSError(f"Failed to start Node.js: {e}") from e
+                self.workers.append(worker)
+                self.started += 1
+                return worker
+            return min(self.workers, key=lambda i: len(i.pending))
+
+    def _submit(self, script: str, fn: str, args: tuple) -> tuple[NodeWorker, Future]:
+        worker = self._worker()
+        return worker, worker.submit(script, fn, list(args))
+
+    def _finish(self, worker: NodeWorker, script: str, start: float, error: str | None) -> None:
+        with self.lock:
+            self.calls += 1
+            if error == 'timeout':
+                self.timeouts += 1
+            elif error:
+                self.errors += 1
+        if error == 'timeout':
+            logger.warning(f"Node.js call to {script} timed out, restarting the worker")
+            worker.close()
+        metrics.record(f"sign {script.removesuffix('.js')}", time.perf_counter() - start, error=error)
+
+    def call(self, script: str, fn: str, *args, timeout: float | None = None):
+        start = time.perf_counter()
+        worker, future = self._submit(script, fn, args)
+        try:
+            result = future.result(timeout or self.timeout)
+        except FutureTimeoutError:
+            self._finish(worker, script, start, 'timeout')
+            raise JSError(f"Node.js call to {script} timed out")
+        except JSError:
+            self._finish(worker, script, start, 'JSError')
+            raise
+        self._finish(worker, script, start, None)
+        return result
+
+    async def acall(self, script: str, fn: str, *args, timeout: float | None = None):
+        start = time.perf_counter()
+        worker, future = self._submit(script, fn, args)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self._finish(worker, script, start, 'timeout')
+            raise JSError(f"Node.js call to {script} timed out")
+        except JSError:
+            self._finish(worker, script, start, 'JSError')
+            raise
+        self._finish(worker, script, start, None)
+        return result
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "workers": sum(1 for i in self.workers if i.alive()),
+                "started": self.started,
+                "restarts": self.restarts,
+                "calls": self.calls,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+            }
+
+    def close(self) -> None:
+        with self.lock:
+            workers = self.workers[:]
+            self.workers.clear()
+        for worker in workers:
+            worker.close()
+
+
+node_pool = NodePool()
+atexit.register(node_pool.close)
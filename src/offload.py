@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+# A fixed-size thread pool for work a coroutine must not do on the event loop: sync HTTP clients,
+# subprocesses, file I/O or pure-Python CPU work. The size bounds how many such calls run at
+# once, the rest wait in the queue instead of spawning threads. The caller's context is carried
+# over, so metrics recorded inside are still tagged with the platform being probed.
+class Offload:
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.pending = 0
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(self.executor, call)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+io_pool = Offload('offload-io', 8)
+cpu_pool = Offload('offload-cpu', 2)
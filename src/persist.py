@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import atexit
+import json
+import os
+import threading
+from typing import Any, Callable
+from .logger import logger
+from .offload import io_pool
+
+FLUSH_INTERVAL = 5.0
+
+
+def write_text(path: str, text: str) -> None:
+    # Replaced atomically through a temp file named after the process, so two processes saving the
+    # same file never write into each other's temp file
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_json(path: str, data: Any, **dump_kwargs) -> None:
+    write_text(path, json.dumps(data, ensure_ascii=False, **dump_kwargs))
+
+
+# Saves the JSON stores (live history, sessions, resolved links) off the event loop. A store only
+# marks itself dirty when it changes; run() writes the dirty ones through io_pool at most every
+# `interval` seconds, so a burst of changes (every room's first probe at start) is one write, and
+# flush_all() writes whatever is left at exit. A shard worker sets read_only: the coordinator is
+# the only process that writes the stores, the workers forward their changes to it.
+class Persister:
+    def __init__(self, interval: float = FLUSH_INTERVAL):
+        self.interval = interval
+        self.read_only = False
+        self.lock = threading.Lock()
+        self.stores: dict[str, Callable[[], None]] = {}
+        self.dirty: set[str] = set()
+        self.flushes = 0
+
+    def register(self, name: str, flush: Callable[[], None]) -> None:
+        self.stores[name] = flush
+
+    def mark_dirty(self, name: str) -> None:
+        if self.read_only:
+            return
+        with self.lock:
+            self.dirty.add(name)
+
+    def _take_dirty(self) -> list[str]:
+        with self.lock:
+            names = [i for i in self.dirty if i in self.stores]
+            self.dirty.difference_update(names)
+        return names
+
+    def _flush(self, name: str) -> None:
+        try:
+            self.stores[name]()
+            self.flushes += 1
+        except Exception as e:
+            logger.error(f"{name} 保存失败: {e}")
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            for name in self._take_dirty():
+                await io_pool.run(self._flush, name)
+
+    def flush_all(self) -> None:
+        for name in self._take_dirty():
+            self._flush(name)
+
+
+persister = Persister()
+atexit.register(persister.flush_all)
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+import importlib
+import threading
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+_loaded: dict[str, Callable] = {}
+_load_lock = threading.Lock()
+
+
+def load(path: str) -> Callable:
+    # 'spider.get_kuaishou_stream_data' -> the function, importing its module on first use
+    func = _loaded.get(path)
+    if func is None:
+        module, name = path.rsplit('.', 1)
+        with _load_lock:
+            func = _loaded[path] = getattr(importlib.import_module(f'{__package__}.{module}'), name)
+    return func
+
+
+# Everything main.py needs to know about a live platform. `hosts` are matched exactly or as a parent
+# domain of the url's host ('douyin.com' covers live.douyin.com and v.douyin.com), entries ending
+# in '.' are host prefixes. Platforms whose fetch is resolver + builder are handled entirely from
+# here; `custom` ones have a handler in main.py for logins, batching or config write-backs.
+@dataclass
+class Platform:
+    name: str
+    hosts: tuple[str, ...]
+    resolver: str = ''
+    builder: str = ''
+    builder_args: tuple[str, ...] = ('quality',)
+    builder_kwargs: dict[str, Any] = field(default_factory=dict)
+    resolver_proxy: bool = True
+    cookie_key: str = ''
+    custom: bool = False
+    proxy_required: bool = False
+    overseas: bool = False
+    clean_hosts: tuple[str, ...] = ()
+    flv_preferred: bool = False
+    http_only: bool = False
+    flv_only: bool = False
+    audio_only: bool = False
+    pin_uid: bool = False
+    record_headers: str = ''
+    record_user_agent: str = ''
+    save_type: str = ''
+
+    async def fetch(self, url: str, quality: str, proxy_addr: str | None = None, cookies: str = '') -> dict:
+        resolver = load(self.resolver)
+        if self.resolver_proxy:
+            data = await resolver(url=url, proxy_addr=proxy_addr, cookies=cookies)
+        else:
+            data = await resolver(url=url, cookies=cookies)
+        if not self.builder:
+            return data
+        values = {'quality': quality, 'proxy': proxy_addr, 'cookies': cookies}
+        return await load(self.builder)(data, *(values[i] for i in self.builder_args), **self.builder_kwargs)
+
+    def headers_for(self, live_url: str) -> str | None:
+        if not self.record_headers:
+            return None
+        return self.record_headers.format(live_domain='/'.join(live_url.split('/')[0:3]))
+
+
+class PlatformRegistry:
+    def __init__(self):
+        self.platforms: dict[str, Platform] = {}
+        self.hosts: dict[str, Platform] = {}
+        self.prefixes: list[tuple[str, Platform]] = []
+
+    def register(self, platform: Platform) -> Platform:
+        if platform.name in self.platforms:
+            raise ValueError(f"平台重复注册: {platform.name}")
+        self.platforms[platform.name] = platform
+        for host in platform.hosts:
+            if host.endswith('.'):
+                self.prefixes.append((host, platform))
+            else:
+                self.hosts[host] = platform
+        return platform
+
+    def get(self, name: str) -> Platform | None:
+        return self.platforms.get(name)
+
+    def for_host(self, host: str) -> Platform | None:
+        host = host.lower()
+        labels = host.split('.')
+        for i in range(len(labels) - 1):
+            platform = self.hosts.get('.'.join(labels[i:]))
+            if platform is not None:
+                return platform
+        for prefix, platform in self.prefixes:
+            if host.startswith(prefix):
+                return platform
+        return None
+
+    def for_url(self, url: str) -> Platform | None:
+        try:
+            host = urllib.parse.urlsplit(url if '://' in url else 'https://' + url).hostname
+        except ValueError:
+            return None
+        return self.for_host(host) if host else None
+
+    def __iter__(self):
+        return iter(self.platforms.values())
+
+
+platform_registry = PlatformRegistry()
+register = platform_registry.register
+STREAM_URL = 'stream.get_stream_url'
+
+register(Platform('抖音直播', ('douyin.com',), cookie_key='抖音cookie', custom=True, clean_hosts=('live.douyin.com',),
+                  flv_preferred=True))
+register(Platform('TikTok直播', ('www.tiktok.com',), 'spider.get_tiktok_stream_data', 'stream.get_tiktok_stream_url',
+                  ('quality', 'proxy'), cookie_key='tiktok_cookie', proxy_required=True, overseas=True,
+                  flv_preferred=True))
+register(Platform('快手直播', ('live.kuaishou.com',), 'spider.get_kuaishou_stream_data',
+                  'stream.get_kuaishou_stream_url', cookie_key='快手cookie'))
+register(Platform('虎牙直播', ('www.huya.com',), cookie_key='虎牙cookie', custom=True, clean_hosts=('www.huya.com',)))
+register(Platform('斗鱼直播', ('www.douyu.com',), 'spider.get_douyu_info_data', 'stream.get_douyu_stream_url',
+                  ('quality', 'cookies', 'proxy'), cookie_key='斗鱼cookie', flv_preferred=True))
+register(Platform('YY直播', ('www.yy.com',), 'spider.get_yy_stream_data', 'stream.get_yy_stream_url', (),
+                  cookie_key='yy_cookie'))
+register(Platform('B站直播', ('live.bilibili.com',), cookie_key='B站cookie', custom=True,
+                  clean_hosts=('live.bilibili.com',), record_headers='referer:https://live.bilibili.com/',
+                  record_user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:127.0) Gecko/20100101 '
+                                    'Firefox/127.0'))
+register(Platform('小红书直播', ('xhslink.com', 'www.xiaohongshu.com', 'www.redelight.cn'), 'spider.get_xhs_stream_url',
+                  cookie_key='小红书cookie'))
+register(Platform('Bigo直播', ('www.bigo.tv', 'slink.bigovideo.tv'), 'spider.get_bigo_stream_url',
+                  cookie_key='bigo_cookie'))
+register(Platform('Blued直播', ('app.blued.cn',), 'spider.get_blued_stream_url', cookie_key='blued_cookie',
+                  record_headers='referer:https://app.blued.cn'))
+register(Platform('SOOP', ('sooplive.co.kr', 'sooplive.com'), cookie_key='sooplive_cookie', custom=True,
+                  proxy_required=True, overseas=True))
+register(Platform('Weverse', ('weverse.io',), custom=True, proxy_required=True, overseas=True,
+                  clean_hosts=('weverse.io', 'www.weverse.io'), record_headers='origin:https://weverse.io'))
+register(Platform('网易CC直播', ('cc.163.com',), 'spider.get_netease_stream_data', 'stream.get_netease_stream_url',
+                  resolver_proxy=False, cookie_key='netease_cookie'))
+register(Platform('千度热播', ('qiandurebo.com',), 'spider.get_qiandurebo_stream_data', cookie_key='千度热播_cookie',
+                  record_headers='referer:https://qiandurebo.com'))
+register(Platform('PandaTV', ('www.pandalive.co.kr',), 'spider.get_pandatv_stream_data', STREAM_URL,
+                  builder_kwargs={'spec': True}, cookie_key='pandatv_cookie', proxy_required=True, overseas=True,
+                  record_headers='origin:https://www.pandalive.co.kr'))
+register(Platform('猫耳FM直播', ('fm.missevan.com',), 'spider.get_maoerfm_stream_url', cookie_key='猫耳fm_cookie',
+                  audio_only=True))
+register(Platform('WinkTV', ('www.winktv.co.kr',), 'spider.get_winktv_stream_data', STREAM_URL,
+                  builder_kwargs={'spec': True}, cookie_key='winktv_cookie', proxy_required=True, overseas=True,
+                  record_headers='origin:https://www.winktv.co.kr'))
+register(Platform('FlexTV', ('www.flextv.co.kr', 'www.ttinglive.com'), cookie_key='flextv_cookie', custom=True,
+                  proxy_required=True, overseas=True, record_headers='origin:https://www.flextv.co.kr'))
+register(Platform('Look直播', ('look.163.com',), 'spider.get_looklive_stream_url', cookie_key='look_cookie',
+                  audio_only=True))
+register(Platform('PopkonTV', ('www.popkontv.com',), custom=True, proxy_required=True, overseas=True,
+                  record_headers='origin:https://www.popkontv.com'))
+register(Platform('TwitCasting', ('twitcasting.tv',), cookie_key='twitcasting_cookie', custom=True))
+register(Platform('百度直播', ('live.baidu.com',), 'spider.get_baidu_stream_data', STREAM_URL,
+                  cookie_key='baidu_cookie'))
+register(Platform('微博直播', ('weibo.com',), 'spider.get_weibo_stream_data', STREAM_URL,
+                  builder_kwargs={'hls_extra_key': 'm3u8_url'}, cookie_key='weibo_cookie'))
+register(Platform('酷狗直播', ('kugou.com',), 'spider.get_kugou_stream_url', cookie_key='kugou_cookie'))
+register(Platform('TwitchTV', ('www.twitch.tv',), cookie_key='twitch_cookie', custom=True, proxy_required=True,
+                  overseas=True))
+register(Platform('LiveMe', ('www.liveme.com',), 'spider.get_liveme_stream_url', cookie_key='liveme_cookie',
+                  proxy_required=True, overseas=True, clean_hosts=('www.liveme.com',)))
+register(Platform('花椒直播', ('www.huajiao.com',), 'spider.get_huajiao_stream_url', cookie_key='huajiao_cookie',
+                  clean_hosts=('www.huajiao.com',), flv_only=True))
+register(Platform('流星直播', ('7u66.com',), 'spider.get_liuxing_stream_url', cookie_key='liuxing_cookie'))
+register(Platform('ShowRoom', ('showroom-live.com',), 'spider.get_showroom_stream_data', STREAM_URL,
+                  builder_kwargs={'spec': True}, cookie_key='showroom_cookie', overseas=True))
+register(Platform('Acfun', ('live.acfun.cn', 'm.acfun.cn'), 'spider.get_acfun_stream_data', STREAM_URL,
+                  builder_kwargs={'url_type': 'flv', 'flv_extra_key': 'url'}, cookie_key='acfun_cookie'))
+register(Platform('畅聊直播', ('live.tlclw.com', 'wap.tlclw.com'), 'spider.get_changliao_stream_url',
+                  cookie_key='changliao_cookie'))
+register(Platform('音播直播', ('ybw1666.com',), 'spider.get_yinbo_stream_url', cookie_key='yinbo_cookie'))
+register(Platform('映客直播', ('www.inke.cn',), 'spider.get_yingke_stream_url', cookie_key='yingke_cookie'))
+register(Platform('知乎直播', ('www.zhihu.com',), 'spider.get_zhihu_stream_url', cookie_key='zhihu_cookie',
+                  clean_hosts=('www.zhihu.com',)))
+register(Platform('CHZZK', ('chzzk.naver.com',), 'spider.get_chzzk_stream_data', STREAM_URL,
+                  builder_kwargs={'spec': True}, cookie_key='chzzk_cookie', overseas=True,
+                  clean_hosts=('chzzk.naver.com',), save_type='TS'))
+register(Platform('嗨秀直播', ('www.haixiutv.com',), 'spider.get_haixiu_stream_url', cookie_key='haixiu_cookie',
+                  clean_hosts=('www.haixiutv.com',)))
+register(Platform('VV星球', ('vvxqiu.com',), 'spider.get_vvxqiu_stream_url', cookie_key='vvxqiu_cookie'))
+register(Platform('17Live', ('17.live',), 'spider.get_17live_stream_url', cookie_key='17live_cookie',
+                  record_headers='referer:https://17.live/en/live/6302408'))
+register(Platform('浪Live', ('www.lang.live',), 'spider.get_langlive_stream_url', cookie_key='langlive_cookie',
+                  record_headers='referer:https://www.lang.live'))
+register(Platform('漂漂直播', ('m.pp.weimipopo.com',), 'spider.get_pplive_stream_url', cookie_key='pplive_cookie'))
+register(Platform('六间房直播', ('6.cn',), 'spider.get_6room_stream_url', cookie_key='6room_cookie',
+                  clean_hosts=('v.6.cn', 'm.6.cn')))
+register(Platform('乐嗨直播', ('lehaitv.com',), 'spider.get_haixiu_stream_url', cookie_key='lehaitv_cookie',
+                  clean_hosts=('www.lehaitv.com',)))
+register(Platform('花猫直播', ('h.catshow168.com',), 'spider.get_pplive_stream_url', cookie_key='huamao_cookie'))
+register(Platform('shopee', ('live.shopee.', 'shp.ee'), 'spider.get_shopee_stream_url', cookie_key='shopee_cookie',
+                  overseas=True, http_only=True, flv_only=True, pin_uid=True, record_headers='origin:{live_domain}'))
+register(Platform('Youtube', ('www.youtube.com', 'youtu.be'), 'spider.get_youtube_stream_url', STREAM_URL,
+                  builder_kwargs={'spec': True}, cookie_key='youtube_cookie', overseas=True, save_type='TS'))
+register(Platform('淘宝直播', ('tb.cn', 'huodong.m.taobao.com'), 'spider.get_taobao_stream_url', STREAM_URL,
+                  builder_kwargs={'url_type': 'all', 'hls_extra_key': 'hlsUrl', 'flv_extra_key': 'flvUrl'},
+                  cookie_key='taobao_cookie'))
+register(Platform('京东直播', ('3.cn', 'm.jd.com'), 'spider.get_jd_stream_url', cookie_key='jd_cookie'))
+register(Platform('faceit', ('faceit.com',), 'spider.get_faceit_stream_data', STREAM_URL,
+                  builder_kwargs={'spec': True}, cookie_key='faceit_cookie', proxy_required=True, overseas=True))
+register(Platform('咪咕直播', ('www.miguvideo.com', 'm.miguvideo.com'), 'spider.get_migu_stream_url',
+                  cookie_key='migu_cookie'))
+register(Platform('连接直播', ('show.lailianjie.com',), 'spider.get_lianjie_stream_url', cookie_key='lianjie_cookie'))
+register(Platform('来秀直播', ('www.imkktv.com',), 'spider.get_laixiu_stream_url', cookie_key='laixiu_cookie'))
+register(Platform('Picarto', ('www.picarto.tv',), 'spider.get_picarto_stream_url', cookie_key='picarto_cookie'))
+register(Platform('Instagram', ('instagram.com',), 'spider.get_instagram_stream_data',
+                  'stream.get_instagram_stream_url', (), cookie_key='instagram_cookie', proxy_required=True,
+                  overseas=True))
@@ -1,8 +1,12 @@
+import asyncio
 import os
+import re
 import sys
+import threading
+import time
 from enum import Enum, auto
 from dataclasses import dataclass, field
-from .utils import logger
+from .utils import logger, handle_proxy_addr
 
 
 class ProxyType(Enum):
@@ -90,3 +94,149 @@ class ProxyDetector:
     def _is_proxy_enabled_linux(self) -> bool:
         proxies = self._get_proxy_info_linux()
         return any(proxy != '' for proxy in proxies)
+
+
+PROXY_FAILURES = ('timeout', 'network')
+
+
+@dataclass
+class ProxyState:
+    address: str
+    success: float = 1.0
+    latency: float = 0.0
+    failures: int = 0
+    quarantined_until: float = 0.0
+    backoff: float = 0.0
+    requests: int = 0
+
+    @property
+    def quarantined(self) -> bool:
+        return self.quarantined_until > time.monotonic()
+
+    def score(self) -> float:
+        # Success rate first, latency only separates proxies that are about as reliable
+        return self.success * 10 - min(self.latency, 10.0)
+
+
+# Scores every configured proxy from the outcome of the requests sent through it (an EWMA of
+# success and latency, plus periodic checks against `check_url`). A platform sticks to the proxy
+# that last worked for it; a proxy that fails `threshold` times in a row is quarantined, for
+# twice as long each time it fails again after release.
+class ProxyPool:
+    def __init__(self, addresses: list[str] | None = None, threshold: int = 3, quarantine: float = 30.0,
+                 max_quarantine: float = 1800.0, check_url: str = 'https://www.gstatic.com/generate_204'):
+        self.threshold = threshold
+        self.quarantine = quarantine
+        self.max_quarantine = max_quarantine
+        self.check_url = check_url
+        self.lock = threading.Lock()
+        self.states: dict[str, ProxyState] = {}
+        self.affinity: dict[str, str] = {}
+        self.configure(addresses or [])
+
+    def configure(self, addresses: list[str]) -> None:
+        with self.lock:
+            states = {}
+            for address in addresses:
+                key = handle_proxy_addr(address.strip())
+                if key:
+                    states[key] = self.states.get(key) or ProxyState(address.strip())
+            self.states = states
+            self.affinity = {k: v for k, v in self.affinity.items() if v in states}
+
+    @staticmethod
+    def parse(text: str | None) -> list[str]:
+        return [i.strip() for i in re.split('[,，]', text or '') if i.strip()]
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __contains__(self, address: str | None) -> bool:
+        return bool(address) and handle_proxy_addr(address) in self.states
+
+    def choose(self, platform: str | None = None) -> str | None:
+        with self.lock:
+            if not self.states:
+                return None
+            key = self.affinity.get(platform)
+            if key and not self.states[key].quarantined:
+                return self.states[key].address
+            healthy = [i for i in self.states.values() if not i.quarantined]
+            if healthy:
+                return max(healthy, key=lambda i: i.score()).address
+            # Everything is quarantined, use whichever comes back first rather than nothing
+            return min(self.states.values(), key=lambda i: i.quarantined_until).address
+
+    def alternative(self, address: str | None, platform: str | None = None) -> str | None:
+        with self.lock:
+            current = handle_proxy_addr(address) if address else None
+            if current not in self.states:
+                return None
+            healthy = [v for k, v in self.states.items() if k != current and not v.quarantined]
+        return handle_proxy_addr(max(healthy, key=lambda i: i.score()).address) if healthy else None
+
+    def report(self, address: str | None, error_type: str | None = None, latency: float = 0.0,
+               platform: str | None = None, alpha: float = 0.2) -> None:
+        key = handle_proxy_addr(address) if address else None
+        with self.lock:
+            state = self.states.get(key)
+            if state is None:
+                return
+            state.requests += 1
+            failed = error_type in PROXY_FAILURES
+            state.success = state.success * (1 - alpha) + (0.0 if failed else 1.0) * alpha
+            if not failed:
+                state.latency = latency if not state.latency else state.latency * (1 - alpha) + latency * alpha
+                state.failures = 0
+                state.backoff = 0.0
+                if platform:
+                    self.affinity[platform] = key
+                return
+            state.failures += 1
+            for name in [k for k, v in self.affinity.items() if v == key]:
+                del self.affinity[name]
+            if state.failures >= self.threshold and not state.quarantined:
+                state.backoff = min(state.backoff * 2 or self.quarantine, self.max_quarantine)
+                state.quarantined_until = time.monotonic() + state.backoff
+                state.failures = 0
+                logger.warning(f"Proxy {state.address} quarantined for {state.backoff:.0f}s after "
+                               f"{self.threshold} consecutive {error_type} errors")
+
+    async def check(self, timeout: float = 10.0) -> None:
+        import httpx
+
+        async def check_one(key: str) -> None:
+            start = time.monotonic()
+            try:
+                async with httpx.AsyncClient(proxy=key, timeout=timeout, verify=False) as client:
+                    await client.get(self.check_url)
+                self.report(key, latency=time.monotonic() - start)
+            except httpx.TimeoutException:
+                self.report(key, 'timeout')
+            except httpx.HTTPError:
+                self.report(key, 'network')
+
+        with self.lock:
+            # Quarantined proxies are only checked once their quarantine is over
+            keys = [k for k, v in self.states.items() if not v.quarantined]
+        await asyncio.gather(*(check_one(key) for key in keys))
+
+    async def run_checks(self, interval: float = 60.0) -> None:
+        while True:
+            if len(self.states) > 1:
+                await self.check()
+            await asyncio.sleep(interval)
+
+    def stats(self) -> list[dict]:
+        with self.lock:
+            return [{
+                "address": state.address,
+                "success": state.success,
+                "latency": state.latency,
+                "requests": state.requests,
+                "quarantined": max(0.0, state.quarantined_until - time.monotonic()),
+                "platforms": sorted(k for k, v in self.affinity.items() if v == key),
+            } for key, state in self.states.items()]
+
+
+proxy_pool = ProxyPool()
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import contextvars
+import json
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager, AsyncExitStack
+import httpx
+from .logger import logger
+from .metrics import current_platform
+
+CONGESTION_ERRORS = ('timeout', 'risk_control', 'server_error')
+current_limiter: contextvars.ContextVar['Limiter | None'] = contextvars.ContextVar('current_limiter', default=None)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+def classify_error(error: BaseException | str | None, status: int | None = None) -> tuple[str | None, int | None]:
+    if error is None:
+        if status in (403, 412, 429):
+            return 'risk_control', status
+        if status and status >= 500:
+            return 'server_error', status
+        if status and status >= 400:
+            return 'http_error', status
+        return None, status
+    message = str(error)
+    if status is None:
+        match = re.search(r'\b([45]\d\d)\b', message)
+        status = int(match.group(1)) if match else None
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+
+    lower = message.lower()
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError, TimeoutError)) or 'timed out' in lower \
+            or 'timeout' in lower:
+        return 'timeout', status
+    if status in (403, 412, 429) or 'risk control' in lower or 'ip banned' in lower or 'forbidden' in lower:
+        return 'risk_control', status
+    if status and status >= 500:
+        return 'server_error', status
+    if isinstance(error, (json.JSONDecodeError, KeyError, IndexError, TypeError, ValueError, AttributeError)):
+        return 'parse', status
+    if isinstance(error, httpx.TransportError):
+        return 'network', status
+    return 'error', status
+
+
+# Additive-increase/multiplicative-decrease of one limiter's admission limit. Timeouts, risk
+# control (403/412/429) and 5xx responses, or latency above the target, halve the limit at most
+# once per cooldown; every full round of healthy probes raises it by one up to the ceiling.
+class AIMDController:
+    def __init__(self, limiter: 'Limiter', ceiling: int, floor: int = 1, latency_target: float = 8.0,
+                 decrease_factor: float = 0.5, cooldown: float = 5.0):
+        self.limiter = limiter
+        self.ceiling = max(1, ceiling)
+        self.floor = max(1, min(floor, self.ceiling))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.successes = 0
+        self.last_decrease = 0.0
+        self.errors: dict[str, int] = {}
+
+    def record(self, latency: float, error: BaseException | str | None = None, status: int | None = None) -> None:
+        error_type, status = classify_error(error, status)
+        if error_type:
+            self.errors[error_type] = self.errors.get(error_type, 0) + 1
+
+        limit = self.limiter.concurrency
+        if error_type in CONGESTION_ERRORS or latency > self.latency_target:
+            self.successes = 0
+            now = time.monotonic()
+            if now - self.last_decrease < self.cooldown:
+                return
+            self.last_decrease = now
+            new_limit = max(self.floor, int(limit * self.decrease_factor))
+            reason = error_type or f'latency {latency:.2f}s > {self.latency_target}s'
+            self.decide(limit, new_limit, reason, latency, status)
+        elif error_type is None:
+            self.successes += 1
+            if self.successes >= limit and limit < self.ceiling:
+                self.successes = 0
+                self.decide(limit, limit + 1, 'healthy round', latency, status)
+
+    def decide(self, old: int, new: int, reason: str, latency: float, status: int | None) -> None:
+        action = 'decrease' if new < old else 'increase' if new > old else 'hold'
+        logger.debug(f"AIMD [{self.limiter.key}] {action} {old} -> {new}: {reason} "
+                     f"(latency={latency:.2f}s, status={status})")
+        self.limiter.resize(new)
+
+
+class Limiter:
+    def __init__(self, key: str, concurrency: int, rate: float = 0):
+        self.key = key
+        self.configured = concurrency
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.bucket = TokenBucket(rate)
+        self.controller: AIMDController | None = None
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.queued = 0
+        self.total = 0
+        self.waits = deque(maxlen=500)
+
+    @property
+    def in_flight(self) -> int:
+        return self.active
+
+    def resize(self, concurrency: int) -> None:
+        self.concurrency = max(1, concurrency)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.active < self.concurrency:
+            future = self._waiters.popleft()
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+    async def _enter(self) -> None:
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            elif future in self._waiters:
+                self._waiters.remove(future)
+            raise
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def acquire(self):
+        start = time.monotonic()
+        self.queued += 1
+        try:
+            await self._enter()
+        finally:
+            self.queued -= 1
+        try:
+            delay = self.bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            admitted = time.monotonic()
+            self.waits.append(admitted - start)
+            self.total += 1
+            token = current_limiter.set(self) if self.controller else None
+            try:
+                yield
+            except Exception as e:
+                if self.controller:
+                    self.controller.record(time.monotonic() - admitted, e)
+                raise
+            finally:
+                if token:
+                    current_limiter.reset(token)
+        finally:
+            self._release()
+
+    def stats(self) -> dict:
+        waits = sorted(self.waits)
+        return {
+            "key": self.key,
+            "concurrency": self.concurrency,
+            "rate": self.rate,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "total": self.total,
+            "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+            "p95_wait": waits[int(len(waits) * 0.95)] if waits else 0.0,
+            "errors": dict(self.controller.errors) if self.controller else {},
+        }
+
+
+# Called by the HTTP layer for every request made while a limiter is held, so the controller
+# sees the real status code and exception type rather than what the spider made of them.
+def report_request(latency: float, status: int | None = None, error: BaseException | None = None) -> None:
+    limiter = current_limiter.get()
+    if limiter and limiter.controller:
+        limiter.controller.record(latency, error, status)
+
+
+def parse_rules(text: str | None) -> dict[str, tuple[int, float]]:
+    rules = {}
+    for item in re.split('[,，]', text or ''):
+        parts = [i.strip() for i in item.strip().split(':')]
+        if len(parts) < 2 or not parts[0]:
+            continue
+        try:
+            concurrency = int(parts[1])
+            rate = float(parts[2]) if len(parts) > 2 and parts[2] else 0.0
+        except ValueError:
+            continue
+        rules[parts[0]] = (concurrency, rate)
+    return rules
+
+
+# Each platform gets its own concurrency cap and requests-per-second budget. A rule can also
+# be keyed by host, in which case requests to that host additionally pass through its bucket.
+class RateLimiter:
+    def __init__(self, default_concurrency: int = 3, default_rate: float = 0):
+        self.default = (default_concurrency, default_rate)
+        self.rules: dict[str, tuple[int, float]] = {}
+        self.limiters: dict[str, Limiter] = {}
+        self.adaptive = False
+        self.latency_target = 8.0
+
+    def configure(self, default_concurrency: int, rules: dict[str, tuple[int, float]] | None = None,
+                  default_rate: float = 0, adaptive: bool = False, latency_target: float = 8.0) -> None:
+        self.default = (default_concurrency, default_rate)
+        self.rules = rules or {}
+        self.adaptive = adaptive
+        self.latency_target = latency_target
+        for key, limiter in list(self.limiters.items()):
+            if (limiter.configured, limiter.rate) != self.rules.get(key, self.default):
+                self.limiters.pop(key)
+            elif limiter.controller and not adaptive:
+                limiter.controller = None
+                limiter.resize(limiter.configured)
+            elif limiter.controller:
+                limiter.controller.latency_target = latency_target
+
+    def get(self, key: str, adaptive: bool = False) -> Limiter:
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            concurrency, rate = self.rules.get(key, self.default)
+            limiter = self.limiters[key] = Limiter(key, concurrency, rate)
+        if adaptive and self.adaptive and limiter.controller is None:
+            limiter.controller = AIMDController(limiter, ceiling=limiter.configured,
+                                                latency_target=self.latency_target)
+        return limiter
+
+    @asynccontextmanager
+    async def limit(self, platform: str, host: str | None = None):
+        async with AsyncExitStack() as stack:
+            await stack.enter_async_context(self.get(platform, adaptive=True).acquire())
+            if host and host in self.rules:
+                await stack.enter_async_context(self.get(host).acquire())
+            token = current_platform.set(platform)
+            try:
+                yield
+            finally:
+                current_platform.reset(token)
+
+    def stats(self) -> list[dict]:
+        return [limiter.stats() for limiter in self.limiters.values() if limiter.total or limiter.queued]
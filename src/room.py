@@ -9,10 +9,11 @@ Copyright (c) 2023 by Hmily, All Rights Reserved.
 """
 import re
 import urllib.parse
-import execjs
 import httpx
 import urllib.request
-from . import JS_SCRIPT_PATH, utils
+from . import utils
+from .http_clients.pool import client_pool
+from .node_pool import node_pool
 
 no_proxy_handler = urllib.request.ProxyHandler({})
 opener = urllib.request.build_opener(no_proxy_handler)
@@ -43,8 +44,7 @@ async def get_xbogus(url: str, headers: dict | None = None) -> str:
     if not headers or 'user-agent' not in (k.lower() for k in headers):
         headers = HEADERS
     query = urllib.parse.urlparse(url).query
-    xbogus = execjs.compile(open(f'{JS_SCRIPT_PATH}/x-bogus.js').read()).call(
-        'sign', query, headers.get("User-Agent", "user-agent"))
+    xbogus = await node_pool.acall('x-bogus.js', 'sign', query, headers.get("User-Agent", "user-agent"))
     return xbogus
 
 
@@ -55,7 +55,7 @@ async def get_sec_user_id(url: str, proxy_addr: str | None = None, headers: dict
 
     try:
         proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        async with httpx.AsyncClient(proxy=proxy_addr, timeout=15) as client:
+        async with httpx.AsyncClient(transport=client_pool.transport(proxy_addr, False), timeout=15) as client:
             response = await client.get(url, headers=headers, follow_redirects=True)
             redirect_url = response.url
             if 'reflow/' in str(redirect_url):
@@ -81,7 +81,7 @@ async def get_unique_id(url: str, proxy_addr: str | None = None, headers: dict |
 
     try:
         proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        async with httpx.AsyncClient(proxy=proxy_addr, timeout=15) as client:
+        async with httpx.AsyncClient(transport=client_pool.transport(proxy_addr, False), timeout=15) as client:
             response = await client.get(url, headers=headers, follow_redirects=True)
             redirect_url = str(response.url)
             if 'reflow/' in str(redirect_url):
@@ -129,7 +129,7 @@ async def get_live_room_id(room_id: str, sec_user_id: str, proxy_addr: str | Non
 
     try:
         proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        async with httpx.AsyncClient(proxy=proxy_addr,
+        async with httpx.AsyncClient(transport=client_pool.transport(proxy_addr, False),
                                      timeout=15) as client:
             response = await client.get(api, headers=headers)
             response.raise_for_status()
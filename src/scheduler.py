@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import hashlib
+import heapq
+import itertools
+import threading
+
+GOLDEN_RATIO = 0.6180339887498949
+
+
+# One timer for every waiting room: due times are rounded up to `resolution` slots so rooms due
+# together are woken by a single callback, and a room can be woken early by a stop signal.
+class PollScheduler:
+    def __init__(self, resolution: float = 0.5):
+        self.resolution = resolution
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.heap: list[tuple[float, int, str, asyncio.Future]] = []
+        self.waiting: dict[str, asyncio.Future] = {}
+        self.rounds: dict[str, int] = {}
+        self.counter = itertools.count()
+        self.timer: asyncio.TimerHandle | None = None
+        self.timer_due = 0.0
+        self.wakeups = 0
+        self.woken = 0
+
+    def jitter(self, key: str, spread: float) -> float:
+        # Golden-ratio sequence seeded by the room, so offsets are spread evenly in [-spread, spread]
+        # across rooms and across the rounds of a single room
+        rounds = self.rounds[key] = self.rounds.get(key, 0) + 1
+        seed = int.from_bytes(hashlib.md5(key.encode()).digest()[:4], 'big') / 2 ** 32
+        return ((seed + rounds * GOLDEN_RATIO) % 1 * 2 - 1) * spread
+
+    async def wait(self, key: str, delay: float) -> bool:
+        self.loop = asyncio.get_running_loop()
+        future = self.loop.create_future()
+        due = self.loop.time() + max(0.0, delay)
+        if self.resolution:
+            due = -(-due // self.resolution) * self.resolution
+        previous = self.waiting.get(key)
+        if previous and not previous.done():
+            previous.set_result(True)
+        self.waiting[key] = future
+        heapq.heappush(self.heap, (due, next(self.counter), key, future))
+        self._arm()
+        try:
+            return await future
+        finally:
+            if self.waiting.get(key) is future:
+                del self.waiting[key]
+
+    def _arm(self) -> None:
+        while self.heap and self.heap[0][3].done():
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return
+        due = self.heap[0][0]
+        if self.timer and self.timer_due <= due:
+            return
+        if self.timer:
+            self.timer.cancel()
+        self.timer = self.loop.call_at(due, self._fire)
+        self.timer_due = due
+
+    def _fire(self) -> None:
+        self.timer = None
+        self.wakeups += 1
+        now = self.loop.time()
+        while self.heap and self.heap[0][0] <= now:
+            future = heapq.heappop(self.heap)[3]
+            if not future.done():
+                future.set_result(False)
+        self._arm()
+
+    def wake(self, key: str) -> None:
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._wake, key)
+
+    def wake_all(self) -> None:
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(lambda: [self._wake(key) for key in list(self.waiting)])
+
+    def _wake(self, key: str) -> None:
+        future = self.waiting.get(key)
+        if future and not future.done():
+            self.woken += 1
+            future.set_result(True)
+
+    @property
+    def pending(self) -> int:
+        return len(self.waiting)
+
+
+# Recording threads block on an event instead of waking every second to check whether their
+# room was commented out or the program is stopping; those events are delivered here.
+class StopSignals:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events: dict[str, set[threading.Event]] = {}
+
+    def register(self, key: str) -> threading.Event:
+        event = threading.Event()
+        with self.lock:
+            self.events.setdefault(key, set()).add(event)
+        return event
+
+    def unregister(self, key: str, event: threading.Event) -> None:
+        with self.lock:
+            events = self.events.get(key)
+            if events:
+                events.discard(event)
+                if not events:
+                    del self.events[key]
+
+    def signal(self, key: str) -> bool:
+        with self.lock:
+            events = list(self.events.get(key, ()))
+        for event in events:
+            event.set()
+        return bool(events)
+
+    def signal_all(self) -> None:
+        with self.lock:
+            events = [event for events in self.events.values() for event in events]
+        for event in events:
+            event.set()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Awaitable, Callable
+from .logger import logger
+from .persist import persister, write_json
+from .single_flight import single_flight, flight_key
+
+SESSION_FILE = os.path.join(os.path.split(os.path.realpath(sys.argv[0]))[0], 'config', 'sessions.json')
+SESSION_VERSION = 1
+# Lifetime assumed for a login whose cookies/tokens do not say when they expire
+DEFAULT_TTL = 12 * 3600
+REFRESH_MARGIN = 600
+
+LoginFunc = Callable[[str | None], Awaitable[str | None]]
+
+
+def jwt_expiry(token: str) -> float | None:
+    parts = token.split('.')
+    if len(parts) != 3:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + '=' * (-len(parts[1]) % 4)))
+        return float(payload['exp'])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def credential_expiry(credential: str) -> float | None:
+    # The earliest `exp` of any JWT in a bearer token or in the values of a cookie string
+    values = [credential.removeprefix('Bearer ').strip()]
+    values += [i.split('=', 1)[1].strip() for i in credential.split(';') if '=' in i]
+    expiries = [i for i in map(jwt_expiry, values) if i]
+    return min(expiries) if expiries else None
+
+
+@dataclass
+class Session:
+    credential: str
+    obtained_at: float
+    expires_at: float
+    extra: dict = field(default_factory=dict)
+
+    def valid(self, margin: float = 0) -> bool:
+        return time.time() + margin < self.expires_at
+
+
+# Logged-in cookies/tokens per (platform, account), kept in config/sessions.json instead of being
+# written back into config.ini after every login. Sessions are loaded once at start and saved
+# atomically by the persister a few seconds after they change. Platforms that register a login
+# function get their sessions renewed by run_refresher a while before they expire, so a probe
+# finds a valid session rather than logging in on the spot; concurrent renewals of one account
+# share a single login. `on_change` receives every new session, to hand it to other shards.
+class SessionStore:
+    def __init__(self, path: str = SESSION_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.sessions: dict[tuple[str, str], Session] = {}
+        self.logins: dict[str, tuple[Callable[[], str], LoginFunc]] = {}
+        self.refreshes = 0
+        self.failures = 0
+        self.on_change: Callable[[dict], None] | None = None
+        self.load()
+        persister.register(self.path, self._save)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != SESSION_VERSION:
+            return
+        self._merge(data.get('sessions', []))
+
+    def adopt(self, items: list[dict]) -> bool:
+        # Sessions another shard logged in with; returns whether any was newer than the known one
+        if not self._merge(items):
+            return False
+        persister.mark_dirty(self.path)
+        return True
+
+    def _merge(self, items: list[dict]) -> bool:
+        adopted = False
+        with self.lock:
+            for item in items:
+                try:
+                    key = (item['platform'], item['account'])
+                    session = Session(item['credential'], item['obtained_at'], item['expires_at'],
+                                      item.get('extra', {}))
+                except (KeyError, TypeError):
+                    continue
+                current = self.sessions.get(key)
+                if current is None or current.obtained_at < session.obtained_at:
+                    self.sessions[key] = session
+                    adopted = True
+        return adopted
+
+    def snapshot(self) -> list[dict]:
+        with self.lock:
+            return [{"platform": platform, "account": account, **asdict(session)}
+                    for (platform, account), session in self.sessions.items()]
+
+    def _save(self) -> None:
+        try:
+            write_json(self.path, {"version": SESSION_VERSION, "sessions": self.snapshot()}, indent=1)
+        except OSError as e:
+            logger.error(f"登录会话保存失败: {e}")
+
+    def get(self, platform: str, account: str) -> Session | None:
+        with self.lock:
+            session = self.sessions.get((platform, account))
+        return session if session and session.valid() else None
+
+    def credential(self, platform: str, account: str, default: str | None = None) -> str | None:
+        session = self.get(platform, account) if account else None
+        return session.credential if session else default
+
+    def put(self, platform: str, account: str, credential: str, expires_at: float | None = None,
+            **extra) -> Session:
+        now = time.time()
+        session = Session(credential, now, expires_at or credential_expiry(credential) or now + DEFAULT_TTL, extra)
+        with self.lock:
+            self.sessions[(platform, account)] = session
+        persister.mark_dirty(self.path)
+        if self.on_change:
+            self.on_change({"platform": platform, "account": account, **asdict(session)})
+        return session
+
+    def invalidate(self, platform: str, account: str) -> None:
+        with self.lock:
+            removed = self.sessions.pop((platform, account), None)
+        if removed:
+            persister.mark_dirty(self.path)
+
+    def register(self, platform: str, account: Callable[[], str], login: LoginFunc) -> None:
+        # `account` is read at refresh time so a changed config is picked up
+        self.logins[platform] = (account, login)
+
+    async def refresh(self, platform: str, proxy_addr: str | None = None) -> Session | None:
+        account_of, login = self.logins[platform]
+        account = account_of()
+        if not account:
+            return None
+
+        async def do_login():
+            credential = await login(proxy_addr)
+            if not credential:
+                raise RuntimeError(f"{platform} 登录失败")
+            return self.put(platform, account, credential)
+
+        try:
+            session = await single_flight.do(flight_key(platform, account, 'login'), do_login)
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"{platform} 登录会话续期失败: {e}")
+            return None
+        self.refreshes += 1
+        return session
+
+    def due(self, margin: float = REFRESH_MARGIN) -> list[str]:
+        # Platforms whose stored session ends within `margin`; ones never logged in are left to the probes
+        platforms = []
+        for platform, (account_of, _) in self.logins.items():
+            account = account_of()
+            with self.lock:
+                session = self.sessions.get((platform, account))
+            if account and session and not session.valid(margin):
+                platforms.append(platform)
+        return platforms
+
+    async def run_refresher(self, proxy_for: Callable[[str], str | None] = lambda _: None,
+                            interval: float = 60.0) -> None:
+        while True:
+            for platform in self.due():
+                await self.refresh(platform, proxy_for(platform))
+            await asyncio.sleep(interval)
+
+    def stats(self) -> list[dict]:
+        with self.lock:
+            return [{
+                "platform": platform,
+                "account": account,
+                "expires_in": max(0.0, session.expires_at - time.time()),
+            } for (platform, account), session in self.sessions.items()]
+
+
+session_store = SessionStore()
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Callable
+from .logger import logger
+
+SHARD_INDEX_ENV = 'DLR_SHARD_INDEX'
+SHARD_ADDRESS_ENV = 'DLR_SHARD_ADDRESS'
+SHARD_AUTHKEY_ENV = 'DLR_SHARD_AUTHKEY'
+SHARD_GLOBAL_PROXY_ENV = 'DLR_SHARD_GLOBAL_PROXY'
+
+
+def canonical_room_url(url: str) -> str:
+    url = url.strip()
+    rest = url.split('://', maxsplit=1)[1] if '://' in url else url
+    host, _, path = rest.partition('/')
+    return f"{host.lower()}/{path.split('#')[0].rstrip('/')}"
+
+
+def shard_for(url: str, members: list[int]) -> int | None:
+    # Rendezvous hashing: a room only moves when the shard that owns it joins or leaves
+    if not members:
+        return None
+    key = canonical_room_url(url)
+    return max(members, key=lambda m: hashlib.md5(f'{m}:{key}'.encode()).digest())
+
+
+def worker_command() -> list[str]:
+    if getattr(sys, 'frozen', False):
+        return [sys.executable]
+    return [sys.executable, os.path.realpath(sys.argv[0])]
+
+
+# Runs in the main process. It owns the config files and the JSON stores, spawns one recorder
+# process per shard, hands each the rooms that hash to it and moves rooms to the surviving shards
+# when a worker dies. A room that is being recorded stays with its shard until the recording ends.
+class ShardCoordinator:
+    def __init__(self, shards: int, log_dir: str, on_message: Callable[[int, dict], None] | None = None,
+                 env: dict | None = None, command: list[str] | None = None,
+                 on_connect: Callable[[int], None] | None = None):
+        self.shards = shards
+        self.log_dir = log_dir
+        self.on_message = on_message
+        self.on_connect = on_connect
+        self.env = env or {}
+        self.command = command or worker_command()
+        self.authkey = secrets.token_bytes(16)
+        self.listener = Listener(('127.0.0.1', 0), authkey=self.authkey)
+        self.lock = threading.RLock()
+        self.procs: dict[int, subprocess.Popen] = {}
+        self.conns: dict[int, Connection] = {}
+        self.status: dict[int, dict] = {}
+        self.restarts: dict[int, int] = {}
+        self.restart_at: dict[int, float] = {}
+        self.rooms: dict[str, tuple] = {}
+        self.comments: list[str] = []
+        self.owners: dict[str, int] = {}
+        self.sent: dict[int, tuple] = {}
+        self.stopping = False
+
+    def start(self) -> None:
+        os.makedirs(self.log_dir, exist_ok=True)
+        for shard in range(self.shards):
+            self._spawn(shard)
+        threading.Thread(target=self._accept_loop, name='shard-accept', daemon=True).start()
+        threading.Thread(target=self._supervise, name='shard-supervise', daemon=True).start()
+
+    def _spawn(self, shard: int) -> None:
+        host, port = self.listener.address
+        env = os.environ.copy()
+        env.update(self.env)
+        env[SHARD_INDEX_ENV] = str(shard)
+        env[SHARD_ADDRESS_ENV] = f'{host}:{port}'
+        env[SHARD_AUTHKEY_ENV] = self.authkey.hex()
+        # Each worker leads its own process group so the ffmpeg processes it started can be found
+        # and stopped if it crashes
+        if os.name == 'nt':
+            group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group = {"start_new_session": True}
+        with open(os.path.join(self.log_dir, f'shard-{shard}.log'), 'a', encoding='utf-8') as log_file:
+            self.procs[shard] = subprocess.Popen(self.command, env=env, stdin=subprocess.DEVNULL,
+                                                 stdout=log_file, stderr=subprocess.STDOUT, **group)
+        logger.debug(f"Started shard {shard} (pid {self.procs[shard].pid})")
+
+    def _accept_loop(self) -> None:
+        while not self.stopping:
+            try:
+                conn = self.listener.accept()
+                hello = conn.recv()
+            except (OSError, EOFError) as e:
+                if not self.stopping:
+                    logger.debug(f"Shard connection rejected: {e}")
+                continue
+            shard = hello.get('shard')
+            with self.lock:
+                self.conns[shard] = conn
+                self.sent.pop(shard, None)
+            threading.Thread(target=self._read_loop, args=(shard, conn), name=f'shard-{shard}-reader',
+                             daemon=True).start()
+            if self.on_connect:
+                try:
+                    self.on_connect(shard)
+                except Exception as e:
+                    logger.error(f"Failed to prepare shard {shard}: {e}")
+            self.rebalance()
+
+    def _read_loop(self, shard: int, conn: Connection) -> None:
+        while True:
+            try:
+                message = conn.recv()
+            except (OSError, EOFError):
+                break
+            if message.get('type') == 'status':
+                with self.lock:
+                    previous = self.status.get(shard, {}).get('recording_urls')
+                    self.status[shard] = message | {"updated": time.time()}
+                if previous != message.get('recording_urls'):
+                    self.rebalance()
+            elif self.on_message:
+                try:
+                    self.on_message(shard, message)
+                except Exception as e:
+                    logger.error(f"Failed to handle message from shard {shard}: {e}")
+
+        with self.lock:
+            if self.conns.get(shard) is conn:
+                self.conns.pop(shard)
+                self.status.pop(shard, None)
+        if not self.stopping:
+            self.rebalance()
+
+    def _supervise(self) -> None:
+        while not self.stopping:
+            time.sleep(1)
+            for shard, proc in list(self.procs.items()):
+                if self.stopping:
+                    break
+                if proc.poll() is None:
+                    continue
+                if shard not in self.restart_at:
+                    self.restarts[shard] = self.restarts.get(shard, 0) + 1
+                    delay = min(60, 5 * 2 ** (self.restarts[shard] - 1))
+                    self.restart_at[shard] = time.time() + delay
+                    logger.warning(f"Shard {shard} exited with code {proc.returncode}, "
+                                   f"its rooms move to the other shards, restarting in {delay}s")
+                    # Recordings it left behind would otherwise keep writing the rooms the next owner picks up
+                    self._kill_group(proc)
+                    with self.lock:
+                        conn = self.conns.pop(shard, None)
+                        self.status.pop(shard, None)
+                    if conn:
+                        conn.close()
+                    self.rebalance()
+                elif time.time() >= self.restart_at[shard]:
+                    self.restart_at.pop(shard)
+                    self._spawn(shard)
+
+    def _kill_group(self, proc: subprocess.Popen) -> None:
+        try:
+            if os.name == 'nt':
+                subprocess.run(['taskkill', '/F', '/T', '/PID', str(proc.pid)], capture_output=True, timeout=10)
+            else:
+                os.killpg(proc.pid, signal.SIGTERM)
+        except (OSError, subprocess.SubprocessError):
+            pass
+
+    def assign(self, url_tuples: list, comments: list) -> None:
+        with self.lock:
+            for url_tuple in url_tuples:
+                self.rooms[url_tuple[1]] = tuple(url_tuple)
+            for url in comments:
+                self.rooms.pop(url, None)
+            self.comments = list(comments)
+        self.rebalance()
+
+    def rebalance(self) -> None:
+        with self.lock:
+            members = sorted(self.conns)
+            recording_owner = {url: shard for shard, status in self.status.items()
+                               for url in status.get('recording_urls', [])}
+            assigned: dict[int, list] = {shard: [] for shard in members}
+            moved = 0
+            for url, url_tuple in self.rooms.items():
+                owner = recording_owner.get(url)
+                if owner not in assigned:
+                    owner = shard_for(url, members)
+                if owner is None:
+                    continue
+                if self.owners.get(url) not in (owner, None):
+                    moved += 1
+                self.owners[url] = owner
+                assigned[owner].append(url_tuple)
+            if moved:
+                logger.debug(f"Rebalanced {moved} rooms across shards {members}")
+
+            for shard, rooms in assigned.items():
+                message = (tuple(sorted(rooms)), tuple(self.comments))
+                if self.sent.get(shard) == message:
+                    continue
+                if self._send(shard, {"type": "rooms", "rooms": list(message[0]), "comments": list(message[1])}):
+                    self.sent[shard] = message
+
+    def send(self, shard: int, message_type: str, **kwargs) -> bool:
+        with self.lock:
+            return self._send(shard, {"type": message_type, **kwargs})
+
+    def broadcast(self, message_type: str, **kwargs) -> None:
+        with self.lock:
+            for shard in list(self.conns):
+                self._send(shard, {"type": message_type, **kwargs})
+
+    def _send(self, shard: int, message: dict) -> bool:
+        conn = self.conns.get(shard)
+        if not conn:
+            return False
+        try:
+            conn.send(message)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def shard_status(self) -> dict[int, dict]:
+        with self.lock:
+            result = {}
+            for shard, proc in self.procs.items():
+                status = self.status.get(shard, {})
+                result[shard] = {
+                    "pid": proc.pid,
+                    "alive": proc.poll() is None,
+                    "connected": shard in self.conns,
+                    "rooms": sum(1 for owner in self.owners.values() if owner == shard),
+                    "monitoring": status.get('monitoring', 0),
+                    "recording": status.get('recording', []),
+                    "errors": status.get('errors', 0),
+                    "restarts": self.restarts.get(shard, 0),
+                }
+            return result
+
+    def stop(self) -> None:
+        self.stopping = True
+        with self.lock:
+            for shard in list(self.conns):
+                self._send(shard, {"type": "stop"})
+        try:
+            self.listener.close()
+        except OSError:
+            pass
+
+    def alive_workers(self) -> list[int]:
+        return [shard for shard, proc in self.procs.items() if proc.poll() is None]
+
+
+# Runs in each shard process: receives its room list from the coordinator and reports back
+# status, push notifications, URL config updates and store changes, which only the coordinator may
+# write. Other messages from the coordinator are handed to `on_message`.
+class ShardWorker:
+    def __init__(self, shard: int, address: tuple, authkey: bytes, global_proxy: bool = False,
+                 on_message: Callable[[dict], None] | None = None):
+        self.shard = shard
+        self.global_proxy = global_proxy
+        self.on_message = on_message
+        self.conn = Client(address, authkey=authkey)
+        self.send_lock = threading.Lock()
+        self.rooms: list[tuple] = []
+        self.comments: list[str] = []
+        self.stopped = threading.Event()
+        self.send('hello', shard=shard, pid=os.getpid())
+        threading.Thread(target=self._read_loop, name='shard-reader', daemon=True).start()
+
+    @classmethod
+    def from_env(cls, on_message: Callable[[dict], None] | None = None) -> 'ShardWorker | None':
+        shard = os.environ.get(SHARD_INDEX_ENV)
+        if shard is None:
+            return None
+        host, port = os.environ[SHARD_ADDRESS_ENV].rsplit(':', maxsplit=1)
+        return cls(int(shard), (host, int(port)), bytes.fromhex(os.environ[SHARD_AUTHKEY_ENV]),
+                   global_proxy=os.environ.get(SHARD_GLOBAL_PROXY_ENV) == '1', on_message=on_message)
+
+    def _read_loop(self) -> None:
+        while True:
+            try:
+                message = self.conn.recv()
+            except (OSError, EOFError):
+                break
+            if message.get('type') == 'rooms':
+                self.rooms = [tuple(i) for i in message['rooms']]
+                self.comments = message['comments']
+            elif message.get('type') == 'stop':
+                break
+            elif self.on_message:
+                try:
+                    self.on_message(message)
+                except Exception as e:
+                    logger.error(f"Failed to handle message from coordinator: {e}")
+        self.stopped.set()
+
+    def send(self, message_type: str, **kwargs) -> None:
+        with self.send_lock:
+            try:
+                self.conn.send({"type": message_type, **kwargs})
+            except (OSError, ValueError):
+                self.stopped.set()
+
+    def excluded_rooms(self, running: list, recording_urls: set) -> list:
+        # Rooms that moved to another shard are dropped once they are not being recorded here
+        assigned = {i[1] for i in self.rooms}
+        return list(self.comments) + [url for url in running if url not in assigned and url not in recording_urls]
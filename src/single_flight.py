@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable
+
+MAX_RESULTS = 1024
+
+
+class LeaderCancelled(Exception):
+    pass
+
+
+def flight_key(platform: str, credential: str | None, purpose: str) -> tuple[str, str, str]:
+    # Credentials are hashed so tokens and cookies are not kept around as dictionary keys
+    digest = hashlib.sha1((credential or '').encode('utf-8')).hexdigest()[:16] if credential else '-'
+    return platform, digest, purpose
+
+
+# Coalesces identical auth/sign requests made by many rooms at once: the first caller for a key
+# runs the request and everyone arriving while it is in flight waits for that same result,
+# whichever event loop they are on. A result can also be kept for `ttl` seconds (or for as long
+# as a ttl function says, 0 meaning not at all), which is how a refreshed token is handed to a
+# room still holding the refresh token that was just used up, instead of it refreshing again.
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inflight: dict[tuple, Future] = {}
+        self.results: dict[tuple, tuple[Any, float]] = {}
+        self.calls = 0
+        self.shared = 0
+        self.hits = 0
+
+    async def do(self, key: tuple, func: Callable[[], Awaitable], ttl: float | Callable[[Any], float] = 0) -> Any:
+        while True:
+            with self.lock:
+                cached = self.results.get(key)
+                if cached and cached[1] > time.monotonic():
+                    self.hits += 1
+                    return cached[0]
+                future = self.inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = self.inflight[key] = Future()
+                    self.calls += 1
+                else:
+                    self.shared += 1
+            if not leader:
+                try:
+                    # Shielded so a follower being cancelled does not cancel the shared request
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except LeaderCancelled:
+                    continue
+            try:
+                result = await func()
+            except asyncio.CancelledError:
+                self._settle(key, future, error=LeaderCancelled())
+                raise
+            except Exception as e:
+                self._settle(key, future, error=e)
+                raise
+            keep_for = ttl(result) if callable(ttl) else ttl
+            self._settle(key, future, result=result, keep_for=keep_for)
+            return result
+
+    def _settle(self, key: tuple, future: Future, result: Any = None, error: BaseException | None = None,
+                keep_for: float = 0) -> None:
+        with self.lock:
+            if self.inflight.get(key) is future:
+                self.inflight.pop(key)
+            if error is None and keep_for > 0:
+                now = time.monotonic()
+                if len(self.results) >= MAX_RESULTS:
+                    self.results = {k: v for k, v in self.results.items() if v[1] > now}
+                self.results[key] = (result, now + keep_for)
+        if not future.done():
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def forget(self, key: tuple) -> None:
+        with self.lock:
+            self.results.pop(key, None)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"calls": self.calls, "shared": self.shared, "hits": self.hits, "cached": len(self.results)}
+
+
+single_flight = SingleFlight()
@@ -9,11 +9,11 @@ Copyright (c) 2023-2025 by Hmily, All Rights Reserved.
 Function: Get live stream data.
 """
 
+import asyncio
 import base64
 import hmac
 import hashlib
 import random
-import subprocess
 import time
 import uuid
 from operator import itemgetter
@@ -24,14 +24,20 @@ import httpx
 import ssl
 import re
 import json
-import execjs
 import urllib.request
-from . import JS_SCRIPT_PATH, utils
+from . import JS_SCRIPT_PATH, utils, extractors, fast_json
+from .node_pool import node_pool
+from .offload import cpu_pool, io_pool
+from .single_flight import single_flight, flight_key
 from .utils import trace_error_decorator, generate_random_string
 from .logger import script_path, logger
 from .room import get_sec_user_id, get_unique_id, UnsupportedUrlError
-from .http_clients.async_http import async_req
+from .http_clients.async_http import async_req, async_req_until
+from .http_clients.pool import client_pool
 from .ab_sign import ab_sign
+from .canonical import canonical_cache
+from . import m3u8 as m3u8_parser
+from .metrics import metrics
 
 
 ssl_context = ssl.create_default_context()
@@ -40,6 +46,19 @@ ssl_context.verify_mode = ssl.CERT_NONE
 OptionalStr = str | None
 OptionalDict = dict | None
 
+# How long shared credentials are reused by other rooms, see single_flight
+DOUYU_ENCRYPTION_TTL = 60
+ACFUN_VISITOR_TTL = 600
+WEVERSE_REFRESH_TTL = 300
+# xhslink redirects to a url with signed query parameters, so it is resolved again daily
+XHS_SHARE_MAX_AGE = 86400
+
+XHS_HEADERS = {
+    'User-Agent': 'ios/7.830 (ios 17.0; ; iPhone 15 (A2846/A3089/A3090/A3092))',
+    'xy-common-params': 'platform=iOS&sid=session.1722166379345546829388',
+    'referer': 'https://app.xhs.cn/',
+}
+
 
 def get_params(url: str, params: str) -> OptionalStr:
     parsed_url = urllib.parse.urlparse(url)
@@ -52,19 +71,7 @@ def get_params(url: str, params: str) -> OptionalStr:
 async def get_play_url_list(m3u8: str, proxy: OptionalStr = None, header: OptionalDict = None,
                             abroad: bool = False) -> List[str]:
     resp = await async_req(url=m3u8, proxy_addr=proxy, headers=header, abroad=abroad)
-    play_url_list = []
-    for i in resp.split('\n'):
-        if i.startswith('https://'):
-            play_url_list.append(i.strip())
-    if not play_url_list:
-        for i in resp.split('\n'):
-            if i.strip().endswith('m3u8'):
-                play_url_list.append(i.strip())
-    bandwidth_pattern = re.compile(r'BANDWIDTH=(\d+)')
-    bandwidth_list = bandwidth_pattern.findall(resp)
-    url_to_bandwidth = {url: int(bandwidth) for bandwidth, url in zip(bandwidth_list, play_url_list)}
-    play_url_list = sorted(play_url_list, key=lambda url: url_to_bandwidth[url], reverse=True)
-    return play_url_list
+    return [i.uri for i in m3u8_parser.parse_variants(resp, m3u8)]
 
 
 async def get_douyin_web_stream_data(url: str, proxy_addr: OptionalStr = None, cookies: OptionalStr = None):
@@ -95,13 +102,14 @@ async def get_douyin_web_stream_data(url: str, proxy_addr: OptionalStr = None, c
         }
 
         api = f'https://live.douyin.com/webcast/room/web/enter/?{urllib.parse.urlencode(params)}'
-        a_bogus = ab_sign(urllib.parse.urlparse(api).query, headers['user-agent'])
+        with metrics.measure('sign a_bogus'):
+            a_bogus = await cpu_pool.run(ab_sign, urllib.parse.urlparse(api).query, headers['user-agent'])
         api += "&a_bogus=" + a_bogus
         try:
             json_str = await async_req(url=api, proxy_addr=proxy_addr, headers=headers)
             if not json_str:
                 raise Exception("it triggered risk control")
-            json_data = json.loads(json_str)['data']
+            json_data = fast_json.loads(json_str)['data']
             if not json_data['data']:
                 raise Exception(f"{url} VR live is not supported")
             room_data = json_data['data'][0]
@@ -123,11 +131,11 @@ async def get_douyin_web_stream_data(url: str, proxy_addr: OptionalStr = None, c
                     json_str = pull_datas[key]['stream_data']
                 else:
                     json_str = live_core_sdk_data['pull_data']['stream_data']
-                json_data = json.loads(json_str)
+                json_data = fast_json.loads(json_str)
                 if 'origin' in json_data['data']:
                     stream_data = live_core_sdk_data['pull_data']['stream_data']
-                    origin_data = json.loads(stream_data)['data']['origin']['main']
-                    sdk_params = json.loads(origin_data['sdk_params'])
+                    origin_data = fast_json.loads(stream_data)['data']['origin']['main']
+                    sdk_params = fast_json.loads(origin_data['sdk_params'])
                     origin_hls_codec = sdk_params.get('VCodec') or ''
 
                     origin_url_list = json_data['data']['origin']['main']
@@ -143,6 +151,14 @@ async def get_douyin_web_stream_data(url: str, proxy_addr: OptionalStr = None, c
     return room_data
 
 
+async def resolve_douyin_share_url(url: str, proxy_addr: OptionalStr = None) -> dict:
+    try:
+        room_id, sec_uid = await get_sec_user_id(url, proxy_addr=proxy_addr)
+        return {"room_id": room_id, "sec_uid": sec_uid}
+    except UnsupportedUrlError:
+        return {"unique_id": await get_unique_id(url, proxy_addr=proxy_addr)}
+
+
 @trace_error_decorator
 async def get_douyin_app_stream_data(url: str, proxy_addr: OptionalStr = None, cookies: OptionalStr = None) -> dict:
     headers = {
@@ -166,13 +182,14 @@ async def get_douyin_app_stream_data(url: str, proxy_addr: OptionalStr = None, c
             "app_id": "1128"
         }
         api2 = f'https://webcast.amemv.com/webcast/room/reflow/info/?{urllib.parse.urlencode(app_params)}'
-        a_bogus = ab_sign(urllib.parse.urlparse(api2).query, headers['User-Agent'])
+        with metrics.measure('sign a_bogus'):
+            a_bogus = await cpu_pool.run(ab_sign, urllib.parse.urlparse(api2).query, headers['User-Agent'])
         api2 += "&a_bogus=" + a_bogus
         try:
             json_str2 = await async_req(url=api2, proxy_addr=proxy_addr, headers=headers)
             if not json_str2:
                 raise Exception("it triggered risk control")
-            json_data2 = json.loads(json_str2)['data']
+            json_data2 = fast_json.loads(json_str2)['data']
             if not json_data2.get('room'):
                 raise Exception(f"{url} VR live is not supported")
             room_data2 = json_data2['room']
@@ -186,13 +203,15 @@ async def get_douyin_app_stream_data(url: str, proxy_addr: OptionalStr = None, c
         if len(web_rid) > 1:
             return await get_douyin_web_stream_data(url, proxy_addr, cookies)
         else:
-            try:
-                data = await get_sec_user_id(url, proxy_addr=proxy_addr)
-                _room_id, _sec_uid = data
-                room_data = await get_app_data(_room_id, _sec_uid)
-            except UnsupportedUrlError:
-                unique_id = await get_unique_id(url, proxy_addr=proxy_addr)
-                return await get_douyin_stream_data(f'https://live.douyin.com/{unique_id}')
+            async def fetch(ids: dict) -> tuple[dict, dict]:
+                if 'unique_id' in ids:
+                    return ids, await get_douyin_stream_data(f'https://live.douyin.com/{ids["unique_id"]}')
+                return ids, await get_app_data(ids['room_id'], ids['sec_uid'])
+
+            ids, room_data = await canonical_cache.use(
+                'douyin', url, lambda: resolve_douyin_share_url(url, proxy_addr), fetch)
+            if 'unique_id' in ids:
+                return room_data
 
         if room_data['status'] == 2:
             if 'stream_url' not in room_data:
@@ -208,11 +227,11 @@ async def get_douyin_app_stream_data(url: str, proxy_addr: OptionalStr = None, c
                     json_str = pull_datas[key]['stream_data']
                 else:
                     json_str = live_core_sdk_data['pull_data']['stream_data']
-                json_data = json.loads(json_str)
+                json_data = fast_json.loads(json_str)
                 if 'origin' in json_data['data']:
                     stream_data = live_core_sdk_data['pull_data']['stream_data']
-                    origin_data = json.loads(stream_data)['data']['origin']['main']
-                    sdk_params = json.loads(origin_data['sdk_params'])
+                    origin_data = fast_json.loads(stream_data)['data']['origin']['main']
+                    sdk_params = fast_json.loads(origin_data['sdk_params'])
                     origin_hls_codec = sdk_params.get('VCodec') or ''
 
                     origin_url_list = json_data['data']['origin']['main']
@@ -242,32 +261,32 @@ async def get_douyin_stream_data(url: str, proxy_addr: OptionalStr = None, cooki
     try:
         origin_url_list = None
         html_str = await async_req(url=url, proxy_addr=proxy_addr, headers=headers)
-        match_json_str = re.search(r'(\{\\"state\\":.*?)]\\n"]\)', html_str)
+        match_json_str = extractors.douyin.state.search(html_str)
         if not match_json_str:
-            match_json_str = re.search(r'(\{\\"common\\":.*?)]\\n"]\)</script><div hidden', html_str)
+            match_json_str = extractors.douyin.common.search(html_str)
         json_str = match_json_str.group(1)
         cleaned_string = json_str.replace('\\', '').replace(r'u0026', r'&')
-        room_store = re.search('"roomStore":(.*?),"linkmicStore"', cleaned_string, re.DOTALL).group(1)
-        anchor_name = re.search('"nickname":"(.*?)","avatar_thumb', room_store, re.DOTALL).group(1)
+        room_store = extractors.douyin.room_store.search(cleaned_string).group(1)
+        anchor_name = extractors.douyin.nickname.search(room_store).group(1)
         room_store = room_store.split(',"has_commerce_goods"')[0] + '}}}'
-        json_data = json.loads(room_store)['roomInfo']['room']
+        json_data = fast_json.loads(room_store)['roomInfo']['room']
         json_data['anchor_name'] = anchor_name
         if 'status' in json_data and json_data['status'] == 4:
             return json_data
         stream_orientation = json_data['stream_url']['stream_orientation']
-        match_json_str2 = re.findall(r'"(\{\\"common\\":.*?)"]\)</script><script nonce=', html_str)
+        match_json_str2 = extractors.douyin.streams.findall(html_str)
         if match_json_str2:
             json_str = match_json_str2[0] if stream_orientation == 1 else match_json_str2[1]
-            json_data2 = json.loads(
+            json_data2 = fast_json.loads(
                 json_str.replace('\\', '').replace('"{', '{').replace('}"', '}').replace('u0026', '&'))
             if 'origin' in json_data2['data']:
                 origin_url_list = json_data2['data']['origin']['main']
 
         else:
             html_str = html_str.replace('\\', '').replace('u0026', '&')
-            match_json_str3 = re.search('"origin":\\{"main":(.*?),"dash"', html_str, re.DOTALL)
+            match_json_str3 = extractors.douyin.origin.search(html_str)
             if match_json_str3:
-                origin_url_list = json.loads(match_json_str3.group(1) + '}')
+                origin_url_list = fast_json.loads(match_json_str3.group(1) + '}')
 
         if origin_url_list:
             origin_hls_codec = origin_url_list['sdk_params'].get('VCodec') or ''
@@ -294,9 +313,11 @@ async def get_tiktok_stream_data(url: str, proxy_addr: OptionalStr = None, cooki
                              '5177d5d53bbd822e1bf66128887d942c9c3e2f'
     }
 
+    state_pattern = extractors.tiktok.state
     for i in range(3):
-        html_str = await async_req(url=url, proxy_addr=proxy_addr, headers=headers, abroad=True, http2=False)
-        time.sleep(1)
+        html_str = await async_req_until(url, until=[state_pattern], proxy_addr=proxy_addr, headers=headers,
+                                         http2=False)
+        await asyncio.sleep(1)
         if "We regret to inform you that we have discontinued operating TikTok" in html_str:
             msg = re.search('<p>\n\\s+(We regret to inform you that we have discontinu.*?)\\.\n\\s+</p>', html_str)
             raise ConnectionError(
@@ -305,12 +326,10 @@ async def get_tiktok_stream_data(url: str, proxy_addr: OptionalStr = None, cooki
             )
         if 'UNEXPECTED_EOF_WHILE_READING' not in html_str:
             try:
-                json_str = re.findall(
-                    '<script id="SIGI_STATE" type="application/json">(.*?)</script>',
-                    html_str, re.DOTALL)[0]
+                json_str = state_pattern.findall(html_str)[0]
             except Exception:
                 raise ConnectionError("Please check if your network can access the TikTok website normally")
-            json_data = json.loads(json_str)
+            json_data = fast_json.loads(json_str)
             return json_data
 
 
@@ -322,16 +341,17 @@ async def get_kuaishou_stream_data(url: str, proxy_addr: OptionalStr = None, coo
     }
     if cookies:
         headers['Cookie'] = cookies
+    state_pattern = extractors.kuaishou.state
     try:
-        html_str = await async_req(url=url, proxy_addr=proxy_addr, headers=headers)
+        html_str = await async_req_until(url, until=[state_pattern], proxy_addr=proxy_addr, headers=headers)
     except Exception as e:
         print(f"Failed to fetch data from {url}.{e}")
         return {"type": 1, "is_live": False}
 
     try:
-        json_str = re.search('<script>window.__INITIAL_STATE__=(.*?);\\(function\\(\\)\\{var s;', html_str).group(1)
-        play_list = re.findall('(\\{"liveStream".*?),"gameInfo', json_str)[0] + "}"
-        play_list = json.loads(play_list)
+        json_str = state_pattern.search(html_str).group(1)
+        play_list = extractors.kuaishou.live_stream.findall(json_str)[0] + "}"
+        play_list = fast_json.loads(play_list)
     except (AttributeError, IndexError, json.JSONDecodeError) as e:
         print(f"Failed to parse JSON data from {url}. Error: {e}")
         return {"type": 1, "is_live": False}
@@ -344,8 +364,7 @@ async def get_kuaishou_stream_data(url: str, proxy_addr: OptionalStr = None, coo
         return result
 
     if not play_list.get('liveStream'):
-        print("IP banned. Please change device or network.")
-        return result
+        raise ConnectionError("IP banned. Please change device or network.")
 
     anchor_name = play_list['author'].get('name', '')
     result.update({"anchor_name": anchor_name})
@@ -379,7 +398,7 @@ async def get_kuaishou_stream_data2(url: str, proxy_addr: OptionalStr = None, co
         data = {"source": 5, "eid": eid, "shareMethod": "card", "clientType": "WEB_OUTSIDE_SHARE_H5"}
         app_api = 'https://livev.m.chenzhongtech.com/rest/k/live/byUser?kpn=GAME_ZONE&captchaToken='
         json_str = await async_req(url=app_api, proxy_addr=proxy_addr, headers=headers, data=data)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
         live_stream = json_data['liveStream']
         anchor_name = live_stream['user']['user_name']
         result = {
@@ -418,8 +437,8 @@ async def get_huya_stream_data(url: str, proxy_addr: OptionalStr = None, cookies
         headers['Cookie'] = cookies
 
     html_str = await async_req(url=url, proxy_addr=proxy_addr, headers=headers)
-    json_str = re.findall('stream: (\\{"data".*?),"iWebDefaultBitRate"', html_str)[0]
-    json_data = json.loads(json_str + '}')
+    json_str = extractors.huya.stream.findall(html_str)[0]
+    json_data = fast_json.loads(json_str + '}')
     return json_data
 
 
@@ -438,7 +457,7 @@ async def get_huya_app_stream_url(url: str, proxy_addr: OptionalStr = None, cook
 
     if any(char.isalpha() for char in room_id):
         html_str = await async_req(url, proxy_addr=proxy_addr, headers=headers)
-        room_id = re.search('ProfileRoom":(.*?),"sPrivateHost', html_str)
+        room_id = extractors.huya.profile_room.search(html_str)
         if room_id:
             room_id = room_id.group(1)
         else:
@@ -452,7 +471,7 @@ async def get_huya_app_stream_url(url: str, proxy_addr: OptionalStr = None, cook
     }
     wx_app_api = f'https://mp.huya.com/cache.php?{urllib.parse.urlencode(params)}'
     json_str = await async_req(url=wx_app_api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data['data']['profileInfo']['nick']
     live_status = json_data['data']['realLiveStatus']
     live_title = json_data['data']['liveData']['introduction']
@@ -523,14 +542,23 @@ def md5(data) -> str:
     return hashlib.md5(data.encode('utf-8')).hexdigest()
 
 
-async def get_token_js(rid: str, did: str, proxy_addr: OptionalStr = None, headers: dict | None = None) -> str:
-    enc_url = f"https://www.douyu.com/wgapi/livenc/liveweb/websec/getEncryption?did={did}"
-    json_str = await async_req(url=enc_url, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
-    if json_data.get('error') != 0:
-        raise Exception(f"getEncryption error: {json_data}")
+async def get_douyu_encryption(did: str, proxy_addr: OptionalStr = None, headers: dict | None = None) -> dict:
+    async def fetch_encryption():
+        enc_url = f"https://www.douyu.com/wgapi/livenc/liveweb/websec/getEncryption?did={did}"
+        json_str = await async_req(url=enc_url, proxy_addr=proxy_addr, headers=headers)
+        json_data = fast_json.loads(json_str)
+        if json_data.get('error') != 0:
+            raise Exception(f"getEncryption error: {json_data}")
+        return json_data['data']
+
+    # The key only depends on the device id, so rooms probed together share one request
+    credential = f"{did}|{(headers or {}).get('Cookie', '')}"
+    return await single_flight.do(flight_key('斗鱼直播', credential, 'getEncryption'), fetch_encryption,
+                                  ttl=DOUYU_ENCRYPTION_TTL)
 
-    key_data = json_data['data']
+
+async def get_token_js(rid: str, did: str, proxy_addr: OptionalStr = None, headers: dict | None = None) -> str:
+    key_data = await get_douyu_encryption(did, proxy_addr=proxy_addr, headers=headers)
     key = key_data['key']
     rand_str = key_data['rand_str']
     enc_time = key_data['enc_time']
@@ -563,14 +591,14 @@ async def get_douyu_info_data(url: str, proxy_addr: OptionalStr = None, cookies:
     else:
         rid = re.search('douyu.com/(.*?)(?=\\?|$)', url).group(1)
         html_str = await async_req(url=f'https://m.douyu.com/{rid}', proxy_addr=proxy_addr, headers=headers)
-        json_str = re.findall('<script id="vike_pageContext" type="application/json">(.*?)</script>', html_str)[0]
-        json_data = json.loads(json_str)
+        json_str = extractors.douyu.page_context.findall(html_str)[0]
+        json_data = fast_json.loads(json_str)
         rid = json_data['pageProps']['room']['roomInfo']['roomInfo']['rid']
 
     headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:124.0) Gecko/20100101 Firefox/124.0'
     url2 = f'https://www.douyu.com/betard/{rid}'
     json_str = await async_req(url=url2, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     result = {
         "anchor_name": json_data['room']['nickname'],
         "is_live": False
@@ -606,7 +634,7 @@ async def get_douyu_stream_data(rid: str, rate: str = '-1', proxy_addr: Optional
     app_api = f'https://www.douyu.com/lapi/live/getH5PlayV1/{rid}'
     headers['Content-Type'] = 'application/x-www-form-urlencoded'
     json_str = await async_req(url=app_api, proxy_addr=proxy_addr, headers=headers, data=data)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     return json_data
 
 
@@ -622,8 +650,8 @@ async def get_yy_stream_data(url: str, proxy_addr: OptionalStr = None, cookies:
         headers['Cookie'] = cookies
 
     html_str = await async_req(url=url, proxy_addr=proxy_addr, headers=headers)
-    anchor_name = re.search('nick: "(.*?)",\n\\s+logo', html_str).group(1)
-    cid = re.search('sid : "(.*?)",\n\\s+ssid', html_str, re.DOTALL).group(1)
+    anchor_name = extractors.yy.nick.search(html_str).group(1)
+    cid = extractors.yy.sid.search(html_str).group(1)
 
     data = '{"head":{"seq":1701869217590,"appidstr":"0","bidstr":"121","cidstr":"' + cid + '","sidstr":"' + cid + '","uid64":0,"client_type":108,"client_ver":"5.17.0","stream_sys_ver":1,"app":"yylive_web","playersdk_ver":"5.17.0","thundersdk_ver":"0","streamsdk_ver":"5.17.0"},"client_attribute":{"client":"web","model":"web0","cpu":"","graphics_card":"","os":"chrome","osversion":"0","vsdk_version":"","app_identify":"","app_version":"","business":"","width":"1920","height":"1080","scale":"","client_type":8,"h265":0},"avp_parameter":{"version":1,"client_type":8,"service_type":0,"imsi":0,"send_time":1701869217,"line_seq":-1,"gear":4,"ssl":1,"stream_format":0}}'
     data_bytes = data.encode('utf-8')
@@ -637,7 +665,7 @@ async def get_yy_stream_data(url: str, proxy_addr: OptionalStr = None, cookies:
     }
     url2 = f'https://stream-manager.yy.com/v3/channel/streams?{urllib.parse.urlencode(params)}'
     json_str = await async_req(url=url2, data=data_bytes, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     json_data['anchor_name'] = anchor_name
 
     params = {
@@ -648,7 +676,7 @@ async def get_yy_stream_data(url: str, proxy_addr: OptionalStr = None, cookies:
     }
     detail_api = f'https://www.yy.com/live/detail?{urllib.parse.urlencode(params)}'
     json_str2 = await async_req(detail_api, proxy_addr=proxy_addr, headers=headers)
-    json_data2 = json.loads(json_str2)
+    json_data2 = fast_json.loads(json_str2)
     json_data['title'] = json_data2['data']['roomName']
     return json_data
 
@@ -669,7 +697,7 @@ async def get_bilibili_room_info_h5(url: str, proxy_addr: OptionalStr = None, co
     room_id = url.split('?')[0].rsplit('/', maxsplit=1)[1]
     api = f'https://api.live.bilibili.com/xlive/web-room/v1/index/getH5InfoByRoom?room_id={room_id}'
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-    room_info = json.loads(json_str)
+    room_info = fast_json.loads(json_str)
     title = room_info['data']['room_info'].get('title') if room_info.get('data') else ''
     return title
 
@@ -688,13 +716,13 @@ async def get_bilibili_room_info(url: str, proxy_addr: OptionalStr = None, cooki
         room_id = url.split('?')[0].rsplit('/', maxsplit=1)[1]
         json_str = await async_req(f'https://api.live.bilibili.com/room/v1/Room/room_init?id={room_id}',
                            proxy_addr=proxy_addr, headers=headers)
-        room_info = json.loads(json_str)
+        room_info = fast_json.loads(json_str)
         uid = room_info['data']['uid']
         live_status = True if room_info['data']['live_status'] == 1 else False
 
         api = f'https://api.live.bilibili.com/live_user/v1/Master/info?uid={uid}'
         json_str2 = await async_req(url=api, proxy_addr=proxy_addr, headers=headers)
-        anchor_info = json.loads(json_str2)
+        anchor_info = fast_json.loads(json_str2)
         anchor_name = anchor_info['data']['info']['uname']
 
         title = await get_bilibili_room_info_h5(url, proxy_addr, cookies)
@@ -704,6 +732,38 @@ async def get_bilibili_room_info(url: str, proxy_addr: OptionalStr = None, cooki
         return {"anchor_name": '', "live_status": False, "room_url": url}
 
 
+@trace_error_decorator
+async def get_bilibili_rooms_info(room_ids: list, proxy_addr: OptionalStr = None, cookies: OptionalStr = None) -> dict:
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:127.0) Gecko/20100101 Firefox/127.0',
+        'Accept-Language': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
+        'origin': 'https://live.bilibili.com',
+        'referer': 'https://live.bilibili.com/',
+    }
+    if cookies:
+        headers['Cookie'] = cookies
+
+    params = [('req_biz', 'web_room_componet')] + [('room_ids', room_id) for room_id in room_ids]
+    api = f'https://api.live.bilibili.com/xlive/web-room/v1/index/getRoomBaseInfo?{urllib.parse.urlencode(params)}'
+    json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
+    json_data = fast_json.loads(json_str)
+    if json_data.get('code') != 0:
+        raise RuntimeError(f"getRoomBaseInfo error: {json_data.get('code')} {json_data.get('message')}")
+
+    result = {}
+    for room in (json_data['data'].get('by_room_ids') or {}).values():
+        room_info = {
+            "anchor_name": room['uname'],
+            "live_status": room['live_status'] == 1,
+            "title": room.get('title', ''),
+        }
+        # Rooms may be requested by their short id and come back keyed by the real one
+        for key in (room.get('room_id'), room.get('short_id')):
+            if key and str(key) in room_ids:
+                result[str(key)] = room_info
+    return result
+
+
 @trace_error_decorator
 async def get_bilibili_stream_data(url: str, qn: str = '10000', platform: str = 'web', proxy_addr: OptionalStr = None,
                              cookies: OptionalStr = None) -> OptionalStr:
@@ -724,7 +784,7 @@ async def get_bilibili_stream_data(url: str, qn: str = '10000', platform: str =
     }
     play_api = f'https://api.live.bilibili.com/room/v1/Room/playUrl?{urllib.parse.urlencode(params)}'
     json_str = await async_req(play_api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     if json_data and json_data['code'] == 0:
         for i in json_data['data']['durl']:
             if 'd1--cn-gotcha' in i['url']:
@@ -747,7 +807,7 @@ async def get_bilibili_stream_data(url: str, qn: str = '10000', platform: str =
         # 此接口因网页上有限制, 需要配置登录后的cookie才能获取最高画质
         api = f'https://api.live.bilibili.com/xlive/web-room/v2/index/getRoomPlayInfo?{urllib.parse.urlencode(params)}'
         json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
         if json_data['data']['live_status'] == 0:
             print("The anchor did not start broadcasting.")
             return
@@ -766,29 +826,51 @@ async def get_bilibili_stream_data(url: str, qn: str = '10000', platform: str =
         m3u8_url = host + base_url + extra
         return m3u8_url
 
+async def resolve_xhs_share_url(url: str, proxy_addr: OptionalStr = None, headers: OptionalDict = None) -> dict:
+    redirect_url = await async_req(url, proxy_addr=proxy_addr, headers=headers or XHS_HEADERS, redirect_url=True)
+    if not redirect_url.startswith('http') or 'xhslink.com' in redirect_url:
+        raise RuntimeError(f"Failed to resolve the xhslink share url: {redirect_url}")
+    return {"url": redirect_url}
+
+
+def canonical_kind(url: str) -> OptionalStr:
+    if 'xhslink.com' in url:
+        return 'xhslink'
+    if 'douyin.com' in url and ('v.douyin.com' in url or '/user/' in url):
+        return 'douyin'
+    return None
+
+
+async def prefetch_canonical_urls(urls: List[str], proxy_for=lambda _: None) -> int:
+    def resolver_for(url: str):
+        if canonical_kind(url) == 'xhslink':
+            return lambda: resolve_xhs_share_url(url, proxy_for(url))
+        return lambda: resolve_douyin_share_url(url, proxy_for(url))
+
+    return await canonical_cache.prefetch(canonical_kind, resolver_for, urls)
+
+
 @trace_error_decorator
 async def get_xhs_stream_url(url: str, proxy_addr: OptionalStr = None, cookies: OptionalStr = None) -> dict:
-    headers = {
-        'User-Agent': 'ios/7.830 (ios 17.0; ; iPhone 15 (A2846/A3089/A3090/A3092))',
-        'xy-common-params': 'platform=iOS&sid=session.1722166379345546829388',
-        'referer': 'https://app.xhs.cn/',
-    }
+    headers = dict(XHS_HEADERS)
     if cookies:
         headers['Cookie'] = cookies
 
     if "xhslink.com" in url:
-        url = await async_req(url, proxy_addr=proxy_addr, headers=headers, redirect_url=True)
+        ids = await canonical_cache.resolve('xhslink', url, lambda: resolve_xhs_share_url(url, proxy_addr, headers),
+                                            max_age=XHS_SHARE_MAX_AGE)
+        url = ids['url']
 
     host_id = get_params(url, "host_id")
     user_id = re.search("/user/profile/(.*?)(?=/|\\?|$)", url)
     user_id = user_id.group(1) if user_id else host_id
     result = {"anchor_name": '', "is_live": False}
     html_str = await async_req(url, proxy_addr=proxy_addr, headers=headers)
-    match_data = re.search("<script>window.__INITIAL_STATE__=(.*?)</script>", html_str)
+    match_data = extractors.xhs.state.search(html_str)
 
     if match_data:
         json_str = match_data.group(1).replace("undefined", "null")
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
 
         if json_data.get("liveStream"):
             stream_data = json_data["liveStream"]
@@ -814,7 +896,7 @@ async def get_xhs_stream_url(url: str, proxy_addr: OptionalStr = None, cookies:
 
     profile_url = f"https://www.xiaohongshu.com/user/profile/{user_id}"
     html_str = await async_req(profile_url, proxy_addr=proxy_addr, headers=headers)
-    anchor_name = re.search("<title>@(.*?) 的个人主页</title>", html_str)
+    anchor_name = extractors.xhs.title.search(html_str)
     if anchor_name:
         result["anchor_name"] = anchor_name.group(1)
 
@@ -834,9 +916,7 @@ async def get_bigo_stream_url(url: str, proxy_addr: OptionalStr = None, cookies:
 
     if 'bigo.tv' not in url:
         html_str = await async_req(url, proxy_addr=proxy_addr, headers=headers)
-        web_url = re.search(
-            '<meta data-n-head="ssr" data-hid="al:web:url" property="al:web:url" content="(.*?)">',
-            html_str).group(1)
+        web_url = extractors.bigo.web_url.search(html_str).group(1)
         room_id = web_url.split('&amp;h=')[-1]
     else:
         if '&h=' in url:
@@ -847,7 +927,7 @@ async def get_bigo_stream_url(url: str, proxy_addr: OptionalStr = None, cookies:
     data = {'siteId': room_id}  # roomId
     url2 = 'https://ta.bigo.tv/official_website/studio/getInternalStudioInfo'
     json_str = await async_req(url=url2, proxy_addr=proxy_addr, headers=headers, data=data)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data['data']['nick_name']
     live_status = json_data['data']['alive']
     result = {"anchor_name": anchor_name, "is_live": False}
@@ -861,12 +941,11 @@ async def get_bigo_stream_url(url: str, proxy_addr: OptionalStr = None, cookies:
     elif result['anchor_name'] == '':
         html_str = await async_req(url=f'https://www.bigo.tv/{url.split("/")[3]}/{room_id}',
                                    proxy_addr=proxy_addr, headers=headers)
-        match_anchor_name = re.search('<title>欢迎来到(.*?)的直播间</title>', html_str, re.DOTALL)
+        match_anchor_name = extractors.bigo.title.search(html_str)
         if match_anchor_name:
             anchor_name = match_anchor_name.group(1)
         else:
-            match_anchor_name = re.search('<meta data-n-head="ssr" data-hid="og:title" property="og:title" '
-                                          'content="(.*?) - BIGO LIVE">', html_str, re.DOTALL)
+            match_anchor_name = extractors.bigo.og_title.search(html_str)
             anchor_name = match_anchor_name.group(1)
         result['anchor_name'] = anchor_name
 
@@ -884,9 +963,9 @@ async def get_blued_stream_url(url: str, proxy_addr: OptionalStr = None, cookies
         headers['Cookie'] = cookies
 
     html_str = await async_req(url=url, proxy_addr=proxy_addr, headers=headers)
-    json_str = re.search('decodeURIComponent\\(\"(.*?)\"\\)\\),window\\.Promise', html_str, re.DOTALL).group(1)
+    json_str = extractors.blued.state.search(html_str).group(1)
     json_str = urllib.parse.unquote(json_str)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data['userInfo']['name']
     live_status = json_data['userInfo']['onLive']
     result = {"anchor_name": anchor_name, "is_live": False}
@@ -957,7 +1036,7 @@ async def get_sooplive_cdn_url(broad_no: str, proxy_addr: OptionalStr = None, co
 
     url2 = 'http://livestream-manager.sooplive.co.kr/broad_stream_assign.html?' + urllib.parse.urlencode(params)
     json_str = await async_req(url=url2, proxy_addr=proxy_addr, headers=headers, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     return json_data
 
@@ -994,7 +1073,7 @@ async def get_sooplive_tk(url: str, rtype: str, proxy_addr: OptionalStr = None,
 
     url2 = f'https://live.sooplive.co.kr/afreeca/player_live_api.php?bjid={bj_id}'
     json_str = await async_req(url=url2, proxy_addr=proxy_addr, headers=headers, data=data, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     if rtype == 'aid':
         token = json_data["CHANNEL"]["AID"]
@@ -1020,7 +1099,7 @@ async def _get_soop_channel_info_global(bj_id, proxy_addr: OptionalStr = None, c
     headers = get_soop_headers(cookies)
     api = 'https://api.sooplive.com/v2/channel/info/' + str(bj_id)
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     nickname = json_data['data']['streamerChannelInfo']['nickname']
     channelId = json_data['data']['streamerChannelInfo']['channelId']
     anchor_name = f"{nickname}-{channelId}"
@@ -1031,7 +1110,7 @@ async def _get_soop_stream_info_global(bj_id, proxy_addr: OptionalStr = None, co
     headers = get_soop_headers(cookies)
     api = 'https://api.sooplive.com/v2/stream/info/' + str(bj_id)
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     status = json_data['data']['isStream']
     title = json_data['data']['title']
     return status, title
@@ -1054,16 +1133,7 @@ async def _fetch_web_stream_data_global(url: str, proxy_addr: OptionalStr = None
             if cookies:
                 headers['cookie'] = cookies
             resp = await async_req(url=m3u8, proxy_addr=proxy_addr, headers=headers)
-            play_url_list = []
-            url_prefix = '/'.join(m3u8.split('/')[0:3])
-            for i in resp.split('\n'):
-                if not i.startswith('#') and i.strip():
-                    play_url_list.append(url_prefix + i.strip())
-            bandwidth_pattern = re.compile(r'BANDWIDTH=(\d+)')
-            bandwidth_list = bandwidth_pattern.findall(resp)
-            url_to_bandwidth = {purl: int(bandwidth) for bandwidth, purl in zip(bandwidth_list, play_url_list)}
-            play_url_list = sorted(play_url_list, key=lambda purl: url_to_bandwidth[purl], reverse=True)
-            return play_url_list
+            return [i.uri for i in m3u8_parser.parse_variants(resp, m3u8)]
 
         m3u8_url = 'https://global-media.sooplive.com/live/' + str(bj_id) + '/master.m3u8'
         result |= {
@@ -1107,7 +1177,7 @@ async def get_sooplive_stream_data(
     url2 = 'http://api.m.sooplive.co.kr/broad/a/watch'
 
     json_str = await async_req(url=url2, proxy_addr=proxy_addr, headers=headers, data=data, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     if 'user_nick' in json_data['data']:
         anchor_name = json_data['data']['user_nick']
@@ -1120,16 +1190,8 @@ async def get_sooplive_stream_data(
 
     async def get_url_list(m3u8: str) -> List[str]:
         resp = await async_req(url=m3u8, proxy_addr=proxy_addr, headers=headers, abroad=True)
-        play_url_list = []
-        url_prefix = m3u8.rsplit('/', maxsplit=1)[0] + '/'
-        for i in resp.split('\n'):
-            if i.startswith('auth_playlist'):
-                play_url_list.append(url_prefix + i.strip())
-        bandwidth_pattern = re.compile(r'BANDWIDTH=(\d+)')
-        bandwidth_list = bandwidth_pattern.findall(resp)
-        url_to_bandwidth = {purl: int(bandwidth) for bandwidth, purl in zip(bandwidth_list, play_url_list)}
-        play_url_list = sorted(play_url_list, key=lambda purl: url_to_bandwidth[purl], reverse=True)
-        return play_url_list
+        variants = m3u8_parser.parse_variants(resp, m3u8)
+        return [i.uri for i in variants if i.uri.rsplit('/', maxsplit=1)[-1].startswith('auth_playlist')]
 
     async def handle_login() -> OptionalStr:
         cookie = await login_sooplive(username, password, proxy_addr=proxy_addr)
@@ -1202,9 +1264,8 @@ async def get_netease_stream_data(url: str, proxy_addr: OptionalStr = None, cook
     url = url + '/' if url[-1] != '/' else url
 
     html_str = await async_req(url=url, proxy_addr=proxy_addr, headers=headers)
-    json_str = re.search('<script id="__NEXT_DATA__" .* crossorigin="anonymous">(.*?)</script></body>',
-                         html_str, re.DOTALL).group(1)
-    json_data = json.loads(json_str)
+    json_str = extractors.netease.next_data.search(html_str).group(1)
+    json_data = fast_json.loads(json_str)
     room_data = json_data['props']['pageProps']['roomInfoInitData']
     live_data = room_data['live']
     result = {"is_live": False}
@@ -1233,13 +1294,13 @@ async def get_qiandurebo_stream_data(url: str, proxy_addr: OptionalStr = None, c
         headers['Cookie'] = cookies
 
     html_str = await async_req(url=url, proxy_addr=proxy_addr, headers=headers)
-    data = re.search('var user = (.*?)\r\n\\s+user\\.play_url', html_str, re.DOTALL).group(1)
-    anchor_name = re.findall('"zb_nickname": "(.*?)",\r\n', data)
+    data = extractors.qiandurebo.user.search(html_str).group(1)
+    anchor_name = extractors.qiandurebo.nickname.findall(data)
 
     result = {"anchor_name": "", "is_live": False}
     if len(anchor_name) > 0:
         result['anchor_name'] = anchor_name[0]
-        play_url = re.findall('"play_url": "(.*?)",\r\n', data)
+        play_url = extractors.qiandurebo.play_url.findall(data)
 
         if len(play_url) > 0 and 'common-text-center" style="display:block' not in html_str:
             result |= {
@@ -1280,7 +1341,7 @@ async def get_pandatv_stream_data(url: str, proxy_addr: OptionalStr = None, cook
     result = {"anchor_name": "", "is_live": False}
     json_str = await async_req('https://api.pandalive.co.kr/v1/member/bj',
                        proxy_addr=proxy_addr, headers=headers, data=data, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     if "bjInfo" not in json_data:
         raise RuntimeError(json_data.get("message", 'Unknown error'))
     anchor_id = json_data['bjInfo']['id']
@@ -1290,7 +1351,7 @@ async def get_pandatv_stream_data(url: str, proxy_addr: OptionalStr = None, cook
 
     if live_status:
         json_str = await async_req(url2, proxy_addr=proxy_addr, headers=headers, data=data2, abroad=True)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
         if 'errorData' in json_data:
             if json_data['errorData']['code'] == 'needAdult':
                 raise RuntimeError(f"{url} The live room requires login and is only accessible to adults. Please "
@@ -1318,7 +1379,7 @@ async def get_maoerfm_stream_url(url: str, proxy_addr: OptionalStr = None, cooki
     url2 = f'https://fm.missevan.com/api/v2/live/{room_id}'
 
     json_str = await async_req(url=url2, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     anchor_name = json_data['info']['creator']['username']
     live_status = False
@@ -1354,7 +1415,7 @@ async def get_winktv_bj_info(url: str, proxy_addr: OptionalStr = None, cookies:
 
     info_api = 'https://api.winktv.co.kr/v1/member/bj'
     json_str = await async_req(url=info_api, proxy_addr=proxy_addr, headers=headers, data=data, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     live_status = 'media' in json_data
     anchor_id = json_data['bjInfo']['id']
     anchor_name = f"{json_data['bjInfo']['nick']}-{anchor_id}"
@@ -1392,7 +1453,7 @@ async def get_winktv_stream_data(url: str, proxy_addr: OptionalStr = None, cooki
         json_str = await async_req(url=play_api, proxy_addr=proxy_addr, headers=headers, data=data, abroad=True)
         if '403: Forbidden' in json_str:
             raise ConnectionError(f"Your network has been banned from accessing WinkTV ({json_str})")
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
         if 'errorData' in json_data:
             if json_data['errorData']['code'] == 'needAdult':
                 raise RuntimeError(f"{url} The live stream is only accessible to logged-in adults. Please ensure that "
@@ -1464,7 +1525,7 @@ async def get_flextv_stream_url(
             raise ConnectionError(
                 "Failed to retrieve FlexTV live streaming data, please switch to a different proxy and try again."
             )
-        return json.loads(json_str)
+        return fast_json.loads(json_str)
 
     json_data = await fetch_data(cookies)
     if 'sources' in json_data and len(json_data['sources']) > 0:
@@ -1491,8 +1552,8 @@ async def get_flextv_stream_data(
     try:
         url2 = f'https://www.ttinglive.com/channels/{user_id}/live'
         html_str = await async_req(url2, proxy_addr=proxy_addr, headers=headers, abroad=True)
-        json_str = re.search('<script id="__NEXT_DATA__" type=".*">(.*?)</script>', html_str).group(1)
-        json_data = json.loads(json_str)
+        json_str = extractors.flextv.next_data.search(html_str).group(1)
+        json_data = fast_json.loads(json_str)
         channel_data = json_data['props']['pageProps']['channel']
         login_need = 'message' in channel_data and '로그인후 이용이 가능합니다.' in channel_data.get('message')
         if login_need:
@@ -1510,8 +1571,8 @@ async def get_flextv_stream_data(
             cookies = new_cookies if new_cookies else cookies
             headers['Cookie'] = cookies
             html_str = await async_req(url2, proxy_addr=proxy_addr, headers=headers, abroad=True)
-            json_str = re.search('<script id="__NEXT_DATA__" type=".*">(.*?)</script>', html_str).group(1)
-            json_data = json.loads(json_str)
+            json_str = extractors.flextv.next_data.search(html_str).group(1)
+            json_data = fast_json.loads(json_str)
             channel_data = json_data['props']['pageProps']['channel']
 
         live_status = 'message' not in channel_data
@@ -1533,7 +1594,7 @@ async def get_flextv_stream_data(
         else:
             url2 = f'https://www.ttinglive.com/channels/{user_id}'
             html_str = await async_req(url2, proxy_addr=proxy_addr, headers=headers, abroad=True)
-            anchor_name = re.search('<meta name="twitter:title" content="(.*?)의', html_str).group(1)
+            anchor_name = extractors.flextv.twitter_title.search(html_str).group(1)
             result["anchor_name"] = anchor_name
     except Exception as e:
         print("Failed to retrieve data from FlexTV live room", e)
@@ -1609,7 +1670,7 @@ async def get_looklive_stream_url(url: str, proxy_addr: OptionalStr = None, cook
     request_data = {'params': params, 'encSecKey': secretkey}
     api = 'https://api.look.163.com/weapi/livestream/room/get/v3'
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers, data=request_data)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data['data']['anchor']['nickName']
     live_status = json_data['data']['liveStatus']
     result = {"anchor_name": anchor_name, "is_live": False}
@@ -1652,7 +1713,7 @@ async def login_popkontv(
 
     try:
         proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        async with httpx.AsyncClient(proxy=proxy_addr, timeout=20, verify=False) as client:
+        async with httpx.AsyncClient(transport=client_pool.transport(proxy_addr, False, False), timeout=20) as client:
             response = await client.post(url, json=data, headers=headers)
             response.raise_for_status()
 
@@ -1702,7 +1763,7 @@ async def get_popkontv_stream_data(
 
     api = 'https://www.popkontv.com/api/proxy/broadcast/v1/search/all'
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers, json_data=data, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     partner_code = ''
     anchor_name = 'Unknown'
@@ -1721,14 +1782,14 @@ async def get_popkontv_stream_data(
         partner_code = regex_result.group(1) if regex_result else code
         notices_url = f'https://www.popkontv.com/channel/notices?mcid={anchor_id}&mcPartnerCode={partner_code}'
         notices_response = await async_req(notices_url, proxy_addr=proxy_addr, headers=headers, abroad=True)
-        mc_name_match = re.search(r'"mcNickName":"([^"]+)"', notices_response)
+        mc_name_match = extractors.popkontv.mc_name.search(notices_response)
         mc_name = mc_name_match.group(1) if mc_name_match else 'Unknown'
         anchor_name = f"{anchor_id}-{mc_name}"
 
     live_url = f"https://www.popkontv.com/live/view?castId={anchor_id}&partnerCode={partner_code}"
     html_str2 = await async_req(live_url, proxy_addr=proxy_addr, headers=headers, abroad=True)
-    json_str2 = re.search('<script id="__NEXT_DATA__" type="application/json">(.*?)</script>', html_str2).group(1)
-    json_data2 = json.loads(json_str2)
+    json_str2 = extractors.popkontv.next_data.search(html_str2).group(1)
+    json_data2 = fast_json.loads(json_str2)
     if 'mcData' in json_data2['props']['pageProps']:
         room_data = json_data2['props']['pageProps']['mcData']['data']
         is_private = room_data['mc_isPrivate']
@@ -1812,7 +1873,7 @@ async def get_popkontv_stream_url(
                 json_str = await fetch_data(headers, new_partner_code)
             else:
                 raise RuntimeError("popkontv login failed, please check if the account and password are correct")
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
         status_msg = json_data["statusMsg"]
         if json_data['statusCd'] == "L000A":
             print("Failed to retrieve live stream source,", status_msg)
@@ -1822,7 +1883,7 @@ async def get_popkontv_stream_url(
         elif json_data['statusCd'] == "L0001":
             cast_start_date_code = int(cast_start_date_code) - 1
             json_str = await fetch_data(headers, partner_code)
-            json_data = json.loads(json_str)
+            json_data = fast_json.loads(json_str)
             m3u8_url = json_data['data']['castHlsUrl']
             result |= {"m3u8_url": m3u8_url, "record_url": m3u8_url}
         elif json_data['statusCd'] == "L0000":
@@ -1859,7 +1920,7 @@ async def login_twitcasting(
         login_api = 'https://twitcasting.tv/indexcaslogin.php?redir=/indexloginwindow.php?next=%2F&keep=1'
 
     html_str = await async_req(login_url, proxy_addr=proxy_addr, headers=headers)
-    cs_session_id = re.search('<input type="hidden" name="cs_session_id" value="(.*?)">', html_str).group(1)
+    cs_session_id = extractors.twitcasting.session_id.search(html_str).group(1)
 
     data = {
         'username': username,
@@ -1899,10 +1960,10 @@ async def get_twitcasting_stream_url(
 
     async def get_data(header) -> tuple:
         html_str = await async_req(url, proxy_addr=proxy_addr, headers=header)
-        anchor = re.search("<title>(.*?) \\(@(.*?)\\)  的直播 - Twit", html_str)
-        title = re.search('<meta name="twitter:title" content="(.*?)">\n\\s+<meta', html_str)
-        status = re.search('data-is-onlive="(.*?)"\n\\s+data-view-mode', html_str)
-        movie_id = re.search('data-movie-id="(.*?)" data-audience-id', html_str)
+        anchor = extractors.twitcasting.anchor.search(html_str)
+        title = extractors.twitcasting.title.search(html_str)
+        status = extractors.twitcasting.status.search(html_str)
+        movie_id = extractors.twitcasting.movie_id.search(html_str)
         return f'{anchor.group(1).strip()}-{anchor.group(2)}-{movie_id.group(1)}', status.group(1), title.group(1)
 
     result = {"anchor_name": '', "is_live": False}
@@ -1934,7 +1995,7 @@ async def get_twitcasting_stream_url(
     if live_status == 'true':
         url_streamserver = f"https://twitcasting.tv/streamserver.php?target={anchor_id}&mode=client&player=pc_web"
         stream_data = await async_req(url_streamserver, proxy_addr=proxy_addr, headers=headers)
-        json_data = json.loads(stream_data)
+        json_data = fast_json.loads(stream_data)
         if not json_data.get('tc-hls') or not json_data['tc-hls'].get("streams"):
             raise RuntimeError("No m3u8_url,please check the url")
 
@@ -1982,7 +2043,7 @@ async def get_baidu_stream_data(url: str, proxy_addr: OptionalStr = None, cookie
     }
     app_api = f'https://mbd.baidu.com/searchbox?{urllib.parse.urlencode(params)}'
     json_str = await async_req(url=app_api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     key = list(json_data['data'].keys())[0]
     data = json_data['data'][key]
     anchor_name = data['host']['name']
@@ -2025,7 +2086,7 @@ async def get_weibo_stream_data(url: str, proxy_addr: OptionalStr = None, cookie
         web_api = f'https://weibo.com/ajax/statuses/mymblog?uid={uid}&page=1&feature=0'
         json_str = await async_req(web_api, proxy_addr=proxy_addr, headers=headers)
         try:
-            json_data = json.loads(json_str)
+            json_data = fast_json.loads(json_str)
         except json.decoder.JSONDecodeError as e:
             if "weibo.com/login.php" in json_str or "通行证" in json_str:
                 logger.error(f"Weibo cookie expired or missing. Please update 'weibo_cookie' in config/config.ini. Response: {json_str[:200]}")
@@ -2060,7 +2121,7 @@ async def get_weibo_stream_data(url: str, proxy_addr: OptionalStr = None, cookie
         # app_api = f'https://weibo.com/l/!/2/wblive/room/show_pc_live.json?live_id={room_id}'
         json_str = await async_req(url=app_api, proxy_addr=proxy_addr, headers=headers)
         try:
-            json_data = json.loads(json_str)
+            json_data = fast_json.loads(json_str)
         except json.decoder.JSONDecodeError as e:
             if "weibo.com/login.php" in json_str or "通行证" in json_str:
                 logger.error(f"Weibo cookie expired or missing. Please update 'weibo_cookie' in config/config.ini. Response: {json_str[:200]}")
@@ -2102,7 +2163,7 @@ async def get_kugou_stream_url(url: str, proxy_addr: OptionalStr = None, cookies
 
     app_api = f'https://service2.fanxing.kugou.com/roomcen/room/web/cdn/getEnterRoomInfo?roomId={room_id}'
     json_str = await async_req(url=app_api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data['data']['normalRoomInfo']['nickName']
     result = {"anchor_name": anchor_name, "is_live": False}
     if not anchor_name:
@@ -2125,7 +2186,7 @@ async def get_kugou_stream_url(url: str, proxy_addr: OptionalStr = None, cookies
         }
         api = f'https://fx1.service.kugou.com/video/pc/live/pull/mutiline/streamaddr?{urllib.parse.urlencode(params)}'
         json_str2 = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-        json_data2 = json.loads(json_str2)
+        json_data2 = fast_json.loads(json_str2)
         stream_data = json_data2['data']['lines']
         if stream_data:
             flv_url = stream_data[-1]['streamProfiles'][0]['httpsFlv'][0]
@@ -2163,7 +2224,7 @@ async def get_twitchtv_room_info(url: str, token: str, proxy_addr: OptionalStr =
 
     json_str = await async_req('https://gql.twitch.tv/gql', proxy_addr=proxy_addr, headers=headers,
                                json_data=data, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     user_data = json_data[0]['data']['userOrError']
     login_name = user_data["login"]
     nickname = f"{user_data['displayName']}-{login_name}"
@@ -2171,6 +2232,48 @@ async def get_twitchtv_room_info(url: str, token: str, proxy_addr: OptionalStr =
     return nickname, status
 
 
+@trace_error_decorator
+async def get_twitchtv_rooms_info(logins: list, proxy_addr: OptionalStr = None, cookies: OptionalStr = None) -> dict:
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:124.0) Gecko/20100101 Firefox/124.0',
+        'Accept-Language': 'zh-CN',
+        'Referer': 'https://www.twitch.tv/',
+        'Client-Id': 'kimne78kx3ncx6brgo4mv6wki5h1ko',
+        'Content-Type': 'text/plain;charset=UTF-8',
+    }
+    if cookies:
+        headers['Cookie'] = cookies
+
+    data = [
+        {
+            "operationName": "ChannelShell",
+            "variables": {
+                "login": login
+            },
+            "extensions": {
+                "persistedQuery": {
+                    "version": 1,
+                    "sha256Hash": "580ab410bcd0c1ad194224957ae2241e5d252b2c5173d8e0cce9d32d5bb14efe"
+                }
+            }
+        } for login in logins
+    ]
+
+    json_str = await async_req('https://gql.twitch.tv/gql', proxy_addr=proxy_addr, headers=headers,
+                               json_data=data, abroad=True)
+    json_data = fast_json.loads(json_str)
+    result = {}
+    for login, item in zip(logins, json_data):
+        user_data = (item.get('data') or {}).get('userOrError') or {}
+        if 'login' not in user_data:
+            continue
+        result[login] = {
+            "anchor_name": f"{user_data['displayName']}-{user_data['login']}",
+            "is_live": True if user_data.get('stream') else False,
+        }
+    return result
+
+
 @trace_error_decorator
 async def get_twitchtv_stream_data(url: str, proxy_addr: OptionalStr = None, cookies: OptionalStr = None) -> dict:
     headers = {
@@ -2202,11 +2305,22 @@ async def get_twitchtv_stream_data(url: str, proxy_addr: OptionalStr = None, coo
         }
     }
 
-    json_str = await async_req('https://gql.twitch.tv/gql', proxy_addr=proxy_addr, headers=headers,
-                               json_data=data, abroad=True)
-    json_data = json.loads(json_str)
-    token = json_data['data']['streamPlaybackAccessToken']['value']
-    sign = json_data['data']['streamPlaybackAccessToken']['signature']
+    async def fetch_access_token():
+        json_str = await async_req('https://gql.twitch.tv/gql', proxy_addr=proxy_addr, headers=headers,
+                                   json_data=data, abroad=True)
+        access_token = fast_json.loads(json_str)['data']['streamPlaybackAccessToken']
+        return access_token['value'], access_token['signature']
+
+    def token_lifetime(result: tuple) -> float:
+        # The token value is a JSON document carrying its own expiry time
+        try:
+            expires = fast_json.loads(result[0]).get('expires', 0)
+        except (ValueError, AttributeError):
+            return 0
+        return expires - time.time() - 60
+
+    token, sign = await single_flight.do(flight_key('TwitchTV', cookies, f'PlaybackAccessToken:{uid}'),
+                                         fetch_access_token, ttl=token_lifetime)
 
     anchor_name, live_status = await get_twitchtv_room_info(url=url, token=token, proxy_addr=proxy_addr, cookies=cookies)
     result = {"anchor_name": anchor_name, "is_live": live_status}
@@ -2251,13 +2365,12 @@ async def get_liveme_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
 
     if 'index.html' not in url:
         html_str = await async_req(url, proxy_addr=proxy_addr, headers=headers, abroad=True)
-        match_url = re.search('<meta property="og:url" content="(.*?)">', html_str)
+        match_url = extractors.liveme.og_url.search(html_str)
         if match_url:
             url = match_url.group(1)
 
     room_id = url.split("/index.html")[0].rsplit('/', maxsplit=1)[-1]
-    sign_data = execjs.compile(open(f'{JS_SCRIPT_PATH}/liveme.js').read()).call('sign', room_id,
-                                                                                f'{JS_SCRIPT_PATH}/crypto-js.min.js')
+    sign_data = await node_pool.acall('liveme.js', 'sign', room_id, f'{JS_SCRIPT_PATH}/crypto-js.min.js')
     lm_s_sign = sign_data.pop("lm_s_sign")
     tongdun_black_box = sign_data.pop("tongdun_black_box")
     platform = sign_data.pop("os")
@@ -2271,7 +2384,7 @@ async def get_liveme_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
 
     api = f'https://live.liveme.com/live/queryinfosimple?{urllib.parse.urlencode(params)}'
     json_str = await async_req(api, data=sign_data, proxy_addr=proxy_addr, headers=headers, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     stream_data = json_data['data']['video_info']
     anchor_name = stream_data['uname']
     live_status = stream_data['status']
@@ -2301,9 +2414,10 @@ async def get_huajiao_sn(url: str, cookies: OptionalStr = None, proxy_addr: Opti
     live_id = url.split('?')[0].rsplit('/', maxsplit=1)[1]
     api = f'https://www.huajiao.com/l/{live_id}'
     try:
-        html_str = await async_req(url=api, proxy_addr=proxy_addr, headers=headers)
-        json_str = re.search('var feed = (.*?});', html_str).group(1)
-        json_data = json.loads(json_str)
+        html_str = await async_req_until(api, until=[extractors.huajiao.feed], proxy_addr=proxy_addr,
+                                         headers=headers)
+        json_str = extractors.huajiao.feed.search(html_str).group(1)
+        json_data = fast_json.loads(json_str)
         sn = json_data['feed']['sn']
         uid = json_data['author']['uid']
         nickname = json_data['author']['nickname']
@@ -2335,10 +2449,10 @@ async def get_huajiao_user_info(url: str, cookies: OptionalStr = None, proxy_add
 
         api = f'https://webh.huajiao.com/User/getUserFeeds?{urllib.parse.urlencode(params)}'
         json_str = await async_req(url=api, proxy_addr=proxy_addr, headers=headers)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
 
         html_str = await async_req(url=f'https://www.huajiao.com/user/{uid}', proxy_addr=proxy_addr, headers=headers)
-        anchor_name = re.search('<title>(.*?)的主页.*</title>', html_str).group(1)
+        anchor_name = extractors.huajiao.user_title.search(html_str).group(1)
         if json_data['data'] and 'sn' in json_data['data']['feeds'][0]['feed']:
             feed = json_data['data']['feeds'][0]['feed']
             return {
@@ -2364,7 +2478,7 @@ async def get_huajiao_stream_url_app(url: str, proxy_addr: OptionalStr = None, c
     room_id = url.rsplit('/', maxsplit=1)[1]
     api = f'https://live.huajiao.com/feed/getFeedInfo?relateid={room_id}'
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     if json_data['errmsg'] or not json_data['data'].get('creatime'):
         print("Failed to retrieve live room data, the Huajiao live room address is not fixed, please manually change "
@@ -2421,7 +2535,7 @@ async def get_huajiao_stream_url(url: str, proxy_addr: OptionalStr = None, cooki
 
             api = f'https://live.huajiao.com/live/substream?{urllib.parse.urlencode(params)}'
             json_str = await async_req(url=api, proxy_addr=proxy_addr, headers=headers)
-            json_data = json.loads(json_str)
+            json_data = fast_json.loads(json_str)
             result |= {
                 'is_live': True,
                 'flv_url': json_data['data']['h264_url'],
@@ -2450,7 +2564,7 @@ async def get_liuxing_stream_url(url: str, proxy_addr: OptionalStr = None, cooki
     }
     api = f'https://wap.7u66.com/api/ui/room/v1.0.0/live.ashx?{urllib.parse.urlencode(params)}'
     json_str = await async_req(url=api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     room_info = json_data['data']['roomInfo']
     anchor_name = room_info['nickname']
     live_status = room_info["live_stat"]
@@ -2476,10 +2590,10 @@ async def get_showroom_stream_data(url: str, proxy_addr: OptionalStr = None, coo
         room_id = url.split('room_id=')[-1]
     else:
         html_str = await async_req(url, proxy_addr=proxy_addr, headers=headers, abroad=True)
-        room_id = re.search('href="/room/profile\\?room_id=(.*?)"', html_str).group(1)
+        room_id = extractors.showroom.room_id.search(html_str).group(1)
     info_api = f'https://www.showroom-live.com/api/live/live_info?room_id={room_id}'
     json_str = await async_req(info_api, proxy_addr=proxy_addr, headers=headers, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data['room_name']
     result = {"anchor_name": anchor_name, "is_live": False}
     live_status = json_data['live_status']
@@ -2488,7 +2602,7 @@ async def get_showroom_stream_data(url: str, proxy_addr: OptionalStr = None, coo
         web_api = f'https://www.showroom-live.com/api/live/streaming_url?room_id={room_id}&abr_available=1'
         json_str = await async_req(web_api, proxy_addr=proxy_addr, headers=headers, abroad=True)
         if json_str:
-            json_data = json.loads(json_str)
+            json_data = fast_json.loads(json_str)
             streaming_url_list = json_data['streaming_url_list']
 
             for i in streaming_url_list:
@@ -2498,8 +2612,7 @@ async def get_showroom_stream_data(url: str, proxy_addr: OptionalStr = None, coo
                     if m3u8_url:
                         m3u8_url_list = await get_play_url_list(m3u8_url, proxy=proxy_addr, header=headers, abroad=True)
                         if m3u8_url_list:
-                            result['play_url_list'] = [f"{m3u8_url.rsplit('/', maxsplit=1)[0]}/{i}" for i in
-                                                       m3u8_url_list]
+                            result['play_url_list'] = m3u8_url_list
                         else:
                             result['play_url_list'] = [m3u8_url]
                         result['play_url_list'] = [i.replace('https://', 'http://') for i in result['play_url_list']]
@@ -2509,6 +2622,12 @@ async def get_showroom_stream_data(url: str, proxy_addr: OptionalStr = None, coo
 
 @trace_error_decorator
 async def get_acfun_sign_params(proxy_addr: OptionalStr = None, cookies: OptionalStr = None) -> tuple:
+    # A visitor login is good for every room, so live rooms share one instead of logging in each
+    return await single_flight.do(flight_key('Acfun', cookies, 'visitor_login'),
+                                  lambda: acfun_visitor_login(proxy_addr, cookies), ttl=ACFUN_VISITOR_TTL)
+
+
+async def acfun_visitor_login(proxy_addr: OptionalStr = None, cookies: OptionalStr = None) -> tuple:
     did = f'web_{utils.generate_random_string(16)}'
     headers = {
         'referer': 'https://live.acfun.cn/',
@@ -2522,7 +2641,7 @@ async def get_acfun_sign_params(proxy_addr: OptionalStr = None, cookies: Optiona
     }
     api = 'https://id.app.acfun.cn/rest/app/visitor/login'
     json_str = await async_req(api, data=data, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     user_id = json_data["userId"]
     visitor_st = json_data["acfun.api.visitor_st"]
     return user_id, did, visitor_st
@@ -2540,7 +2659,7 @@ async def get_acfun_stream_data(url: str, proxy_addr: OptionalStr = None, cookie
     author_id = url.split('?')[0].rsplit('/', maxsplit=1)[1]
     user_info_api = f'https://live.acfun.cn/rest/pc-direct/user/userInfo?userId={author_id}'
     json_str = await async_req(user_info_api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data['profile']['name']
     status = 'liveId' in json_data['profile']
     result = {"anchor_name": anchor_name, "is_live": False}
@@ -2562,10 +2681,10 @@ async def get_acfun_stream_data(url: str, proxy_addr: OptionalStr = None, cookie
         }
         play_api = f'https://api.kuaishouzt.com/rest/zt/live/web/startPlay?{urllib.parse.urlencode(params)}'
         json_str = await async_req(play_api, data=data, proxy_addr=proxy_addr, headers=headers)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
         live_title = json_data['data']['caption']
         videoPlayRes = json_data['data']['videoPlayRes']
-        play_url_list = json.loads(videoPlayRes)['liveAdaptiveManifest'][0]['adaptationSet']['representation']
+        play_url_list = fast_json.loads(videoPlayRes)['liveAdaptiveManifest'][0]['adaptationSet']['representation']
         play_url_list = sorted(play_url_list, key=itemgetter('bitrate'), reverse=True)
         result |= {'play_url_list': play_url_list, 'title': live_title}
     return result
@@ -2589,15 +2708,14 @@ async def get_changliao_stream_url(url: str, proxy_addr: OptionalStr = None, coo
     }
     play_api = f'https://wap.tlclw.com/api/ui/room/v1.0.0/live.ashx?{urllib.parse.urlencode(params)}'
     json_str = await async_req(play_api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data['data']['roomInfo']['nickname']
     live_status = json_data['data']['roomInfo']['live_stat']
 
     async def get_live_domain(page_url):
         html_str = await async_req(page_url, proxy_addr=proxy_addr, headers=headers)
-        config_json_str = re.findall("var config = (.*?)config.webskins",
-                                     html_str, re.DOTALL)[0].rsplit(";", maxsplit=1)[0].strip()
-        config_json_data = json.loads(config_json_str)
+        config_json_str = extractors.changliao.config.findall(html_str)[0].rsplit(";", maxsplit=1)[0].strip()
+        config_json_data = fast_json.loads(config_json_str)
         stream_flv_domain = config_json_data['domainpullstream_flv']
         stream_hls_domain = config_json_data['domainpullstream_hls']
         return stream_flv_domain, stream_hls_domain
@@ -2633,7 +2751,7 @@ async def get_yingke_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
 
     api = f'https://webapi.busi.inke.cn/web/live_share_pc?{urllib.parse.urlencode(params)}'
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data['data']['media_info']['nick']
     live_status = json_data['data']['status']
 
@@ -2663,16 +2781,15 @@ async def get_yinbo_stream_url(url: str, proxy_addr: OptionalStr = None, cookies
     }
     play_api = f'https://wap.ybw1666.com/api/ui/room/v1.0.0/live.ashx?{urllib.parse.urlencode(params)}'
     json_str = await async_req(play_api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     room_data = json_data['data']['roomInfo']
     anchor_name = room_data['nickname']
     live_status = room_data['live_stat']
 
     async def get_live_domain(page_url):
         html_str = await async_req(page_url, proxy_addr=proxy_addr, headers=headers)
-        config_json_str = re.findall("var config = (.*?)config.webskins",
-                                     html_str, re.DOTALL)[0].rsplit(";", maxsplit=1)[0].strip()
-        config_json_data = json.loads(config_json_str)
+        config_json_str = extractors.yinbo.config.findall(html_str)[0].rsplit(";", maxsplit=1)[0].strip()
+        config_json_data = fast_json.loads(config_json_str)
         stream_flv_domain = config_json_data['domainpullstream_flv']
         stream_hls_domain = config_json_data['domainpullstream_hls']
         return stream_flv_domain, stream_hls_domain
@@ -2700,15 +2817,15 @@ async def get_zhihu_stream_url(url: str, proxy_addr: OptionalStr = None, cookies
         user_id = url.split('people/')[1]
         api = f'https://api.zhihu.com/people/{user_id}/profile?profile_new_version='
         json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
         live_page_url = json_data['drama']['living_theater']['theater_url']
     else:
         live_page_url = url
 
     web_id = live_page_url.split('?')[0].rsplit('/', maxsplit=1)[-1]
     html_str = await async_req(live_page_url, proxy_addr=proxy_addr, headers=headers)
-    json_str2 = re.findall('<script id="js-initialData" type="text/json">(.*?)</script>', html_str)[0]
-    json_data2 = json.loads(json_str2)
+    json_str2 = extractors.zhihu.initial_data.findall(html_str)[0]
+    json_data2 = fast_json.loads(json_str2)
     live_data = json_data2['initialState']['theater']['theaters'][web_id]
     anchor_name = live_data['actor']['name']
     live_status = live_data['drama']['status']
@@ -2741,7 +2858,7 @@ async def get_chzzk_stream_data(url: str, proxy_addr: OptionalStr = None, cookie
     room_id = url.split('?')[0].rsplit('/', maxsplit=1)[-1]
     play_api = f'https://api.chzzk.naver.com/service/v3/channels/{room_id}/live-detail'
     json_str = await async_req(play_api, proxy_addr=proxy_addr, headers=headers, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     live_data = json_data.get('content')
     if not live_data:
         return {"anchor_name": "", "is_live": False}
@@ -2750,11 +2867,9 @@ async def get_chzzk_stream_data(url: str, proxy_addr: OptionalStr = None, cookie
 
     result = {"anchor_name": anchor_name, "is_live": False}
     if live_status == 'OPEN':
-        play_data = json.loads(live_data['livePlaybackJson'])
+        play_data = fast_json.loads(live_data['livePlaybackJson'])
         m3u8_url = play_data['media'][0]['path']
         m3u8_url_list = await get_play_url_list(m3u8_url, proxy=proxy_addr, header=headers, abroad=True)
-        prefix = m3u8_url.split('?')[0].rsplit('/', maxsplit=1)[0]
-        m3u8_url_list = [prefix + '/' + i for i in m3u8_url_list]
         result |= {"is_live": True, "m3u8_url": m3u8_url, "play_url_list": m3u8_url_list}
     return result
 
@@ -2781,8 +2896,7 @@ async def get_haixiu_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
         "c": "10138100100000",
         "_st1": int(time.time() * 1000)
     }
-    ajax_data = execjs.compile(open(f'{JS_SCRIPT_PATH}/haixiu.js').read()).call('sign', params,
-                                                                                f'{JS_SCRIPT_PATH}/crypto-js.min.js')
+    ajax_data = await node_pool.acall('haixiu.js', 'sign', params, f'{JS_SCRIPT_PATH}/crypto-js.min.js')
 
     params["accessToken"] = urllib.parse.unquote(urllib.parse.unquote(access_token))
     params['_ajaxData1'] = ajax_data
@@ -2796,7 +2910,7 @@ async def get_haixiu_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
         api = f'https://service.lehaitv.com/v2/room/{room_id}/media/advanceInfoRoom?{urllib.parse.urlencode(params)}'
 
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     stream_data = json_data['data']
     anchor_name = stream_data['nickname']
@@ -2823,7 +2937,7 @@ async def get_vvxqiu_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
     room_id = get_params(url, "roomId")
     api_1 = f'https://h5p.vvxqiu.com/activity-center/fanclub/activity/captain/banner?roomId={room_id}&product=vvstar'
     json_str = await async_req(api_1, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data['data']['anchorName']
     if not anchor_name:
         params = {
@@ -2837,7 +2951,7 @@ async def get_vvxqiu_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
             f'https://h5p.vvxqiu.com/activity-center/halloween2023/banner?{urllib.parse.urlencode(params)}',
             proxy_addr=proxy_addr, headers=headers
         )
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
         anchor_name = json_data['data']['memberVO']['memberName']
 
     result = {"anchor_name": anchor_name, "is_live": False}
@@ -2862,7 +2976,7 @@ async def get_17live_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
     room_id = url.split('?')[0].rsplit('/', maxsplit=1)[-1]
     api_1 = f'https://wap-api.17app.co/api/v1/user/room/{room_id}'
     json_str = await async_req(api_1, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     anchor_name = json_data["displayName"]
     result = {"anchor_name": anchor_name, "is_live": False}
     json_data = {
@@ -2870,7 +2984,7 @@ async def get_17live_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
     }
     api_1 = f'https://wap-api.17app.co/api/v1/lives/{room_id}/viewers/alive'
     json_str = await async_req(api_1, json_data=json_data, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     live_status = json_data.get("status")
     if live_status and live_status == 2:
         flv_url = json_data['pullURLsInfo']['rtmpURLs'][0]['urlHighQuality']
@@ -2892,7 +3006,7 @@ async def get_langlive_stream_url(url: str, proxy_addr: OptionalStr = None, cook
     room_id = url.split('?')[0].rsplit('/', maxsplit=1)[-1]
     api_1 = f'https://api.lang.live/langweb/v1/room/liveinfo?room_id={room_id}'
     json_str = await async_req(api_1, proxy_addr=proxy_addr, headers=headers, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     live_info = json_data['data']['live_info']
     anchor_name = live_info['nickname']
     live_status = live_info['live_status']
@@ -2929,7 +3043,7 @@ async def get_pplive_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
     else:
         api = 'https://api.pp.weimipopo.com/live/preview'
     json_str = await async_req(api, json_data=json_data, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     live_info = json_data['data']
     anchor_name = live_info['name']
     live_status = live_info['living']
@@ -2953,7 +3067,7 @@ async def get_6room_stream_url(url: str, proxy_addr: OptionalStr = None, cookies
 
     room_id = url.split('?')[0].rsplit('/', maxsplit=1)[1]
     html_str = await async_req(f'https://v.6.cn/{room_id}', proxy_addr=proxy_addr, headers=headers)
-    room_id = re.search('rid: \'(.*?)\',\n\\s+roomid', html_str).group(1)
+    room_id = extractors.sixroom.room_id.search(html_str).group(1)
     data = {
         'av': '3.1',
         'encpass': '',
@@ -2965,7 +3079,7 @@ async def get_6room_stream_url(url: str, proxy_addr: OptionalStr = None, cookies
     }
     api = 'https://v.6.cn/coop/mobile/index.php?padapi=coop-mobile-inroom.php'
     json_str = await async_req(api, data=data, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     flv_title = json_data['content']['liveinfo']['flvtitle']
     anchor_name = json_data['content']['roominfo']['alias']
     result = {"anchor_name": anchor_name, "is_live": False}
@@ -3005,20 +3119,20 @@ async def get_shopee_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
     if uid:
         json_str = await async_req(f'{api_host}/api/v1/shop_page/live/ongoing?uid={uid}',
                            proxy_addr=proxy_addr, headers=headers, abroad=True)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
         if json_data['data']['ongoing_live']:
             session_id = json_data['data']['ongoing_live']['session_id']
             is_living = True
         else:
             json_str = await async_req(f'{api_host}/api/v1/shop_page/live/replay_list?offset=0&limit=1&uid={uid}',
                                proxy_addr=proxy_addr, headers=headers, abroad=True)
-            json_data = json.loads(json_str)
+            json_data = fast_json.loads(json_str)
             if json_data['data']['replay']:
                 result['anchor_name'] = json_data['data']['replay'][0]['nick_name']
                 return result
 
     json_str = await async_req(f'{api_host}/api/v1/session/{session_id}', proxy_addr=proxy_addr, headers=headers, abroad=True)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     if not json_data.get('data'):
         print("Fetch shopee live data failed, please update the address of the live broadcast room and try again.")
         return result
@@ -3048,7 +3162,10 @@ async def get_youtube_stream_url(url: str, proxy_addr: OptionalStr = None, cooki
     else:
         headers['Cookie'] = socs_cookie
 
-    html_str = await async_req(url, proxy_addr=proxy_addr, headers=headers, abroad=True)
+    # Everything below is read from the API key in ytcfg and the inline player response
+    html_str = await async_req_until(
+        url, until=[extractors.youtube.api_key, extractors.youtube.player_response],
+        proxy_addr=proxy_addr, headers=headers)
     if not html_str:
         return {"anchor_name": "", "is_live": False}
 
@@ -3072,19 +3189,19 @@ async def get_youtube_stream_url(url: str, proxy_addr: OptionalStr = None, cooki
 
     # Attempt to use Android API (innertube) for better stability (mimic yt-dlp)
     try:
-        api_key_match = re.search(r'"INNERTUBE_API_KEY":"([^"]+)"', html_str)
+        api_key_match = extractors.youtube.api_key.search(html_str)
         
         # Try finding videoId
         video_id = None
-        video_id_match = re.search(r'"videoId":"([^"]+)"', html_str)
+        video_id_match = extractors.youtube.video_id.search(html_str)
         if video_id_match:
             video_id = video_id_match.group(1)
         else:
             # Try parsing initial response for videoId if regex fails
-            match_init = re.search(r'var ytInitialPlayerResponse = (.*?);var', html_str)
+            match_init = extractors.youtube.player_response_short.search(html_str)
             if match_init:
                 try:
-                    jd = json.loads(match_init.group(1))
+                    jd = fast_json.loads(match_init.group(1))
                     video_id = jd.get('videoDetails', {}).get('videoId')
                 except Exception:
                     pass
@@ -3118,7 +3235,7 @@ async def get_youtube_stream_url(url: str, proxy_addr: OptionalStr = None, cooki
             
             api_resp = await async_req(android_url, proxy_addr=proxy_addr, headers=android_headers, json_data=android_payload, abroad=True)
             if api_resp and isinstance(api_resp, str) and api_resp.startswith('{'):
-                api_json = json.loads(api_resp)
+                api_json = fast_json.loads(api_resp)
                 # Check if we got valid streaming data
                 if 'streamingData' in api_json:
                     return await process_youtube_data(api_json)
@@ -3127,13 +3244,13 @@ async def get_youtube_stream_url(url: str, proxy_addr: OptionalStr = None, cooki
         pass
 
     # Fallback to Web scraping (original logic)
-    match = re.search(r'var ytInitialPlayerResponse = (.*?);var meta = document\.createElement', html_str)
+    match = extractors.youtube.player_response.search(html_str)
     if not match:
-        match = re.search(r'var ytInitialPlayerResponse = (.*?);var', html_str)
+        match = extractors.youtube.player_response_short.search(html_str)
     
     if match:
         json_str = match.group(1)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
     else:
         json_data = {}
 
@@ -3157,7 +3274,7 @@ async def get_taobao_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
     live_id = get_params(url, 'id')
     if not live_id:
         html_str = await async_req(url, proxy_addr=proxy_addr, headers=headers)
-        redirect_url = re.findall("var url = '(.*?)';", html_str)[0]
+        redirect_url = extractors.taobao.redirect.findall(html_str)[0]
         live_id = get_params(redirect_url, 'id')
 
     params = {
@@ -3181,7 +3298,7 @@ async def get_taobao_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
         _m_h5_tk = re.findall('_m_h5_tk=(.*?);', headers['Cookie'])[0]
         t13 = int(time.time() * 1000)
         pre_sign_str = f'{_m_h5_tk.split("_")[0]}&{t13}&{app_key}&' + params['data']
-        sign = execjs.compile(open(f'{JS_SCRIPT_PATH}/taobao-sign.js').read()).call('sign', pre_sign_str)
+        sign = await node_pool.acall('taobao-sign.js', 'sign', pre_sign_str)
         params |= {'sign': sign, 't': t13}
         api = f'https://h5api.m.taobao.com/h5/mtop.mediaplatform.live.livedetail/4.0/?{urllib.parse.urlencode(params)}'
         jsonp_str, new_cookie = await async_req(url=api, proxy_addr=proxy_addr, headers=headers, timeout=20,
@@ -3248,7 +3365,7 @@ async def get_jd_stream_url(url: str, proxy_addr: OptionalStr = None, cookies: O
         }
         info_api = 'https://api.m.jd.com/talent_head_findTalentMsg'
         json_str = await async_req(info_api, data=data, proxy_addr=proxy_addr, headers=headers)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
         anchor_name = json_data['result']['talentName']
         result['anchor_name'] = anchor_name
         if 'livingRoomJump' not in json_data['result']:
@@ -3263,7 +3380,7 @@ async def get_jd_stream_url(url: str, proxy_addr: OptionalStr = None, cookies: O
     api = f'https://api.m.jd.com/client.action?{urllib.parse.urlencode(params)}'
     # backup_api: https://api.m.jd.com/api
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     live_status = json_data['data']['status']
     if live_status == 1:
         if author_id:
@@ -3275,7 +3392,7 @@ async def get_jd_stream_url(url: str, proxy_addr: OptionalStr = None, cookies: O
             }
             json_str2 = await async_req('https://api.m.jd.com/jdTalentContentList', data=data,
                                 proxy_addr=proxy_addr, headers=headers)
-            json_data2 = json.loads(json_str2)
+            json_data2 = fast_json.loads(json_str2)
             result['title'] = json_data2['result']['content'][0]['title']
 
         flv_url = json_data['data']['videoUrl']
@@ -3297,11 +3414,11 @@ async def get_faceit_stream_data(url: str, proxy_addr: OptionalStr = None, cooki
     nickname = re.findall('/players/(.*?)/stream', url)[0]
     api = f'https://www.faceit.com/api/users/v1/nicknames/{nickname}'
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     user_id = json_data['payload']['id']
     api2 = f'https://www.faceit.com/api/stream/v1/streamings?userId={user_id}'
     json_str2 = await async_req(api2, proxy_addr=proxy_addr, headers=headers)
-    json_data2 = json.loads(json_str2)
+    json_data2 = fast_json.loads(json_str2)
     platform_info = json_data2['payload'][0]
     anchor_name = platform_info.get('userNickname')
     anchor_id = platform_info.get('platformId')
@@ -3332,7 +3449,7 @@ async def get_migu_stream_url(url: str, proxy_addr: OptionalStr = None, cookies:
     web_id = url.split('?')[0].rsplit('/')[-1]
     api = f'https://vms-sc.miguvideo.com/vms-match/v6/staticcache/basic/basic-data/{web_id}/miguvideo'
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     anchor_name = json_data['body']['title']
     live_title = json_data['body'].get('title') + '-' + json_data['body'].get('detailPageTitle', '')
@@ -3355,7 +3472,7 @@ async def get_migu_stream_url(url: str, proxy_addr: OptionalStr = None, cookies:
 
     api = f'https://webapi.miguvideo.com/gateway/playurl/v3/play/playurl?{urllib.parse.urlencode(params)}'
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
     live_status = json_data['body']['content']['currentLive']
     if live_status != '1':
         return result
@@ -3363,19 +3480,7 @@ async def get_migu_stream_url(url: str, proxy_addr: OptionalStr = None, cookies:
         result['title'] = live_title
         source_url = json_data['body']['urlInfo']['url']
 
-        async def _get_dd_calcu(url):
-            try:
-                result = subprocess.run(
-                    ["node", f"{JS_SCRIPT_PATH}/migu.js", url],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                return result.stdout.strip()
-            except execjs.ProgramError:
-                raise execjs.ProgramError('Failed to execute JS code. Please check if the Node.js environment')
-
-        ddCalcu = await _get_dd_calcu(source_url)
+        ddCalcu = await node_pool.acall('migu.js', 'getDdCalcu', source_url, timeout=30)
         real_source_url = f'{source_url}&ddCalcu={ddCalcu}&sv=10010'
         if '.m3u8' in real_source_url:
             m3u8_url = await async_req(
@@ -3403,7 +3508,7 @@ async def get_lianjie_stream_url(url: str, proxy_addr: OptionalStr = None, cooki
     room_id = url.split('?')[0].rsplit('lailianjie.com/', maxsplit=1)[-1]
     play_api = f'https://api.lailianjie.com/ApiServices/service/live/getRoomInfo?&_$t=&_sign=&roomNumber={room_id}'
     json_str = await async_req(play_api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     room_data = json_data['data']
     anchor_name = room_data['nickname']
@@ -3469,7 +3574,7 @@ async def get_laixiu_stream_url(url: str, proxy_addr: OptionalStr = None, cookie
     room_id = match.group(1) if match else ''
     play_api = f'https://api.imkktv.com/liveroom/getShareLiveVideo?roomId={room_id}'
     json_str = await async_req(play_api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     room_data = json_data['data']
     anchor_name = room_data['nickname']
@@ -3497,7 +3602,7 @@ async def get_picarto_stream_url(url: str, proxy_addr: OptionalStr = None, cooki
     api = f'https://ptvintern.picarto.tv/api/channel/detail/{anchor_id}'
 
     json_str = await async_req(api, proxy_addr=proxy_addr, headers=headers)
-    json_data = json.loads(json_str)
+    json_data = fast_json.loads(json_str)
 
     anchor_name = json_data['channel']['name']
     live_status = json_data['channel']['online']
@@ -3536,7 +3641,7 @@ async def get_instagram_stream_data(url: str, proxy_addr: OptionalStr = None, co
         # 1. Get User ID
         search_api = f"https://www.instagram.com/web/search/topsearch/?context=blended&query={username}"
         json_str = await async_req(search_api, proxy_addr=proxy_addr, headers=headers)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
 
         user_id = None
         for user in json_data.get("users", []):
@@ -3550,7 +3655,7 @@ async def get_instagram_stream_data(url: str, proxy_addr: OptionalStr = None, co
         # 2. Check Live Status (App API)
         info_api = f"https://i.instagram.com/api/v1/users/{user_id}/info/"
         json_str = await async_req(info_api, proxy_addr=proxy_addr, headers=headers)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
 
         user_info = json_data.get("user", {})
         broadcast = user_info.get("broadcast")
@@ -3564,7 +3669,7 @@ async def get_instagram_stream_data(url: str, proxy_addr: OptionalStr = None, co
         # 3. Get Stream URL (App API)
         live_api = f"https://i.instagram.com/api/v1/live/{broadcast_id}/info/"
         json_str = await async_req(live_api, proxy_addr=proxy_addr, headers=headers)
-        json_data = json.loads(json_str)
+        json_data = fast_json.loads(json_str)
 
         dash_url = json_data.get("dash_playback_url")
         rtmp_url = json_data.get("rtmp_playback_url")
@@ -3658,10 +3763,15 @@ async def get_weverse_stream_data(url: str, proxy_addr: OptionalStr = None, cook
             resp_str = await do_request(full_url, req_headers)
 
             try:
-                data = json.loads(resp_str)
+                data = fast_json.loads(resp_str)
                 if data.get("errorCode") in ["wam_401", "common_401", "common_403"] or data.get("status") in [401, 403]:
                     if refresh_token and attempt == 0:
-                        new_a, new_r = refresh_weverse_token(refresh_token)
+                        # Keyed by the refresh token being spent: rooms racing to refresh it share one
+                        # refresh, and a room that still holds it afterwards gets the new pair
+                        new_a, new_r = await single_flight.do(
+                            flight_key('Weverse', refresh_token, 'token_refresh'),
+                            lambda: io_pool.run(refresh_weverse_token, refresh_token),
+                            ttl=lambda tokens: WEVERSE_REFRESH_TTL if tokens[0] else 0)
                         if new_a:
                             current_token = new_a
                             refresh_token = new_r
@@ -3672,17 +3782,25 @@ async def get_weverse_stream_data(url: str, proxy_addr: OptionalStr = None, cook
                 return None
         return None
 
-    comm_data = await call_weverse_api("/community/v1.0/communityIdUrlPathByUrlPathArtistCode", {"keyword": channel_name})
-    if not comm_data or "communityId" not in comm_data:
-        return {"anchor_name": channel_name, "is_live": False, "new_tokens": new_tokens}
-
-    community_id = str(comm_data["communityId"])
+    async def resolve_community() -> dict:
+        comm_data = await call_weverse_api("/community/v1.0/communityIdUrlPathByUrlPathArtistCode",
+                                           {"keyword": channel_name})
+        if not comm_data or "communityId" not in comm_data:
+            raise RuntimeError(f"Weverse community not found: {channel_name}")
+        return {"community_id": str(comm_data["communityId"])}
+
+    async def get_live_tab(ids: dict) -> dict:
+        data = await call_weverse_api(f"/post/v1.0/community-{ids['community_id']}/liveTab", {
+            "debugMessage": "true",
+            "fields": "onAirLivePosts.fieldSet(postsV1).limit(10),reservedLivePosts.fieldSet(postsV1).limit(10)"
+        })
+        if not data or data.get("errorCode"):
+            raise RuntimeError(f"Weverse live tab unavailable: {data and data.get('errorCode')}")
+        return data
 
-    live_tab_data = await call_weverse_api(f"/post/v1.0/community-{community_id}/liveTab", {
-        "debugMessage": "true",
-        "fields": "onAirLivePosts.fieldSet(postsV1).limit(10),reservedLivePosts.fieldSet(postsV1).limit(10)"
-    })
-    if not live_tab_data:
+    try:
+        live_tab_data = await canonical_cache.use('weverse', channel_name, resolve_community, get_live_tab)
+    except RuntimeError:
         return {"anchor_name": channel_name, "is_live": False, "new_tokens": new_tokens}
 
     video_id = None
@@ -3707,7 +3825,7 @@ async def get_weverse_stream_data(url: str, proxy_addr: OptionalStr = None, cook
     })
 
     if play_info and "lipPlayback" in play_info:
-        playback = json.loads(play_info["lipPlayback"])
+        playback = fast_json.loads(play_info["lipPlayback"])
         m3u8_url = None
         for media in playback.get("media", []):
             if media.get("protocol") == "HLS":
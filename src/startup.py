@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+
+
+# Self time of every module imported while installed, grouped by top-level package (modules of this
+# project are kept apart), so the report shows what an import actually costs rather than
+# everything it pulled in. Works by wrapping __import__, which is enough for import statements.
+class ImportTimer:
+    def __init__(self):
+        self.times: dict[str, float] = {}
+        self.stack: list[float] = []
+        self.original = None
+
+    def install(self) -> None:
+        if self.original is None:
+            self.original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self.original is not None and builtins.__import__ == self._import:
+            builtins.__import__ = self.original
+        self.original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self.original or builtins.__import__
+        try:
+            fullname = importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__')) \
+                if level else name
+        except (ImportError, ValueError):
+            fullname = name
+        if fullname in sys.modules or threading.current_thread() is not threading.main_thread():
+            return original(name, globals, locals, fromlist, level)
+        self.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - start
+            children = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += total
+            parts = fullname.split('.')
+            key = '.'.join(parts[:2]) if parts[0] in ('src', 'msg_push', 'ffmpeg_install', 'i18n') else parts[0]
+            self.times[key] = self.times.get(key, 0.0) + total - children
+
+    def top(self, count: int = 12) -> list[tuple[str, float]]:
+        return sorted(self.times.items(), key=lambda i: -i[1])[:count]
+
+
+# Wall time of each startup phase, from the first import of this package to the first room probe
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases: list[tuple[str, float]] = []
+        self.imports = ImportTimer()
+        self.lock = threading.Lock()
+        self.finished = False
+
+    def mark(self, phase: str) -> None:
+        with self.lock:
+            now = time.perf_counter()
+            self.phases.append((phase, now - self.last))
+            self.last = now
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def finish(self, phase: str) -> bool:
+        # Marks the last phase once; returns False to every later caller
+        with self.lock:
+            if self.finished:
+                return False
+            self.finished = True
+        self.mark(phase)
+        self.imports.uninstall()
+        return True
+
+    def format(self) -> str:
+        lines = [f"启动耗时 {self.last - self.started:.2f}s"]
+        lines += [f"  {name:<20} {duration * 1000:8.0f}ms" for name, duration in self.phases]
+        lines.append("导入耗时(不含子模块)")
+        lines += [f"  {name:<20} {duration * 1000:8.0f}ms" for name, duration in self.imports.top()]
+        return '\n'.join(lines)
+
+
+startup_timer = StartupTimer()
+startup_timer.imports.install()
@@ -10,13 +10,13 @@ Function: Get live stream data.
 """
 import base64
 import hashlib
-import json
 import time
 import random
 import re
 from operator import itemgetter
 import urllib.parse
 import urllib.request
+from . import fast_json
 from .utils import trace_error_decorator
 from .spider import (
     get_douyu_stream_data, get_bilibili_stream_data
@@ -88,7 +88,7 @@ async def get_tiktok_stream_url(json_data: dict, video_quality: str, proxy_addr:
         for key in stream:
             url_info = stream[key]['main']
             sdk_params = url_info['sdk_params']
-            sdk_params = json.loads(sdk_params)
+            sdk_params = fast_json.loads(sdk_params)
             vbitrate = int(sdk_params['vbitrate'])
             v_codec = sdk_params.get('VCodec', '')
 
@@ -120,7 +120,7 @@ async def get_tiktok_stream_url(json_data: dict, video_quality: str, proxy_addr:
 
     if status == 2:
         stream_data = live_room['liveRoom']['streamData']['pull_data']['stream_data']
-        stream_data = json.loads(stream_data).get('data', {})
+        stream_data = fast_json.loads(stream_data).get('data', {})
         flv_url_list = get_video_quality_url(stream_data, 'flv')
         m3u8_url_list = get_video_quality_url(stream_data, 'hls')
 
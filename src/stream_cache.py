@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import re
+import threading
+import time
+import urllib.parse
+from typing import Any
+
+# Query parameters that CDNs use for the expiry time of a signed URL, and whether they are hex
+EXPIRY_PARAMS = {
+    'expire': False,
+    'expires': False,
+    'x-expires': False,
+    'deadline': False,
+    'exp': False,
+    'e': False,
+    'wstime': True,
+    'txtime': True,
+}
+URL_KEYS = ('record_url', 'flv_url', 'm3u8_url')
+MAX_QUICK_RECONNECTS = 3
+
+
+def parse_timestamp(value: str, hex_value: bool = False, now: float | None = None) -> float | None:
+    now = now or time.time()
+    try:
+        ts = int(value, 16) if hex_value else int(value)
+    except (TypeError, ValueError):
+        return None
+    if ts > 10 ** 12:
+        ts /= 1000
+    # Anything outside this range is a duration or a counter, not an expiry time
+    if now - 86400 < ts < now + 7 * 86400:
+        return float(ts)
+    return None
+
+
+def url_expiry(url: str, now: float | None = None) -> float | None:
+    parsed = urllib.parse.urlsplit(url)
+    expiries = []
+    for key, value in urllib.parse.parse_qsl(parsed.query):
+        key = key.lower()
+        if key in EXPIRY_PARAMS:
+            expiries.append(parse_timestamp(value, EXPIRY_PARAMS[key], now))
+        elif key == 'hdnts':
+            match = re.search(r'exp=(\d+)', value)
+            expiries.append(parse_timestamp(match.group(1), now=now) if match else None)
+        elif key == 'auth_key':
+            expiries.append(parse_timestamp(value.split('-', maxsplit=1)[0], now=now))
+    match = re.search(r'/expire/(\d+)/', parsed.path)
+    if match:
+        expiries.append(parse_timestamp(match.group(1), now=now))
+    expiries = [i for i in expiries if i]
+    return min(expiries) if expiries else None
+
+
+# Resolved live stream info per (room, quality). Entries live until the earliest expiry of their
+# signed URLs (or default_ttl when the URLs carry none) and are only handed out when a recording
+# dropped unexpectedly, so that reconnecting skips the page fetch and signing round trip.
+class StreamCache:
+    def __init__(self, default_ttl: float = 60.0, max_ttl: float = 600.0, margin: float = 10.0):
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.margin = margin
+        self.lock = threading.Lock()
+        self.entries: dict[tuple[str, str], tuple[float, Any]] = {}
+        self.reconnect: set[str] = set()
+        self.quick_reconnects: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def configure(self, default_ttl: float) -> None:
+        self.default_ttl = default_ttl
+
+    def ttl_for(self, port_info: dict, now: float | None = None) -> float:
+        now = now or time.time()
+        expiries = [url_expiry(port_info[key], now) for key in URL_KEYS if isinstance(port_info.get(key), str)]
+        expiries = [i for i in expiries if i]
+        if not expiries:
+            return self.default_ttl
+        return min(min(expiries) - now - self.margin, self.max_ttl)
+
+    def put(self, room: str, quality: str, port_info: dict, value: Any) -> None:
+        if self.default_ttl <= 0:
+            return
+        now = time.time()
+        ttl = self.ttl_for(port_info, now)
+        if ttl <= 0:
+            return
+        with self.lock:
+            self.entries[(room, quality)] = (now + ttl, value)
+
+    def get(self, room: str, quality: str) -> Any:
+        with self.lock:
+            entry = self.entries.get((room, quality))
+            if entry and entry[0] > time.time():
+                return entry[1]
+            self.entries.pop((room, quality), None)
+        return None
+
+    def invalidate(self, room: str) -> None:
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == room]:
+                del self.entries[key]
+            self.reconnect.discard(room)
+            self.quick_reconnects.pop(room, None)
+            self.invalidations += 1
+
+    def request_reconnect(self, room: str, duration: float) -> bool:
+        # A stream that keeps failing within seconds gets a fresh resolution instead of a tight loop
+        with self.lock:
+            quick = self.quick_reconnects.get(room, 0) + 1 if duration < 10 else 0
+            self.quick_reconnects[room] = quick
+            if quick <= MAX_QUICK_RECONNECTS:
+                self.reconnect.add(room)
+                return True
+        self.invalidate(room)
+        return False
+
+    def wants_reconnect(self, room: str) -> bool:
+        return room in self.reconnect
+
+    def take_reconnect(self, room: str, quality: str) -> Any:
+        with self.lock:
+            if room not in self.reconnect:
+                return None
+            self.reconnect.discard(room)
+        value = self.get(room, quality)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
@@ -7,13 +7,14 @@ import string
 from pathlib import Path
 import functools
 import hashlib
+import inspect
 import re
 import traceback
 from typing import Any
 from urllib.parse import parse_qs, urlparse
 from collections import OrderedDict
-import execjs
 from .logger import logger
+from .node_pool import JSError
 import configparser
 import threading
 
@@ -39,11 +40,24 @@ class Color:
 
 
 def trace_error_decorator(func: callable) -> callable:
+    if inspect.iscoroutinefunction(func):
+        # Spider coroutines have always let their errors reach the probe loop, which records them against
+        # the platform; a Node.js failure is only explained here before it goes on
+        @functools.wraps(func)
+        async def async_wrapper(*args: list, **kwargs: dict) -> Any:
+            try:
+                return await func(*args, **kwargs)
+            except JSError:
+                logger.warning('Failed to execute JS code. Please check if the Node.js environment')
+                raise
+
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args: list, **kwargs: dict) -> Any:
         try:
             return func(*args, **kwargs)
-        except execjs.ProgramError:
+        except JSError:
             logger.warning('Failed to execute JS code. Please check if the Node.js environment')
         except Exception as e:
             error_line = traceback.extract_tb(e.__traceback__)[-1].lineno
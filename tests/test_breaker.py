@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import time
+import pytest
+from src import breaker as breaker_module
+from src.breaker import CircuitBreaker, BreakerRegistry, CLOSED, OPEN, HALF_OPEN
+from src.http_clients import async_http
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module.time, 'monotonic', clock)
+    return clock
+
+
+def tripped(clock: Clock, **kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker('host', threshold=2, reset_timeout=60.0, **kwargs)
+    breaker.record_failure('timeout')
+    breaker.record_failure('timeout')
+    return breaker
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('host', threshold=3)
+    breaker.record_failure('timeout')
+    breaker.record_success()
+    breaker.record_failure('timeout')
+    breaker.record_failure('timeout')
+    assert breaker.state == CLOSED
+    breaker.record_failure('timeout')
+    assert breaker.state == OPEN
+    assert not breaker.allow('room')
+    assert breaker.retry_after() == pytest.approx(60.0)
+
+
+def test_lets_a_single_canary_through_after_the_timeout(clock):
+    breaker = tripped(clock)
+    clock.now += 59
+    assert not breaker.allow('a')
+    clock.now += 1
+    assert breaker.allow('b')
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow('c')
+    assert not breaker.allow('d')
+
+
+def test_canary_success_closes_and_releases_blocked_callers(clock):
+    breaker = tripped(clock)
+    breaker.allow('a')
+    clock.now += 60
+    breaker.allow('canary')
+    breaker.allow('b')
+    assert breaker.record_success() == {'a', 'b'}
+    assert breaker.state == CLOSED
+    assert breaker.allow('c')
+
+
+def test_canary_failure_reopens_with_twice_the_timeout(clock):
+    breaker = tripped(clock, max_timeout=150.0)
+    clock.now += 60
+    breaker.allow()
+    breaker.record_failure('timeout')
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == pytest.approx(120.0)
+    clock.now += 120
+    breaker.allow()
+    breaker.record_failure('timeout')
+    assert breaker.retry_after() == pytest.approx(150.0)
+
+
+def test_a_silent_canary_is_replaced_after_canary_timeout(clock):
+    breaker = tripped(clock, canary_timeout=120.0)
+    clock.now += 60
+    assert breaker.allow()
+    clock.now += 119
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_released_canary_slot_goes_to_the_next_caller(clock):
+    breaker = tripped(clock)
+    clock.now += 60
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_release_does_nothing_while_closed_or_open(clock):
+    breaker = CircuitBreaker('host', threshold=1)
+    breaker.release()
+    assert breaker.state == CLOSED
+    breaker.record_failure('timeout')
+    breaker.release()
+    assert not breaker.allow()
+
+
+def test_non_endpoint_errors_release_the_canary(clock):
+    breaker = tripped(clock)
+    clock.now += 60
+    assert breaker.allow()
+    async_http.record_outcome(breaker, time.monotonic(), 'GET host', error=ValueError('bad json'))
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    async_http.record_outcome(breaker, time.monotonic(), 'GET host', status=200)
+    assert breaker.state == CLOSED
+
+
+def test_disabled_breaker_always_allows(clock):
+    breaker = CircuitBreaker('host', threshold=0)
+    for _ in range(10):
+        breaker.record_failure('timeout')
+    assert breaker.allow()
+
+
+def test_registry_applies_new_settings_to_existing_breakers():
+    registry = BreakerRegistry(threshold=5)
+    breaker = registry.get('host')
+    assert registry.get('host') is breaker
+    registry.configure(2, 30.0)
+    assert (breaker.threshold, breaker.reset_timeout) == (2, 30.0)
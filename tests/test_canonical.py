@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import pytest
+from src.canonical import CanonicalCache
+from src.persist import persister
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(persister, 'read_only', True)
+    return CanonicalCache(str(tmp_path / 'canonical_cache.json'))
+
+
+class Resolver:
+    def __init__(self, *values: dict):
+        self.values = list(values)
+        self.calls = 0
+
+    async def __call__(self) -> dict:
+        self.calls += 1
+        return self.values[min(self.calls, len(self.values)) - 1]
+
+
+def consumer(works_with: dict, log: list):
+    async def consume(value: dict):
+        log.append(value)
+        if value != works_with:
+            raise RuntimeError('room not found')
+        return 'live'
+    return consume
+
+
+def test_resolves_once_then_serves_the_cached_value(cache):
+    resolver = Resolver({"room_id": "1"})
+    log = []
+    for _ in range(3):
+        assert asyncio.run(cache.use('douyin', 'https://v.douyin.com/a/', resolver,
+                                     consumer({"room_id": "1"}, log))) == 'live'
+    assert resolver.calls == 1
+    assert (cache.hits, cache.misses, cache.revalidations) == (2, 1, 0)
+
+
+def test_a_failing_cached_value_is_resolved_again_and_retried(cache):
+    resolver = Resolver({"room_id": "old"}, {"room_id": "new"})
+    url = 'https://v.douyin.com/b/'
+    asyncio.run(cache.resolve('douyin', url, resolver))
+    log = []
+    assert asyncio.run(cache.use('douyin', url, resolver, consumer({"room_id": "new"}, log))) == 'live'
+    assert log == [{"room_id": "old"}, {"room_id": "new"}]
+    assert cache.get('douyin', url) == {"room_id": "new"}
+    assert cache.revalidations == 1
+
+
+def test_the_error_stands_when_resolving_again_gives_the_same_value(cache):
+    resolver = Resolver({"room_id": "1"})
+    url = 'https://v.douyin.com/c/'
+    asyncio.run(cache.resolve('douyin', url, resolver))
+    log = []
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.use('douyin', url, resolver, consumer({"room_id": "2"}, log)))
+    assert len(log) == 1
+    assert resolver.calls == 2
+
+
+def test_a_fresh_value_is_not_revalidated(cache):
+    resolver = Resolver({"room_id": "1"}, {"room_id": "2"})
+    log = []
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.use('douyin', 'https://v.douyin.com/d/', resolver, consumer({"room_id": "2"}, log)))
+    assert resolver.calls == 1
+    assert cache.revalidations == 0
+
+
+def test_entries_expire_after_max_age(cache):
+    cache.put('xhslink', 'https://xhslink.com/e', {"url": "x"})
+    assert cache.get('xhslink', 'https://xhslink.com/e', max_age=86400) == {"url": "x"}
+    entry = cache.entries[('xhslink', 'https://xhslink.com/e')]
+    entry.resolved_at -= 86401
+    assert cache.get('xhslink', 'https://xhslink.com/e', max_age=86400) is None
+
+
+def test_entries_survive_a_restart(cache):
+    cache.put('weverse', 'artist', {"community_id": "7"})
+    cache.invalidate('weverse', 'missing')
+    cache._save()
+    assert CanonicalCache(cache.path).get('weverse', 'artist') == {"community_id": "7"}
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from urllib.parse import urljoin
+import pytest
+from src import m3u8
+
+BASE = 'https://cdn.example.com/live/room/master.m3u8?token=abc'
+
+
+@pytest.mark.parametrize('uri', [
+    'chunklist_720p.m3u8',
+    'sub/dir/720p.m3u8?x=1',
+    '/other/path/720p.m3u8',
+    '//mirror.example.com/720p.m3u8',
+    '../up/720p.m3u8',
+    './same/720p.m3u8',
+    '?only=query',
+    'https://elsewhere.example.com/a/720p.m3u8?sig=1',
+    'http://plain.example.com/720p.m3u8',
+])
+def test_uri_resolver_agrees_with_urljoin(uri):
+    assert m3u8.uri_resolver(BASE)(uri) == urljoin(BASE, uri)
+
+
+def test_uri_resolver_without_base_keeps_uris():
+    assert m3u8.uri_resolver('')('720p.m3u8') == '720p.m3u8'
+
+
+def test_parse_variants_resolves_and_orders_by_bandwidth():
+    text = (
+        '#EXTM3U\r\n'
+        '#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"\r\n'
+        'low/index.m3u8\r\n'
+        '#EXT-X-STREAM-INF:AVERAGE-BANDWIDTH=100,BANDWIDTH=5000000,RESOLUTION=1920x1080\r\n'
+        'https://other.example.com/high/index.m3u8?sig=1\r\n'
+        '#EXT-X-STREAM-INF:BANDWIDTH=2000000\r\n'
+        '/abs/mid.m3u8\r\n'
+    )
+    variants = m3u8.parse_variants(text, BASE)
+    assert [i.uri for i in variants] == [
+        'https://other.example.com/high/index.m3u8?sig=1',
+        'https://cdn.example.com/abs/mid.m3u8',
+        'https://cdn.example.com/live/room/low/index.m3u8',
+    ]
+    assert [i.bandwidth for i in variants] == [5000000, 2000000, 800000]
+    assert variants[2].attributes['CODECS'] == 'avc1.4d401e,mp4a.40.2'
+    assert variants[0].attributes['RESOLUTION'] == '1920x1080'
+
+
+def test_parse_variants_matches_a_full_parse():
+    text = '#EXTM3U\n' + ''.join(f'#EXT-X-STREAM-INF:BANDWIDTH={i * 1000}\n{i}.m3u8\n' for i in (3, 1, 2))
+    assert m3u8.parse_variants(text, BASE) == m3u8.parse(text, BASE).variants_by_bandwidth()
+
+
+def test_parse_variants_of_a_media_playlist_is_empty():
+    text = '#EXTM3U\n#EXT-X-TARGETDURATION:2\n#EXTINF:2.0,\nseg1.ts\n'
+    assert m3u8.parse_variants(text, BASE) == []
+
+
+def test_segment_uris_are_resolved_against_the_playlist():
+    text = ('#EXTM3U\n#EXT-X-MEDIA-SEQUENCE:10\n#EXT-X-MAP:URI="init.mp4"\n'
+            '#EXTINF:2.0,\nseg10.m4s\n#EXTINF:2.0,\n/root/seg11.m4s\n')
+    playlist = m3u8.parse(text, BASE)
+    assert [(i.sequence, i.uri) for i in playlist.segments] == [
+        (10, 'https://cdn.example.com/live/room/seg10.m4s'),
+        (11, 'https://cdn.example.com/root/seg11.m4s'),
+    ]
+    assert playlist.segments[0].init.uri == 'https://cdn.example.com/live/room/init.mp4'
+    assert m3u8.parse(text, BASE, after_sequence=10).segments[0].sequence == 11
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import pytest
+from src import rate_limit
+from src.rate_limit import Limiter, RateLimiter, TokenBucket, parse_rules
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', clock)
+    return clock
+
+
+def test_bucket_without_rate_never_waits(clock):
+    bucket = TokenBucket(0)
+    assert [bucket.reserve() for _ in range(100)] == [0.0] * 100
+
+
+def test_bucket_allows_a_burst_then_spaces_requests(clock):
+    bucket = TokenBucket(2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_bucket_refills_over_time_up_to_capacity(clock):
+    bucket = TokenBucket(2, capacity=3)
+    for _ in range(3):
+        bucket.reserve()
+    clock.now += 1.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() > 0
+    clock.now += 3600
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() > 0
+
+
+def test_parse_rules():
+    assert parse_rules('抖音:2:0.5, B站直播:4，bad, x:y, :3') == {'抖音': (2, 0.5), 'B站直播': (4, 0.0)}
+    assert parse_rules(None) == {}
+
+
+def test_limiter_caps_concurrency():
+    limiter = Limiter('test', 2)
+    active = 0
+    peak = 0
+
+    async def request():
+        nonlocal active, peak
+        async with limiter.acquire():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+    assert limiter.total == 6
+    assert limiter.in_flight == 0
+
+
+def test_platforms_get_their_own_limiter():
+    limiter = RateLimiter(default_concurrency=3)
+    limiter.configure(3, {'抖音': (1, 2.0)})
+    assert limiter.get('抖音') is limiter.get('抖音')
+    assert (limiter.get('抖音').concurrency, limiter.get('抖音').rate) == (1, 2.0)
+    assert (limiter.get('快手').concurrency, limiter.get('快手').rate) == (3, 0)
+
+
+def test_reconfiguring_replaces_changed_limiters_only():
+    limiter = RateLimiter()
+    limiter.configure(3, {'抖音': (1, 0)})
+    douyin, kuaishou = limiter.get('抖音'), limiter.get('快手')
+    limiter.configure(3, {'抖音': (2, 0)})
+    assert limiter.get('抖音') is not douyin
+    assert limiter.get('快手') is kuaishou
+
+
+def controlled(concurrency: int = 8, **kwargs) -> Limiter:
+    limiter = Limiter('test', concurrency)
+    limiter.controller = rate_limit.AIMDController(limiter, ceiling=concurrency, **kwargs)
+    return limiter
+
+
+def test_congestion_halves_the_limit_once_per_cooldown(clock):
+    limiter = controlled(8, cooldown=5.0)
+    limiter.controller.record(0.1, 'timeout')
+    assert limiter.concurrency == 4
+    limiter.controller.record(0.1, 'HTTP 429')
+    assert limiter.concurrency == 4
+    clock.now += 5.0
+    limiter.controller.record(0.1, 'HTTP 503')
+    assert limiter.concurrency == 2
+    assert limiter.controller.errors == {'timeout': 1, 'risk_control': 1, 'server_error': 1}
+
+
+def test_limit_never_drops_below_the_floor(clock):
+    limiter = controlled(8, floor=2, cooldown=0.0)
+    for _ in range(10):
+        clock.now += 1
+        limiter.controller.record(0.1, 'timeout')
+    assert limiter.concurrency == 2
+
+
+def test_slow_responses_count_as_congestion(clock):
+    limiter = controlled(8, latency_target=2.0)
+    limiter.controller.record(1.0)
+    assert limiter.concurrency == 8
+    limiter.controller.record(2.5)
+    assert limiter.concurrency == 4
+
+
+def test_each_healthy_round_adds_one_up_to_the_ceiling(clock):
+    limiter = controlled(4)
+    limiter.resize(2)
+    limiter.controller.record(0.1)
+    assert limiter.concurrency == 2
+    limiter.controller.record(0.1)
+    assert limiter.concurrency == 3
+    for _ in range(3):
+        limiter.controller.record(0.1)
+    assert limiter.concurrency == 4
+    for _ in range(20):
+        limiter.controller.record(0.1)
+    assert limiter.concurrency == 4
+
+
+def test_errors_that_are_not_congestion_leave_the_limit_alone(clock):
+    limiter = controlled(4)
+    limiter.resize(2)
+    limiter.controller.record(0.1)
+    limiter.controller.record(0.1, ValueError('bad json'))
+    assert limiter.concurrency == 2
+    assert limiter.controller.errors == {'parse': 1}
+
+
+def test_requests_inside_a_limit_report_to_its_controller(clock):
+    limiter = RateLimiter()
+    limiter.configure(4, adaptive=True)
+
+    async def main():
+        async with limiter.limit('抖音'):
+            rate_limit.report_request(0.1, status=429)
+        rate_limit.report_request(0.1, status=429)
+
+    asyncio.run(main())
+    assert limiter.get('抖音').concurrency == 2
+    assert limiter.get('抖音').controller.errors == {'risk_control': 1}
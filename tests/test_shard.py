@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from src.shard import canonical_room_url, shard_for
+
+ROOMS = [f'https://live.douyin.com/{i}' for i in range(2000)]
+
+
+def owners(members: list[int]) -> dict[str, int]:
+    return {url: shard_for(url, members) for url in ROOMS}
+
+
+def test_no_members():
+    assert shard_for(ROOMS[0], []) is None
+
+
+def test_canonical_url_ignores_scheme_case_fragment_and_trailing_slash():
+    expected = canonical_room_url('https://live.douyin.com/123')
+    assert canonical_room_url('http://LIVE.douyin.com/123/') == expected
+    assert canonical_room_url(' live.douyin.com/123#top ') == expected
+    assert shard_for('http://LIVE.douyin.com/123/', [0, 1, 2]) == shard_for('https://live.douyin.com/123', [0, 1, 2])
+
+
+def test_assignment_does_not_depend_on_member_order():
+    assert owners([0, 1, 2, 3]) == owners([3, 1, 0, 2])
+
+
+def test_rooms_spread_over_all_shards():
+    counts = {}
+    for shard in owners([0, 1, 2, 3]).values():
+        counts[shard] = counts.get(shard, 0) + 1
+    assert sorted(counts) == [0, 1, 2, 3]
+    assert min(counts.values()) > len(ROOMS) / 4 * 0.8
+
+
+def test_only_rooms_of_a_leaving_shard_move():
+    before = owners([0, 1, 2, 3])
+    after = owners([0, 1, 3])
+    for url, shard in before.items():
+        if shard != 2:
+            assert after[url] == shard
+        else:
+            assert after[url] in (0, 1, 3)
+
+
+def test_a_joining_shard_only_takes_rooms():
+    before = owners([0, 1, 2])
+    after = owners([0, 1, 2, 3])
+    moved = [url for url in ROOMS if before[url] != after[url]]
+    assert moved
+    assert all(after[url] == 3 for url in moved)
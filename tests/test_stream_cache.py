@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import time
+import pytest
+from src.stream_cache import StreamCache, parse_timestamp, url_expiry
+
+NOW = 1_700_000_000.0
+
+
+@pytest.mark.parametrize('url, expiry', [
+    (f'https://pull.example.com/live/1.flv?expires={int(NOW) + 300}&sign=x', NOW + 300),
+    (f'https://pull.example.com/live/1.flv?wsSecret=x&wsTime={int(NOW) + 600:x}', NOW + 600),
+    (f'https://pull.example.com/live/1.flv?txSecret=x&txTime={int(NOW) + 600:X}', NOW + 600),
+    (f'https://pull.example.com/live/1.flv?deadline={int(NOW + 120) * 1000}', NOW + 120),
+    (f'https://pull.example.com/live/1.m3u8?hdnts=st={int(NOW)}~exp={int(NOW) + 900}~acl=/*', NOW + 900),
+    (f'https://pull.example.com/live/1.flv?auth_key={int(NOW) + 60}-0-0-abcdef', NOW + 60),
+    (f'https://pull.example.com/expire/{int(NOW) + 45}/live/1.flv', NOW + 45),
+])
+def test_url_expiry_reads_common_cdn_signatures(url, expiry):
+    assert url_expiry(url, NOW) == expiry
+
+
+def test_url_expiry_takes_the_earliest_of_several():
+    url = f'https://pull.example.com/expire/{int(NOW) + 500}/1.flv?expire={int(NOW) + 200}&e={int(NOW) + 300}'
+    assert url_expiry(url, NOW) == NOW + 200
+
+
+def test_url_expiry_ignores_values_that_are_not_times():
+    assert url_expiry('https://pull.example.com/live/1.flv?expire=3600&e=abc', NOW) is None
+    assert url_expiry('https://pull.example.com/live/1.flv', NOW) is None
+    assert parse_timestamp(str(int(NOW) + 30 * 86400), now=NOW) is None
+    assert parse_timestamp(str(int(NOW) - 2 * 86400), now=NOW) is None
+
+
+def test_ttl_is_the_earliest_expiry_minus_the_margin():
+    cache = StreamCache(default_ttl=60, max_ttl=600, margin=10)
+    port_info = {
+        'record_url': f'https://a.example.com/1.flv?expires={int(NOW) + 300}',
+        'flv_url': f'https://a.example.com/1.flv?expires={int(NOW) + 200}',
+        'm3u8_url': None,
+    }
+    assert cache.ttl_for(port_info, NOW) == 190
+
+
+def test_ttl_is_capped_and_falls_back_to_the_default():
+    cache = StreamCache(default_ttl=60, max_ttl=600, margin=10)
+    far = {'record_url': f'https://a.example.com/1.flv?expires={int(NOW) + 86400}'}
+    assert cache.ttl_for(far, NOW) == 600
+    assert cache.ttl_for({'record_url': 'https://a.example.com/1.flv'}, NOW) == 60
+
+
+def test_urls_about_to_expire_are_not_cached():
+    cache = StreamCache(margin=10)
+    now = int(time.time())
+    cache.put('room', 'OD', {'record_url': f'https://a.example.com/1.flv?expires={now + 5}'}, 'stale')
+    assert cache.get('room', 'OD') is None
+    cache.put('room', 'OD', {'record_url': f'https://a.example.com/1.flv?expires={now + 300}'}, 'fresh')
+    assert cache.get('room', 'OD') == 'fresh'
+
+
+def test_a_zero_default_ttl_disables_the_cache():
+    cache = StreamCache(default_ttl=0)
+    cache.put('room', 'OD', {'record_url': f'https://a.example.com/1.flv?expires={int(time.time()) + 300}'}, 'x')
+    assert cache.get('room', 'OD') is None
+
+
+def test_entries_are_only_handed_out_after_a_reconnect_request():
+    cache = StreamCache()
+    cache.put('room', 'OD', {}, 'info')
+    assert cache.take_reconnect('room', 'OD') is None
+    assert cache.request_reconnect('room', duration=120)
+    assert cache.take_reconnect('room', 'OD') == 'info'
+    assert cache.take_reconnect('room', 'OD') is None
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_repeated_quick_failures_drop_the_entry():
+    cache = StreamCache()
+    cache.put('room', 'OD', {}, 'info')
+    assert all(cache.request_reconnect('room', duration=1) for _ in range(3))
+    assert not cache.request_reconnect('room', duration=1)
+    assert cache.get('room', 'OD') is None